@@ -0,0 +1,54 @@
+"""
+Dependencias compartidas por los routers de la API v1
+Autenticación: un solo get_current_user para todos los routers
+"""
+
+from fastapi import Depends
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+
+from core.database_connection import get_database_session
+from services.seguridad.usuario_service import UsuarioService
+from schemas.seguridad.usuario_response import UsuarioResponse
+
+# Configurar seguridad
+security = HTTPBearer()
+
+
+def get_usuario_service(
+    db: Session = Depends(get_database_session)
+) -> UsuarioService:
+    """
+    Dependency para obtener el servicio de usuario
+
+    Args:
+        db (Session): Sesión de base de datos
+
+    Returns:
+        UsuarioService: Instancia del servicio
+    """
+    return UsuarioService(db)
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    usuario_service: UsuarioService = Depends(get_usuario_service)
+) -> UsuarioResponse:
+    """
+    Dependency para obtener el usuario actual desde el token JWT
+
+    El usuario (con roles y estatus) se toma del cache de usuarios autenticados
+    por (id_usuario, jti); solo se consulta la BD al expirar o invalidarse la entrada.
+    La sesión de BD se abre de forma perezosa, sin conexión si hay acierto en cache.
+
+    Args:
+        credentials (HTTPAuthorizationCredentials): Credenciales del token
+        usuario_service (UsuarioService): Servicio de usuario
+
+    Returns:
+        UsuarioResponse: Usuario actual
+
+    Raises:
+        HTTPException: Si el token es inválido
+    """
+    return usuario_service.get_current_user(credentials.credentials)
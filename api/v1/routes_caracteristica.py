@@ -5,57 +5,17 @@ Endpoints para operaciones CRUD de características
 
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from core.database_connection import get_database_session
 from services.hotel.caracteristica_service import CaracteristicaService
-from services.seguridad.usuario_service import UsuarioService
+from api.v1.dependencies import get_current_user
 from schemas.hotel.caracteristica_schemas import CaracteristicaCreate, CaracteristicaUpdate, CaracteristicaResponse
 from schemas.seguridad.usuario_response import UsuarioResponse
 
 # Crear router para características
 router = APIRouter(prefix="/caracteristicas", tags=["Características"])
 
-# Configurar seguridad
-security = HTTPBearer()
-
-
-def get_usuario_service(
-    db: Session = Depends(get_database_session)
-) -> UsuarioService:
-    """
-    Dependency para obtener el servicio de usuario
-    
-    Args:
-        db (Session): Sesión de base de datos
-        
-    Returns:
-        UsuarioService: Instancia del servicio
-    """
-    return UsuarioService(db)
-
-
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    usuario_service: UsuarioService = Depends(get_usuario_service)
-) -> UsuarioResponse:
-    """
-    Dependency para obtener el usuario actual desde el token JWT
-    
-    Args:
-        credentials (HTTPAuthorizationCredentials): Credenciales del token
-        usuario_service (UsuarioService): Servicio de usuario
-        
-    Returns:
-        UsuarioResponse: Usuario actual
-        
-    Raises:
-        HTTPException: Si el token es inválido
-    """
-    return usuario_service.get_current_user(credentials.credentials)
-
-
 @router.post("/", response_model=CaracteristicaResponse, status_code=status.HTTP_201_CREATED)
 async def create_caracteristica(
     caracteristica_data: CaracteristicaCreate,
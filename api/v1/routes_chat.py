@@ -1,9 +1,13 @@
+import json
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional, List
 from sqlalchemy.orm import Session
 from core.database_connection import get_database_session
+from api.v1.dependencies import get_current_user
+from schemas.seguridad.usuario_response import UsuarioResponse
 from services.ai.chat_service import ChatService
 
 router = APIRouter(prefix="/chat", tags=["Chat IA"])
@@ -12,32 +16,29 @@ chat_service = ChatService()
 
 class ChatMessage(BaseModel):
     message: str
-    user_id: Optional[str] = None  # Opcional, se puede obtener del token
+    user_id: Optional[str] = None  # Obsoleto: el historial se asocia al usuario del token
 
 class ChatResponse(BaseModel):
     response: str
     timestamp: str
     sources: List[str] = []  # Archivos de documentación usados
 
+def _chat_user_id(current_user: UsuarioResponse) -> str:
+    """Clave del historial de conversación: id del usuario autenticado"""
+    return f"user_{current_user.id_usuario}"
+
 @router.post("/", response_model=ChatResponse)
 def enviar_mensaje(
     data: ChatMessage,
     db: Session = Depends(get_database_session),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    current_user: UsuarioResponse = Depends(get_current_user)
 ):
     """
     Envía un mensaje al asistente de IA y recibe una respuesta.
     Mantiene el contexto de la conversación por usuario.
     """
     try:
-        # Obtener user_id del token (puedes extraerlo del JWT)
-        # Por ahora usamos un ID simple, pero puedes mejorarlo
-        token = credentials.credentials
-        
-        # TODO: Extraer user_id del token JWT
-        # Por ahora usamos el token como identificador temporal
-        user_id = data.user_id or f"user_{token[:10]}"
-        
+        user_id = _chat_user_id(current_user)
         resultado = chat_service.chat(user_id, data.message)
         
         return ChatResponse(
@@ -49,18 +50,40 @@ def enviar_mensaje(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en el chat: {str(e)}")
 
+@router.post("/stream")
+async def enviar_mensaje_stream(
+    data: ChatMessage,
+    current_user: UsuarioResponse = Depends(get_current_user)
+):
+    """
+    Envía un mensaje al asistente y recibe la respuesta en streaming (Server-Sent Events).
+    
+    Eventos: `sources` (archivos de documentación usados), `token` (fragmento de la
+    respuesta), `done` (respuesta completa, igual que POST /chat/) o `error`.
+    Si el cliente cierra la conexión se cancela la generación.
+    """
+    user_id = _chat_user_id(current_user)
+    
+    async def eventos():
+        async for evento, datos in chat_service.chat_stream(user_id, data.message):
+            yield f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/limpiar")
 def limpiar_conversacion(
     db: Session = Depends(get_database_session),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    current_user: UsuarioResponse = Depends(get_current_user)
 ):
     """
     Limpia el historial de conversación del usuario actual.
     """
     try:
-        token = credentials.credentials
-        user_id = f"user_{token[:10]}"
-        chat_service.limpiar_historial(user_id)
+        chat_service.limpiar_historial(_chat_user_id(current_user))
         return {"message": "Historial limpiado correctamente"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al limpiar historial: {str(e)}")
@@ -83,3 +106,12 @@ def recargar_documentacion(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al recargar documentación: {str(e)}")
 
+
+@router.get("/stats")
+def obtener_estadisticas(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """
+    Métricas del asistente: aciertos del caché de respuestas e historiales en memoria.
+    """
+    return chat_service.stats()
@@ -6,12 +6,11 @@ Incluye validación de RFC único
 
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from core.database_connection import get_database_session
 from services.cliente.cliente_service import ClienteService
-from services.seguridad.usuario_service import UsuarioService
+from api.v1.dependencies import get_current_user
 from schemas.cliente.cliente_create import ClienteCreate
 from schemas.cliente.cliente_update import ClienteUpdate
 from schemas.cliente.cliente_response import ClienteResponse
@@ -28,45 +27,6 @@ router = APIRouter(
     }
 )
 
-# Configurar seguridad
-security = HTTPBearer()
-
-
-def get_usuario_service(
-    db: Session = Depends(get_database_session)
-) -> UsuarioService:
-    """
-    Dependency para obtener el servicio de usuario
-    
-    Args:
-        db (Session): Sesión de base de datos
-        
-    Returns:
-        UsuarioService: Instancia del servicio
-    """
-    return UsuarioService(db)
-
-
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    usuario_service: UsuarioService = Depends(get_usuario_service)
-) -> UsuarioResponse:
-    """
-    Dependency para obtener el usuario actual desde el token JWT
-    
-    Args:
-        credentials (HTTPAuthorizationCredentials): Credenciales del token
-        usuario_service (UsuarioService): Servicio de usuario
-        
-    Returns:
-        UsuarioResponse: Usuario actual
-        
-    Raises:
-        HTTPException: Si el token es inválido
-    """
-    return usuario_service.get_current_user(credentials.credentials)
-
-
 @router.post("/publico", response_model=ClienteResponse, status_code=status.HTTP_201_CREATED)
 async def create_cliente_publico(
     cliente_data: ClienteCreate,
@@ -7,10 +7,13 @@ from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import Dict, Any, List, Optional
 
 from services.email.email_service import EmailService
+from services.email.smtp_pool import get_smtp_pool_stats
+from services.email.email_outbox import get_email_outbox_stats
 from schemas.email.email_basic_schemas import EmailSendBasic, EmailResponseBasic
 from schemas.email.email_schemas import EmailLogResponse
 from dao.email.dao_email_log import EmailLogDAO
 from core.database_connection import get_database_session
+from core.executor import run_blocking
 
 # Crear router
 router = APIRouter(
@@ -81,6 +84,40 @@ async def send_email(email_data: EmailSendBasic) -> EmailResponseBasic:
         )
 
 
+@router.post(
+    "/send-many",
+    response_model=List[EmailResponseBasic],
+    status_code=status.HTTP_200_OK,
+    summary="Enviar Lote de Emails",
+    description="Encola varios emails en el outbox y retorna el log_id de cada uno (sin outbox los envía reutilizando las conexiones del pool SMTP). Retorna un resultado por email."
+)
+async def send_many_emails(emails: List[EmailSendBasic]) -> List[EmailResponseBasic]:
+    """
+    Encola (o envía) un lote de emails; cada email queda registrado en su log
+    
+    Args:
+        emails (List[EmailSendBasic]): Emails a enviar
+        
+    Returns:
+        List[EmailResponseBasic]: Resultado por email, en el mismo orden
+        
+    Raises:
+        HTTPException: Si hay error en el procesamiento
+    """
+    try:
+        email_service = EmailService()
+        return await email_service.send_many(emails)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "message": "Error al procesar el lote de emails",
+                "error": str(e)
+            }
+        )
+
+
 @router.post(
     "/send-welcome",
     response_model=EmailResponseBasic,
@@ -263,7 +300,7 @@ async def test_smtp_connection() -> Dict[str, Any]:
     """
     try:
         email_service = EmailService()
-        result = email_service.test_connection()
+        result = await run_blocking(email_service.test_connection)
         
         if not result["success"]:
             raise HTTPException(
@@ -316,24 +353,27 @@ async def get_email_logs(
         HTTPException: Si hay error al obtener los logs
     """
     try:
-        email_dao = EmailLogDAO(db)
-        
-        if email:
-            logs = email_dao.get_by_email(email, skip, limit)
-        else:
-            # Obtener logs recientes - usar query directo
-            from models.email.email_log_model import EmailLog
-            logs = db.query(EmailLog).filter(
-                EmailLog.estatus_id == 1
-            ).order_by(
-                EmailLog.fecha_creacion.desc()
-            ).offset(skip).limit(limit).all()
-        
-        # Filtrar por estado si se proporciona
-        if estado:
-            logs = [log for log in logs if log.estado_envio == estado]
-        
-        return logs
+        def _consultar_logs():
+            email_dao = EmailLogDAO(db)
+            
+            if email:
+                logs = email_dao.get_by_email(email, skip, limit)
+            else:
+                # Obtener logs recientes - usar query directo
+                from models.email.email_log_model import EmailLog
+                logs = db.query(EmailLog).filter(
+                    EmailLog.estatus_id == 1
+                ).order_by(
+                    EmailLog.fecha_creacion.desc()
+                ).offset(skip).limit(limit).all()
+            
+            # Filtrar por estado si se proporciona
+            if estado:
+                logs = [log for log in logs if log.estado_envio == estado]
+            
+            return [EmailLogResponse.model_validate(log) for log in logs]
+        
+        return await run_blocking(_consultar_logs)
         
     except Exception as e:
         raise HTTPException(
@@ -345,6 +385,34 @@ async def get_email_logs(
         )
 
 
+@router.get(
+    "/smtp-pool/stats",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Estadísticas del Pool SMTP",
+    description="Conexiones abiertas, reutilizadas y reconectadas, y mensajes enviados por el pool SMTP"
+)
+async def smtp_pool_stats() -> Dict[str, Any]:
+    """
+    Retorna las métricas del pool de conexiones SMTP de este proceso
+    """
+    return get_smtp_pool_stats()
+
+
+@router.get(
+    "/outbox/stats",
+    response_model=Dict[str, Any],
+    status_code=status.HTTP_200_OK,
+    summary="Estadísticas del Outbox de Email",
+    description="Emails encolados, reclamados, enviados, fallidos, reintentados y logs depurados por los workers de este proceso"
+)
+async def email_outbox_stats() -> Dict[str, Any]:
+    """
+    Retorna las métricas del outbox de emails de este proceso
+    """
+    return get_email_outbox_stats()
+
+
 @router.get(
     "/logs/stats",
     response_model=Dict[str, Any],
@@ -370,7 +438,7 @@ async def get_email_stats(
     """
     try:
         email_dao = EmailLogDAO(db)
-        stats = email_dao.get_stats_by_period(days)
+        stats = await run_blocking(email_dao.get_stats_by_period, days)
         return stats
         
     except Exception as e:
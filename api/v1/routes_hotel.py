@@ -1,8 +1,10 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import List
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from core.config import Settings
-from core.database_connection import get_database_session
+from core.database_connection import get_database_session, get_async_database_session
+from core.executor import run_blocking
 from schemas.hotel import HotelCreate, HotelUpdate, HotelResponse
 from services.hotel.hotel_service import HotelService
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -31,11 +33,24 @@ def get_hotel_service(db: Session = Depends(get_database_session)) -> HotelServi
     return HotelService(db)
 
 
+def get_hotel_async_service(async_db: AsyncSession = Depends(get_async_database_session)) -> HotelService:
+    """
+    Dependency para obtener el servicio de hotel solo con sesión async (lecturas sin hilo por query)
+    
+    Args:
+        async_db (AsyncSession): Sesión async de base de datos (inyectada por FastAPI)
+        
+    Returns:
+        HotelService: Instancia del servicio de hotel (solo métodos *_async)
+    """
+    return HotelService(async_db_session=async_db)
+
+
 @api_router.get("/", response_model=List[HotelResponse])
 async def get_hotels(
     skip: int = Query(0, ge=0, description="Número de registros a saltar"),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros"),
-    service: HotelService = Depends(get_hotel_service),
+    service: HotelService = Depends(get_hotel_async_service),
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ):
     """
@@ -53,7 +68,7 @@ async def get_hotels(
         HTTPException: 500 si hay un error en el servidor
     """
     try:
-        hoteles = service.obtener_todos_los_hoteles(skip=skip, limit=limit)
+        hoteles = await service.obtener_todos_los_hoteles_async(skip=skip, limit=limit)
         return hoteles
     except Exception as e:
         raise HTTPException(
@@ -83,7 +98,7 @@ async def get_hotel(
         HTTPException: 500 si hay un error en el servidor
     """
     try:
-        hotel = service.obtener_hotel_por_id(hotel_id)
+        hotel = await run_blocking(service.obtener_hotel_por_id, hotel_id)
         
         if not hotel:
             raise HTTPException(
@@ -122,7 +137,7 @@ async def create_hotel(
         HTTPException: 500 si hay un error en el servidor
     """
     try:
-        hotel_creado = service.crear_hotel(hotel)
+        hotel_creado = await run_blocking(service.crear_hotel, hotel)
         return hotel_creado
     except ValueError as e:
         raise HTTPException(
@@ -160,7 +175,7 @@ async def update_hotel(
         HTTPException: 500 si hay un error en el servidor
     """
     try:
-        hotel_actualizado = service.actualizar_hotel(hotel_id, hotel_update)
+        hotel_actualizado = await run_blocking(service.actualizar_hotel, hotel_id, hotel_update)
         
         if not hotel_actualizado:
             raise HTTPException(
@@ -201,7 +216,7 @@ async def delete_hotel(
         HTTPException: 500 si hay un error en el servidor
     """
     try:
-        eliminado = service.eliminar_hotel(hotel_id)
+        eliminado = await run_blocking(service.eliminar_hotel, hotel_id)
         
         if not eliminado:
             raise HTTPException(
@@ -238,7 +253,7 @@ async def buscar_por_nombre(
         List[HotelResponse]: Lista de hoteles encontrados
     """
     try:
-        hoteles = service.buscar_por_nombre(nombre)
+        hoteles = await run_blocking(service.buscar_por_nombre, nombre)
         return hoteles
     except Exception as e:
         raise HTTPException(
@@ -264,7 +279,7 @@ async def obtener_por_pais(
         List[HotelResponse]: Lista de hoteles del país
     """
     try:
-        hoteles = service.obtener_por_pais(id_pais)
+        hoteles = await run_blocking(service.obtener_por_pais, id_pais)
         return hoteles
     except Exception as e:
         raise HTTPException(
@@ -290,7 +305,7 @@ async def obtener_por_estrellas(
         List[HotelResponse]: Lista de hoteles
     """
     try:
-        hoteles = service.obtener_por_estrellas(numero_estrellas)
+        hoteles = await run_blocking(service.obtener_por_estrellas, numero_estrellas)
         return hoteles
     except ValueError as e:
         raise HTTPException(
@@ -17,6 +17,7 @@ from schemas.storage import (
 )
 from sqlalchemy.orm import Session
 from core.database_connection import get_database_session
+from core.executor import run_blocking
 from services.hotel.hotel_service import HotelService
 from utils.rutas_imagenes import RutasImagenes
 
@@ -84,7 +85,7 @@ async def update_foto_perfil_hotel(
     Requiere autenticación.
     """
     # Verificar que el hotel existe
-    hotel = hotel_service.dao.get_by_id(id_hotel)
+    hotel = await run_blocking(hotel_service.dao.get_by_id, id_hotel)
     if not hotel:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -110,7 +111,8 @@ async def update_foto_perfil_hotel(
         content_type = file.content_type
         
         # Subir la foto de perfil
-        result = hotel_storage_service.upload_foto_perfil(
+        result = await run_blocking(
+            hotel_storage_service.upload_foto_perfil,
             id_hotel=id_hotel,
             file_bytes=file_bytes,
             file_extension=file_extension,
@@ -124,7 +126,8 @@ async def update_foto_perfil_hotel(
             )
         
         # Actualizar la ruta en la base de datos (solo guardamos la ruta relativa)
-        hotel_service.actualizar_url_foto_perfil(
+        await run_blocking(
+            hotel_service.actualizar_url_foto_perfil,
             id_hotel=id_hotel,
             ruta_storage=result["path"]
         )
@@ -169,7 +172,7 @@ async def delete_foto_perfil_hotel(
     Requiere autenticación.
     """
     # Verificar que el hotel existe
-    hotel = hotel_service.dao.get_by_id(id_hotel)
+    hotel = await run_blocking(hotel_service.dao.get_by_id, id_hotel)
     if not hotel:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -177,11 +180,12 @@ async def delete_foto_perfil_hotel(
         )
     
     # Eliminar foto de perfil si existe
-    hotel_storage_service.delete_foto_perfil(id_hotel)
+    await run_blocking(hotel_storage_service.delete_foto_perfil, id_hotel)
     
     # Restaurar foto por defecto en la base de datos
     ruta_default = rutas_imagenes.get_ruta_default_hotel(id_hotel)
-    hotel_service.actualizar_url_foto_perfil(
+    await run_blocking(
+        hotel_service.actualizar_url_foto_perfil,
         id_hotel=id_hotel,
         ruta_storage=ruta_default
     )
@@ -220,7 +224,7 @@ async def upload_galeria_hotel(
     Requiere autenticación.
     """
     # Verificar que el hotel existe
-    hotel = hotel_service.dao.get_by_id(id_hotel)
+    hotel = await run_blocking(hotel_service.dao.get_by_id, id_hotel)
     if not hotel:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -246,7 +250,8 @@ async def upload_galeria_hotel(
         content_type = file.content_type
         
         # Subir la imagen a la galería (el nombre se genera automáticamente)
-        result = hotel_storage_service.upload_galeria(
+        result = await run_blocking(
+            hotel_storage_service.upload_galeria,
             id_hotel=id_hotel,
             file_bytes=file_bytes,
             file_extension=file_extension,
@@ -298,7 +303,7 @@ async def list_galeria_hotel(
     Requiere autenticación.
     """
     # Verificar que el hotel existe
-    hotel = hotel_service.dao.get_by_id(id_hotel)
+    hotel = await run_blocking(hotel_service.dao.get_by_id, id_hotel)
     if not hotel:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -306,7 +311,7 @@ async def list_galeria_hotel(
         )
     
     # Listar imágenes de la galería
-    result = hotel_storage_service.list_galeria(id_hotel)
+    result = await run_blocking(hotel_storage_service.list_galeria, id_hotel)
     
     if not result.get("success"):
         raise HTTPException(
@@ -348,7 +353,7 @@ async def delete_galeria_hotel(
     Requiere autenticación.
     """
     # Verificar que el hotel existe
-    hotel = hotel_service.dao.get_by_id(id_hotel)
+    hotel = await run_blocking(hotel_service.dao.get_by_id, id_hotel)
     if not hotel:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -356,7 +361,7 @@ async def delete_galeria_hotel(
         )
     
     # Eliminar imagen de la galería
-    result = hotel_storage_service.delete_galeria(id_hotel, nombre_archivo)
+    result = await run_blocking(hotel_storage_service.delete_galeria, id_hotel, nombre_archivo)
     
     if not result.get("success"):
         raise HTTPException(
@@ -9,13 +9,14 @@ from fastapi.responses import JSONResponse
 from typing import Optional
 import os
 
-from services.storage import SupabaseImageStorageService
+from services.storage import SupabaseImageStorageService, get_galeria_cache_stats
 from schemas.storage import ImageUploadResponse
-from api.v1.routes_usuario import get_current_user
+from api.v1.dependencies import get_current_user
 from schemas.seguridad.usuario_response import UsuarioResponse
 from utils.rutas_imagenes import RutasImagenes
 from sqlalchemy.orm import Session
 from core.database_connection import get_database_session
+from core.executor import run_blocking
 from services.seguridad.usuario_service import UsuarioService
 
 # Configurar router
@@ -113,7 +114,8 @@ async def update_foto_perfil(
         content_type = file.content_type
         
         # Subir la imagen (usar upsert=True para sobrescribir si ya existe)
-        result = image_service.upload_image(
+        result = await run_blocking(
+            image_service.upload_image,
             file_path=file_path,
             file_bytes=file_bytes,
             content_type=content_type,
@@ -127,7 +129,8 @@ async def update_foto_perfil(
             )
         
         # Actualizar la ruta en la base de datos (solo guardamos la ruta relativa)
-        usuario_service.actualizar_url_foto_perfil(
+        await run_blocking(
+            usuario_service.actualizar_url_foto_perfil,
             id_usuario=id_usuario,
             url_publica=None,  # No se usa, solo guardamos la ruta relativa
             ruta_storage=file_path
@@ -200,7 +203,8 @@ async def upload_imagen(
         content_type = file.content_type
         
         # Subir la imagen
-        result = image_service.upload_image(
+        result = await run_blocking(
+            image_service.upload_image,
             file_path=file_path,
             file_bytes=file_bytes,
             content_type=content_type,
@@ -268,7 +272,7 @@ async def delete_foto_perfil(
     
     for ext in extensions:
         file_path = f"{ruta_base}{ext}"
-        result = image_service.delete(file_path)
+        result = await run_blocking(image_service.delete, file_path)
         
         if result.get("success"):
             deleted = True
@@ -276,7 +280,8 @@ async def delete_foto_perfil(
     
     # Restaurar foto por defecto en la base de datos (siempre, incluso si no había imagen)
     ruta_default = "usuarios/perfil/default.jpg"
-    usuario_service.actualizar_url_foto_perfil(
+    await run_blocking(
+        usuario_service.actualizar_url_foto_perfil,
         id_usuario=id_usuario,
         url_publica=None,  # No se usa, solo guardamos la ruta
         ruta_storage=ruta_default
@@ -291,3 +296,14 @@ async def delete_foto_perfil(
         }
     )
 
+
+@router.get("/galeria-cache/stats", summary="Métricas del cache de listados de galería")
+def get_galeria_cache_stats_endpoint(
+    current_user: UsuarioResponse = Depends(get_current_user)
+):
+    """
+    Métricas del cache de listados de carpetas de galería
+    
+    Incluye entradas, capacidad, TTL, hits, misses, desalojos y tasa de aciertos.
+    """
+    return get_galeria_cache_stats()
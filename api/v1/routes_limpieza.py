@@ -7,7 +7,7 @@ from typing import List
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import datetime
 from pydantic import BaseModel
-from api.v1.routes_usuario import get_current_user
+from api.v1.dependencies import get_current_user
 from schemas.seguridad.usuario_response import UsuarioResponse
 
 router = APIRouter(prefix="/limpiezas", tags=["Limpiezas"])
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from core.database_connection import get_database_session
 from services.mensajeria.conversacion_service import ConversacionService
 from services.mensajeria.mensaje_service import MensajeService
+from services.mensajeria.websocket_manager import websocket_manager
 from schemas.mensajeria.conversacion_schema import (
     ConversacionCreateClienteAdmin,
     ConversacionCreateEmpleadoEmpleado,
@@ -16,8 +17,8 @@ from schemas.mensajeria.conversacion_schema import (
     ConversacionListResponse,
     UsuarioDisponibleResponse
 )
-from schemas.mensajeria.mensaje_schema import MensajeCreate, MensajeResponse
-from api.v1.routes_usuario import get_current_user
+from schemas.mensajeria.mensaje_schema import MensajeCreate, MensajeResponse, ContadorNoLeidosResponse
+from api.v1.dependencies import get_current_user
 from schemas.seguridad.usuario_response import UsuarioResponse
 
 router = APIRouter(
@@ -44,24 +45,26 @@ def get_mensaje_service(db: Session = Depends(get_database_session)) -> MensajeS
 def listar_conversaciones(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Campo `cursor` de la última conversación recibida"),
     current_user: UsuarioResponse = Depends(get_current_user),
     conversacion_service: ConversacionService = Depends(get_conversacion_service)
 ):
     """
-    Lista todas las conversaciones del usuario actual
+    Lista todas las conversaciones del usuario actual (inbox)
     
-    - **skip**: Número de conversaciones a saltar (paginación)
+    - **cursor**: Paginación keyset; enviar el `cursor` de la última conversación de la página anterior
+    - **skip**: Número de conversaciones a saltar (compatibilidad; se ignora si se envía cursor)
     - **limit**: Número máximo de conversaciones a retornar
     """
     try:
-        print(f"🔵 API: Obteniendo conversaciones para usuario_id={current_user.id_usuario}, skip={skip}, limit={limit}")
-        resultado = conversacion_service.obtener_conversaciones_usuario(
+        return conversacion_service.obtener_conversaciones_usuario(
             usuario_id=current_user.id_usuario,
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor
         )
-        print(f"🔵 API: Retornando {len(resultado)} conversaciones")
-        return resultado
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ API: Error obteniendo conversaciones: {e}")
         print(f"❌ API: Tipo de error: {type(e)}")
@@ -116,6 +119,36 @@ def buscar_usuarios_disponibles(
         )
 
 
+@router.get("/conversaciones/no-leidos", response_model=ContadorNoLeidosResponse)
+def obtener_contador_no_leidos(
+    detalle: bool = Query(False, description="Incluir el contador de cada conversación"),
+    current_user: UsuarioResponse = Depends(get_current_user),
+    mensaje_service: MensajeService = Depends(get_mensaje_service)
+):
+    """
+    Obtiene el contador de mensajes no leídos del usuario actual
+    
+    Lee los contadores desnormalizados (una fila por PK); los cambios también se
+    envían por WebSocket como eventos `no_leidos`.
+    
+    - **detalle**: Incluir las conversaciones con mensajes no leídos
+    """
+    return mensaje_service.obtener_contadores_no_leidos(current_user.id_usuario, detalle=detalle)
+
+
+@router.get("/websocket/stats", summary="Métricas de las conexiones WebSocket")
+def obtener_websocket_stats(
+    current_user: UsuarioResponse = Depends(get_current_user)
+):
+    """
+    Métricas de las conexiones WebSocket de este worker
+    
+    Incluye sockets conectados, profundidad de las colas de salida, mensajes encolados,
+    enviados y descartados, desconexiones por consumidor lento y el estado del broker.
+    """
+    return websocket_manager.stats()
+
+
 @router.get("/conversaciones/{conversacion_id}", response_model=ConversacionResponse)
 def obtener_conversacion(
     conversacion_id: int,
@@ -171,18 +204,6 @@ def crear_conversacion_empleado_empleado(
     )
 
 
-@router.get("/conversaciones/no-leidos")
-def obtener_contador_no_leidos(
-    current_user: UsuarioResponse = Depends(get_current_user),
-    mensaje_service: MensajeService = Depends(get_mensaje_service)
-):
-    """
-    Obtiene el contador de mensajes no leídos del usuario actual
-    """
-    contador = mensaje_service.obtener_contador_no_leidos(current_user.id_usuario)
-    return {"contador_no_leidos": contador}
-
-
 # =============================================================================
 # ENDPOINTS DE MENSAJES
 # =============================================================================
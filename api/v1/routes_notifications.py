@@ -3,14 +3,14 @@ Rutas API para gestión de tokens de dispositivos y notificaciones push
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from core.database_connection import get_database_session
-from services.seguridad.usuario_service import UsuarioService
+from api.v1.dependencies import get_current_user
 from schemas.seguridad.usuario_response import UsuarioResponse
 from schemas.notifications.device_token_schemas import DeviceTokenRequest, DeviceTokenResponse
 from dao.seguridad.dao_device_token import DeviceTokenDAO
+from services.notifications.notification_dispatcher import notification_dispatcher
 
 # Configurar router
 router = APIRouter(
@@ -19,45 +19,6 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Configurar seguridad
-security = HTTPBearer()
-
-
-def get_usuario_service(
-    db: Session = Depends(get_database_session)
-) -> UsuarioService:
-    """
-    Dependency para obtener el servicio de usuario
-    
-    Args:
-        db (Session): Sesión de base de datos
-        
-    Returns:
-        UsuarioService: Instancia del servicio
-    """
-    return UsuarioService(db)
-
-
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    usuario_service: UsuarioService = Depends(get_usuario_service)
-) -> UsuarioResponse:
-    """
-    Dependency para obtener el usuario actual desde el token JWT
-    
-    Args:
-        credentials (HTTPAuthorizationCredentials): Credenciales del token
-        usuario_service (UsuarioService): Servicio de usuario
-        
-    Returns:
-        UsuarioResponse: Usuario actual
-        
-    Raises:
-        HTTPException: Si el token es inválido
-    """
-    return usuario_service.get_current_user(credentials.credentials)
-
-
 @router.post("/register-token", response_model=DeviceTokenResponse, summary="Registrar token de dispositivo")
 async def register_device_token(
     request: DeviceTokenRequest,
@@ -124,3 +85,16 @@ async def unregister_device_token(
             detail=f"Error al desregistrar tokens: {str(e)}"
         )
 
+
+
+@router.get("/dispatcher/stats", summary="Métricas del despachador de notificaciones")
+def get_dispatcher_stats(
+    current_user: UsuarioResponse = Depends(get_current_user)
+):
+    """
+    Métricas del despachador de notificaciones push
+    
+    Incluye profundidad de la cola, trabajos en curso y contadores de
+    eventos encolados, agrupados, enviados, reintentados y fallidos.
+    """
+    return notification_dispatcher.stats()
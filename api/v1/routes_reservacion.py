@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from sqlalchemy.orm import Session
 from core.database_connection import get_database_session
 from services.reserva.reservacion_service import ReservacionService
-from schemas.reserva.reservacion_schema import ReservacionCreate, ReservacionUpdate, ReservacionResponse, HabitacionReservadaResponse
+from services.reserva.cotizacion_pipeline import cotizacion_pipeline
+from schemas.reserva.reservacion_schema import ReservacionCreate, ReservacionUpdate, ReservacionResponse, HabitacionReservadaResponse, CotizacionEstadoResponse, CotizacionLoteRequest
 from schemas.reserva.tipo_habitacion_disponible_schema import TipoHabitacionDisponibleResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import List, Optional
@@ -79,6 +80,29 @@ def obtener_por_fechas(
 def crear_reservacion(reservacion: ReservacionCreate, db: Session = Depends(get_database_session),credentials: HTTPAuthorizationCredentials = Depends(security)):
     return service.crear_reservacion(db, reservacion)
 
+@router.get("/cotizacion/{id_reservacion}", response_model=CotizacionEstadoResponse)
+def obtener_estado_cotizacion(id_reservacion: int, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    Estado del envío de cotización (PDF + email) y notificación push de una reservación
+    
+    El trabajo se ejecuta en segundo plano después de crear la reservación.
+    El estado se conserva en memoria del proceso que atendió la creación.
+    """
+    estado = cotizacion_pipeline.obtener_estado(id_reservacion)
+    if not estado:
+        raise HTTPException(status_code=404, detail="No hay trabajo de cotización registrado para la reservación")
+    return estado
+
+@router.post("/cotizacion/lote", response_model=List[CotizacionEstadoResponse])
+def enviar_cotizaciones_lote(data: CotizacionLoteRequest, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    Envía (o reenvía) las cotizaciones de varias reservaciones de un grupo o evento
+    
+    Los PDFs se generan juntos en el pool de procesos y cada envío se procesa en segundo
+    plano como el de una reservación nueva; el estado se consulta por reservación.
+    """
+    return cotizacion_pipeline.encolar_lote(data.ids_reservacion)
+
 @router.put("/{id_reservacion}", response_model=ReservacionResponse)
 def actualizar_reservacion(id_reservacion: int, reservacion: ReservacionUpdate, db: Session = Depends(get_database_session),credentials: HTTPAuthorizationCredentials = Depends(security)):
     reservacion_actualizada = service.actualizar_reservacion(db, id_reservacion, reservacion)
@@ -128,6 +152,8 @@ def obtener_tipos_habitacion_disponibles(
 @router.get("/{fecha_inicio_reservacion}/{fecha_salida}", response_model=List[HabitacionAreaResponse])
 def obtener_habitaciones_disponibles(
         limit: int = Query(100, ge=1, le=1000, description="Número máximo de registros"),
-        fecha_inicio_reservacion: date =  Path(..., example="2025-01-10"), fecha_salida: date =  Path(..., example="2025-01-15"), credentials: HTTPAuthorizationCredentials = Depends(security)):
-    habitaciones = service.obtener_habitaciones_disponibles(fecha_inicio_reservacion, fecha_salida, limit)
+        fecha_inicio_reservacion: date =  Path(..., example="2025-01-10"), fecha_salida: date =  Path(..., example="2025-01-15"),
+        id_hotel: Optional[int] = Query(None, description="ID del hotel para filtrar"),
+        credentials: HTTPAuthorizationCredentials = Depends(security)):
+    habitaciones = service.obtener_habitaciones_disponibles(fecha_inicio_reservacion, fecha_salida, limit, id_hotel)
     return habitaciones
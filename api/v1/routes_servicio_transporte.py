@@ -11,7 +11,7 @@ from schemas.reserva.servicios_transporte_schema import (
 )
 from schemas.seguridad.usuario_response import UsuarioResponse
 from services.reserva.servicio_transporte_service import ServicioTransporteService
-from api.v1.routes_usuario import get_current_user
+from api.v1.dependencies import get_current_user
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 security = HTTPBearer()
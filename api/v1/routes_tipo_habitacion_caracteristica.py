@@ -5,12 +5,11 @@ Endpoints para gestionar la relación TipoHabitacion-Caracteristica
 
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from core.database_connection import get_database_session
 from services.hotel.tipo_habitacion_caracteristica_service import TipoHabitacionCaracteristicaService
-from services.seguridad.usuario_service import UsuarioService
+from api.v1.dependencies import get_current_user
 from schemas.hotel.tipo_habitacion_caracteristica_schemas import (
     TipoHabitacionCaracteristicaBulkAssign
 )
@@ -21,45 +20,6 @@ from schemas.seguridad.usuario_response import UsuarioResponse
 # Crear router para asignación de características
 router = APIRouter(prefix="/tipos-habitacion", tags=["Asignación de Características"])
 
-# Configurar seguridad
-security = HTTPBearer()
-
-
-def get_usuario_service(
-    db: Session = Depends(get_database_session)
-) -> UsuarioService:
-    """
-    Dependency para obtener el servicio de usuario
-    
-    Args:
-        db (Session): Sesión de base de datos
-        
-    Returns:
-        UsuarioService: Instancia del servicio
-    """
-    return UsuarioService(db)
-
-
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    usuario_service: UsuarioService = Depends(get_usuario_service)
-) -> UsuarioResponse:
-    """
-    Dependency para obtener el usuario actual desde el token JWT
-    
-    Args:
-        credentials (HTTPAuthorizationCredentials): Credenciales del token
-        usuario_service (UsuarioService): Servicio de usuario
-        
-    Returns:
-        UsuarioResponse: Usuario actual
-        
-    Raises:
-        HTTPException: Si el token es inválido
-    """
-    return usuario_service.get_current_user(credentials.credentials)
-
-
 @router.post("/{tipo_habitacion_id}/caracteristicas/{caracteristica_id}", status_code=status.HTTP_201_CREATED)
 async def assign_caracteristica_to_tipo_habitacion(
     tipo_habitacion_id: int,
@@ -6,12 +6,15 @@ Incluye CRUD completo y autenticación
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 import logging
 
 from core.database_connection import get_database_session
+from core.executor import run_blocking
+from core.password_hasher import get_password_hasher_stats
 from services.seguridad.usuario_service import UsuarioService
+from api.v1.dependencies import security, get_usuario_service, get_current_user
 from schemas.seguridad.usuario_create import UsuarioCreate
 from schemas.seguridad.usuario_update import UsuarioUpdate
 from schemas.seguridad.usuario_response import UsuarioResponse
@@ -37,45 +40,6 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Configurar seguridad
-security = HTTPBearer()
-
-
-def get_usuario_service(
-    db: Session = Depends(get_database_session)
-) -> UsuarioService:
-    """
-    Dependency para obtener el servicio de usuario
-    
-    Args:
-        db (Session): Sesión de base de datos
-        
-    Returns:
-        UsuarioService: Instancia del servicio
-    """
-    return UsuarioService(db)
-
-
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    usuario_service: UsuarioService = Depends(get_usuario_service)
-) -> UsuarioResponse:
-    """
-    Dependency para obtener el usuario actual desde el token JWT
-    
-    Args:
-        credentials (HTTPAuthorizationCredentials): Credenciales del token
-        usuario_service (UsuarioService): Servicio de usuario
-        
-    Returns:
-        UsuarioResponse: Usuario actual
-        
-    Raises:
-        HTTPException: Si el token es inválido
-    """
-    return usuario_service.get_current_user(credentials.credentials)
-
-
 # =============================================================================
 # RUTAS DE AUTENTICACIÓN
 # =============================================================================
@@ -93,7 +57,7 @@ async def login(
     
     Retorna un token JWT válido por 30 minutos.
     """
-    return usuario_service.login(login_data)
+    return await run_blocking(usuario_service.login, login_data)
 
 
 @router.post("/recuperar-password", response_model=RecuperarPasswordResponse, summary="Recuperar contraseña")
@@ -113,7 +77,7 @@ async def recuperar_password(
     
     La contraseña temporal expira en 7 días y debe cambiarse al ingresar al sistema.
     """
-    resultado = usuario_service.recuperar_password(request_data.correo_electronico)
+    resultado = await run_blocking(usuario_service.recuperar_password, request_data.correo_electronico)
     return RecuperarPasswordResponse(
         success=resultado["success"],
         mensaje=resultado["mensaje"],
@@ -144,7 +108,7 @@ async def create_usuario(
     
     La contraseña se encripta automáticamente antes de guardarse.
     """
-    return usuario_service.create_usuario(usuario_data)
+    return await run_blocking(usuario_service.create_usuario, usuario_data)
 
 
 @router.get("/", response_model=List[UsuarioResponse], summary="Listar usuarios")
@@ -175,6 +139,17 @@ async def obtener_usuarios_huerfanos(
     except HTTPException as e:
         raise e
     
+@router.get("/password-hasher/stats", summary="Estadísticas del pool de hashing de contraseñas")
+async def password_hasher_stats(
+    current_user: UsuarioResponse = Depends(get_current_user)
+):
+    """
+    Métricas del pool de procesos de Argon2 de este proceso: operaciones en curso,
+    profundidad de cola, rechazos por saturación, hashes actualizados y latencia
+    """
+    return get_password_hasher_stats()
+
+
 @router.get("/{id_usuario}", response_model=UsuarioResponse, summary="Obtener usuario por ID")
 async def get_usuario(
     id_usuario: int,
@@ -358,7 +333,9 @@ async def registrar_usuario_cliente(
         logger.info(f"Registro cliente - login: '{request_data.login}', correo: '{request_data.correo_electronico}', cliente_id: {request_data.cliente_id}, password presente: {request_data.password is not None}")
         
         usuario_service = UsuarioService(db)
-        return usuario_service.registrar_usuario_cliente(request_data)
+        return await run_blocking(usuario_service.registrar_usuario_cliente, request_data)
+    except HTTPException:
+        raise
     except RequestValidationError as e:
         logger.error(f"Error de validación en registro cliente: {e.errors()}")
         raise
@@ -394,7 +371,9 @@ async def cambiar_password_temporal(
     """
     try:
         usuario_service = UsuarioService(db)
-        return usuario_service.cambiar_password_temporal(request_data)
+        return await run_blocking(usuario_service.cambiar_password_temporal, request_data)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -7,14 +7,14 @@ import json
 import logging
 from typing import Optional
 from fastapi import WebSocket, WebSocketDisconnect, HTTPException, status, Query
-from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 
-from core.database_connection import get_database_session
+from core.database_connection import db_connection
 from core.config import AuthSettings
+from core.executor import run_blocking
+from schemas.mensajeria.mensaje_schema import MensajeResponse
 from services.mensajeria.websocket_manager import WebSocketManager
-from services.mensajeria.mensaje_service import MensajeService
-from services.mensajeria.conversacion_service import ConversacionService
+from services.mensajeria.mensaje_service import MensajeService, mensaje_a_evento
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +42,19 @@ async def verify_token(token: str) -> Optional[dict]:
         return None
 
 
+def _enviar_mensaje(conversacion_id: int, remitente_id: int, contenido: str) -> MensajeResponse:
+    """
+    Guarda un mensaje con una sesión propia (abierta solo durante el envío)
+    Se ejecuta en el pool de hilos para no bloquear el event loop
+    """
+    with db_connection.get_session() as db:
+        return MensajeService(db).enviar_mensaje(
+            conversacion_id=conversacion_id,
+            remitente_id=remitente_id,
+            contenido=contenido
+        )
+
+
 def register_websocket_endpoint(app):
     """
     Registra el endpoint WebSocket en la aplicación FastAPI
@@ -58,6 +71,11 @@ def register_websocket_endpoint(app):
         """
         Endpoint WebSocket para mensajería en tiempo real
         
+        Con WS_HEARTBEAT_INTERVAL > 0 el servidor envía {"type": "ping"} y el cliente
+        debe responder {"type": "pong"}; con WS_IDLE_TIMEOUT > 0 el socket se cierra si
+        el cliente no envía nada en ese tiempo. Ambos están desactivados por defecto
+        hasta que los clientes respondan el heartbeat de aplicación.
+        
         Args:
             websocket (WebSocket): Conexión WebSocket
             usuario_id (int): ID del usuario (debe coincidir con el token)
@@ -79,18 +97,16 @@ def register_websocket_endpoint(app):
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
         
-        # Conectar el WebSocket
-        await websocket_manager.connect(websocket, usuario_id)
+        # Conectar el WebSocket (None si se alcanzó el límite de conexiones del worker)
+        conexion = await websocket_manager.connect(websocket, usuario_id)
+        if conexion is None:
+            return
         
         try:
-            # Obtener sesión de base de datos
-            db = next(get_database_session())
-            mensaje_service = MensajeService(db)
-            conversacion_service = ConversacionService(db)
-            
             while True:
                 # Recibir mensaje del cliente
                 data = await websocket.receive_text()
+                conexion.actividad()
                 
                 try:
                     message_data = json.loads(data)
@@ -102,76 +118,50 @@ def register_websocket_endpoint(app):
                         contenido = message_data.get("contenido")
                         
                         if not conversacion_id or not contenido:
-                            await websocket.send_json({
+                            await websocket_manager.send_to_connection(websocket, usuario_id, {
                                 "type": "error",
                                 "message": "conversacion_id y contenido son requeridos"
                             })
                             continue
                         
-                        # Crear mensaje usando el servicio
-                        mensaje_response = mensaje_service.enviar_mensaje(
-                            conversacion_id=conversacion_id,
-                            remitente_id=usuario_id,
-                            contenido=contenido
+                        # El servicio entrega el mensaje al destinatario (WebSocket o push)
+                        mensaje_response = await run_blocking(
+                            _enviar_mensaje, conversacion_id, usuario_id, contenido
                         )
                         
-                        # Obtener conversación para determinar destinatario
-                        conversacion = conversacion_service.obtener_conversacion_por_id(
-                            conversacion_id, usuario_id
-                        )
-                        destinatario_id = (
-                            conversacion.usuario2_id 
-                            if usuario_id == conversacion.usuario1_id 
-                            else conversacion.usuario1_id
-                        )
-                        
-                        # Enviar mensaje al destinatario si está conectado
-                        await websocket_manager.send_personal_message({
-                            "type": "nuevo_mensaje",
-                            "conversacion_id": conversacion_id,
-                            "mensaje": {
-                                "id_mensaje": mensaje_response.id_mensaje,
-                                "conversacion_id": mensaje_response.conversacion_id,
-                                "remitente_id": mensaje_response.remitente_id,
-                                "contenido": mensaje_response.contenido,
-                                "fecha_envio": mensaje_response.fecha_envio.isoformat(),
-                                "fecha_leido": mensaje_response.fecha_leido.isoformat() if mensaje_response.fecha_leido else None,
-                                "id_estatus": mensaje_response.id_estatus
-                            }
-                        }, destinatario_id)
-                        
                         # Confirmar al remitente
-                        await websocket.send_json({
+                        await websocket_manager.send_to_connection(websocket, usuario_id, {
                             "type": "mensaje_enviado",
-                            "mensaje": {
-                                "id_mensaje": mensaje_response.id_mensaje,
-                                "conversacion_id": mensaje_response.conversacion_id,
-                                "remitente_id": mensaje_response.remitente_id,
-                                "contenido": mensaje_response.contenido,
-                                "fecha_envio": mensaje_response.fecha_envio.isoformat(),
-                                "fecha_leido": mensaje_response.fecha_leido.isoformat() if mensaje_response.fecha_leido else None,
-                                "id_estatus": mensaje_response.id_estatus
-                            }
+                            "mensaje": mensaje_a_evento(mensaje_response)
                         })
                     
                     elif message_type == "ping":
                         # Responder a ping con pong
-                        await websocket.send_json({"type": "pong"})
+                        await websocket_manager.send_to_connection(websocket, usuario_id, {"type": "pong"})
+                    
+                    elif message_type == "pong":
+                        # Respuesta al heartbeat del servidor (la actividad ya quedó registrada)
+                        pass
                     
                     else:
-                        await websocket.send_json({
+                        await websocket_manager.send_to_connection(websocket, usuario_id, {
                             "type": "error",
                             "message": f"Tipo de mensaje desconocido: {message_type}"
                         })
                 
+                except HTTPException as e:
+                    await websocket_manager.send_to_connection(websocket, usuario_id, {
+                        "type": "error",
+                        "message": e.detail
+                    })
                 except json.JSONDecodeError:
-                    await websocket.send_json({
+                    await websocket_manager.send_to_connection(websocket, usuario_id, {
                         "type": "error",
                         "message": "Formato JSON inválido"
                     })
                 except Exception as e:
                     logger.error(f"Error procesando mensaje WebSocket: {e}")
-                    await websocket.send_json({
+                    await websocket_manager.send_to_connection(websocket, usuario_id, {
                         "type": "error",
                         "message": str(e)
                     })
@@ -182,7 +172,4 @@ def register_websocket_endpoint(app):
         except Exception as e:
             logger.error(f"Error en WebSocket: {e}")
             websocket_manager.disconnect(websocket, usuario_id)
-        finally:
-            if 'db' in locals():
-                db.close()
 
@@ -20,11 +20,97 @@ class DatabaseSettings:
     port: int = int(os.getenv("PORT_DB", "3306"))
     driver: str = os.getenv("DRIVER", "ODBC Driver 17 for SQL Server")
     trust_server_certificate: bool = os.getenv("TRUST_SERVER_CERTIFICATE", "true") == "true"
+    
+    # Configuración del pool de conexiones (aplica al engine síncrono y al async)
+    pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+    pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    pool_timeout: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    
+    # Pool del engine async (mssql+aioodbc); por defecto igual al síncrono
+    async_pool_size: int = int(os.getenv("DB_ASYNC_POOL_SIZE", os.getenv("DB_POOL_SIZE", "10")))
+    async_max_overflow: int = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", os.getenv("DB_MAX_OVERFLOW", "20")))
+
+class ExecutorSettings:
+    """
+    Configuración del pool de hilos para código bloqueante (SQLAlchemy, Supabase, SMTP)
+    usado desde rutas async
+    """
+    max_workers: int = int(os.getenv("BLOCKING_POOL_MAX_WORKERS", "32"))
+    thread_name_prefix: str = os.getenv("BLOCKING_POOL_THREAD_PREFIX", "innpulse-blocking")
+
+class DisponibilidadSettings:
+    """
+    Configuración del índice en memoria de disponibilidad de habitaciones
+    """
+    # Segundos antes de reconstruir el índice desde BD (recoge cambios de otros workers)
+    index_ttl_seconds: int = int(os.getenv("DISPONIBILIDAD_INDEX_TTL", "60"))
+    # Si es True, el resultado del índice se valida contra Sp_DisponibilidadHabitaciones_Obt
+    validar_con_sp: bool = os.getenv("DISPONIBILIDAD_VALIDAR_SP", "false").lower() == "true"
+    # Si es True, al crear una reservación la habitación se confirma contra el stored
+    # procedure con un bloqueo por habitación (el índice de cada worker puede estar desfasado)
+    validar_reserva_con_sp: bool = os.getenv("DISPONIBILIDAD_VALIDAR_SP_AL_RESERVAR", "true").lower() == "true"
+    # Milisegundos de espera por el bloqueo de la habitación al reservar
+    bloqueo_timeout_ms: int = int(os.getenv("DISPONIBILIDAD_BLOQUEO_TIMEOUT_MS", "10000"))
+
+class CotizacionSettings:
+    """
+    Configuración del pipeline en segundo plano de cotizaciones (PDF + email + push)
+    """
+    workers: int = int(os.getenv("COTIZACION_WORKERS", "2"))
+    # Máximo de estados de trabajos que se conservan en memoria para consulta
+    max_estados: int = int(os.getenv("COTIZACION_MAX_ESTADOS", "5000"))
+    # PDFs de cotización en memoria por hash de contenido (reenvíos no se regeneran)
+    pdf_cache_size: int = int(os.getenv("COTIZACION_PDF_CACHE_SIZE", "256"))
+    # Procesos para generar cotizaciones en lote; 0 = número de CPUs
+    pdf_batch_workers: int = int(os.getenv("COTIZACION_PDF_BATCH_WORKERS", "0"))
+
+class NotificationSettings:
+    """
+    Configuración del despachador de notificaciones push (cola + pool de workers)
+    """
+    workers: int = int(os.getenv("NOTIFICATIONS_WORKERS", "4"))
+    queue_size: int = int(os.getenv("NOTIFICATIONS_QUEUE_SIZE", "1000"))
+    # Ventana para agrupar varios eventos del mismo destinatario en un solo push
+    coalesce_seconds: float = float(os.getenv("NOTIFICATIONS_COALESCE_SECONDS", "2"))
+    max_retries: int = int(os.getenv("NOTIFICATIONS_MAX_RETRIES", "5"))
+    retry_base_seconds: float = float(os.getenv("NOTIFICATIONS_RETRY_BASE_SECONDS", "2"))
+    retry_max_seconds: float = float(os.getenv("NOTIFICATIONS_RETRY_MAX_SECONDS", "300"))
+    # Persistir la cola en NOTIFICACIONES.Tb_notificacion_pendiente para sobrevivir reinicios
+    persist: bool = os.getenv("NOTIFICATIONS_PERSIST", "false").lower() == "true"
+    # Segundos que un proceso reserva una notificación persistida antes de que otro la recupere
+    lease_seconds: int = int(os.getenv("NOTIFICATIONS_LEASE_SECONDS", "300"))
+    recovery_interval_seconds: int = int(os.getenv("NOTIFICATIONS_RECOVERY_INTERVAL", "60"))
+    # Días que se conservan las notificaciones persistidas ya enviadas o fallidas
+    retention_days: int = int(os.getenv("NOTIFICATIONS_RETENTION_DAYS", "7"))
+    # Horas entre limpiezas de la cola persistente (0 desactiva la limpieza)
+    cleanup_interval_hours: float = float(os.getenv("NOTIFICATIONS_CLEANUP_INTERVAL_HOURS", "6"))
 
 class AuthSettings:
     secret_key: str = os.getenv("SECRET_KEY", "tu_clave_secreta_muy_segura_aqui_cambiar_en_produccion")
     algorithm: str = os.getenv("ALGORITHM", "HS256")
     access_token_expire_minutes: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    # Cache del usuario autenticado por token (0 desactiva el cache)
+    principal_cache_ttl_seconds: int = int(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "30"))
+    principal_cache_max_entries: int = int(os.getenv("AUTH_PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    # Segundos antes de reconstruir la matriz de permisos en memoria (recoge cambios de otros workers)
+    permisos_matrix_ttl_seconds: int = int(os.getenv("PERMISOS_MATRIX_TTL", "300"))
+
+class PasswordHashSettings:
+    """
+    Configuración del hashing de contraseñas (Argon2) en un pool de procesos
+    """
+    # Procesos del pool (0 ejecuta el hashing en el hilo de la petición)
+    workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    # Máximo de operaciones en curso + en cola; el resto espera hasta acquire_timeout
+    max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+    acquire_timeout: float = float(os.getenv("PASSWORD_HASH_ACQUIRE_TIMEOUT", "5"))
+    # Costos de Argon2 (los defaults coinciden con los hashes existentes de argon2-cffi);
+    # al cambiarlos, los hashes se actualizan en el siguiente login de cada usuario
+    time_cost: int = int(os.getenv("ARGON2_TIME_COST", "3"))
+    memory_cost: int = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+    parallelism: int = int(os.getenv("ARGON2_PARALLELISM", "4"))
 
 class EmailSettings:
     """
@@ -41,6 +127,97 @@ class EmailSettings:
     from_email: str = os.getenv("FromEmail", "noreply@innpulse360.com")
     from_name: str = os.getenv("FROM_NAME", "InnPulse360")
 
+    # Pool de conexiones SMTP persistentes (autenticadas y reutilizables)
+    pool_size: int = int(os.getenv("SMTP_POOL_SIZE", "3"))
+    # Segundos sin uso tras los cuales una conexión se descarta y se reabre
+    idle_timeout: int = int(os.getenv("SMTP_IDLE_TIMEOUT", "60"))
+    # Mensajes por conexión antes de reciclarla (0 = sin límite)
+    max_messages_per_connection: int = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+    timeout: int = int(os.getenv("SMTP_TIMEOUT", "10"))
+    # Segundos máximos esperando una conexión libre del pool
+    acquire_timeout: int = int(os.getenv("SMTP_ACQUIRE_TIMEOUT", "30"))
+
+class EmailOutboxSettings:
+    """
+    Configuración del outbox de emails (EMAIL.Tb_email_log como cola + workers en segundo plano)
+    """
+    # Si está deshabilitado, los emails se envían directamente desde la petición
+    enabled: bool = os.getenv("EMAIL_OUTBOX_ENABLED", "true").lower() == "true"
+    workers: int = int(os.getenv("EMAIL_OUTBOX_WORKERS", "2"))
+    # Emails reclamados por cada worker en cada vuelta
+    batch_size: int = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "20"))
+    # Espera entre consultas cuando no hay emails pendientes
+    poll_interval_seconds: float = float(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", "5"))
+    # Backoff exponencial entre reintentos de emails fallidos
+    retry_base_seconds: int = int(os.getenv("EMAIL_OUTBOX_RETRY_BASE_SECONDS", "30"))
+    retry_max_seconds: int = int(os.getenv("EMAIL_OUTBOX_RETRY_MAX_SECONDS", "3600"))
+    # Segundos tras los que un email en 'sending' se considera abandonado (proceso caído)
+    lease_seconds: int = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "300"))
+    # Limpieza periódica de logs antiguos
+    cleanup_interval_hours: float = float(os.getenv("EMAIL_LOG_CLEANUP_INTERVAL_HOURS", "24"))
+    retention_days: int = int(os.getenv("EMAIL_LOG_RETENTION_DAYS", "90"))
+
+class WebSocketSettings:
+    """
+    Configuración de la mensajería en tiempo real (WebSocket) con varios workers
+    """
+    # Broker pub/sub entre workers: vacío o "memory" = un solo proceso;
+    # redis://[:password@]host:port, rediss://... o unix:///ruta.sock (Redis o scripts/ws_pubsub_hub.py)
+    broker_url: str = os.getenv("WS_BROKER_URL", "")
+    channel_prefix: str = os.getenv("WS_BROKER_CHANNEL_PREFIX", "innpulse:ws")
+    # Cada worker anuncia sus usuarios conectados con esta frecuencia; un worker que no
+    # se anuncia en 3 intervalos se da por caído y sus usuarios por desconectados
+    presence_interval_seconds: float = float(os.getenv("WS_PRESENCE_INTERVAL", "15"))
+    # Espera máxima entre reintentos de conexión al broker
+    reconnect_max_seconds: float = float(os.getenv("WS_BROKER_RECONNECT_MAX_SECONDS", "30"))
+    # Cola de salida por socket: mensajes pendientes de escribir antes de aplicar la política
+    send_queue_size: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+    # Segundos máximos para escribir un mensaje en un socket; al vencer se cierra
+    send_timeout_seconds: float = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+    # Cola llena: "disconnect" cierra el socket (el cliente reconecta y resincroniza),
+    # "drop_oldest" descarta el mensaje más antiguo de la cola
+    slow_consumer_policy: str = os.getenv("WS_SLOW_CONSUMER_POLICY", "disconnect").lower()
+    # Heartbeat de aplicación ({"type": "ping"}); el cliente responde con {"type": "pong"}.
+    # Desactivado por defecto: los clientes actuales no conocen el mensaje. Los sockets
+    # medio cerrados los detecta el ping de protocolo de uvicorn (--ws-ping-interval)
+    heartbeat_interval_seconds: float = float(os.getenv("WS_HEARTBEAT_INTERVAL", "0"))
+    # Un socket sin tramas del cliente durante este tiempo se da por muerto y se cierra.
+    # Solo activar junto con WS_HEARTBEAT_INTERVAL cuando los clientes respondan "pong"
+    idle_timeout_seconds: float = float(os.getenv("WS_IDLE_TIMEOUT", "0"))
+    # Frecuencia de la tarea que envía heartbeats y cierra sockets inactivos
+    reaper_interval_seconds: float = float(os.getenv("WS_REAPER_INTERVAL", "10"))
+    # Sockets simultáneos por usuario en este worker (al exceder se cierra el más antiguo)
+    max_connections_per_user: int = int(os.getenv("WS_MAX_CONNECTIONS_PER_USER", "5"))
+    # Sockets simultáneos en este worker (al exceder se rechaza la conexión); 0 = sin límite
+    max_connections: int = int(os.getenv("WS_MAX_CONNECTIONS", "5000"))
+
+class ChatSettings:
+    """
+    Configuración del asistente de IA (documentación con RAG y OpenAI)
+    """
+    embedding_model: str = os.getenv("CHAT_EMBEDDING_MODEL", "text-embedding-3-small")
+    # Chunks por petición a la API de embeddings al (re)cargar la documentación
+    embedding_batch_size: int = int(os.getenv("CHAT_EMBEDDING_BATCH_SIZE", "64"))
+    # Cargar la documentación en segundo plano al iniciar la app (si no, en el primer mensaje)
+    warmup_on_startup: bool = os.getenv("CHAT_WARMUP_ON_STARTUP", "true").lower() == "true"
+    # Historial de conversaciones: "memory" (LRU por proceso) o "file" (compartido entre workers)
+    history_backend: str = os.getenv("CHAT_HISTORY_BACKEND", "memory").lower()
+    history_dir: str = os.getenv("CHAT_HISTORY_DIR", "chat_history")
+    # Mensajes guardados por usuario y tiempo sin uso tras el que se descarta el historial
+    history_max_messages: int = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "20"))
+    history_ttl_seconds: float = float(os.getenv("CHAT_HISTORY_TTL_SECONDS", "3600"))
+    # Presupuesto global de memoria de los historiales (backend memory); 0 = sin límite
+    history_max_bytes: int = int(os.getenv("CHAT_HISTORY_MAX_BYTES", str(32 * 1024 * 1024)))
+    # Historial incluido en cada prompt: máximo de mensajes y de tokens estimados
+    history_prompt_messages: int = int(os.getenv("CHAT_HISTORY_PROMPT_MESSAGES", "10"))
+    history_prompt_tokens: int = int(os.getenv("CHAT_HISTORY_PROMPT_TOKENS", "1500"))
+    # Caché de respuestas a preguntas frecuentes (exacta y por similitud de embeddings)
+    answer_cache_enabled: bool = os.getenv("CHAT_ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    answer_cache_ttl_seconds: float = float(os.getenv("CHAT_ANSWER_CACHE_TTL_SECONDS", "86400"))
+    answer_cache_max_entries: int = int(os.getenv("CHAT_ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    # Similitud coseno mínima entre preguntas para reutilizar una respuesta
+    answer_cache_similarity: float = float(os.getenv("CHAT_ANSWER_CACHE_SIMILARITY", "0.95"))
+
 class SupabaseSettings:
     """
     Configuración para el servicio de Supabase Storage
@@ -57,6 +234,11 @@ class SupabaseSettings:
     bucket_images: str = os.getenv("SUPABASE_BUCKET_IMAGES", "images")
     bucket_pdfs: str = os.getenv("SUPABASE_BUCKET_PDFS", "pdfs")
     public_base_url: str = os.getenv("SUPABASE_PUBLIC_BASE_URL", "")
+    # Listados de galería simultáneos (en el pool compartido) al cargar varios registros
+    gallery_fetch_workers: int = int(os.getenv("SUPABASE_GALLERY_FETCH_WORKERS", "8"))
+    # Cache de listados de galería (0 desactiva el cache)
+    gallery_cache_ttl_seconds: int = int(os.getenv("SUPABASE_GALLERY_CACHE_TTL", "300"))
+    gallery_cache_max_entries: int = int(os.getenv("SUPABASE_GALLERY_CACHE_MAX_ENTRIES", "1000"))
 
 class FCMSettings:
     """
@@ -83,6 +265,13 @@ class FCMSettings:
     # URL de la API HTTP v1 de FCM
     fcm_url: str = "https://fcm.googleapis.com/v1/projects/{project_id}/messages:send"
     
+    # Envío: pool HTTP keep-alive compartido y límite de envíos concurrentes
+    max_concurrency: int = int(os.getenv("FCM_MAX_CONCURRENCY", "16"))
+    http_pool_size: int = int(os.getenv("FCM_HTTP_POOL_SIZE", "32"))
+    request_timeout: int = int(os.getenv("FCM_REQUEST_TIMEOUT", "10"))
+    # Segundos antes de la expiración en que se renueva el access token OAuth
+    token_refresh_margin: int = int(os.getenv("FCM_TOKEN_REFRESH_MARGIN", "300"))
+    
     @property
     def has_env_variables(self) -> bool:
         """Verifica si todas las variables de entorno necesarias están configuradas"""
@@ -8,6 +8,12 @@ from typing import Optional
 from sqlalchemy import create_engine, Engine, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine
+)
 from .config import DatabaseSettings
 
 
@@ -46,6 +52,8 @@ class DatabaseConnection:
             
         self._engine: Optional[Engine] = None
         self._session_factory: Optional[sessionmaker] = None
+        self._async_engine: Optional[AsyncEngine] = None
+        self._async_session_factory: Optional[async_sessionmaker] = None
         self._database_settings = DatabaseSettings()
         self._initialized = True
     
@@ -82,13 +90,15 @@ class DatabaseConnection:
             
             # Crear engine con configuración optimizada para SQL Server
             # QueuePool es más adecuado para aplicaciones web con múltiples requests concurrentes
+            # Tamaños y reciclado del pool vienen de DatabaseSettings (variables DB_POOL_*)
             engine = create_engine(
                 connection_string,
                 poolclass=QueuePool,
-                pool_size=10,          # Número de conexiones a mantener en el pool
-                max_overflow=20,       # Máximo de conexiones adicionales que se pueden crear
-                pool_pre_ping=True,    # Verificar conexión antes de usar (importante para SQL Server)
-                pool_recycle=3600,     # Reciclar conexiones después de 1 hora (evita conexiones stale)
+                pool_size=self._database_settings.pool_size,          # Conexiones a mantener en el pool
+                max_overflow=self._database_settings.max_overflow,    # Conexiones adicionales permitidas
+                pool_pre_ping=self._database_settings.pool_pre_ping,  # Verificar conexión antes de usar (importante para SQL Server)
+                pool_recycle=self._database_settings.pool_recycle,    # Reciclar conexiones (evita conexiones stale)
+                pool_timeout=self._database_settings.pool_timeout,    # Espera máxima por una conexión libre
                 echo=False,            # Cambiar a True para debug SQL
                 future=True            # Usar SQLAlchemy 2.0 style
             )
@@ -100,9 +110,62 @@ class DatabaseConnection:
             print(f"Error al conectar a la base de datos: {e}")
             raise
     
-    def _build_connection_string(self) -> str:
+    @property
+    def async_engine(self) -> AsyncEngine:
+        """
+        Propiedad que retorna el engine async (mssql+aioodbc)
+        Se crea solo cuando se accede por primera vez (Lazy initialization)
+        """
+        if self._async_engine is None:
+            self._async_engine = self._create_async_engine()
+        return self._async_engine
+    
+    @property
+    def async_session_factory(self) -> async_sessionmaker:
+        """
+        Propiedad que retorna la factory de sesiones async
+        
+        expire_on_commit=False evita lazy loads implícitos (no permitidos con
+        AsyncSession) al leer atributos después de un commit
+        """
+        if self._async_session_factory is None:
+            self._async_session_factory = async_sessionmaker(
+                bind=self.async_engine,
+                class_=AsyncSession,
+                autoflush=False,
+                expire_on_commit=False
+            )
+        return self._async_session_factory
+    
+    def _create_async_engine(self) -> AsyncEngine:
+        """
+        Crea el engine async de SQLAlchemy sobre aioodbc
+        Usa su propio pool (AsyncAdaptedQueuePool) independiente del engine síncrono
+        """
+        try:
+            engine = create_async_engine(
+                self._build_connection_string(driver_name="mssql+aioodbc"),
+                pool_size=self._database_settings.async_pool_size,
+                max_overflow=self._database_settings.async_max_overflow,
+                pool_pre_ping=self._database_settings.pool_pre_ping,
+                pool_recycle=self._database_settings.pool_recycle,
+                pool_timeout=self._database_settings.pool_timeout,
+                echo=False
+            )
+            
+            print(f"Conexión async a base de datos configurada: {self._database_settings.database}")
+            return engine
+            
+        except Exception as e:
+            print(f"Error al configurar conexión async a la base de datos: {e}")
+            raise
+    
+    def _build_connection_string(self, driver_name: str = "mssql+pyodbc") -> str:
         """
         Construye la cadena de conexión para SQL Server
+        
+        Args:
+            driver_name (str): Dialecto+driver de SQLAlchemy (mssql+pyodbc o mssql+aioodbc)
         """
         # Convertir el booleano a 'yes' o 'no' para ODBC Driver
         trust_cert = "yes" if self._database_settings.trust_server_certificate else "no"
@@ -111,7 +174,7 @@ class DatabaseConnection:
         # MARS (Multiple Active Result Sets) permite múltiples consultas en la misma conexión
         # pero puede causar problemas, así que lo deshabilitamos explícitamente
         return (
-            f"mssql+pyodbc://{self._database_settings.username}:"
+            f"{driver_name}://{self._database_settings.username}:"
             f"{self._database_settings.password}@"
             f"{self._database_settings.server}:"
             f"{self._database_settings.port}/"
@@ -128,6 +191,13 @@ class DatabaseConnection:
         """
         return self.session_factory()
     
+    def get_async_session(self) -> AsyncSession:
+        """
+        Obtiene una nueva sesión async de base de datos
+        IMPORTANTE: Siempre cerrar la sesión después de usarla (await session.close())
+        """
+        return self.async_session_factory()
+    
     def get_engine(self) -> Engine:
         """
         Obtiene el engine de la base de datos
@@ -155,6 +225,16 @@ class DatabaseConnection:
             self._engine.dispose()
             print("Conexión a base de datos cerrada")
     
+    async def close_async_connection(self):
+        """
+        Cierra el pool del engine async
+        """
+        if self._async_engine:
+            await self._async_engine.dispose()
+            self._async_engine = None
+            self._async_session_factory = None
+            print("Conexión async a base de datos cerrada")
+    
     def __del__(self):
         """
         Destructor para limpiar recursos
@@ -181,6 +261,21 @@ def get_database_session():
         session.close()
 
 
+async def get_async_database_session():
+    """
+    Función helper para obtener una sesión async de base de datos
+    Útil para usar con FastAPI dependency injection en rutas async
+    
+    Las consultas se ejecutan sobre aioodbc sin ocupar un hilo del pool por
+    cada query en curso
+    """
+    session = db_connection.get_async_session()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
 def get_database_engine() -> Engine:
     """
     Función helper para obtener el engine de base de datos
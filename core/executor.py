@@ -0,0 +1,171 @@
+"""
+Capa de ejecución para código bloqueante llamado desde rutas async
+Ejecuta servicios/DAOs síncronos (SQLAlchemy/pyodbc, Supabase, SMTP) en un pool
+de hilos acotado para no bloquear el event loop de uvicorn
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, TypeVar
+from .config import ExecutorSettings
+
+T = TypeVar("T")
+
+
+class BlockingExecutor:
+    """
+    Clase Singleton que administra el pool de hilos para llamadas bloqueantes
+
+    Características:
+    - Una sola instancia (y un solo pool) por proceso
+    - Pool acotado y configurable vía ExecutorSettings
+    - Lazy initialization (el pool se crea en la primera llamada)
+    - Propaga contextvars al hilo de ejecución
+    """
+
+    _instance: Optional['BlockingExecutor'] = None
+    _lock = threading.Lock()  # Para thread-safety
+
+    def __new__(cls) -> 'BlockingExecutor':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self._settings = ExecutorSettings()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self._completed = 0
+        self._counter_lock = threading.Lock()
+        self._initialized = True
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Retorna el ThreadPoolExecutor, creándolo la primera vez que se usa
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._settings.max_workers,
+                        thread_name_prefix=self._settings.thread_name_prefix
+                    )
+        return self._executor
+
+    def _track(self, func: Callable[..., T]) -> Callable[..., T]:
+        """
+        Envuelve la función para llevar el conteo de tareas en curso
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self._counter_lock:
+                self._in_flight += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._counter_lock:
+                    self._in_flight -= 1
+                    self._completed += 1
+        return wrapper
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Ejecuta una función síncrona en el pool y espera su resultado sin bloquear el loop
+
+        Args:
+            func (Callable): Función bloqueante a ejecutar
+            *args: Argumentos posicionales
+            **kwargs: Argumentos con nombre
+
+        Returns:
+            T: Resultado de la función (las excepciones se propagan al llamador)
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, self._track(func), *args, **kwargs)
+        return await loop.run_in_executor(self.executor, call)
+
+    def map(self, func: Callable[..., T], items: Iterable[Any], max_concurrency: Optional[int] = None) -> List[T]:
+        """
+        Aplica func a cada elemento usando el pool desde código síncrono
+
+        Ejecuta como máximo max_concurrency llamadas a la vez. El hilo llamador ejecuta
+        una de cada tanda y también las que el pool todavía no empezó, así que llamar
+        desde un hilo del propio pool no puede quedarse esperando por hilos libres.
+
+        Args:
+            func (Callable): Función bloqueante a aplicar
+            items (Iterable): Elementos a procesar
+            max_concurrency (Optional[int]): Llamadas simultáneas (default: todas)
+
+        Returns:
+            List[T]: Resultados en el mismo orden que items
+        """
+        items = list(items)
+        if not items:
+            return []
+        size = max(1, min(max_concurrency or len(items), len(items)))
+        tracked = self._track(func)
+        results: List[T] = []
+        for start in range(0, len(items), size):
+            batch = items[start:start + size]
+            futures = [
+                self.executor.submit(contextvars.copy_context().run, tracked, item)
+                for item in batch[1:]
+            ]
+            results.append(tracked(batch[0]))
+            for item, future in zip(batch[1:], futures):
+                results.append(tracked(item) if future.cancel() else future.result())
+        return results
+
+    def stats(self) -> dict:
+        """
+        Retorna métricas básicas del pool
+
+        Returns:
+            dict: max_workers, tareas en curso y tareas completadas
+        """
+        with self._counter_lock:
+            return {
+                "max_workers": self._settings.max_workers,
+                "in_flight": self._in_flight,
+                "completed": self._completed
+            }
+
+    def shutdown(self, wait: bool = True):
+        """
+        Detiene el pool de hilos (se recrea si se vuelve a usar)
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Instancia global del ejecutor (Singleton)
+blocking_executor = BlockingExecutor()
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Función helper para ejecutar código bloqueante desde rutas async
+
+    Ejemplo:
+        hoteles = await run_blocking(service.obtener_todos_los_hoteles, skip=0, limit=10)
+    """
+    return await blocking_executor.run(func, *args, **kwargs)
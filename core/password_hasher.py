@@ -0,0 +1,226 @@
+"""
+Hashing de contraseñas (Argon2) en un pool de procesos acotado
+Argon2 consume CPU y memoria a propósito; ejecutarlo en procesos separados evita que
+una ráfaga de logins acapare el GIL y la CPU del worker que atiende las peticiones
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+from passlib.context import CryptContext
+
+from .config import PasswordHashSettings
+
+T = TypeVar("T")
+
+# (time_cost, memory_cost, parallelism)
+ParametrosArgon2 = Tuple[int, int, int]
+
+# Contextos por parámetros, uno por proceso (en los procesos del pool se crean una vez)
+_contextos: Dict[ParametrosArgon2, CryptContext] = {}
+
+
+def _contexto(parametros: ParametrosArgon2) -> CryptContext:
+    contexto = _contextos.get(parametros)
+    if contexto is None:
+        time_cost, memory_cost, parallelism = parametros
+        contexto = CryptContext(
+            schemes=["argon2"],
+            deprecated="auto",
+            argon2__rounds=time_cost,  # rounds = time_cost en passlib
+            argon2__memory_cost=memory_cost,
+            argon2__parallelism=parallelism
+        )
+        _contextos[parametros] = contexto
+    return contexto
+
+
+def _hash(password: str, parametros: ParametrosArgon2) -> str:
+    return _contexto(parametros).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, parametros: ParametrosArgon2) -> Tuple[bool, Optional[str]]:
+    return _contexto(parametros).verify_and_update(password, hashed)
+
+
+class PasswordHasherSaturado(RuntimeError):
+    """
+    No hubo cupo en el pool de hashing dentro del tiempo de espera configurado
+    """
+
+
+class PasswordHasher:
+    """
+    Clase Singleton que ejecuta hash/verify de Argon2 en un pool de procesos
+
+    Características:
+    - Pool de procesos propio y acotado (PASSWORD_HASH_WORKERS; 0 ejecuta en el hilo llamador)
+    - Límite de operaciones en curso + en cola (PASSWORD_HASH_MAX_PENDING); al agotarse se
+      espera hasta PASSWORD_HASH_ACQUIRE_TIMEOUT y luego se rechaza con PasswordHasherSaturado
+    - Costos de Argon2 configurables (time_cost, memory_cost, parallelism)
+    - verify_and_update retorna un hash nuevo cuando el almacenado usa otros parámetros
+    - Métricas de profundidad de cola, rechazos y latencia
+    """
+
+    _instance: Optional['PasswordHasher'] = None
+    _lock = threading.Lock()  # Para thread-safety
+
+    def __new__(cls) -> 'PasswordHasher':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self._settings = PasswordHashSettings()
+        self._parametros: ParametrosArgon2 = (
+            self._settings.time_cost,
+            self._settings.memory_cost,
+            self._settings.parallelism
+        )
+        self._workers = max(0, self._settings.workers)
+        self._max_pending = max(1, self._settings.max_pending)
+        self._cupos = threading.BoundedSemaphore(self._max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "completed": 0,
+            "rejected": 0,
+            "errors": 0,
+            "rehashed": 0,
+            "total_ms": 0.0,
+            "max_ms": 0.0,
+        }
+        self._initialized = True
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """
+        Retorna el pool de procesos, creándolo la primera vez que se usa
+        (spawn: los procesos no heredan hilos ni conexiones del worker web)
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self._workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._executor
+
+    def _ejecutar(self, func: Callable[..., T], *args) -> T:
+        """
+        Ejecuta la función en el pool respetando el límite de operaciones pendientes
+        """
+        if not self._cupos.acquire(timeout=self._settings.acquire_timeout):
+            with self._stats_lock:
+                self._stats["rejected"] += 1
+            raise PasswordHasherSaturado("El pool de hashing de contraseñas está saturado")
+
+        inicio = time.perf_counter()
+        with self._stats_lock:
+            self._stats["in_flight"] += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._stats["in_flight"])
+        error = False
+        try:
+            if self._workers == 0:
+                return func(*args, self._parametros)
+            future: Future = self.executor.submit(func, *args, self._parametros)
+            return future.result()
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._cupos.release()
+            duracion_ms = (time.perf_counter() - inicio) * 1000
+            with self._stats_lock:
+                self._stats["in_flight"] -= 1
+                self._stats["completed"] += 1
+                self._stats["errors"] += int(error)
+                self._stats["total_ms"] += duracion_ms
+                self._stats["max_ms"] = max(self._stats["max_ms"], duracion_ms)
+
+    def hash(self, password: str) -> str:
+        """
+        Genera el hash Argon2 de una contraseña con los parámetros configurados
+
+        Raises:
+            PasswordHasherSaturado: Si no hay cupo en el pool
+        """
+        return self._ejecutar(_hash, password)
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica una contraseña contra su hash
+
+        Returns:
+            Tuple[bool, Optional[str]]: (coincide, hash nuevo si el almacenado usa
+            parámetros distintos a los configurados y debe reemplazarse)
+
+        Raises:
+            PasswordHasherSaturado: Si no hay cupo en el pool
+        """
+        valido, nuevo_hash = self._ejecutar(_verify_and_update, password, hashed)
+        if nuevo_hash:
+            with self._stats_lock:
+                self._stats["rehashed"] += 1
+        return valido, nuevo_hash
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """
+        Verifica una contraseña contra su hash
+        """
+        return self.verify_and_update(password, hashed)[0]
+
+    def stats(self) -> dict:
+        """
+        Retorna métricas del pool
+
+        Returns:
+            dict: workers, operaciones en curso, profundidad de cola, rechazos y latencia
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        completadas = stats["completed"]
+        stats["queue_depth"] = max(0, stats["in_flight"] - max(1, self._workers))
+        stats["avg_ms"] = round(stats.pop("total_ms") / completadas, 2) if completadas else 0.0
+        stats["max_ms"] = round(stats["max_ms"], 2)
+        stats["workers"] = self._workers
+        stats["max_pending"] = self._max_pending
+        stats["time_cost"], stats["memory_cost"], stats["parallelism"] = self._parametros
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        """
+        Detiene el pool de procesos (se recrea si se vuelve a usar)
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Instancia global del hasher (Singleton)
+password_hasher = PasswordHasher()
+
+
+def get_password_hasher_stats() -> dict:
+    """
+    Función helper para obtener las métricas del pool de hashing de contraseñas
+    """
+    return password_hasher.stats()
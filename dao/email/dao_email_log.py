@@ -3,7 +3,7 @@ DAO (Data Access Object) para operaciones CRUD de EmailLog
 Maneja todas las interacciones con la base de datos para logs de email
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
@@ -33,7 +33,8 @@ class EmailLogDAO:
         
         Args:
             email_data (EmailSend): Datos del email
-            **kwargs: Datos adicionales del log
+            **kwargs: Datos adicionales del log (estado_envio permite registrar un email
+                que la petición envía directamente como 'sending', fuera del alcance del outbox)
             
         Returns:
             EmailLog: Log creado
@@ -51,7 +52,7 @@ class EmailLogDAO:
                 'id_template': email_data.id_template,
                 'tipo_email': email_data.tipo_email,
                 'variables_utilizadas': email_data.variables,
-                'estado_envio': EmailStatus.PENDING,
+                'estado_envio': kwargs.get('estado_envio', EmailStatus.PENDING),
                 'ip_origen': kwargs.get('ip_origen'),
                 'user_agent': kwargs.get('user_agent'),
                 'usuario_id': kwargs.get('usuario_id'),
@@ -71,6 +72,50 @@ class EmailLogDAO:
             self.db.rollback()
             raise e
     
+    def create_logs(self, emails: List[EmailSend], **kwargs) -> List[EmailLog]:
+        """
+        Crea los logs de un lote de emails con un solo commit
+        
+        Args:
+            emails (List[EmailSend]): Datos de los emails
+            **kwargs: Datos adicionales comunes a todos los logs
+            
+        Returns:
+            List[EmailLog]: Logs creados, en el mismo orden que emails
+        """
+        try:
+            db_logs = [
+                EmailLog(
+                    destinatario_email=str(email_data.destinatario_email),
+                    destinatario_nombre=email_data.destinatario_nombre,
+                    remitente_email=kwargs.get('remitente_email', ''),
+                    remitente_nombre=kwargs.get('remitente_nombre', ''),
+                    asunto=email_data.asunto,
+                    contenido_html=email_data.contenido_html,
+                    contenido_texto=email_data.contenido_texto,
+                    id_template=email_data.id_template,
+                    tipo_email=email_data.tipo_email,
+                    variables_utilizadas=email_data.variables,
+                    estado_envio=kwargs.get('estado_envio', EmailStatus.PENDING),
+                    usuario_id=kwargs.get('usuario_id'),
+                    proveedor_email=kwargs.get('proveedor_email', 'smtp'),
+                    max_intentos=kwargs.get('max_intentos', 3),
+                    estatus_id=1
+                )
+                for email_data in emails
+            ]
+            
+            self.db.add_all(db_logs)
+            self.db.commit()
+            for db_log in db_logs:
+                self.db.refresh(db_log)
+            
+            return db_logs
+            
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise e
+    
     def get_by_id(self, log_id: int) -> Optional[EmailLog]:
         """
         Obtiene un log por ID
@@ -128,22 +173,145 @@ class EmailLogDAO:
             self.db.rollback()
             raise e
     
-    def get_pending_emails(self, limit: int = 100) -> List[EmailLog]:
+    def update_status_many(self, updates: List[Tuple[int, EmailStatus, Optional[str]]]) -> int:
+        """
+        Actualiza el estado de varios logs con una sola consulta y un solo commit
+        
+        Args:
+            updates (List[Tuple[int, EmailStatus, Optional[str]]]): (log_id, estado, error_mensaje)
+            
+        Returns:
+            int: Número de logs actualizados
+        """
+        if not updates:
+            return 0
+        try:
+            por_id = {log_id: (estado, error_mensaje) for log_id, estado, error_mensaje in updates}
+            db_logs = self.db.query(EmailLog).filter(
+                and_(
+                    EmailLog.id_log.in_(list(por_id)),
+                    EmailLog.estatus_id == 1
+                )
+            ).all()
+            
+            for db_log in db_logs:
+                estado, error_mensaje = por_id[db_log.id_log]
+                db_log.estado_envio = estado
+                db_log.intentos_envio += 1
+                if estado == EmailStatus.SENT:
+                    db_log.fecha_envio = func.now()
+                elif estado == EmailStatus.FAILED:
+                    db_log.error_mensaje = error_mensaje
+            
+            self.db.commit()
+            return len(db_logs)
+            
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise e
+    
+    def get_pending_emails(self, limit: int = 100, include_retry: bool = False,
+                           skip_locked: bool = False) -> List[EmailLog]:
         """
         Obtiene emails pendientes de envío
         
         Args:
             limit (int): Límite de registros
+            include_retry (bool): Incluir también los marcados para reintento
+            skip_locked (bool): Bloquear las filas leídas y saltar las bloqueadas por
+                otra transacción (UPDLOCK + READPAST en SQL Server)
             
         Returns:
             List[EmailLog]: Lista de emails pendientes
         """
-        return self.db.query(EmailLog).filter(
+        estados = [EmailStatus.PENDING, EmailStatus.RETRY] if include_retry else [EmailStatus.PENDING]
+        query = self.db.query(EmailLog).filter(
             and_(
-                EmailLog.estado_envio == EmailStatus.PENDING,
+                EmailLog.estado_envio.in_(estados),
                 EmailLog.estatus_id == 1
             )
-        ).order_by(EmailLog.fecha_creacion).limit(limit).all()
+        )
+        if skip_locked:
+            query = query.with_for_update(skip_locked=True)
+        return query.order_by(EmailLog.fecha_creacion).limit(limit).all()
+    
+    def claim_batch(self, limit: int = 20) -> List[EmailLog]:
+        """
+        Reclama un lote de emails pendientes o por reintentar para enviarlos
+        
+        Las filas se leen con bloqueo y saltando las ya bloqueadas, y se pasan a
+        'sending' en la misma transacción: dos workers (o procesos) nunca reclaman
+        el mismo email.
+        
+        Args:
+            limit (int): Máximo de emails a reclamar
+            
+        Returns:
+            List[EmailLog]: Emails reclamados (ya en estado 'sending')
+        """
+        try:
+            db_logs = self.get_pending_emails(limit, include_retry=True, skip_locked=True)
+            for db_log in db_logs:
+                db_log.estado_envio = EmailStatus.SENDING
+            self.db.commit()
+            return db_logs
+            
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise e
+    
+    def release_stale_sending(self, lease_seconds: int) -> Tuple[int, int]:
+        """
+        Libera los emails que quedaron en 'sending' más de lease_seconds (el proceso que
+        los reclamó se detuvo antes de registrar el resultado)
+        
+        El envío interrumpido cuenta como un intento (pudo haber salido): vuelven a
+        reintento solo los que aún tienen intentos disponibles y el resto pasa a 'failed'.
+        Los envíos directos (max_intentos=1) nunca se reenvían.
+        
+        Args:
+            lease_seconds (int): Segundos máximos que un email puede estar en 'sending'
+            
+        Returns:
+            Tuple[int, int]: (emails devueltos a reintento, emails marcados como fallidos)
+        """
+        try:
+            fecha_limite = self.get_db_now() - timedelta(seconds=lease_seconds)
+            abandonados = and_(
+                EmailLog.estado_envio == EmailStatus.SENDING,
+                EmailLog.fecha_actualizacion < fecha_limite,
+                EmailLog.estatus_id == 1
+            )
+            liberados = self.db.query(EmailLog).filter(
+                abandonados,
+                EmailLog.intentos_envio + 1 < EmailLog.max_intentos
+            ).update({
+                "estado_envio": EmailStatus.RETRY,
+                "intentos_envio": EmailLog.intentos_envio + 1
+            }, synchronize_session=False)
+            agotados = self.db.query(EmailLog).filter(abandonados).update({
+                "estado_envio": EmailStatus.FAILED,
+                "intentos_envio": EmailLog.intentos_envio + 1,
+                "error_mensaje": "Envío interrumpido sin resultado; intentos agotados"
+            }, synchronize_session=False)
+            
+            self.db.commit()
+            return liberados, agotados
+            
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise e
+    
+    def get_db_now(self) -> datetime:
+        """
+        Obtiene la hora actual del servidor de BD (la misma referencia que usa
+        func.now() en fecha_actualizacion)
+        
+        Returns:
+            datetime: Hora del servidor sin zona horaria
+        """
+        ahora = self.db.query(func.now()).scalar()
+        return ahora.replace(tzinfo=None)
     
     def get_failed_retryable(self, limit: int = 50) -> List[EmailLog]:
         """
@@ -280,7 +448,8 @@ class EmailLogDAO:
     
     def cleanup_old_logs(self, days_to_keep: int = 90) -> int:
         """
-        Limpia logs antiguos (eliminación lógica)
+        Limpia logs antiguos en estado terminal (eliminación lógica); los pendientes,
+        en envío o por reintentar se conservan
         
         Args:
             days_to_keep (int): Días a mantener
@@ -294,9 +463,10 @@ class EmailLogDAO:
             result = self.db.query(EmailLog).filter(
                 and_(
                     EmailLog.fecha_creacion < fecha_limite,
+                    EmailLog.estado_envio.in_([EmailStatus.SENT, EmailStatus.DELIVERED, EmailStatus.FAILED]),
                     EmailLog.estatus_id == 1
                 )
-            ).update({"estatus_id": 0})
+            ).update({"estatus_id": 0}, synchronize_session=False)
             
             self.db.commit()
             return result
@@ -4,13 +4,14 @@ Contiene DAOs para gestión hotelera
 """
 
 from .dao_caracteristica import CaracteristicaDAO
-from .dao_hotel import HotelDAO
+from .dao_hotel import HotelDAO, HotelAsyncDAO
 from .dao_tipo_habitacion import TipoHabitacionDAO
 from .dao_tipo_habitacion_caracteristica import TipoHabitacionCaracteristicaDAO
 
 __all__ = [
     "CaracteristicaDAO", 
     "HotelDAO", 
+    "HotelAsyncDAO", 
     "TipoHabitacionDAO", 
     "TipoHabitacionCaracteristicaDAO"
 ]
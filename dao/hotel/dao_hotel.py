@@ -4,8 +4,10 @@ Maneja todas las interacciones con la base de datos para la entidad Hotel
 """
 
 from typing import List, Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from models.hotel.hotel_model import Hotel
 from schemas.hotel.hotel_create import HotelCreate
 from schemas.hotel.hotel_update import HotelUpdate
@@ -238,3 +240,58 @@ class HotelDAO:
         except SQLAlchemyError as e:
             raise e
 
+
+class HotelAsyncDAO:
+    """
+    Clase DAO async para lecturas de Hotel sobre AsyncSession
+    Se adopta método por método en las rutas de lectura más concurridas
+    """
+    
+    def __init__(self, db_session: AsyncSession):
+        """
+        Inicializa el DAO con una sesión async de base de datos
+        
+        Args:
+            db_session (AsyncSession): Sesión async de SQLAlchemy
+        """
+        self.db = db_session
+    
+    async def get_by_id(self, hotel_id: int) -> Optional[Hotel]:
+        """
+        Obtiene un hotel por su ID
+        
+        Args:
+            hotel_id (int): ID del hotel a buscar
+            
+        Returns:
+            Optional[Hotel]: Hotel encontrado o None si no existe
+        """
+        try:
+            result = await self.db.execute(
+                select(Hotel).where(Hotel.id_hotel == hotel_id)
+            )
+            return result.scalars().first()
+        except SQLAlchemyError as e:
+            raise e
+    
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[Hotel]:
+        """
+        Obtiene todos los hoteles con paginación
+        
+        Args:
+            skip (int): Número de registros a saltar (para paginación)
+            limit (int): Número máximo de registros a retornar
+            
+        Returns:
+            List[Hotel]: Lista de hoteles
+        """
+        try:
+            result = await self.db.execute(
+                select(Hotel)
+                .order_by(Hotel.id_hotel.desc())
+                .offset(skip)
+                .limit(limit)
+            )
+            return list(result.scalars().all())
+        except SQLAlchemyError as e:
+            raise e
@@ -3,9 +3,9 @@ DAO (Data Access Object) para operaciones CRUD de TipoHabitacion
 Maneja todas las interacciones con la base de datos para la entidad TipoHabitacion
 """
 
-from typing import List, Optional
+from typing import Iterable, List, Optional
 from decimal import Decimal
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException, status
 
@@ -88,6 +88,31 @@ class TipoHabitacionDAO:
         except SQLAlchemyError as e:
             raise e
     
+    def get_active_by_ids(self, ids: Iterable[int]) -> List[TipoHabitacion]:
+        """
+        Obtiene en una sola consulta (IN) los tipos de habitación activos indicados,
+        con periodicidad y características ya cargadas
+        """
+        ids = list(ids)
+        if not ids:
+            return []
+        try:
+            return (
+                self.db.query(TipoHabitacion)
+                .options(
+                    joinedload(TipoHabitacion.periodicidad),
+                    selectinload(TipoHabitacion.caracteristicas)
+                )
+                .filter(
+                    TipoHabitacion.id_tipoHabitacion.in_(ids),
+                    TipoHabitacion.estatus_id == self.__status_active__
+                )
+                .order_by(TipoHabitacion.id_tipoHabitacion)
+                .all()
+            )
+        except SQLAlchemyError as e:
+            raise e
+    
     def update(self, id_tipoHabitacion: int, tipo_habitacion_data: TipoHabitacionUpdate) -> Optional[TipoHabitacion]:
         try:
             db_tipo_habitacion = self.get_by_id(id_tipoHabitacion)
@@ -2,6 +2,7 @@
 from .dao_conversacion import ConversacionDAO
 from .dao_mensaje import MensajeDAO
 from .dao_mensaje_adjunto import MensajeAdjuntoDAO
+from .dao_contador_no_leidos import ContadorNoLeidosDAO
 
-__all__ = ['ConversacionDAO', 'MensajeDAO', 'MensajeAdjuntoDAO']
+__all__ = ['ConversacionDAO', 'MensajeDAO', 'MensajeAdjuntoDAO', 'ContadorNoLeidosDAO']
 
@@ -0,0 +1,210 @@
+"""
+DAO (Data Access Object) para los contadores desnormalizados de mensajes no leídos
+Los métodos de escritura no hacen commit: se ejecutan dentro de la transacción del
+llamador (la misma que inserta o marca como leídos los mensajes)
+"""
+
+from datetime import datetime
+from typing import List, Tuple
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from models.mensajeria.contador_no_leidos_model import ConversacionNoLeidos, UsuarioNoLeidos
+
+
+class ContadorNoLeidosDAO:
+    """
+    Clase DAO para MENSAJERIA.Tb_ConversacionNoLeidos y MENSAJERIA.Tb_UsuarioNoLeidos
+    Los incrementos y descuentos son UPDATE atómicos (columna = columna ± n) sobre la PK
+    """
+
+    def __init__(self, db_session: Session):
+        """
+        Inicializa el DAO con una sesión de base de datos
+
+        Args:
+            db_session (Session): Sesión de SQLAlchemy para operaciones de BD
+        """
+        self.db = db_session
+
+    # ------------------------------------------------------------------
+    # Escritura (sin commit)
+    # ------------------------------------------------------------------
+
+    def _sumar(self, modelo, columna, claves: dict, cantidad: int):
+        """
+        UPDATE columna = columna + cantidad; si la fila no existe se inserta. Si otro
+        proceso la insertó al mismo tiempo, el INSERT falla por PK y se repite el UPDATE.
+        """
+        valores = {columna: columna + cantidad, modelo.fecha_actualizacion: datetime.now()}
+        if self.db.query(modelo).filter_by(**claves).update(valores, synchronize_session=False):
+            return
+        try:
+            with self.db.begin_nested():
+                self.db.add(modelo(**claves, **{columna.key: cantidad}, fecha_actualizacion=datetime.now()))
+        except IntegrityError:
+            self.db.query(modelo).filter_by(**claves).update(valores, synchronize_session=False)
+
+    @staticmethod
+    def _restar(columna, cantidad: int):
+        # Nunca por debajo de cero
+        return case((columna > cantidad, columna - cantidad), else_=0)
+
+    def incrementar(self, usuario_id: int, conversacion_id: int, cantidad: int = 1):
+        """
+        Suma mensajes no leídos a la conversación y al total del usuario
+
+        Args:
+            usuario_id (int): ID del destinatario
+            conversacion_id (int): ID de la conversación
+            cantidad (int): Mensajes a sumar
+
+        Raises:
+            SQLAlchemyError: Si hay un error en la base de datos
+        """
+        if cantidad <= 0:
+            return
+        self._sumar(
+            ConversacionNoLeidos,
+            ConversacionNoLeidos.no_leidos,
+            {"usuario_id": usuario_id, "conversacion_id": conversacion_id},
+            cantidad
+        )
+        self._sumar(UsuarioNoLeidos, UsuarioNoLeidos.total, {"usuario_id": usuario_id}, cantidad)
+
+    def descontar(self, usuario_id: int, conversacion_id: int, cantidad: int) -> bool:
+        """
+        Resta mensajes leídos del contador de la conversación y del total del usuario
+
+        El total solo se descuenta si la conversación tiene contador (las conversaciones
+        archivadas ya no forman parte del total).
+
+        Args:
+            usuario_id (int): ID del usuario que leyó
+            conversacion_id (int): ID de la conversación
+            cantidad (int): Mensajes marcados como leídos
+
+        Returns:
+            bool: True si se modificó algún contador
+
+        Raises:
+            SQLAlchemyError: Si hay un error en la base de datos
+        """
+        if cantidad <= 0:
+            return False
+        ahora = datetime.now()
+        filas = (
+            self.db.query(ConversacionNoLeidos)
+                .filter(
+                    ConversacionNoLeidos.usuario_id == usuario_id,
+                    ConversacionNoLeidos.conversacion_id == conversacion_id
+                )
+                .update(
+                    {
+                        ConversacionNoLeidos.no_leidos: self._restar(ConversacionNoLeidos.no_leidos, cantidad),
+                        ConversacionNoLeidos.fecha_actualizacion: ahora
+                    },
+                    synchronize_session=False
+                )
+        )
+        if not filas:
+            return False
+        (
+            self.db.query(UsuarioNoLeidos)
+                .filter(UsuarioNoLeidos.usuario_id == usuario_id)
+                .update(
+                    {
+                        UsuarioNoLeidos.total: self._restar(UsuarioNoLeidos.total, cantidad),
+                        UsuarioNoLeidos.fecha_actualizacion: ahora
+                    },
+                    synchronize_session=False
+                )
+        )
+        return True
+
+    def eliminar_conversacion(self, conversacion_id: int) -> List[int]:
+        """
+        Quita los contadores de una conversación (al archivarla) y descuenta sus
+        pendientes del total de cada participante
+
+        Args:
+            conversacion_id (int): ID de la conversación
+
+        Returns:
+            List[int]: IDs de los usuarios cuyo total cambió
+
+        Raises:
+            SQLAlchemyError: Si hay un error en la base de datos
+        """
+        contadores = (
+            self.db.query(ConversacionNoLeidos.usuario_id, ConversacionNoLeidos.no_leidos)
+                .filter(ConversacionNoLeidos.conversacion_id == conversacion_id)
+                .all()
+        )
+        afectados = []
+        for usuario_id, no_leidos in contadores:
+            if self.descontar(usuario_id, conversacion_id, no_leidos):
+                afectados.append(usuario_id)
+        if contadores:
+            (
+                self.db.query(ConversacionNoLeidos)
+                    .filter(ConversacionNoLeidos.conversacion_id == conversacion_id)
+                    .delete(synchronize_session=False)
+            )
+        return afectados
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def get_total(self, usuario_id: int) -> int:
+        """
+        Total de mensajes no leídos del usuario (lectura de una fila por PK)
+        """
+        try:
+            total = (
+                self.db.query(UsuarioNoLeidos.total)
+                    .filter(UsuarioNoLeidos.usuario_id == usuario_id)
+                    .scalar()
+            )
+            return total or 0
+        except SQLAlchemyError as e:
+            raise e
+
+    def get_contador(self, usuario_id: int, conversacion_id: int) -> int:
+        """
+        Mensajes no leídos del usuario en una conversación (lectura de una fila por PK)
+        """
+        try:
+            no_leidos = (
+                self.db.query(ConversacionNoLeidos.no_leidos)
+                    .filter(
+                        ConversacionNoLeidos.usuario_id == usuario_id,
+                        ConversacionNoLeidos.conversacion_id == conversacion_id
+                    )
+                    .scalar()
+            )
+            return no_leidos or 0
+        except SQLAlchemyError as e:
+            raise e
+
+    def get_por_conversacion(self, usuario_id: int) -> List[Tuple[int, int]]:
+        """
+        Conversaciones con mensajes no leídos del usuario
+
+        Returns:
+            List[Tuple[int, int]]: Pares (conversacion_id, no_leidos) con no_leidos > 0
+        """
+        try:
+            filas = (
+                self.db.query(ConversacionNoLeidos.conversacion_id, ConversacionNoLeidos.no_leidos)
+                    .filter(
+                        ConversacionNoLeidos.usuario_id == usuario_id,
+                        ConversacionNoLeidos.no_leidos > 0
+                    )
+                    .order_by(ConversacionNoLeidos.conversacion_id)
+                    .all()
+            )
+            return [(fila.conversacion_id, fila.no_leidos) for fila in filas]
+        except SQLAlchemyError as e:
+            raise e
@@ -3,12 +3,17 @@ DAO (Data Access Object) para operaciones CRUD de Conversacion
 Maneja todas las interacciones con la base de datos para la entidad Conversacion
 """
 
-from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy.orm import Session, joinedload, aliased
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import or_, and_, func, case
+from sqlalchemy import or_, and_, func, case, select
 from models.mensajeria.conversacion_model import Conversacion
 from models.mensajeria.mensaje_model import Mensaje
+from models.mensajeria.contador_no_leidos_model import ConversacionNoLeidos
+from models.seguridad.usuario_model import Usuario
+from dao.mensajeria.dao_mensaje import MensajeDAO
+from dao.mensajeria.dao_contador_no_leidos import ContadorNoLeidosDAO
 
 
 class ConversacionDAO:
@@ -134,6 +139,107 @@ class ConversacionDAO:
         except SQLAlchemyError as e:
             raise e
     
+    @staticmethod
+    def fecha_orden_inbox():
+        """
+        Clave de orden del inbox: fecha del último mensaje (o de creación si aún no se registró)
+        """
+        return func.coalesce(Conversacion.fecha_ultimo_mensaje, Conversacion.fecha_creacion)
+    
+    def get_inbox(
+        self,
+        usuario_id: int,
+        limit: int = 20,
+        despues_de: Optional[Tuple[datetime, int]] = None,
+        skip: int = 0
+    ) -> List[Any]:
+        """
+        Obtiene una página del inbox de un usuario en una sola consulta
+        
+        Cada fila trae la conversación, su último mensaje, el contador de no leídos del
+        usuario y el login/foto del otro participante. Solo incluye conversaciones activas
+        con al menos un mensaje, ordenadas por fecha del último mensaje (más recientes primero).
+        
+        Args:
+            usuario_id (int): ID del usuario
+            limit (int): Tamaño de la página
+            despues_de (Optional[Tuple[datetime, int]]): Cursor (fecha de orden, id_conversacion)
+                de la última conversación de la página anterior (paginación keyset)
+            skip (int): Desplazamiento (solo para clientes que aún no usan cursor)
+            
+        Returns:
+            List[Row]: Filas con Conversacion, UltimoMensaje, contador_no_leidos,
+                otro_usuario_id, otro_usuario_login, otro_usuario_foto y fecha_orden
+        """
+        try:
+            ultimo = aliased(Mensaje, name="ultimo_mensaje")
+            fecha_orden = self.fecha_orden_inbox()
+            
+            ultimo_id = (
+                select(Mensaje.id_mensaje)
+                    .where(
+                        Mensaje.conversacion_id == Conversacion.id_conversacion,
+                        Mensaje.id_estatus != MensajeDAO.__status_eliminado__
+                    )
+                    .order_by(Mensaje.fecha_envio.desc(), Mensaje.id_mensaje.desc())
+                    .limit(1)
+                    .correlate(Conversacion)
+                    .scalar_subquery()
+            )
+            # Contador desnormalizado del usuario (sin fila = 0)
+            no_leidos = func.coalesce(ConversacionNoLeidos.no_leidos, 0)
+            otro_usuario_id = case(
+                (Conversacion.usuario1_id == usuario_id, Conversacion.usuario2_id),
+                else_=Conversacion.usuario1_id
+            )
+            
+            query = (
+                self.db.query(
+                    Conversacion,
+                    ultimo,
+                    no_leidos.label("contador_no_leidos"),
+                    otro_usuario_id.label("otro_usuario_id"),
+                    Usuario.login.label("otro_usuario_login"),
+                    Usuario.url_foto_perfil.label("otro_usuario_foto"),
+                    fecha_orden.label("fecha_orden")
+                )
+                    .select_from(Conversacion)
+                    # JOIN interno: descarta las conversaciones sin mensajes
+                    .join(ultimo, ultimo.id_mensaje == ultimo_id)
+                    .outerjoin(
+                        ConversacionNoLeidos,
+                        and_(
+                            ConversacionNoLeidos.usuario_id == usuario_id,
+                            ConversacionNoLeidos.conversacion_id == Conversacion.id_conversacion
+                        )
+                    )
+                    .outerjoin(Usuario, Usuario.id_usuario == otro_usuario_id)
+                    .filter(
+                        or_(
+                            Conversacion.usuario1_id == usuario_id,
+                            Conversacion.usuario2_id == usuario_id
+                        ),
+                        Conversacion.id_estatus == self.__status_active__
+                    )
+            )
+            
+            if despues_de is not None:
+                fecha_cursor, id_cursor = despues_de
+                query = query.filter(
+                    or_(
+                        fecha_orden < fecha_cursor,
+                        and_(fecha_orden == fecha_cursor, Conversacion.id_conversacion < id_cursor)
+                    )
+                )
+            
+            query = query.order_by(fecha_orden.desc(), Conversacion.id_conversacion.desc())
+            if skip:
+                query = query.offset(skip)
+            
+            return query.limit(limit).all()
+        except SQLAlchemyError as e:
+            raise e
+    
     def get_by_cliente(self, cliente_id: int) -> List[Conversacion]:
         """
         Obtiene todas las conversaciones de un cliente
@@ -221,6 +327,8 @@ class ConversacionDAO:
         """
         Archiva una conversación (cambia estatus a archivada)
         
+        Sus mensajes pendientes dejan de contar en el total de no leídos de los participantes.
+        
         Args:
             id_conversacion (int): ID de la conversación
             
@@ -230,6 +338,8 @@ class ConversacionDAO:
         try:
             conversacion = self.get_by_id(id_conversacion)
             if conversacion:
+                if conversacion.id_estatus != self.__status_archived__:
+                    ContadorNoLeidosDAO(self.db).eliminar_conversacion(id_conversacion)
                 conversacion.id_estatus = self.__status_archived__
                 self.db.commit()
                 self.db.refresh(conversacion)
@@ -251,6 +361,8 @@ class ConversacionDAO:
         try:
             conversacion = self.get_by_id(id_conversacion)
             if conversacion:
+                if conversacion.id_estatus != self.__status_archived__:
+                    ContadorNoLeidosDAO(self.db).eliminar_conversacion(id_conversacion)
                 conversacion.id_estatus = self.__status_archived__
                 self.db.commit()
                 return True
@@ -6,10 +6,11 @@ Maneja todas las interacciones con la base de datos para la entidad Mensaje
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_
 from datetime import datetime
 from models.mensajeria.mensaje_model import Mensaje
 from models.mensajeria.conversacion_model import Conversacion
+from dao.mensajeria.dao_contador_no_leidos import ContadorNoLeidosDAO
 
 
 class MensajeDAO:
@@ -30,13 +31,16 @@ class MensajeDAO:
             db_session (Session): Sesión de SQLAlchemy para operaciones de BD
         """
         self.db = db_session
+        self.contador_dao = ContadorNoLeidosDAO(db_session)
     
-    def create(self, mensaje_data: dict) -> Mensaje:
+    def create(self, mensaje_data: dict, destinatario_id: Optional[int] = None) -> Mensaje:
         """
         Crea un nuevo mensaje en la base de datos
         
         Args:
             mensaje_data (dict): Datos del mensaje a crear
+            destinatario_id (Optional[int]): Si se indica, se incrementan sus contadores de
+                no leídos en la misma transacción que el INSERT del mensaje
             
         Returns:
             Mensaje: Objeto Mensaje creado con ID asignado
@@ -53,6 +57,8 @@ class MensajeDAO:
             db_mensaje = Mensaje(**mensaje_dict)
             
             self.db.add(db_mensaje)
+            if destinatario_id is not None and db_mensaje.id_estatus == self.__status_enviado__:
+                self.contador_dao.incrementar(destinatario_id, db_mensaje.conversacion_id)
             self.db.commit()
             self.db.refresh(db_mensaje)
             
@@ -139,7 +145,8 @@ class MensajeDAO:
     
     def contar_no_leidos_usuario(self, usuario_id: int) -> int:
         """
-        Cuenta los mensajes no leídos de todas las conversaciones de un usuario
+        Cuenta los mensajes no leídos de todas las conversaciones activas de un usuario
+        (lee el contador desnormalizado, una fila por PK)
         
         Args:
             usuario_id (int): ID del usuario
@@ -147,47 +154,19 @@ class MensajeDAO:
         Returns:
             int: Cantidad de mensajes no leídos
         """
-        try:
-            # Obtener IDs de conversaciones donde el usuario participa
-            conversaciones = (
-                self.db.query(Conversacion.id_conversacion)
-                    .filter(
-                        or_(
-                            Conversacion.usuario1_id == usuario_id,
-                            Conversacion.usuario2_id == usuario_id
-                        ),
-                        Conversacion.id_estatus == 1
-                    )
-                    .all()
-            )
-            
-            conversacion_ids = [c[0] for c in conversaciones]
-            
-            if not conversacion_ids:
-                return 0
-            
-            # Contar mensajes no leídos donde el usuario NO es el remitente
-            count = (
-                self.db.query(func.count(Mensaje.id_mensaje))
-                    .filter(
-                        Mensaje.conversacion_id.in_(conversacion_ids),
-                        Mensaje.remitente_id != usuario_id,
-                        Mensaje.fecha_leido.is_(None),
-                        Mensaje.id_estatus == self.__status_enviado__
-                    )
-                    .scalar()
-            )
-            
-            return count or 0
-        except SQLAlchemyError as e:
-            raise e
+        return self.contador_dao.get_total(usuario_id)
     
-    def marcar_leido(self, id_mensaje: int) -> Optional[Mensaje]:
+    def marcar_leido(self, id_mensaje: int, usuario_id: Optional[int] = None) -> Optional[Mensaje]:
         """
         Marca un mensaje como leído
         
+        La actualización es condicional (solo si aún no estaba leído), de modo que dos
+        lecturas simultáneas no descuentan el mismo mensaje dos veces.
+        
         Args:
             id_mensaje (int): ID del mensaje
+            usuario_id (Optional[int]): ID del destinatario; si se indica se descuenta
+                de sus contadores de no leídos
             
         Returns:
             Optional[Mensaje]: Mensaje actualizado o None si no existe
@@ -195,8 +174,22 @@ class MensajeDAO:
         try:
             mensaje = self.get_by_id(id_mensaje)
             if mensaje and mensaje.fecha_leido is None:
-                mensaje.fecha_leido = datetime.now()
-                mensaje.id_estatus = self.__status_leido__
+                filas = (
+                    self.db.query(Mensaje)
+                        .filter(
+                            Mensaje.id_mensaje == id_mensaje,
+                            Mensaje.fecha_leido.is_(None)
+                        )
+                        .update(
+                            {
+                                Mensaje.fecha_leido: datetime.now(),
+                                Mensaje.id_estatus: self.__status_leido__
+                            },
+                            synchronize_session=False
+                        )
+                )
+                if filas and usuario_id is not None and mensaje.id_estatus == self.__status_enviado__:
+                    self.contador_dao.descontar(usuario_id, mensaje.conversacion_id, filas)
                 self.db.commit()
                 self.db.refresh(mensaje)
             return mensaje
@@ -208,6 +201,9 @@ class MensajeDAO:
         """
         Marca todos los mensajes no leídos de una conversación como leídos
         
+        Un solo UPDATE masivo; la cantidad de filas afectadas se descuenta de los
+        contadores del usuario en la misma transacción.
+        
         Args:
             conversacion_id (int): ID de la conversación
             usuario_id (int): ID del usuario (solo marca mensajes que no son suyos)
@@ -216,14 +212,25 @@ class MensajeDAO:
             int: Cantidad de mensajes marcados como leídos
         """
         try:
-            mensajes_no_leidos = self.get_no_leidos(conversacion_id, usuario_id)
-            count = 0
-            for mensaje in mensajes_no_leidos:
-                mensaje.fecha_leido = datetime.now()
-                mensaje.id_estatus = self.__status_leido__
-                count += 1
+            count = (
+                self.db.query(Mensaje)
+                    .filter(
+                        Mensaje.conversacion_id == conversacion_id,
+                        Mensaje.remitente_id != usuario_id,
+                        Mensaje.fecha_leido.is_(None),
+                        Mensaje.id_estatus == self.__status_enviado__
+                    )
+                    .update(
+                        {
+                            Mensaje.fecha_leido: datetime.now(),
+                            Mensaje.id_estatus: self.__status_leido__
+                        },
+                        synchronize_session=False
+                    )
+            )
             
             if count > 0:
+                self.contador_dao.descontar(usuario_id, conversacion_id, count)
                 self.db.commit()
             
             return count
@@ -244,6 +251,18 @@ class MensajeDAO:
         try:
             mensaje = self.get_by_id(id_mensaje)
             if mensaje:
+                if mensaje.id_estatus == self.__status_enviado__ and mensaje.fecha_leido is None:
+                    # Un mensaje pendiente que se elimina deja de contar como no leído
+                    conversacion = self.db.query(Conversacion).filter(
+                        Conversacion.id_conversacion == mensaje.conversacion_id
+                    ).first()
+                    if conversacion:
+                        destinatario_id = (
+                            conversacion.usuario2_id
+                            if mensaje.remitente_id == conversacion.usuario1_id
+                            else conversacion.usuario1_id
+                        )
+                        self.contador_dao.descontar(destinatario_id, mensaje.conversacion_id, 1)
                 mensaje.id_estatus = self.__status_eliminado__
                 self.db.commit()
                 return True
@@ -0,0 +1,7 @@
+"""
+DAO para módulo de notificaciones
+"""
+
+from .dao_notificacion_pendiente import NotificacionPendienteDAO
+
+__all__ = ["NotificacionPendienteDAO"]
@@ -0,0 +1,168 @@
+"""
+DAO (Data Access Object) para la cola persistente de notificaciones push
+"""
+
+from datetime import datetime
+from typing import Iterable, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from models.notificaciones.notificacion_pendiente_model import NotificacionPendiente
+
+
+class NotificacionPendienteDAO:
+    """
+    Clase DAO para manejar la tabla NOTIFICACIONES.Tb_notificacion_pendiente
+    """
+    
+    def __init__(self, db_session: Session):
+        """
+        Inicializa el DAO con una sesión de base de datos
+        
+        Args:
+            db_session (Session): Sesión de SQLAlchemy para operaciones de BD
+        """
+        self.db = db_session
+    
+    def create(self, tipo: str, destinatario: str, payload: str, bloqueado_hasta: datetime) -> NotificacionPendiente:
+        """
+        Registra una notificación pendiente reservada por el proceso actual
+        """
+        try:
+            notificacion = NotificacionPendiente(
+                tipo=tipo,
+                destinatario=destinatario,
+                payload=payload,
+                estado='pending',
+                intentos=0,
+                fecha_creacion=datetime.utcnow(),
+                fecha_proximo_intento=datetime.utcnow(),
+                bloqueado_hasta=bloqueado_hasta
+            )
+            self.db.add(notificacion)
+            self.db.commit()
+            self.db.refresh(notificacion)
+            return notificacion
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise e
+    
+    def marcar_enviadas(self, ids: Iterable[int]) -> int:
+        """
+        Marca notificaciones como enviadas
+        """
+        return self._actualizar(ids, estado='sent', bloqueado_hasta=None, error_mensaje=None)
+    
+    def marcar_fallidas(self, ids: Iterable[int], intentos: int, error: str) -> int:
+        """
+        Marca notificaciones como fallidas definitivamente
+        """
+        return self._actualizar(ids, estado='failed', intentos=intentos, bloqueado_hasta=None, error_mensaje=error)
+    
+    def reprogramar(self, ids: Iterable[int], intentos: int, proximo_intento: datetime,
+                    bloqueado_hasta: datetime, error: Optional[str] = None) -> int:
+        """
+        Registra un reintento programado (la notificación sigue reservada por este proceso)
+        """
+        return self._actualizar(
+            ids,
+            intentos=intentos,
+            fecha_proximo_intento=proximo_intento,
+            bloqueado_hasta=bloqueado_hasta,
+            error_mensaje=error
+        )
+    
+    def reclamar_vencidas(self, bloqueado_hasta: datetime, limit: int = 100) -> List[NotificacionPendiente]:
+        """
+        Reserva para este proceso las notificaciones pendientes cuya reserva venció
+        (su proceso dueño se detuvo). La reserva es condicional fila por fila para que
+        dos procesos no tomen la misma notificación.
+        
+        Returns:
+            List[NotificacionPendiente]: Notificaciones reclamadas
+        """
+        ahora = datetime.utcnow()
+        try:
+            candidatas = (
+                self.db.query(NotificacionPendiente)
+                .filter(
+                    NotificacionPendiente.estado == 'pending',
+                    (NotificacionPendiente.bloqueado_hasta.is_(None)) |
+                    (NotificacionPendiente.bloqueado_hasta < ahora)
+                )
+                .order_by(NotificacionPendiente.id_notificacion)
+                .limit(limit)
+                .all()
+            )
+            reclamadas = []
+            for candidata in candidatas:
+                # Solo se reclama si nadie cambió la reserva desde la lectura
+                if candidata.bloqueado_hasta is None:
+                    misma_reserva = NotificacionPendiente.bloqueado_hasta.is_(None)
+                else:
+                    misma_reserva = NotificacionPendiente.bloqueado_hasta == candidata.bloqueado_hasta
+                filas = (
+                    self.db.query(NotificacionPendiente)
+                    .filter(
+                        NotificacionPendiente.id_notificacion == candidata.id_notificacion,
+                        NotificacionPendiente.estado == 'pending',
+                        misma_reserva
+                    )
+                    .update({"bloqueado_hasta": bloqueado_hasta}, synchronize_session=False)
+                )
+                if filas:
+                    reclamadas.append(candidata)
+            self.db.commit()
+            return reclamadas
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise e
+    
+    def eliminar_terminadas(self, antes_de: datetime, batch_size: int = 1000) -> int:
+        """
+        Elimina las notificaciones enviadas o fallidas creadas antes de antes_de
+        
+        Borra por lotes para no mantener bloqueos largos sobre la tabla.
+        
+        Returns:
+            int: Número de notificaciones eliminadas
+        """
+        eliminadas = 0
+        try:
+            while True:
+                ids = [
+                    fila[0] for fila in
+                    self.db.query(NotificacionPendiente.id_notificacion)
+                    .filter(
+                        NotificacionPendiente.estado.in_(['sent', 'failed']),
+                        NotificacionPendiente.fecha_creacion < antes_de
+                    )
+                    .limit(batch_size)
+                    .all()
+                ]
+                if not ids:
+                    return eliminadas
+                eliminadas += (
+                    self.db.query(NotificacionPendiente)
+                    .filter(NotificacionPendiente.id_notificacion.in_(ids))
+                    .delete(synchronize_session=False)
+                )
+                self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise e
+    
+    def _actualizar(self, ids: Iterable[int], **valores) -> int:
+        ids = list(ids)
+        if not ids:
+            return 0
+        try:
+            filas = (
+                self.db.query(NotificacionPendiente)
+                .filter(NotificacionPendiente.id_notificacion.in_(ids))
+                .update(valores, synchronize_session=False)
+            )
+            self.db.commit()
+            return filas
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise e
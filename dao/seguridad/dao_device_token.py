@@ -91,6 +91,53 @@ class DeviceTokenDAO:
         except SQLAlchemyError as e:
             raise e
     
+    def get_by_usuario_ids(self, usuario_ids: List[int]) -> List[DeviceToken]:
+        """
+        Obtener en una sola consulta los tokens activos de varios usuarios
+        
+        Args:
+            usuario_ids (List[int]): IDs de los usuarios
+            
+        Returns:
+            List[DeviceToken]: Lista de tokens activos
+        """
+        if not usuario_ids:
+            return []
+        try:
+            return self.db.query(DeviceToken).filter(
+                DeviceToken.usuario_id.in_(usuario_ids),
+                DeviceToken.activo == True
+            ).all()
+        except SQLAlchemyError as e:
+            raise e
+    
+    def deactivate_tokens(self, device_tokens: List[str]) -> int:
+        """
+        Desactivar tokens específicos (ej. los que FCM reporta como no registrados)
+        
+        Args:
+            device_tokens (List[str]): Tokens FCM a desactivar
+            
+        Returns:
+            int: Número de tokens desactivados
+        """
+        if not device_tokens:
+            return 0
+        try:
+            tokens_actualizados = self.db.query(DeviceToken).filter(
+                DeviceToken.device_token.in_(device_tokens),
+                DeviceToken.activo == True
+            ).update(
+                {"activo": False, "fecha_actualizacion": datetime.utcnow()},
+                synchronize_session=False
+            )
+            
+            self.db.commit()
+            return tokens_actualizados
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            raise e
+    
     def deactivate_by_usuario_id(self, usuario_id: int) -> bool:
         """
         Desactivar todos los tokens de un usuario (útil para logout)
@@ -179,6 +179,30 @@ class UsuarioAsignacionDAO:
         except SQLAlchemyError as e:
             raise e
     
+    def get_usuario_id_empleado_activo(self, empleado_id: int) -> Optional[int]:
+        """
+        Obtiene el usuario_id asociado a un empleado con asignación activa
+        
+        Args:
+            empleado_id (int): ID del empleado
+            
+        Returns:
+            Optional[int]: ID del usuario o None si no tiene asignación activa
+        """
+        try:
+            fila = (
+                self.db.query(UsuarioAsignacion.usuario_id)
+                .filter(
+                    UsuarioAsignacion.empleado_id == empleado_id,
+                    UsuarioAsignacion.tipo_asignacion == self.TIPO_EMPLEADO,
+                    UsuarioAsignacion.estatus == 1  # Activo
+                )
+                .first()
+            )
+            return fila.usuario_id if fila else None
+        except SQLAlchemyError as e:
+            raise e
+    
     def existe_asignacion_usuario(self, usuario_id: int) -> bool:
         """
         Verifica si un usuario ya tiene una asignación
@@ -1,9 +1,23 @@
+import logging
 from fastapi import FastAPI 
 from fastapi.middleware.cors import CORSMiddleware
-from core.config import Settings
+from core.config import Settings, ChatSettings
 from api.v1 import api_router
 from api.v1.routes_websocket import register_websocket_endpoint
 from core.database_connection import db_connection
+from core.executor import blocking_executor
+from core.password_hasher import password_hasher
+from services.notifications.notification_dispatcher import notification_dispatcher
+from services.notifications.fcm_sender import fcm_sender
+from services.reserva.cotizacion_pipeline import cotizacion_pipeline
+from utils.pdf_generator import quotation_renderer
+from services.email.smtp_pool import smtp_pool
+from services.email.email_outbox import email_outbox
+from services.seguridad.permisos_matrix import permisos_matrix
+from services.mensajeria.websocket_manager import websocket_manager
+from api.v1.routes_chat import chat_service
+
+logger = logging.getLogger(__name__)
 
 # Crear instancia de settings
 settings = Settings()
@@ -30,6 +44,91 @@ app.include_router(api_router, prefix=settings.api_version)
 # Registrar endpoint WebSocket
 register_websocket_endpoint(app)
 
+@app.on_event("startup")
+def start_notification_dispatcher():
+    """Inicia los workers de notificaciones push (y la recuperación de pendientes persistidas)"""
+    notification_dispatcher.start()
+
+
+@app.on_event("startup")
+def start_email_outbox():
+    """Inicia los workers del outbox de emails (envío, reintentos y limpieza de logs)"""
+    email_outbox.start()
+
+
+@app.on_event("startup")
+def load_permisos_matrix():
+    """Carga en memoria la matriz de permisos (módulos por rol y roles por usuario)"""
+    try:
+        permisos_matrix.reconstruir()
+    except Exception as e:
+        # No impedir el arranque: la matriz se carga en la primera consulta
+        logger.error(f"No se pudo cargar la matriz de permisos al iniciar: {e}")
+
+
+@app.on_event("startup")
+def warm_up_chat_documentation():
+    """Carga en segundo plano la documentación del asistente de IA (embeddings)"""
+    if ChatSettings.warmup_on_startup:
+        chat_service.warm_up()
+
+
+@app.on_event("startup")
+async def start_websocket_manager():
+    """Conecta el broker WebSocket entre workers (WS_BROKER_URL) y publica la presencia"""
+    await websocket_manager.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_websocket_manager():
+    """Retira la presencia de este worker y cierra las conexiones con el broker"""
+    await websocket_manager.stop()
+
+
+@app.on_event("shutdown")
+def shutdown_notification_dispatcher():
+    """Detiene los workers de notificaciones push y libera las conexiones con FCM"""
+    notification_dispatcher.shutdown()
+    fcm_sender.shutdown()
+
+
+@app.on_event("shutdown")
+def shutdown_cotizacion_pipeline():
+    """Espera las cotizaciones en curso antes de detener el servidor"""
+    cotizacion_pipeline.shutdown(wait=True)
+    quotation_renderer.shutdown(wait=False)
+
+
+@app.on_event("shutdown")
+def shutdown_email_outbox():
+    """Detiene los workers del outbox de emails esperando el lote en curso"""
+    email_outbox.shutdown()
+
+
+@app.on_event("shutdown")
+def shutdown_smtp_pool():
+    """Cierra las conexiones SMTP persistentes (después de terminar las cotizaciones y el outbox)"""
+    smtp_pool.shutdown()
+
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    """Detiene el pool de procesos de hashing de contraseñas"""
+    password_hasher.shutdown(wait=False)
+
+
+@app.on_event("shutdown")
+def shutdown_blocking_executor():
+    """Libera el pool de hilos de código bloqueante al detener el servidor"""
+    blocking_executor.shutdown(wait=False)
+
+
+@app.on_event("shutdown")
+async def shutdown_async_database():
+    """Cierra el pool del engine async de base de datos"""
+    await db_connection.close_async_connection()
+
+
 # Endpoint de bienvenida
 @app.get("/")
 def read_root():
@@ -40,7 +40,7 @@ class EmailLog(Base):
     variables_utilizadas = Column(JSON, nullable=True)
     
     # Estado del envío
-    estado_envio = Column(String(20), nullable=False, default='pending', index=True)  # pending, sent, failed, retry
+    estado_envio = Column(String(20), nullable=False, default='pending', index=True)  # pending, sending, sent, failed, retry
     fecha_envio = Column(DateTime(timezone=True), nullable=True)
     fecha_entrega = Column(DateTime(timezone=True), nullable=True)
     
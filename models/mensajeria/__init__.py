@@ -2,6 +2,7 @@
 from .conversacion_model import Conversacion
 from .mensaje_model import Mensaje
 from .mensaje_adjunto_model import MensajeAdjunto
+from .contador_no_leidos_model import ConversacionNoLeidos, UsuarioNoLeidos
 
-__all__ = ['Conversacion', 'Mensaje', 'MensajeAdjunto']
+__all__ = ['Conversacion', 'Mensaje', 'MensajeAdjunto', 'ConversacionNoLeidos', 'UsuarioNoLeidos']
 
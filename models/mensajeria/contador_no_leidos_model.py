@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from core.base import Base
+
+
+class ConversacionNoLeidos(Base):
+    """
+    Modelo SQLAlchemy para la tabla MENSAJERIA.Tb_ConversacionNoLeidos
+    Contador desnormalizado de mensajes no leídos por (usuario, conversación)
+    """
+    __tablename__ = "Tb_ConversacionNoLeidos"
+    __table_args__ = {'schema': 'MENSAJERIA'}
+    
+    # Campos de la tabla (PK compuesta: el usuario primero para leer todos sus contadores con un seek)
+    usuario_id = Column(Integer, ForeignKey('SEGURIDAD.Tb_usuario.id_usuario'), primary_key=True)
+    conversacion_id = Column(Integer, ForeignKey('MENSAJERIA.Tb_Conversacion.id_conversacion'), primary_key=True)
+    no_leidos = Column(Integer, nullable=False, default=0)
+    fecha_actualizacion = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<ConversacionNoLeidos(usuario_id={self.usuario_id}, conversacion_id={self.conversacion_id}, no_leidos={self.no_leidos})>"
+
+
+class UsuarioNoLeidos(Base):
+    """
+    Modelo SQLAlchemy para la tabla MENSAJERIA.Tb_UsuarioNoLeidos
+    Total de mensajes no leídos del usuario en sus conversaciones activas (badge)
+    """
+    __tablename__ = "Tb_UsuarioNoLeidos"
+    __table_args__ = {'schema': 'MENSAJERIA'}
+    
+    # Campos de la tabla
+    usuario_id = Column(Integer, ForeignKey('SEGURIDAD.Tb_usuario.id_usuario'), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    fecha_actualizacion = Column(DateTime, nullable=False)
+    
+    def __repr__(self):
+        return f"<UsuarioNoLeidos(usuario_id={self.usuario_id}, total={self.total})>"
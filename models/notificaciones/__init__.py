@@ -0,0 +1,8 @@
+"""
+Modelos para módulo de notificaciones
+Contiene la cola persistente de notificaciones push
+"""
+
+from .notificacion_pendiente_model import NotificacionPendiente
+
+__all__ = ["NotificacionPendiente"]
@@ -0,0 +1,32 @@
+"""
+Modelo SQLAlchemy para la cola persistente de notificaciones push
+Permite que las notificaciones encoladas sobrevivan a reinicios del servidor
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from core.base import Base
+from datetime import datetime
+
+
+class NotificacionPendiente(Base):
+    """
+    Modelo para la tabla NOTIFICACIONES.Tb_notificacion_pendiente
+    Cada fila es un evento de notificación (tipo + payload JSON) pendiente de despachar
+    """
+    __tablename__ = "Tb_notificacion_pendiente"
+    __table_args__ = {'schema': 'NOTIFICACIONES'}
+    
+    id_notificacion = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    tipo = Column(String(50), nullable=False)  # limpieza_asignada, transporte_iniciado, etc.
+    destinatario = Column(String(100), nullable=False, index=True)  # Clave de agrupación (ej: "empleado:12")
+    payload = Column(Text, nullable=False)  # JSON con los datos del evento
+    estado = Column(String(20), nullable=False, default='pending', index=True)  # pending, sent, failed
+    intentos = Column(Integer, nullable=False, default=0)
+    error_mensaje = Column(Text, nullable=True)
+    fecha_creacion = Column(DateTime, nullable=False, default=datetime.utcnow)
+    fecha_proximo_intento = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Mientras no venza, la notificación pertenece al proceso que la encoló
+    bloqueado_hasta = Column(DateTime, nullable=True, index=True)
+    
+    def __repr__(self):
+        return f"<NotificacionPendiente(id_notificacion={self.id_notificacion}, tipo='{self.tipo}', estado='{self.estado}')>"
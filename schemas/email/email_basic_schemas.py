@@ -67,12 +67,18 @@ class EmailResponseBasic(BaseModel):
         description="Mensaje de error si falló"
     )
     
+    log_id: Optional[int] = Field(
+        None,
+        description="ID del log en EMAIL.Tb_email_log cuando el email quedó encolado en el outbox"
+    )
+    
     class Config:
         json_schema_extra = {
             "example": {
                 "success": True,
                 "message": "Email enviado exitosamente",
                 "fecha_envio": "2024-01-15T10:30:00Z",
-                "error": None
+                "error": None,
+                "log_id": None
             }
         }
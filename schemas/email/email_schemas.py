@@ -24,6 +24,7 @@ class EmailStatus(str, Enum):
     Estados posibles de un email
     """
     PENDING = "pending"
+    SENDING = "sending"
     SENT = "sent"
     DELIVERED = "delivered"
     FAILED = "failed"
@@ -10,7 +10,9 @@ from .conversacion_schema import (
 )
 from .mensaje_schema import (
     MensajeCreate,
-    MensajeResponse
+    MensajeResponse,
+    ConversacionNoLeidosResponse,
+    ContadorNoLeidosResponse
 )
 from .mensaje_adjunto_schema import (
     MensajeAdjuntoResponse
@@ -34,6 +36,8 @@ __all__ = [
     'ConversacionListResponse',
     'UsuarioDisponibleResponse',
     'MensajeCreate',
-    'MensajeResponse'
+    'MensajeResponse',
+    'ConversacionNoLeidosResponse',
+    'ContadorNoLeidosResponse'
 ]
 
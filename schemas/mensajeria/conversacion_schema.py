@@ -65,6 +65,7 @@ class ConversacionListResponse(BaseModel):
     otro_usuario_id: Optional[int] = None
     otro_usuario_nombre: Optional[str] = None
     otro_usuario_foto: Optional[str] = None
+    cursor: Optional[str] = Field(None, description="Cursor para pedir la página siguiente del inbox")
     
     class Config:
         from_attributes = True
@@ -31,3 +31,18 @@ class MensajeLeidoUpdate(BaseModel):
     """Schema para marcar mensaje como leído"""
     mensaje_id: int = Field(..., description="ID del mensaje a marcar como leído")
 
+
+
+class ConversacionNoLeidosResponse(BaseModel):
+    """Schema con el contador de no leídos de una conversación"""
+    conversacion_id: int
+    no_leidos: int
+
+
+class ContadorNoLeidosResponse(BaseModel):
+    """Schema de respuesta del contador de mensajes no leídos del usuario"""
+    contador_no_leidos: int = Field(..., description="Total de mensajes no leídos en conversaciones activas")
+    conversaciones: Optional[List[ConversacionNoLeidosResponse]] = Field(
+        None,
+        description="Conversaciones con mensajes no leídos (solo si se solicita el detalle)"
+    )
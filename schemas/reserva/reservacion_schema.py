@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from ..hotel.habitacion_area_schema import HabitacionAreaResponse
 from ..cliente.cliente_response import ClienteResponse
 
@@ -40,3 +40,15 @@ class HabitacionReservadaResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class CotizacionEstadoResponse(BaseModel):
+    id_reservacion: int
+    estado: str  # pendiente, en_proceso, completada, fallida
+    email: Optional[str] = None  # enviado, fallido, omitido
+    push: Optional[str] = None  # encolado, fallido, omitido
+    error: Optional[str] = None
+    fecha_encolado: Optional[datetime] = None
+    fecha_inicio: Optional[datetime] = None
+    fecha_fin: Optional[datetime] = None
+
+class CotizacionLoteRequest(BaseModel):
+    ids_reservacion: List[int]  # Reservaciones de un grupo o evento
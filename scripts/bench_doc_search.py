@@ -0,0 +1,91 @@
+"""
+Microbenchmark de la búsqueda de documentación del asistente
+
+Compara el ranking por similitud coseno en Python puro (un bucle por chunk, como lo
+hacía search_relevant_docs) con el índice vectorial de services.ai.embedding_index
+(matriz normalizada + producto matriz-vector + argpartition) para distintos tamaños de
+documentación. Usa embeddings aleatorios; no llama a la API de embeddings.
+
+Uso:
+    python scripts/bench_doc_search.py [--chunks 100,1000,5000] [--dim 1536] [--consultas 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+# El cliente de OpenAI exige una clave aunque el benchmark no llama a la API
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+
+from services.ai.documentation_service import DocumentationService  # noqa: E402
+from services.ai.embedding_index import EmbeddingIndex  # noqa: E402
+
+
+def _vector(rng: random.Random, dim: int):
+    return [rng.uniform(-1, 1) for _ in range(dim)]
+
+
+def _ranking_lineal(service: DocumentationService, query, documents, top_k: int):
+    scored = [
+        {'content': doc['content'], 'file': doc['file'], 'score': service._cosine_similarity(query, doc['embedding'])}
+        for doc in documents
+    ]
+    scored.sort(key=lambda x: x['score'], reverse=True)
+    return scored[:top_k]
+
+
+def _medir(funcion, consultas):
+    inicio = time.perf_counter()
+    resultados = [funcion(q) for q in consultas]
+    return (time.perf_counter() - inicio) / len(consultas) * 1000, resultados
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", default="100,1000,5000", help="Tamaños de documentación (chunks) separados por coma")
+    parser.add_argument("--dim", type=int, default=1536, help="Dimensión de los embeddings")
+    parser.add_argument("--consultas", type=int, default=20, help="Consultas por escenario")
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    consultas = [_vector(rng, args.dim) for _ in range(args.consultas)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = DocumentationService(docs_folder=tmp)
+        service.embeddings_index_file = str(Path(tmp) / "bench_embeddings.npy")
+
+        print(f"{'chunks':>8} {'python (ms)':>12} {'numpy (ms)':>11} {'mmap (ms)':>10} {'construir (ms)':>15} {'speedup':>8}")
+        for total in [int(n) for n in args.chunks.split(",")]:
+            documents = [
+                {'id': f"doc_{i}", 'file': f"doc_{i % 10}.md", 'content': f"chunk {i}", 'embedding': _vector(rng, args.dim)}
+                for i in range(total)
+            ]
+
+            lineal_ms, esperados = _medir(lambda q: _ranking_lineal(service, q, documents, args.top_k), consultas)
+
+            inicio = time.perf_counter()
+            service._get_index(documents)
+            construir_ms = (time.perf_counter() - inicio) * 1000
+            numpy_ms, obtenidos = _medir(lambda q: service.rank_documents(q, documents, args.top_k), consultas)
+
+            # Segunda carga: la matriz persistida se abre con memory-map
+            service._index = None
+            mmap_ms, _ = _medir(lambda q: service.rank_documents(q, documents, args.top_k), consultas)
+            assert isinstance(service._index, EmbeddingIndex)
+
+            for esperado, obtenido in zip(esperados, obtenidos):
+                assert [d['content'] for d in esperado] == [d['content'] for d in obtenido]
+
+            print(f"{total:>8} {lineal_ms:>12.2f} {numpy_ms:>11.3f} {mmap_ms:>10.3f} {construir_ms:>15.1f} {lineal_ms / numpy_ms:>7.0f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,82 @@
+"""
+Microbenchmark de logins por segundo (verificación Argon2)
+
+Mide cuántas verificaciones de contraseña por segundo sostiene un núcleo con los
+parámetros de Argon2 configurados y cuántas sostiene el pool de procesos de
+core.password_hasher con N workers bajo carga concurrente.
+
+Uso:
+    python scripts/bench_password_hash.py [--logins 200] [--concurrencia 32]
+
+Los parámetros se toman de las mismas variables de entorno que la app
+(ARGON2_TIME_COST, ARGON2_MEMORY_COST, ARGON2_PARALLELISM, PASSWORD_HASH_WORKERS).
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.password_hasher import _verify_and_update, password_hasher  # noqa: E402
+
+PASSWORD = "Benchmark#2024"
+
+
+def _medir(etiqueta: str, total: int, funcion) -> float:
+    inicio = time.perf_counter()
+    funcion()
+    duracion = time.perf_counter() - inicio
+    por_segundo = total / duracion
+    print(f"{etiqueta:<34} {total:>6} logins en {duracion:7.2f} s -> {por_segundo:8.1f} logins/s")
+    return por_segundo
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200, help="Verificaciones a ejecutar por escenario")
+    parser.add_argument("--concurrencia", type=int, default=32, help="Peticiones simultáneas contra el pool")
+    args = parser.parse_args(argv)
+
+    stats = password_hasher.stats()
+    parametros = (stats["time_cost"], stats["memory_cost"], stats["parallelism"])
+    print(
+        f"Argon2 time_cost={parametros[0]} memory_cost={parametros[1]} KiB "
+        f"parallelism={parametros[2]} | workers del pool={stats['workers']}"
+    )
+
+    hashed = password_hasher.hash(PASSWORD)
+
+    # 1 núcleo: verificación en el hilo actual, sin pool
+    por_nucleo = _medir(
+        "1 núcleo (en línea)",
+        args.logins,
+        lambda: [_verify_and_update(PASSWORD, hashed, parametros) for _ in range(args.logins)]
+    )
+
+    # Pool de procesos con peticiones concurrentes (como varias rutas de login a la vez)
+    def _pool():
+        with ThreadPoolExecutor(max_workers=args.concurrencia) as hilos:
+            resultados = list(hilos.map(lambda _: password_hasher.verify(PASSWORD, hashed), range(args.logins)))
+        assert all(resultados)
+
+    password_hasher.verify(PASSWORD, hashed)  # arrancar los procesos fuera de la medición
+    total_pool = _medir(f"pool ({stats['workers']} procesos, {args.concurrencia} conc.)", args.logins, _pool)
+
+    workers = max(1, stats["workers"])
+    print(f"{'por worker del pool':<34} {'':>6}                         {total_pool / workers:8.1f} logins/s")
+    print(f"{'escalamiento vs 1 núcleo':<34} {'':>6}                         {total_pool / por_nucleo:8.2f}x")
+
+    final = password_hasher.stats()
+    print(f"latencia promedio {final['avg_ms']} ms, máxima {final['max_ms']} ms, "
+          f"máximo en curso {final['max_in_flight']}, rechazos {final['rejected']}")
+
+    password_hasher.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
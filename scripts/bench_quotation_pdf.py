@@ -0,0 +1,87 @@
+"""
+Microbenchmark de PDFs de cotización por segundo
+
+Compara la generación de cotizaciones reconstruyendo los estilos en cada PDF (como lo
+hacía generate_quotation_pdf), con la plantilla construida una vez por proceso, en lote
+con el pool de procesos de QuotationRenderer y reenviando cotizaciones ya generadas
+(caché por hash de contenido).
+
+Uso:
+    python scripts/bench_quotation_pdf.py [--cotizaciones 60]
+
+El número de procesos del lote se toma de COTIZACION_PDF_BATCH_WORKERS (0 = CPUs).
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+import utils.pdf_generator as pdf_generator  # noqa: E402
+from utils.pdf_generator import QuotationData, quotation_renderer, render_quotation_pdf  # noqa: E402
+
+
+def _cotizacion(i: int) -> QuotationData:
+    return QuotationData(
+        codigo_reservacion=f"RES-{i:06d}",
+        fecha_entrada="15/03/2025",
+        fecha_salida="18/03/2025",
+        duracion_dias=3,
+        hotel_nombre="Hotel InnPulse Centro",
+        hotel_direccion="Av. Reforma 123, Ciudad de México",
+        hotel_telefono="55 1234 5678",
+        hotel_email="reservas@innpulse360.com",
+        habitacion_nombre=f"Habitación {100 + i % 50}",
+        habitacion_descripcion="Habitación doble con vista a la ciudad",
+        tipo_habitacion="Doble",
+        cliente_nombre=f"Huésped del grupo {i}",
+        cliente_rfc="XAXX010101000",
+        cliente_identificacion="INE",
+        cliente_email=f"huesped{i}@example.com",
+        precio_unitario=1250.0,
+        periodicidad_nombre="Por noche",
+        precio_total=3750.0 + i
+    )
+
+
+def _medir(etiqueta: str, total: int, funcion) -> float:
+    inicio = time.perf_counter()
+    funcion()
+    duracion = time.perf_counter() - inicio
+    por_segundo = total / duracion
+    print(f"{etiqueta:<36} {total:>5} PDFs en {duracion:7.2f} s -> {por_segundo:8.1f} PDFs/s")
+    return por_segundo
+
+
+def main(argv) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cotizaciones", type=int, default=60, help="Cotizaciones por escenario")
+    args = parser.parse_args(argv)
+    n = args.cotizaciones
+
+    def _estilos_por_pdf():
+        for i in range(n):
+            pdf_generator._plantilla = None
+            render_quotation_pdf(_cotizacion(i))
+
+    base = _medir("estilos reconstruidos en cada PDF", n, _estilos_por_pdf)
+    plantilla = _medir("plantilla construida una vez", n, lambda: [render_quotation_pdf(_cotizacion(i)) for i in range(n)])
+
+    # Arrancar los procesos fuera de la medición
+    quotation_renderer.render_batch([_cotizacion(-i) for i in range(1, 3)])
+    workers = quotation_renderer.workers
+    lote = _medir(f"lote ({workers} procesos)", n, lambda: quotation_renderer.render_batch([_cotizacion(i) for i in range(n)]))
+    cache = _medir("reenvío (caché por contenido)", n, lambda: [quotation_renderer.render(_cotizacion(i)) for i in range(n)])
+
+    print(f"plantilla vs estilos por PDF: {plantilla / base:.2f}x | lote: {lote / base:.2f}x | caché: {cache / base:.0f}x")
+    print(quotation_renderer.stats())
+
+    quotation_renderer.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,133 @@
+"""
+Verificador de rutas async que ejecutan I/O síncrono en el event loop
+
+Recorre los routers de api/v1 y reporta cada `async def` de ruta que invoca,
+sin `await`, métodos de dependencias inyectadas (servicios, DAOs, sesión de BD)
+o de instancias locales de *Service / *DAO. Esas llamadas deben pasar por
+core.executor.run_blocking o la ruta debe declararse con `def`.
+
+Uso:
+    python scripts/check_async_routes.py [ruta ...]
+
+Retorna código de salida 1 si encuentra llamadas bloqueantes.
+"""
+
+import ast
+import sys
+from pathlib import Path
+from typing import Iterator, List, Set, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PATHS = [ROOT_DIR / "api" / "v1"]
+
+ROUTE_METHODS = {"get", "post", "put", "patch", "delete", "options", "head", "api_route"}
+BLOCKING_CLASS_SUFFIXES = ("Service", "DAO", "Dao")
+BLOCKING_NAMES = {"db", "session"}
+
+
+def _is_route(func: ast.AsyncFunctionDef) -> bool:
+    """
+    Indica si la función está decorada como ruta (@router.get, @api_router.post, ...)
+    """
+    for decorator in func.decorator_list:
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if isinstance(target, ast.Attribute) and target.attr in ROUTE_METHODS:
+            return True
+    return False
+
+
+def _root_name(node: ast.AST) -> str:
+    """
+    Retorna el nombre base de una cadena de atributos (service.dao.get_by_id -> service)
+    """
+    while isinstance(node, (ast.Attribute, ast.Call)):
+        node = node.func if isinstance(node, ast.Call) else node.value
+    return node.id if isinstance(node, ast.Name) else ""
+
+
+def _blocking_names(func: ast.AsyncFunctionDef) -> Set[str]:
+    """
+    Nombres que apuntan a objetos bloqueantes dentro de la ruta:
+    parámetros con Depends(...) y variables locales creadas con *Service()/*DAO()
+    """
+    names = set(BLOCKING_NAMES)
+
+    args = func.args.args + func.args.kwonlyargs
+    defaults = [None] * (len(func.args.args) - len(func.args.defaults)) + list(func.args.defaults)
+    defaults += list(func.args.kw_defaults)
+    for arg, default in zip(args, defaults):
+        if (
+            isinstance(default, ast.Call)
+            and isinstance(default.func, ast.Name)
+            and default.func.id == "Depends"
+        ):
+            names.add(arg.arg)
+
+    for node in ast.walk(func):
+        if not isinstance(node, ast.Assign) or not isinstance(node.value, ast.Call):
+            continue
+        constructor = node.value.func
+        class_name = constructor.id if isinstance(constructor, ast.Name) else getattr(constructor, "attr", "")
+        if class_name.endswith(BLOCKING_CLASS_SUFFIXES):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    names.add(target.id)
+
+    return names
+
+
+def _sync_calls(func: ast.AsyncFunctionDef) -> Iterator[Tuple[int, str]]:
+    """
+    Genera (línea, llamada) por cada invocación bloqueante sin await dentro de la ruta
+    """
+    names = _blocking_names(func)
+    awaited = {id(node.value) for node in ast.walk(func) if isinstance(node, ast.Await)}
+    # En cadenas como db.query(...).filter(...).all() solo se reporta la llamada externa
+    chained = {
+        id(node.func.value) for node in ast.walk(func)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+    }
+
+    for node in ast.walk(func):
+        if not isinstance(node, ast.Call) or id(node) in awaited or id(node) in chained:
+            continue
+        if not isinstance(node.func, ast.Attribute):
+            continue
+        if _root_name(node.func) in names:
+            yield node.lineno, ast.unparse(node.func)
+
+
+def check_file(path: Path) -> List[str]:
+    """
+    Analiza un archivo de rutas y retorna los hallazgos formateados
+    """
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    findings = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.AsyncFunctionDef) and _is_route(node):
+            for lineno, call in sorted(_sync_calls(node)):
+                findings.append(
+                    f"{path.relative_to(ROOT_DIR)}:{lineno}: "
+                    f"ruta async '{node.name}' llama '{call}' de forma síncrona"
+                )
+    return findings
+
+
+def main(argv: List[str]) -> int:
+    paths = [Path(p).resolve() for p in argv] or DEFAULT_PATHS
+    files = []
+    for path in paths:
+        files.extend(sorted(path.glob("*.py")) if path.is_dir() else [path])
+
+    findings = []
+    for file in files:
+        findings.extend(check_file(file))
+
+    for finding in findings:
+        print(finding)
+    print(f"{len(findings)} llamada(s) bloqueante(s) en rutas async")
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
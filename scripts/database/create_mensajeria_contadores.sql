@@ -0,0 +1,85 @@
+-- Script para crear los contadores desnormalizados de mensajes no leídos
+-- Schema: MENSAJERIA (ejecutar después de create_mensajeria_tables.sql)
+-- Los contadores se mantienen desde la aplicación al enviar y al leer mensajes;
+-- el bloque final los inicializa a partir de Tb_Mensaje y puede re-ejecutarse para recalcularlos
+
+-- Tabla: Tb_ConversacionNoLeidos
+-- Mensajes no leídos de cada usuario en cada conversación activa
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[MENSAJERIA].[Tb_ConversacionNoLeidos]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [MENSAJERIA].[Tb_ConversacionNoLeidos] (
+        usuario_id INT NOT NULL,
+        conversacion_id INT NOT NULL,
+        no_leidos INT NOT NULL DEFAULT 0,
+        fecha_actualizacion DATETIME NOT NULL DEFAULT GETDATE(),
+        
+        -- PK con el usuario primero: los contadores de un usuario se leen con un seek
+        CONSTRAINT PK_ConversacionNoLeidos PRIMARY KEY (usuario_id, conversacion_id),
+        
+        -- Foreign Keys
+        CONSTRAINT FK_ConversacionNoLeidos_Usuario FOREIGN KEY (usuario_id) 
+            REFERENCES [SEGURIDAD].[Tb_usuario](id_usuario),
+        CONSTRAINT FK_ConversacionNoLeidos_Conversacion FOREIGN KEY (conversacion_id) 
+            REFERENCES [MENSAJERIA].[Tb_Conversacion](id_conversacion) ON DELETE CASCADE
+    )
+    
+    -- Índice para archivar una conversación (quita sus contadores)
+    CREATE INDEX IX_ConversacionNoLeidos_Conversacion ON [MENSAJERIA].[Tb_ConversacionNoLeidos](conversacion_id)
+    
+    EXEC sp_addextendedproperty 
+        @name = N'MS_Description', 
+        @value = N'Contador desnormalizado de mensajes no leídos por usuario y conversación', 
+        @level0type = N'SCHEMA', @level0name = N'MENSAJERIA',
+        @level1type = N'TABLE', @level1name = N'Tb_ConversacionNoLeidos'
+END
+GO
+
+-- Tabla: Tb_UsuarioNoLeidos
+-- Total de mensajes no leídos de cada usuario (badge de la app móvil)
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[MENSAJERIA].[Tb_UsuarioNoLeidos]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [MENSAJERIA].[Tb_UsuarioNoLeidos] (
+        usuario_id INT PRIMARY KEY,
+        total INT NOT NULL DEFAULT 0,
+        fecha_actualizacion DATETIME NOT NULL DEFAULT GETDATE(),
+        
+        -- Foreign Key
+        CONSTRAINT FK_UsuarioNoLeidos_Usuario FOREIGN KEY (usuario_id) 
+            REFERENCES [SEGURIDAD].[Tb_usuario](id_usuario)
+    )
+    
+    EXEC sp_addextendedproperty 
+        @name = N'MS_Description', 
+        @value = N'Total de mensajes no leídos por usuario en sus conversaciones activas', 
+        @level0type = N'SCHEMA', @level0name = N'MENSAJERIA',
+        @level1type = N'TABLE', @level1name = N'Tb_UsuarioNoLeidos'
+END
+GO
+
+-- Inicialización / recálculo desde Tb_Mensaje (no leído = estatus 1 sin fecha_leido,
+-- enviado por el otro participante de una conversación activa)
+BEGIN TRANSACTION
+
+DELETE FROM [MENSAJERIA].[Tb_ConversacionNoLeidos] WITH (TABLOCKX)
+DELETE FROM [MENSAJERIA].[Tb_UsuarioNoLeidos] WITH (TABLOCKX)
+
+INSERT INTO [MENSAJERIA].[Tb_ConversacionNoLeidos] (usuario_id, conversacion_id, no_leidos, fecha_actualizacion)
+SELECT
+    CASE WHEN m.remitente_id = c.usuario1_id THEN c.usuario2_id ELSE c.usuario1_id END,
+    m.conversacion_id,
+    COUNT(*),
+    GETDATE()
+FROM [MENSAJERIA].[Tb_Mensaje] m
+INNER JOIN [MENSAJERIA].[Tb_Conversacion] c ON c.id_conversacion = m.conversacion_id
+WHERE m.id_estatus = 1
+  AND m.fecha_leido IS NULL
+  AND c.id_estatus = 1
+GROUP BY CASE WHEN m.remitente_id = c.usuario1_id THEN c.usuario2_id ELSE c.usuario1_id END, m.conversacion_id
+
+INSERT INTO [MENSAJERIA].[Tb_UsuarioNoLeidos] (usuario_id, total, fecha_actualizacion)
+SELECT usuario_id, SUM(no_leidos), GETDATE()
+FROM [MENSAJERIA].[Tb_ConversacionNoLeidos]
+GROUP BY usuario_id
+
+COMMIT TRANSACTION
+GO
@@ -0,0 +1,33 @@
+-- Script para crear tablas del módulo de Notificaciones
+-- Schema: NOTIFICACIONES
+-- Solo es necesario si NOTIFICATIONS_PERSIST=true
+
+-- Crear schema si no existe
+IF NOT EXISTS (SELECT * FROM sys.schemas WHERE name = 'NOTIFICACIONES')
+BEGIN
+    EXEC('CREATE SCHEMA NOTIFICACIONES')
+END
+GO
+
+-- Tabla: Tb_notificacion_pendiente
+-- Cola persistente de notificaciones push despachadas por NotificationDispatcher
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[NOTIFICACIONES].[Tb_notificacion_pendiente]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [NOTIFICACIONES].[Tb_notificacion_pendiente] (
+        id_notificacion INT PRIMARY KEY IDENTITY(1,1),
+        tipo VARCHAR(50) NOT NULL, -- 'limpieza_asignada', 'transporte_iniciado', ...
+        destinatario VARCHAR(100) NOT NULL, -- Clave de agrupación, ej: 'empleado:12'
+        payload NVARCHAR(MAX) NOT NULL, -- JSON con los datos del evento
+        estado VARCHAR(20) NOT NULL DEFAULT 'pending', -- 'pending', 'sent', 'failed'
+        intentos INT NOT NULL DEFAULT 0,
+        error_mensaje NVARCHAR(MAX) NULL,
+        fecha_creacion DATETIME NOT NULL DEFAULT GETUTCDATE(),
+        fecha_proximo_intento DATETIME NOT NULL DEFAULT GETUTCDATE(),
+        bloqueado_hasta DATETIME NULL -- Reserva del proceso que la encoló
+    )
+    
+    -- Índices para la recuperación de pendientes
+    CREATE INDEX IX_NotificacionPendiente_Estado ON [NOTIFICACIONES].[Tb_notificacion_pendiente](estado, bloqueado_hasta)
+    CREATE INDEX IX_NotificacionPendiente_Destinatario ON [NOTIFICACIONES].[Tb_notificacion_pendiente](destinatario)
+END
+GO
@@ -0,0 +1,121 @@
+"""
+Servidor pub/sub local compatible con Redis para el broker WebSocket
+
+Implementa el subconjunto del protocolo de Redis que usa RedisBroker (SUBSCRIBE,
+UNSUBSCRIBE, PUBLISH, PING, AUTH, QUIT) para correr varios workers en una sola
+máquina o en desarrollo sin instalar Redis. En producción con varios hosts usar Redis.
+
+Uso:
+    python scripts/ws_pubsub_hub.py --unix /tmp/innpulse-ws.sock
+    python scripts/ws_pubsub_hub.py --host 127.0.0.1 --port 6390
+
+y en cada worker:
+    WS_BROKER_URL=unix:///tmp/innpulse-ws.sock   (o redis://127.0.0.1:6390)
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Set
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from services.mensajeria.websocket_broker import _comando, _leer_respuesta  # noqa: E402
+
+
+class PubSubHub:
+    """
+    Reparte cada PUBLISH a las conexiones suscritas al canal
+    """
+
+    def __init__(self):
+        self._suscriptores: Dict[bytes, Set[asyncio.StreamWriter]] = {}
+
+    def _respuesta_suscripcion(self, tipo: bytes, canal: bytes, total: int) -> bytes:
+        return b"*3\r\n$%d\r\n%s\r\n$%d\r\n%s\r\n:%d\r\n" % (len(tipo), tipo, len(canal), canal, total)
+
+    async def atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        canales: Set[bytes] = set()
+        try:
+            while True:
+                try:
+                    comando = await _leer_respuesta(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                if not isinstance(comando, list) or not comando:
+                    writer.write(b"-ERR comando invalido\r\n")
+                    continue
+                nombre = comando[0].upper()
+                args = comando[1:]
+                if nombre == b"PUBLISH" and len(args) == 2:
+                    canal, datos = args
+                    mensaje = _comando(b"message", canal, datos)
+                    receptores = list(self._suscriptores.get(canal, ()))
+                    for receptor in receptores:
+                        try:
+                            receptor.write(mensaje)
+                        except Exception:
+                            pass
+                    writer.write(b":%d\r\n" % len(receptores))
+                elif nombre == b"SUBSCRIBE" and args:
+                    for canal in args:
+                        canales.add(canal)
+                        self._suscriptores.setdefault(canal, set()).add(writer)
+                        writer.write(self._respuesta_suscripcion(b"subscribe", canal, len(canales)))
+                elif nombre == b"UNSUBSCRIBE":
+                    for canal in args or list(canales):
+                        canales.discard(canal)
+                        self._quitar(canal, writer)
+                        writer.write(self._respuesta_suscripcion(b"unsubscribe", canal, len(canales)))
+                elif nombre == b"PING":
+                    writer.write(b"+PONG\r\n")
+                elif nombre == b"AUTH":
+                    writer.write(b"+OK\r\n")
+                elif nombre == b"QUIT":
+                    writer.write(b"+OK\r\n")
+                    break
+                else:
+                    writer.write(b"-ERR comando no soportado '%s'\r\n" % nombre)
+                await writer.drain()
+        finally:
+            for canal in canales:
+                self._quitar(canal, writer)
+            writer.close()
+
+    def _quitar(self, canal: bytes, writer: asyncio.StreamWriter):
+        suscriptores = self._suscriptores.get(canal)
+        if suscriptores is not None:
+            suscriptores.discard(writer)
+            if not suscriptores:
+                del self._suscriptores[canal]
+
+
+async def main(argv) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--unix", help="Ruta del socket unix")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args(argv)
+
+    hub = PubSubHub()
+    if args.unix:
+        if os.path.exists(args.unix):
+            os.unlink(args.unix)
+        servidor = await asyncio.start_unix_server(hub.atender, path=args.unix)
+        print(f"Hub pub/sub escuchando en unix://{args.unix}")
+    else:
+        servidor = await asyncio.start_server(hub.atender, args.host, args.port)
+        print(f"Hub pub/sub escuchando en redis://{args.host}:{args.port}")
+    async with servidor:
+        await servidor.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(asyncio.run(main(sys.argv[1:])))
+    except KeyboardInterrupt:
+        pass
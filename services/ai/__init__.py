@@ -1,6 +1,9 @@
 # Servicios de IA para InnPulse360
 from .documentation_service import DocumentationService
+from .embedding_index import EmbeddingIndex
+from .chat_history import ChatHistoryStore, MemoryChatHistoryStore, FileChatHistoryStore
+from .answer_cache import AnswerCache
 from .chat_service import ChatService
 
-__all__ = ['DocumentationService', 'ChatService']
+__all__ = ['DocumentationService', 'EmbeddingIndex', 'ChatHistoryStore', 'MemoryChatHistoryStore', 'FileChatHistoryStore', 'AnswerCache', 'ChatService']
 
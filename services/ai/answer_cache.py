@@ -0,0 +1,225 @@
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+# Clave de una respuesta: pregunta normalizada + ids de los chunks recuperados
+AnswerKey = Tuple[str, Tuple[str, ...]]
+
+# Palabras (normalizadas) que remiten a mensajes anteriores de la conversación
+CONTEXT_WORDS = frozenset({
+    "eso", "esto", "ese", "esa", "esos", "esas", "estos", "estas", "aquel", "aquella",
+    "aquello", "anterior", "mismo", "misma", "dicho", "entonces", "tambien",
+    "dijiste", "mencionaste", "explicaste"
+})
+# Conectores que, al inicio, indican que la pregunta continúa la anterior ("¿y para cancelar?")
+CONTINUATION_WORDS = frozenset({"y", "pero", "o", "entonces"})
+# Preguntas más cortas que esto se consideran dependientes del contexto
+MIN_STANDALONE_WORDS = 3
+
+
+@dataclass
+class CachedAnswer:
+    """
+    Respuesta del asistente guardada en el caché
+    """
+    question: str
+    chunk_ids: Tuple[str, ...]
+    response: str
+    sources: List[str]
+    embedding: Optional[np.ndarray]
+    created_at: float
+
+
+class AnswerCache:
+    """
+    Caché de respuestas del asistente para preguntas frecuentes
+
+    Busca primero por pregunta normalizada exacta (sin llamar a la API de embeddings) y
+    luego por similitud: una pregunta con los mismos chunks recuperados y un embedding
+    con similitud coseno >= similarity_threshold reutiliza la respuesta. Las preguntas
+    idénticas en curso se resuelven con una sola llamada (single-flight).
+
+    clear() invalida todo (al recargar la documentación); las respuestas que estaban en
+    curso en ese momento no se guardan.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, similarity_threshold: float):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.similarity_threshold = similarity_threshold
+        self._entries: 'OrderedDict[AnswerKey, CachedAnswer]' = OrderedDict()
+        self._by_question: Dict[str, AnswerKey] = {}
+        self._by_chunks: Dict[Tuple[str, ...], Set[AnswerKey]] = {}
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._stats = {
+            "aciertos_exactos": 0,
+            "aciertos_similares": 0,
+            "fallos": 0,
+            "coalescidas": 0,
+            "invalidaciones": 0,
+            "vencidas": 0,
+            "desalojadas": 0
+        }
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        """Minúsculas, sin acentos, sin signos de puntuación y con espacios simples"""
+        text = unicodedata.normalize('NFKD', question.lower())
+        text = ''.join(c for c in text if not unicodedata.combining(c))
+        text = re.sub(r'[^\w\s]', ' ', text)
+        return ' '.join(text.split())
+
+    @staticmethod
+    def is_standalone(question: str) -> bool:
+        """
+        Si una pregunta normalizada se entiende sin la conversación previa (no empieza
+        con un conector ni usa referencias como "eso" o "lo anterior")
+        """
+        words = question.split()
+        if len(words) < MIN_STANDALONE_WORDS or words[0] in CONTINUATION_WORDS:
+            return False
+        return not any(word in CONTEXT_WORDS for word in words)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def _alive(self, entry: CachedAnswer, now: float) -> bool:
+        return self.ttl_seconds <= 0 or now - entry.created_at <= self.ttl_seconds
+
+    def _remove(self, key: AnswerKey):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        if self._by_question.get(entry.question) == key:
+            del self._by_question[entry.question]
+        keys = self._by_chunks.get(entry.chunk_ids)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_chunks[entry.chunk_ids]
+
+    def lookup_exact(self, question: str) -> Optional[CachedAnswer]:
+        """Respuesta para la misma pregunta normalizada"""
+        now = time.time()
+        with self._lock:
+            key = self._by_question.get(question)
+            entry = self._entries.get(key) if key is not None else None
+            if entry is not None and not self._alive(entry, now):
+                self._remove(key)
+                self._stats["vencidas"] += 1
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self._stats["aciertos_exactos"] += 1
+            return entry
+
+    def lookup_similar(self, chunk_ids: Tuple[str, ...], embedding: List[float]) -> Optional[CachedAnswer]:
+        """
+        Respuesta de una pregunta parecida que recuperó los mismos chunks; cuenta un
+        fallo si no hay ninguna
+        """
+        now = time.time()
+        query = self._normalize_vector(embedding)
+        with self._lock:
+            best, best_score = None, self.similarity_threshold
+            for key in list(self._by_chunks.get(chunk_ids, ())):
+                entry = self._entries[key]
+                if not self._alive(entry, now):
+                    self._remove(key)
+                    self._stats["vencidas"] += 1
+                    continue
+                if query is None or entry.embedding is None or entry.embedding.shape != query.shape:
+                    continue
+                score = float(entry.embedding @ query)
+                if score >= best_score:
+                    best, best_score = key, score
+            if best is None:
+                self._stats["fallos"] += 1
+                return None
+            self._entries.move_to_end(best)
+            self._stats["aciertos_similares"] += 1
+            return self._entries[best]
+
+    def store(self, question: str, chunk_ids: Tuple[str, ...], embedding: Optional[List[float]],
+              response: str, sources: List[str], generation: int):
+        """Guarda una respuesta si la documentación no se recargó mientras se generaba"""
+        key = (question, chunk_ids)
+        entry = CachedAnswer(question, chunk_ids, response, sources, self._normalize_vector(embedding), time.time())
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._remove(key)
+            self._entries[key] = entry
+            self._by_question[question] = key
+            self._by_chunks.setdefault(chunk_ids, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["desalojadas"] += 1
+
+    def single_flight(self, key: Hashable, compute: Callable[[], T]) -> T:
+        """
+        Ejecuta compute una sola vez por clave: las llamadas concurrentes con la misma
+        clave esperan y reciben el mismo resultado (o la misma excepción)
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self._stats["coalescidas"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            result = compute()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def clear(self):
+        """Invalida todas las respuestas (y las que estén generándose)"""
+        with self._lock:
+            self._entries.clear()
+            self._by_question.clear()
+            self._by_chunks.clear()
+            self._generation += 1
+            self._stats["invalidaciones"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entradas"] = len(self._entries)
+            stats["en_curso"] = len(self._in_flight)
+        consultas = stats["aciertos_exactos"] + stats["aciertos_similares"] + stats["fallos"]
+        stats["tasa_aciertos"] = round(
+            (stats["aciertos_exactos"] + stats["aciertos_similares"]) / consultas, 4
+        ) if consultas else 0.0
+        return stats
+
+    @staticmethod
+    def _normalize_vector(embedding: Optional[List[float]]) -> Optional[np.ndarray]:
+        if not embedding:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
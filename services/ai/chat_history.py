@@ -0,0 +1,294 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from core.config import ChatSettings
+
+# Bytes aproximados por mensaje además del contenido (dict, rol, contadores)
+MESSAGE_OVERHEAD_BYTES = 120
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimación de tokens de un mensaje (~4 caracteres por token más el formato del rol)
+    Suficiente para acotar el prompt sin depender de un tokenizador
+    """
+    return len(text) // 4 + 4
+
+
+@dataclass
+class ChatHistory:
+    """
+    Historial de un usuario con los tokens y bytes de cada mensaje ya calculados
+    """
+    messages: List[Dict] = field(default_factory=list)
+    tokens: List[int] = field(default_factory=list)
+    total_tokens: int = 0
+    size_bytes: int = 0
+    last_access: float = field(default_factory=time.time)
+
+    def append(self, message: Dict):
+        self.messages.append(message)
+        tokens = count_tokens(message['content'])
+        self.tokens.append(tokens)
+        self.total_tokens += tokens
+        self.size_bytes += len(message['content'].encode('utf-8')) + MESSAGE_OVERHEAD_BYTES
+
+    def trim(self, max_messages: int):
+        """Conserva solo los últimos max_messages mensajes"""
+        while len(self.messages) > max_messages:
+            message = self.messages.pop(0)
+            self.total_tokens -= self.tokens.pop(0)
+            self.size_bytes -= len(message['content'].encode('utf-8')) + MESSAGE_OVERHEAD_BYTES
+
+    def window(self, max_messages: int, max_tokens: int) -> List[Dict]:
+        """Mensajes más recientes que caben en max_messages y max_tokens"""
+        selected = 0
+        tokens = 0
+        for message_tokens in reversed(self.tokens):
+            if selected >= max_messages or (max_tokens > 0 and tokens + message_tokens > max_tokens):
+                break
+            tokens += message_tokens
+            selected += 1
+        return list(self.messages[len(self.messages) - selected:]) if selected else []
+
+    def to_dict(self) -> Dict:
+        return {'messages': self.messages, 'tokens': self.tokens, 'last_access': self.last_access}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ChatHistory':
+        history = cls(last_access=data.get('last_access', time.time()))
+        tokens = data.get('tokens') or []
+        for i, message in enumerate(data.get('messages', [])):
+            history.messages.append(message)
+            message_tokens = tokens[i] if i < len(tokens) else count_tokens(message['content'])
+            history.tokens.append(message_tokens)
+            history.total_tokens += message_tokens
+            history.size_bytes += len(message['content'].encode('utf-8')) + MESSAGE_OVERHEAD_BYTES
+        return history
+
+
+class ChatHistoryStore(ABC):
+    """
+    Almacén de historiales de conversación del asistente (interfaz)
+    """
+    backend = "base"
+
+    def __init__(self, max_messages: int, ttl_seconds: float):
+        self.max_messages = max(2, max_messages)
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def window(self, user_id: str, max_messages: int, max_tokens: int) -> List[Dict]:
+        """Últimos mensajes del usuario que caben en el límite de mensajes y tokens"""
+        ...
+
+    @abstractmethod
+    def append(self, user_id: str, messages: List[Dict]):
+        """Agrega mensajes al historial del usuario (recortado a max_messages)"""
+        ...
+
+    @abstractmethod
+    def clear(self, user_id: str):
+        """Elimina el historial del usuario"""
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Métricas del almacén"""
+        ...
+
+    def _expired(self, history: ChatHistory, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - history.last_access > self.ttl_seconds
+
+
+class MemoryChatHistoryStore(ChatHistoryStore):
+    """
+    Historiales en memoria con LRU, TTL por inactividad y presupuesto global de bytes
+
+    Al superar max_bytes se descartan los historiales usados hace más tiempo, así la
+    memoria del proceso no crece con el número de usuarios que han usado el asistente.
+    """
+    backend = "memory"
+
+    def __init__(self, max_messages: int, ttl_seconds: float, max_bytes: int):
+        super().__init__(max_messages, ttl_seconds)
+        self.max_bytes = max_bytes
+        self._histories: 'OrderedDict[str, ChatHistory]' = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self._evicted = 0
+        self._expired_count = 0
+
+    def _get(self, user_id: str, now: float) -> Optional[ChatHistory]:
+        history = self._histories.get(user_id)
+        if history is None:
+            return None
+        if self._expired(history, now):
+            self._remove(user_id)
+            self._expired_count += 1
+            return None
+        history.last_access = now
+        self._histories.move_to_end(user_id)
+        return history
+
+    def _remove(self, user_id: str):
+        history = self._histories.pop(user_id, None)
+        if history is not None:
+            self._size_bytes -= history.size_bytes
+
+    def _purge(self, now: float):
+        # Los menos usados están al inicio: primero vencidos, luego exceso de bytes
+        while self._histories:
+            user_id, history = next(iter(self._histories.items()))
+            if self._expired(history, now):
+                self._expired_count += 1
+            elif self.max_bytes > 0 and self._size_bytes > self.max_bytes and len(self._histories) > 1:
+                self._evicted += 1
+            else:
+                break
+            self._remove(user_id)
+
+    def window(self, user_id: str, max_messages: int, max_tokens: int) -> List[Dict]:
+        with self._lock:
+            history = self._get(user_id, time.time())
+            return history.window(max_messages, max_tokens) if history else []
+
+    def append(self, user_id: str, messages: List[Dict]):
+        now = time.time()
+        with self._lock:
+            history = self._get(user_id, now)
+            if history is None:
+                history = ChatHistory(last_access=now)
+                self._histories[user_id] = history
+            before = history.size_bytes
+            for message in messages:
+                history.append(message)
+            history.trim(self.max_messages)
+            self._size_bytes += history.size_bytes - before
+            self._purge(now)
+
+    def clear(self, user_id: str):
+        with self._lock:
+            self._remove(user_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "usuarios": len(self._histories),
+                "bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "desalojados": self._evicted,
+                "vencidos": self._expired_count
+            }
+
+
+class FileChatHistoryStore(ChatHistoryStore):
+    """
+    Historiales en archivos JSON (uno por usuario) en un directorio compartido
+
+    Permite que varios workers del mismo host (o con un volumen compartido) vean el mismo
+    historial. La memoria del proceso no depende del número de usuarios; los archivos
+    vencidos se eliminan al leerlos y en una limpieza periódica.
+    """
+    backend = "file"
+
+    def __init__(self, directory: str, max_messages: int, ttl_seconds: float, purge_interval_seconds: float = 600):
+        super().__init__(max_messages, ttl_seconds)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.purge_interval_seconds = purge_interval_seconds
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._expired_count = 0
+
+    def _path(self, user_id: str) -> Path:
+        name = hashlib.sha256(user_id.encode('utf-8')).hexdigest()
+        return self.directory / f"{name}.json"
+
+    def _read(self, user_id: str, now: float) -> Optional[ChatHistory]:
+        path = self._path(user_id)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                history = ChatHistory.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            return None
+        if self._expired(history, now):
+            self._expired_count += 1
+            path.unlink(missing_ok=True)
+            return None
+        return history
+
+    def _write(self, user_id: str, history: ChatHistory):
+        path = self._path(user_id)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(history.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def _purge(self, now: float):
+        if self.ttl_seconds <= 0 or now - self._last_purge < self.purge_interval_seconds:
+            return
+        self._last_purge = now
+        for path in self.directory.glob("*.json"):
+            try:
+                if now - path.stat().st_mtime > self.ttl_seconds:
+                    path.unlink(missing_ok=True)
+                    self._expired_count += 1
+            except OSError:
+                pass
+
+    def window(self, user_id: str, max_messages: int, max_tokens: int) -> List[Dict]:
+        history = self._read(user_id, time.time())
+        return history.window(max_messages, max_tokens) if history else []
+
+    def append(self, user_id: str, messages: List[Dict]):
+        now = time.time()
+        with self._lock:
+            history = self._read(user_id, now) or ChatHistory()
+            for message in messages:
+                history.append(message)
+            history.trim(self.max_messages)
+            history.last_access = now
+            self._write(user_id, history)
+            self._purge(now)
+
+    def clear(self, user_id: str):
+        self._path(user_id).unlink(missing_ok=True)
+
+    def stats(self) -> Dict:
+        files = list(self.directory.glob("*.json"))
+        return {
+            "backend": self.backend,
+            "usuarios": len(files),
+            "bytes": sum(path.stat().st_size for path in files if path.exists()),
+            "directorio": str(self.directory),
+            "vencidos": self._expired_count
+        }
+
+
+def crear_history_store(settings: ChatSettings) -> ChatHistoryStore:
+    """
+    Crea el almacén de historiales según CHAT_HISTORY_BACKEND ("memory" o "file")
+    """
+    if settings.history_backend == "file":
+        return FileChatHistoryStore(
+            settings.history_dir,
+            settings.history_max_messages,
+            settings.history_ttl_seconds
+        )
+    return MemoryChatHistoryStore(
+        settings.history_max_messages,
+        settings.history_ttl_seconds,
+        settings.history_max_bytes
+    )
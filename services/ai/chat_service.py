@@ -1,8 +1,41 @@
 import os
-from openai import OpenAI
-from typing import List, Dict, Optional
+import threading
+from openai import OpenAI, AsyncOpenAI
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
+from core.config import ChatSettings
+from core.executor import run_blocking
 from .documentation_service import DocumentationService
+from .chat_history import ChatHistoryStore, crear_history_store
+from .answer_cache import AnswerCache, CachedAnswer
+
+ERROR_RESPONSE = "Lo siento, hubo un error al procesar tu mensaje. Por favor intenta de nuevo."
+
+
+@dataclass
+class ChatTurn:
+    """
+    Datos de un mensaje ya resueltos antes de llamar a OpenAI (historial, documentos
+    recuperados y, si hubo acierto, la respuesta del caché)
+    """
+    message: str
+    historial: List[Dict]
+    cacheable: bool
+    question: str
+    cached: Optional[CachedAnswer] = None
+    query_embedding: List[float] = field(default_factory=list)
+    relevant_docs: List[Dict] = field(default_factory=list)
+    generation: int = 0
+
+    @property
+    def sources(self) -> List[str]:
+        return self.cached.sources if self.cached else [doc['file'] for doc in self.relevant_docs]
+
+    @property
+    def chunk_ids(self) -> Tuple[str, ...]:
+        return tuple(doc['id'] for doc in self.relevant_docs)
+
 
 class ChatService:
     def __init__(self):
@@ -10,13 +43,40 @@ class ChatService:
         if not api_key:
             raise ValueError("OPENAI_API_KEY no está configurada")
         self.client = OpenAI(api_key=api_key)
+        # Cliente async para las respuestas en streaming (no ocupa un hilo por generación)
+        self.async_client = AsyncOpenAI(api_key=api_key)
         
-        # Inicializar servicio de documentación
+        # Inicializar servicio de documentación; los documentos se cargan en warm_up()
+        # o en el primer mensaje, no al importar el módulo
         self.docs_service = DocumentationService()
-        self.documents = self.docs_service.load_documents()
+        self._documents: Optional[List[Dict]] = None
+        self._documents_lock = threading.Lock()
+        
+        # Historial de conversaciones (acotado: LRU + TTL + presupuesto de bytes, o archivos)
+        self.settings = ChatSettings()
+        self.history: ChatHistoryStore = crear_history_store(self.settings)
         
-        # Historial de conversaciones
-        self.conversations: Dict[str, List[Dict]] = {}
+        # Respuestas de preguntas frecuentes (se invalida al recargar la documentación)
+        self.answer_cache = AnswerCache(
+            self.settings.answer_cache_ttl_seconds,
+            self.settings.answer_cache_max_entries,
+            self.settings.answer_cache_similarity
+        )
+    
+    @property
+    def documents(self) -> List[Dict]:
+        """Documentos con embeddings; si aún no se cargaron, espera a la carga"""
+        if self._documents is None:
+            with self._documents_lock:
+                if self._documents is None:
+                    self._documents = self.docs_service.load_documents()
+        return self._documents
+    
+    def warm_up(self) -> threading.Thread:
+        """Carga la documentación en un hilo de fondo (los mensajes que lleguen antes la esperan)"""
+        thread = threading.Thread(target=lambda: self.documents, name="chat-docs-warmup", daemon=True)
+        thread.start()
+        return thread
     
     def get_system_prompt(self) -> str:
         """Define el contexto del asistente"""
@@ -30,85 +90,197 @@ IMPORTANTE:
 - Responde siempre de forma amigable, profesional y en español
 - Si te proporcionan contexto de documentación, úsalo para responder de manera precisa"""
 
+    def _build_messages(self, message: str, relevant_docs: List[Dict], historial: List[Dict]) -> List[Dict]:
+        """Mensajes para OpenAI: prompt de sistema, documentación, historial y pregunta"""
+        # Construir contexto de documentación
+        context = ""
+        if relevant_docs:
+            context = "\n\n--- DOCUMENTACIÓN RELEVANTE ---\n\n"
+            for i, doc in enumerate(relevant_docs, 1):
+                context += f"[Documento {i} - {doc['file']}]\n{doc['content']}\n\n"
+            context += "--- FIN DE DOCUMENTACIÓN ---\n\n"
+        
+        messages = [
+            {"role": "system", "content": self.get_system_prompt()}
+        ]
+        
+        # Agregar contexto de documentación si existe
+        if context:
+            messages.append({
+                "role": "system", 
+                "content": f"Usa la siguiente documentación para responder:\n{context}"
+            })
+        
+        # Agregar historial y mensaje actual del usuario
+        messages.extend(historial)
+        messages.append({"role": "user", "content": message})
+        return messages
+    
+    def _completion_args(self, turn: ChatTurn) -> Dict:
+        return {
+            "model": "gpt-3.5-turbo",
+            "messages": self._build_messages(turn.message, turn.relevant_docs, turn.historial),
+            "temperature": 0.7,
+            "max_tokens": 500
+        }
+    
+    def _complete(self, turn: ChatTurn) -> str:
+        """Llama a OpenAI y retorna la respuesta del asistente"""
+        response = self.client.chat.completions.create(**self._completion_args(turn))
+        return response.choices[0].message.content.strip()
+    
+    def _prepare_turn(self, user_id: str, message: str) -> ChatTurn:
+        """
+        Historial, caché de respuestas y búsqueda de documentos de un mensaje
+        
+        Las preguntas sin historial previo, y las que se entienden sin él aunque haya
+        conversación (ver AnswerCache.is_standalone), pasan por el caché de respuestas:
+        coincidencia exacta de la pregunta normalizada, o pregunta similar con los mismos
+        documentos recuperados. Si la búsqueda de documentos falla la respuesta no se cachea.
+        """
+        # Obtener historial de conversación (últimos mensajes dentro del límite de tokens)
+        historial = self.history.window(
+            user_id,
+            self.settings.history_prompt_messages,
+            self.settings.history_prompt_tokens
+        )
+        
+        # Las preguntas que dependen del historial no se cachean
+        question = AnswerCache.normalize(message)
+        turn = ChatTurn(
+            message=message,
+            historial=historial,
+            cacheable=self.settings.answer_cache_enabled and (not historial or AnswerCache.is_standalone(question)),
+            question=question,
+            generation=self.answer_cache.generation
+        )
+        if turn.cacheable:
+            turn.cached = self.answer_cache.lookup_exact(turn.question)
+            if turn.cached is not None:
+                return turn
+        
+        # Buscar documentos relevantes
+        documents = self.documents
+        turn.query_embedding = self.docs_service.embed_query(message) if documents else []
+        if turn.query_embedding:
+            turn.relevant_docs = self.docs_service.rank_documents(turn.query_embedding, documents, top_k=3)
+        
+        # Sin documentos recuperados (embedding fallido) la respuesta no es reutilizable
+        if not turn.relevant_docs:
+            turn.cacheable = False
+        
+        if turn.cacheable:
+            turn.cached = self.answer_cache.lookup_similar(turn.chunk_ids, turn.query_embedding)
+        return turn
+    
+    def _store_answer(self, turn: ChatTurn, assistant_response: str):
+        if turn.cacheable:
+            self.answer_cache.store(
+                turn.question, turn.chunk_ids, turn.query_embedding,
+                assistant_response, turn.sources, turn.generation
+            )
+    
+    def _reply(self, user_id: str, message: str, assistant_response: str, sources: List[str]) -> Dict:
+        """Guarda el intercambio en el historial y arma la respuesta"""
+        self.history.append(user_id, [
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": assistant_response}
+        ])
+        return {
+            "response": assistant_response,
+            "timestamp": datetime.now().isoformat(),
+            "sources": sources
+        }
+    
     def chat(self, user_id: str, message: str) -> Dict:
         """
         Procesa un mensaje del usuario usando RAG (Retrieval Augmented Generation).
+        
+        Usa el caché de respuestas (ver _prepare_turn); las preguntas iguales que llegan
+        a la vez comparten una sola llamada a OpenAI.
         """
         try:
-            # Buscar documentos relevantes
-            relevant_docs = self.docs_service.search_relevant_docs(message, self.documents, top_k=3)
-            
-            # Construir contexto de documentación
-            context = ""
-            if relevant_docs:
-                context = "\n\n--- DOCUMENTACIÓN RELEVANTE ---\n\n"
-                for i, doc in enumerate(relevant_docs, 1):
-                    context += f"[Documento {i} - {doc['file']}]\n{doc['content']}\n\n"
-                context += "--- FIN DE DOCUMENTACIÓN ---\n\n"
-            
-            # Obtener historial de conversación
-            if user_id not in self.conversations:
-                self.conversations[user_id] = []
-            
-            historial = self.conversations[user_id]
+            turn = self._prepare_turn(user_id, message)
+            if turn.cached is not None:
+                return self._reply(user_id, message, turn.cached.response, turn.sources)
             
-            # Construir mensajes para OpenAI
-            messages = [
-                {"role": "system", "content": self.get_system_prompt()}
-            ]
+            if not turn.cacheable:
+                return self._reply(user_id, message, self._complete(turn), turn.sources)
             
-            # Agregar contexto de documentación si existe
-            if context:
-                messages.append({
-                    "role": "system", 
-                    "content": f"Usa la siguiente documentación para responder:\n{context}"
-                })
+            def _generate() -> str:
+                assistant_response = self._complete(turn)
+                self._store_answer(turn, assistant_response)
+                return assistant_response
             
-            # Agregar historial (últimos 10 mensajes)
-            for msg in historial[-10:]:
-                messages.append(msg)
-            
-            # Agregar mensaje actual del usuario
-            messages.append({"role": "user", "content": message})
-            
-            # Llamar a OpenAI
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500
-            )
-            
-            assistant_response = response.choices[0].message.content.strip()
-            
-            # Guardar en historial
-            historial.append({"role": "user", "content": message})
-            historial.append({"role": "assistant", "content": assistant_response})
-            
-            # Limitar historial
-            if len(historial) > 20:
-                historial[:] = historial[-20:]
-            
-            return {
-                "response": assistant_response,
-                "timestamp": datetime.now().isoformat(),
-                "sources": [doc['file'] for doc in relevant_docs] if relevant_docs else []
-            }
+            assistant_response = self.answer_cache.single_flight((turn.question, turn.chunk_ids), _generate)
+            return self._reply(user_id, message, assistant_response, turn.sources)
             
         except Exception as e:
             return {
-                "response": "Lo siento, hubo un error al procesar tu mensaje. Por favor intenta de nuevo.",
+                "response": ERROR_RESPONSE,
                 "timestamp": datetime.now().isoformat(),
                 "error": str(e)
             }
     
+    async def chat_stream(self, user_id: str, message: str) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Variante en streaming de chat(): produce eventos (tipo, datos) a medida que
+        OpenAI genera la respuesta
+        
+        - ("sources", {"sources": [...]}) al terminar la búsqueda de documentos
+        - ("token", {"text": "..."}) por cada fragmento de la respuesta
+        - ("done", {"response", "timestamp", "sources"}) al final
+        - ("error", {"response", "error"}) si algo falla
+        
+        El historial y el caché de respuestas se actualizan solo si la respuesta se
+        completa. Si el cliente se desconecta, la tarea se cancela y se cierra la
+        conexión con OpenAI (la generación se detiene).
+        """
+        try:
+            # Historial, caché y embeddings usan clientes síncronos: fuera del event loop
+            turn = await run_blocking(self._prepare_turn, user_id, message)
+            yield "sources", {"sources": turn.sources}
+            
+            if turn.cached is not None:
+                assistant_response = turn.cached.response
+                yield "token", {"text": assistant_response}
+            else:
+                parts: List[str] = []
+                stream = await self.async_client.chat.completions.create(**self._completion_args(turn), stream=True)
+                try:
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            parts.append(delta)
+                            yield "token", {"text": delta}
+                finally:
+                    await stream.close()
+                assistant_response = "".join(parts).strip()
+                self._store_answer(turn, assistant_response)
+            
+            reply = await run_blocking(self._reply, user_id, message, assistant_response, turn.sources)
+            yield "done", reply
+            
+        except Exception as e:
+            yield "error", {"response": ERROR_RESPONSE, "error": str(e)}
+    
     def limpiar_historial(self, user_id: str):
         """Limpia el historial de conversación de un usuario"""
-        if user_id in self.conversations:
-            del self.conversations[user_id]
+        self.history.clear(user_id)
     
     def recargar_documentacion(self):
         """Recarga la documentación (útil después de actualizar archivos)"""
-        self.documents = self.docs_service.load_documents()
-        return len(self.documents)
+        # Bajo el mismo lock que la carga inicial: el warm-up no puede pisar la recarga
+        with self._documents_lock:
+            documents = self.docs_service.load_documents()
+            self._documents = documents
+        self.answer_cache.clear()
+        return len(documents)
+    
+    def stats(self) -> Dict:
+        """Métricas del caché de respuestas y del historial de conversaciones"""
+        return {
+            "answer_cache": self.answer_cache.stats(),
+            "history": self.history.stats()
+        }
 
@@ -1,36 +1,64 @@
 import os
 import json
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Callable, List, Dict, Tuple, Optional
 from openai import OpenAI
 import hashlib
+import threading
+from core.config import ChatSettings
+from .embedding_index import EmbeddingIndex
+
+CACHE_VERSION = 2
+
+# Backend de embeddings: recibe textos y retorna un vector por texto (en el mismo orden)
+Embedder = Callable[[List[str]], List[List[float]]]
 
 class DocumentationService:
-    def __init__(self, docs_folder: str = "documentation/app_movil"):
+    def __init__(self, docs_folder: str = "documentation/app_movil", embedder: Optional[Embedder] = None):
         self.docs_folder = Path(docs_folder)
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", ""))
+        self.settings = ChatSettings()
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "")) if embedder is None else None
+        self.embedder: Embedder = embedder or self._embed_openai
+        # Caché de embeddings por hash del contenido de cada chunk
         self.embeddings_cache_file = "documentation_embeddings.json"
-        self.embeddings_cache = self._load_cache()
+        self.embeddings_cache: Dict[str, List[float]] = self._load_cache()
+        # Matriz de embeddings normalizados (memory-map), se abre en la primera búsqueda
+        self.embeddings_index_file = "documentation_embeddings.npy"
+        self._index: Optional[EmbeddingIndex] = None
+        self._index_documents: Optional[List[Dict]] = None
+        self._index_rows: List[Dict] = []
+        self._index_lock = threading.Lock()
+        # Serializa load_documents (warm-up y recarga pueden coincidir y ambos modifican el caché)
+        self._load_lock = threading.Lock()
         
-    def _load_cache(self) -> Dict:
-        """Carga el caché de embeddings desde archivo"""
+    def _load_cache(self) -> Dict[str, List[float]]:
+        """Carga el caché de embeddings desde archivo (se descarta si cambió el formato o el modelo)"""
         if os.path.exists(self.embeddings_cache_file):
             try:
                 with open(self.embeddings_cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION and data.get('model') == self.settings.embedding_model:
+                    return data.get('embeddings', {})
+            except (OSError, ValueError, AttributeError):
+                pass
         return {}
     
     def _save_cache(self):
-        """Guarda el caché de embeddings en archivo"""
-        with open(self.embeddings_cache_file, 'w', encoding='utf-8') as f:
-            json.dump(self.embeddings_cache, f, ensure_ascii=False, indent=2)
+        """Guarda el caché de embeddings en archivo (escritura atómica)"""
+        tmp_file = f"{self.embeddings_cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'version': CACHE_VERSION, 'model': self.settings.embedding_model, 'embeddings': self.embeddings_cache},
+                f,
+                ensure_ascii=False,
+                separators=(',', ':')
+            )
+        os.replace(tmp_file, self.embeddings_cache_file)
     
-    def _get_file_hash(self, file_path: Path) -> str:
-        """Genera hash del archivo para detectar cambios"""
-        with open(file_path, 'rb') as f:
-            return hashlib.md5(f.read()).hexdigest()
+    @staticmethod
+    def _chunk_hash(chunk: str) -> str:
+        """Hash del contenido de un chunk (clave del caché de embeddings)"""
+        return hashlib.sha256(chunk.encode('utf-8')).hexdigest()
     
     def _split_text(self, text: str, chunk_size: int = 1000) -> List[str]:
         """Divide el texto en chunks para procesamiento"""
@@ -54,17 +82,31 @@ class DocumentationService:
         
         return chunks
     
+    def _embed_openai(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings de varios textos en una sola petición a OpenAI"""
+        response = self.client.embeddings.create(
+            model=self.settings.embedding_model,
+            input=texts
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    
+    def _get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Obtiene los embeddings de varios textos en lotes de CHAT_EMBEDDING_BATCH_SIZE"""
+        batch_size = max(1, self.settings.embedding_batch_size)
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            try:
+                embeddings.extend(self.embedder(batch))
+            except Exception as e:
+                print(f"Error al obtener embeddings: {e}")
+                embeddings.extend([] for _ in batch)
+        return embeddings
+    
     def _get_embedding(self, text: str) -> List[float]:
-        """Obtiene el embedding de un texto usando OpenAI"""
-        try:
-            response = self.client.embeddings.create(
-                model="text-embedding-3-small",  # Modelo económico
-                input=text
-            )
-            return response.data[0].embedding
-        except Exception as e:
-            print(f"Error al obtener embedding: {e}")
-            return []
+        """Obtiene el embedding de un texto"""
+        embeddings = self._get_embeddings([text])
+        return embeddings[0] if embeddings else []
     
     def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calcula similitud coseno entre dos vectores"""
@@ -81,53 +123,102 @@ class DocumentationService:
         return dot_product / (magnitude1 * magnitude2)
     
     def load_documents(self) -> List[Dict]:
-        """Carga todos los documentos markdown de la carpeta"""
-        documents = []
+        """
+        Carga todos los documentos markdown de la carpeta
         
+        Solo se piden embeddings de los chunks cuyo contenido no está en el caché (editar
+        un párrafo vuelve a procesar solo ese chunk), en lotes, y el caché se escribe una
+        vez al final. Los embeddings de chunks que ya no existen se eliminan. Las cargas
+        concurrentes se ejecutan una tras otra.
+        """
+        with self._load_lock:
+            return self._load_documents()
+    
+    def _load_documents(self) -> List[Dict]:
         if not self.docs_folder.exists():
             print(f"⚠️ Carpeta de documentación no encontrada: {self.docs_folder}")
-            return documents
+            return []
         
-        for md_file in self.docs_folder.glob("*.md"):
+        chunks: List[Tuple[str, str, str, str]] = []  # (id, archivo, contenido, hash)
+        for md_file in sorted(self.docs_folder.glob("*.md")):
             try:
                 with open(md_file, 'r', encoding='utf-8') as f:
                     content = f.read()
                 
-                file_hash = self._get_file_hash(md_file)
-                cache_key = f"{md_file.name}_{file_hash}"
+                file_chunks = self._split_text(content)
+                for i, chunk in enumerate(file_chunks):
+                    chunks.append((f"{md_file.name}_chunk_{i}", md_file.name, chunk, self._chunk_hash(chunk)))
                 
-                # Dividir en chunks
-                chunks = self._split_text(content)
-                
-                for i, chunk in enumerate(chunks):
-                    chunk_id = f"{md_file.name}_chunk_{i}"
-                    
-                    # Verificar si ya tenemos el embedding en caché
-                    if cache_key in self.embeddings_cache and chunk_id in self.embeddings_cache[cache_key]:
-                        embedding = self.embeddings_cache[cache_key][chunk_id]
-                    else:
-                        # Generar nuevo embedding
-                        embedding = self._get_embedding(chunk)
-                        
-                        # Guardar en caché
-                        if cache_key not in self.embeddings_cache:
-                            self.embeddings_cache[cache_key] = {}
-                        self.embeddings_cache[cache_key][chunk_id] = embedding
-                        self._save_cache()
-                    
-                    documents.append({
-                        'id': chunk_id,
-                        'file': md_file.name,
-                        'content': chunk,
-                        'embedding': embedding
-                    })
-                
-                print(f"✅ Cargado: {md_file.name} ({len(chunks)} chunks)")
+                print(f"✅ Cargado: {md_file.name} ({len(file_chunks)} chunks)")
                 
             except Exception as e:
                 print(f"❌ Error al cargar {md_file.name}: {e}")
         
-        return documents
+        # Embeddings solo de los chunks nuevos o modificados (sin repetir contenidos iguales)
+        pendientes: Dict[str, str] = {}
+        for _, _, chunk, chunk_hash in chunks:
+            if chunk_hash not in self.embeddings_cache:
+                pendientes.setdefault(chunk_hash, chunk)
+        
+        cambios = False
+        if pendientes:
+            embeddings = self._get_embeddings(list(pendientes.values()))
+            for chunk_hash, embedding in zip(pendientes.keys(), embeddings):
+                if embedding:
+                    self.embeddings_cache[chunk_hash] = embedding
+                    cambios = True
+            print(f"🔄 Embeddings generados: {sum(1 for h in pendientes if h in self.embeddings_cache)}/{len(pendientes)}")
+        
+        vigentes = {chunk_hash for _, _, _, chunk_hash in chunks}
+        obsoletos = [chunk_hash for chunk_hash in self.embeddings_cache if chunk_hash not in vigentes]
+        for chunk_hash in obsoletos:
+            del self.embeddings_cache[chunk_hash]
+        
+        if cambios or obsoletos:
+            try:
+                self._save_cache()
+            except OSError as e:
+                print(f"⚠️ No se pudo guardar el caché de embeddings: {e}")
+        
+        return [
+            {
+                'id': chunk_id,
+                'file': file_name,
+                'content': chunk,
+                'embedding': self.embeddings_cache.get(chunk_hash, [])
+            }
+            for chunk_id, file_name, chunk, chunk_hash in chunks
+        ]
+    
+    def _get_index(self, documents: List[Dict]) -> Tuple[EmbeddingIndex, List[Dict]]:
+        """Índice vectorial de la lista de documentos (se reconstruye si la lista cambia)"""
+        with self._index_lock:
+            if self._index is None or self._index_documents is not documents:
+                index = EmbeddingIndex.load_or_build(
+                    documents, Path(self.embeddings_index_file), self.settings.embedding_model
+                )
+                docs_by_id = {doc['id']: doc for doc in documents}
+                self._index_rows = [docs_by_id[doc_id] for doc_id in index.ids]
+                self._index = index
+                self._index_documents = documents
+            return self._index, self._index_rows
+    
+    def rank_documents(self, query_embedding: List[float], documents: List[Dict], top_k: int = 3) -> List[Dict]:
+        """Top-k de documentos por similitud coseno con un embedding de consulta"""
+        index, rows = self._get_index(documents)
+        return [
+            {
+                'id': rows[row]['id'],
+                'content': rows[row]['content'],
+                'file': rows[row]['file'],
+                'score': score
+            }
+            for row, score in index.top_k(query_embedding, top_k)
+        ]
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embedding de una consulta ([] si falla la API)"""
+        return self._get_embedding(query)
     
     def search_relevant_docs(self, query: str, documents: List[Dict], top_k: int = 3) -> List[Dict]:
         """Busca los documentos más relevantes para una consulta"""
@@ -139,20 +230,4 @@ class DocumentationService:
         if not query_embedding:
             return []
         
-        # Calcular similitud con todos los documentos
-        scored_docs = []
-        for doc in documents:
-            if not doc.get('embedding'):
-                continue
-            
-            similarity = self._cosine_similarity(query_embedding, doc['embedding'])
-            scored_docs.append({
-                'content': doc['content'],
-                'file': doc['file'],
-                'score': similarity
-            })
-        
-        # Ordenar por similitud y retornar top_k
-        scored_docs.sort(key=lambda x: x['score'], reverse=True)
-        return scored_docs[:top_k]
-
+        return self.rank_documents(query_embedding, documents, top_k)
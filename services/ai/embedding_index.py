@@ -0,0 +1,163 @@
+import os
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import numpy as np
+
+
+class EmbeddingIndex:
+    """
+    Índice de búsqueda por similitud coseno sobre los chunks de documentación.
+
+    Los embeddings se guardan en una matriz contigua float32 con las filas ya
+    normalizadas, así la similitud con una consulta es un producto matriz-vector y el
+    top-k sale de argpartition (sin ordenar todos los chunks).
+
+    La matriz se persiste como .npy junto al caché JSON y se abre con memory-map; un
+    archivo .npy.meta.json hermano guarda los ids de las filas, el modelo, la dimensión y
+    la huella de los chunks para saber si sigue correspondiendo a los documentos cargados.
+    """
+
+    def __init__(self, matrix: np.ndarray, ids: List[str], fingerprint: str):
+        self.matrix = matrix
+        self.ids = ids
+        self.fingerprint = fingerprint
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def dimension_of(documents: List[Dict]) -> int:
+        """Dimensión de los embeddings de los documentos (0 si ninguno tiene)"""
+        return next((len(doc['embedding']) for doc in documents if doc.get('embedding')), 0)
+
+    @classmethod
+    def fingerprint_of(cls, documents: List[Dict], model: str = "") -> str:
+        """
+        Huella de los chunks indexables (id y contenido, en orden) y del modelo y la
+        dimensión de sus embeddings: cambiar de modelo invalida la matriz persistida
+        aunque los documentos sean los mismos
+        """
+        digest = hashlib.md5()
+        digest.update(f"{model}\0{cls.dimension_of(documents)}\0".encode('utf-8'))
+        for doc in documents:
+            if doc.get('embedding'):
+                digest.update(doc['id'].encode('utf-8'))
+                digest.update(b'\0')
+                digest.update(doc['content'].encode('utf-8'))
+                digest.update(b'\0')
+        return digest.hexdigest()
+
+    @classmethod
+    def build(cls, documents: List[Dict], model: str = "") -> 'EmbeddingIndex':
+        """Construye el índice normalizando las filas una sola vez"""
+        fingerprint = cls.fingerprint_of(documents, model)
+        dimension = cls.dimension_of(documents)
+        # Filas con la dimensión del índice (descarta embeddings de otro modelo mezclados)
+        rows = [doc for doc in documents if doc.get('embedding') and len(doc['embedding']) == dimension]
+        ids = [doc['id'] for doc in rows]
+        if not rows:
+            return cls(np.zeros((0, 0), dtype=np.float32), ids, fingerprint)
+
+        matrix = np.asarray([doc['embedding'] for doc in rows], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return cls(np.ascontiguousarray(matrix), ids, fingerprint)
+
+    @staticmethod
+    def _meta_path(matrix_path: Path) -> Path:
+        return matrix_path.with_name(matrix_path.name + '.meta.json')
+
+    @staticmethod
+    def _tmp_path(path: Path) -> Path:
+        # Nombre único por proceso e hilo para no pisar escrituras concurrentes
+        return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def save(self, matrix_path: Path, model: str = ""):
+        """Guarda la matriz (.npy) y sus metadatos; cada archivo se reemplaza de forma atómica"""
+        matrix_path = Path(matrix_path)
+        tmp_matrix = self._tmp_path(matrix_path)
+        with open(tmp_matrix, 'wb') as f:
+            np.save(f, self.matrix)
+        os.replace(tmp_matrix, matrix_path)
+
+        meta_path = self._meta_path(matrix_path)
+        tmp_meta = self._tmp_path(meta_path)
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fingerprint': self.fingerprint,
+                'model': model,
+                'dimension': int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0,
+                'ids': self.ids
+            }, f, ensure_ascii=False)
+        os.replace(tmp_meta, meta_path)
+
+    @classmethod
+    def load(cls, matrix_path: Path, fingerprint: str, dimension: int) -> Optional['EmbeddingIndex']:
+        """
+        Abre la matriz con memory-map si corresponde a la huella indicada y su forma es
+        (filas, dimension)
+        """
+        matrix_path = Path(matrix_path)
+        meta_path = cls._meta_path(matrix_path)
+        if not matrix_path.exists() or not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('fingerprint') != fingerprint:
+                return None
+            matrix = np.load(matrix_path, mmap_mode='r')
+            if matrix.ndim != 2 or matrix.shape[0] != len(meta['ids']):
+                return None
+            if meta['ids'] and matrix.shape[1] != dimension:
+                return None
+            return cls(matrix, meta['ids'], fingerprint)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @classmethod
+    def load_or_build(cls, documents: List[Dict], matrix_path: Path, model: str = "") -> 'EmbeddingIndex':
+        """
+        Usa la matriz persistida si sigue vigente (mismos chunks, modelo y dimensión);
+        si no, la reconstruye y la guarda
+        """
+        fingerprint = cls.fingerprint_of(documents, model)
+        index = cls.load(matrix_path, fingerprint, cls.dimension_of(documents))
+        if index is not None:
+            return index
+
+        index = cls.build(documents, model)
+        try:
+            index.save(matrix_path, model)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar el índice de embeddings: {e}")
+        return index
+
+    def top_k(self, query_embedding: List[float], top_k: int = 3) -> List[tuple]:
+        """
+        Retorna [(fila, score)] de los top_k chunks más similares, de mayor a menor
+        """
+        n = len(self.ids)
+        if n == 0 or top_k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape[0] != self.matrix.shape[1]:
+            return []
+        norm = float(np.linalg.norm(query))
+        if norm == 0:
+            return []
+
+        scores = self.matrix @ (query / norm)
+        k = min(top_k, n)
+        if k < n:
+            candidates = np.argpartition(scores, n - k)[n - k:]
+        else:
+            candidates = np.arange(n)
+        best = candidates[np.argsort(scores[candidates])[::-1]]
+        return [(int(i), float(scores[i])) for i in best]
@@ -1,15 +1,126 @@
 from dao.camarista.dao_limpieza import LimpiezaDao
 from models.camarista.limpieza_model import Limpieza
 from models.seguridad.usuario_asignacion_model import UsuarioAsignacion
+from dao.seguridad.dao_usuario_asignacion import UsuarioAsignacionDAO
 from schemas.camarista.limpieza_schema import LimpiezaCreate, LimpiezaUpdate
 from sqlalchemy.orm import Session
 from datetime import date, datetime, time
 from typing import Optional
+from services.notifications.notification_dispatcher import (
+    NotificationMessage,
+    enqueue_notification,
+    notification_handler
+)
+from sqlalchemy.orm import joinedload
 import logging
-import threading
 
 logger = logging.getLogger(__name__)
 
+
+def _nombre_habitacion(limpieza: Limpieza) -> str:
+    """
+    Descripción legible de la habitación/área de una limpieza
+    """
+    if not limpieza.habitacion_area:
+        return "habitación/área"
+    # Usar descripcion como principal, nombre_clave como respaldo
+    return (
+        limpieza.habitacion_area.descripcion or
+        limpieza.habitacion_area.nombre_clave or
+        f"Habitación {limpieza.habitacion_area.id_habitacion_area}"
+    )
+
+
+def _cargar_limpiezas(db: Session, payloads: list):
+    """
+    Recarga en una sola consulta las limpiezas de un grupo de eventos, con su habitación/área
+    """
+    ids = [p["limpieza_id"] for p in payloads]
+    return (
+        db.query(Limpieza)
+        .options(joinedload(Limpieza.habitacion_area))
+        .filter(Limpieza.id_limpieza.in_(ids))
+        .order_by(Limpieza.id_limpieza)
+        .all()
+    )
+
+
+@notification_handler("limpieza_asignada")
+def _resolver_limpieza_asignada(db: Session, payloads: list):
+    """
+    Construye el push de limpiezas asignadas a un empleado (uno solo si se asignaron varias)
+    """
+    empleado_id = payloads[0]["empleado_id"]
+    usuario_id = UsuarioAsignacionDAO(db).get_usuario_id_empleado_activo(empleado_id)
+    if not usuario_id:
+        logger.info(f"No se encontró usuario asignado para empleado_id {empleado_id}")
+        return []
+    
+    limpiezas = _cargar_limpiezas(db, payloads)
+    if not limpiezas:
+        logger.warning(f"No se encontraron limpiezas {[p['limpieza_id'] for p in payloads]} para notificación")
+        return []
+    
+    ultima = limpiezas[-1]
+    if len(limpiezas) == 1:
+        body = f"Se te ha asignado la limpieza de {_nombre_habitacion(ultima)}"
+        title = "Nueva limpieza asignada"
+    else:
+        body = f"Se te han asignado {len(limpiezas)} limpiezas"
+        title = "Nuevas limpiezas asignadas"
+    
+    return [NotificationMessage(
+        usuario_id=usuario_id,
+        title=title,
+        body=body,
+        data={
+            "tipo": "limpieza_asignada",
+            "limpieza_id": str(ultima.id_limpieza),
+            "limpieza_ids": ",".join(str(l.id_limpieza) for l in limpiezas),
+            "habitacion_area_id": str(ultima.habitacion_area_id),
+            "empleado_id": str(empleado_id),
+            "screen": "limpieza_detail"
+        }
+    )]
+
+
+@notification_handler("limpieza_completada")
+def _resolver_limpieza_completada(db: Session, payloads: list):
+    """
+    Construye el push para el empleado que asignó las limpiezas completadas
+    """
+    empleado_asigna_id = payloads[0]["empleado_asigna_id"]
+    usuario_id = UsuarioAsignacionDAO(db).get_usuario_id_empleado_activo(empleado_asigna_id)
+    if not usuario_id:
+        logger.info(f"No se encontró usuario para empleado_asigna_id {empleado_asigna_id}")
+        return []
+    
+    limpiezas = _cargar_limpiezas(db, payloads)
+    if not limpiezas:
+        return []
+    
+    ultima = limpiezas[-1]
+    if len(limpiezas) == 1:
+        title = "Limpieza completada"
+        body = f"La limpieza de {_nombre_habitacion(ultima)} que asignaste ha sido completada"
+    else:
+        title = "Limpiezas completadas"
+        body = f"{len(limpiezas)} limpiezas que asignaste han sido completadas"
+    
+    return [NotificationMessage(
+        usuario_id=usuario_id,
+        title=title,
+        body=body,
+        data={
+            "tipo": "limpieza_completada",
+            "limpieza_id": str(ultima.id_limpieza),
+            "limpieza_ids": ",".join(str(l.id_limpieza) for l in limpiezas),
+            "habitacion_area_id": str(ultima.habitacion_area_id),
+            "screen": "limpieza_detail"
+        }
+    )]
+
+
 class LimpiezaService:
     def __init__(self):
         self.dao = LimpiezaDao()
@@ -22,189 +133,49 @@ class LimpiezaService:
 
     def _enviar_notificacion_asignacion(self, db: Session, limpieza: Limpieza):
         """
-        Envía notificación push cuando se asigna una limpieza a un empleado
-        Se ejecuta en un hilo separado para no bloquear la respuesta principal
+        Encola la notificación push al empleado al que se asigna una limpieza
+        El envío lo hace el NotificationDispatcher sin bloquear la respuesta principal
         
         Args:
             db (Session): Sesión de base de datos
             limpieza (Limpieza): Limpieza asignada
         """
-        # Guardar datos necesarios antes de pasar al hilo
-        limpieza_id = limpieza.id_limpieza
-        empleado_id = limpieza.empleado_id
-        habitacion_area_id = limpieza.habitacion_area_id
-        
-        # Ejecutar en hilo separado para no bloquear la respuesta
-        def enviar_en_background():
-            try:
-                # Crear nueva sesión de BD para el hilo (importante: no reutilizar la sesión del hilo principal)
-                from core.database_connection import get_database_session
-                db_background = next(get_database_session())
-                
-                try:
-                    # Solo enviar si hay empleado asignado
-                    if not empleado_id:
-                        return
-                    
-                    # Buscar usuario_id desde empleado_id en UsuarioAsignacion
-                    usuario_asignacion = db_background.query(UsuarioAsignacion).filter(
-                        UsuarioAsignacion.empleado_id == empleado_id,
-                        UsuarioAsignacion.tipo_asignacion == 1,  # 1=Empleado
-                        UsuarioAsignacion.estatus == 1  # Activo
-                    ).first()
-                    
-                    if not usuario_asignacion:
-                        logger.info(f"No se encontró usuario asignado para empleado_id {empleado_id}")
-                        return
-                    
-                    usuario_id = usuario_asignacion.usuario_id
-                    
-                    # Recargar limpieza con relaciones desde BD
-                    from sqlalchemy.orm import joinedload
-                    limpieza_completa = db_background.query(Limpieza).options(
-                        joinedload(Limpieza.habitacion_area)
-                    ).filter(Limpieza.id_limpieza == limpieza_id).first()
-                    
-                    if not limpieza_completa:
-                        logger.warning(f"No se encontró limpieza {limpieza_id} para notificación")
-                        return
-                    
-                    # Importar aquí para evitar importación circular
-                    from services.notifications.fcm_push_service import FCMPushService
-                    
-                    # Crear servicio de notificaciones con nueva sesión
-                    push_service = FCMPushService(db_background)
-                    
-                    # Obtener información de la habitación/área
-                    habitacion_nombre = "habitación/área"
-                    if limpieza_completa.habitacion_area:
-                        # Usar descripcion como principal, nombre_clave como respaldo
-                        habitacion_nombre = (
-                            limpieza_completa.habitacion_area.descripcion or 
-                            limpieza_completa.habitacion_area.nombre_clave or 
-                            f"Habitación {limpieza_completa.habitacion_area.id_habitacion_area}"
-                        )
-                    
-                    # Enviar notificación (sin esperar respuesta)
-                    push_service.send_to_user(
-                        usuario_id=usuario_id,
-                        title="Nueva limpieza asignada",
-                        body=f"Se te ha asignado la limpieza de {habitacion_nombre}",
-                        data={
-                            "tipo": "limpieza_asignada",
-                            "limpieza_id": str(limpieza_id),
-                            "habitacion_area_id": str(habitacion_area_id),
-                            "empleado_id": str(empleado_id),
-                            "screen": "limpieza_detail"
-                        }
-                    )
-                    
-                    logger.info(f"Notificación enviada al usuario {usuario_id} por limpieza {limpieza_id}")
-                    
-                finally:
-                    # Cerrar sesión de BD del hilo
-                    db_background.close()
-                    
-            except Exception as e:
-                # No fallar la operación principal si falla la notificación
-                logger.error(f"Error enviando notificación de limpieza: {e}", exc_info=True)
+        # Solo enviar si hay empleado asignado
+        if not limpieza.empleado_id:
+            return
         
-        # Iniciar hilo en background sin esperar (daemon=True permite que el programa termine sin esperar el hilo)
-        thread = threading.Thread(target=enviar_en_background, daemon=True)
-        thread.start()
+        enqueue_notification(
+            "limpieza_asignada",
+            f"empleado:{limpieza.empleado_id}",
+            {
+                "limpieza_id": limpieza.id_limpieza,
+                "empleado_id": limpieza.empleado_id,
+                "habitacion_area_id": limpieza.habitacion_area_id
+            }
+        )
 
     def _enviar_notificacion_terminacion(self, db: Session, limpieza: Limpieza):
         """
-        Envía notificación push al empleado que asignó la limpieza cuando se completa
-        Se ejecuta en un hilo separado para no bloquear la respuesta principal
+        Encola la notificación push al empleado que asignó la limpieza cuando se completa
         
         Args:
             db (Session): Sesión de base de datos
             limpieza (Limpieza): Limpieza completada
         """
-        # Guardar datos necesarios antes de pasar al hilo
-        limpieza_id = limpieza.id_limpieza
-        empleado_asigna_id = limpieza.empleado_asigna_id
-        habitacion_area_id = limpieza.habitacion_area_id
-        
-        # Ejecutar en hilo separado para no bloquear la respuesta
-        def enviar_en_background():
-            try:
-                # Crear nueva sesión de BD para el hilo (importante: no reutilizar la sesión del hilo principal)
-                from core.database_connection import get_database_session
-                db_background = next(get_database_session())
-                
-                try:
-                    # Si no hay empleado_asigna_id, no enviar notificación
-                    if not empleado_asigna_id:
-                        logger.info(f"No hay empleado_asigna_id para limpieza {limpieza_id}")
-                        return
-                    
-                    # Buscar usuario_id desde empleado_asigna_id en UsuarioAsignacion
-                    usuario_asignacion = db_background.query(UsuarioAsignacion).filter(
-                        UsuarioAsignacion.empleado_id == empleado_asigna_id,
-                        UsuarioAsignacion.tipo_asignacion == 1,  # 1=Empleado
-                        UsuarioAsignacion.estatus == 1  # Activo
-                    ).first()
-                    
-                    if not usuario_asignacion:
-                        logger.info(f"No se encontró usuario para empleado_asigna_id {empleado_asigna_id}")
-                        return
-                    
-                    usuario_id = usuario_asignacion.usuario_id
-                    
-                    # Recargar limpieza con relaciones desde BD
-                    from sqlalchemy.orm import joinedload
-                    limpieza_completa = db_background.query(Limpieza).options(
-                        joinedload(Limpieza.habitacion_area)
-                    ).filter(Limpieza.id_limpieza == limpieza_id).first()
-                    
-                    if not limpieza_completa:
-                        logger.warning(f"No se encontró limpieza {limpieza_id} para notificación")
-                        return
-                    
-                    # Importar aquí para evitar importación circular
-                    from services.notifications.fcm_push_service import FCMPushService
-                    
-                    # Crear servicio de notificaciones con nueva sesión
-                    push_service = FCMPushService(db_background)
-                    
-                    # Obtener información de la habitación/área
-                    habitacion_nombre = "habitación/área"
-                    if limpieza_completa.habitacion_area:
-                        # Usar descripcion como principal, nombre_clave como respaldo
-                        habitacion_nombre = (
-                            limpieza_completa.habitacion_area.descripcion or 
-                            limpieza_completa.habitacion_area.nombre_clave or 
-                            f"Habitación {limpieza_completa.habitacion_area.id_habitacion_area}"
-                        )
-                    
-                    # Enviar notificación (sin esperar respuesta)
-                    push_service.send_to_user(
-                        usuario_id=usuario_id,
-                        title="Limpieza completada",
-                        body=f"La limpieza de {habitacion_nombre} que asignaste ha sido completada",
-                        data={
-                            "tipo": "limpieza_completada",
-                            "limpieza_id": str(limpieza_id),
-                            "habitacion_area_id": str(habitacion_area_id),
-                            "screen": "limpieza_detail"
-                        }
-                    )
-                    
-                    logger.info(f"Notificación enviada al usuario {usuario_id} (empleado_asigna_id: {empleado_asigna_id}) por limpieza {limpieza_id}")
-                    
-                finally:
-                    # Cerrar sesión de BD del hilo
-                    db_background.close()
-                    
-            except Exception as e:
-                # No fallar la operación principal si falla la notificación
-                logger.error(f"Error enviando notificación de limpieza completada: {e}", exc_info=True)
+        # Si no hay empleado_asigna_id, no enviar notificación
+        if not limpieza.empleado_asigna_id:
+            logger.info(f"No hay empleado_asigna_id para limpieza {limpieza.id_limpieza}")
+            return
         
-        # Iniciar hilo en background sin esperar (daemon=True permite que el programa termine sin esperar el hilo)
-        thread = threading.Thread(target=enviar_en_background, daemon=True)
-        thread.start()
+        enqueue_notification(
+            "limpieza_completada",
+            f"empleado:{limpieza.empleado_asigna_id}",
+            {
+                "limpieza_id": limpieza.id_limpieza,
+                "empleado_asigna_id": limpieza.empleado_asigna_id,
+                "habitacion_area_id": limpieza.habitacion_area_id
+            }
+        )
 
     def crear(self, db: Session, data: LimpiezaCreate):
         data_dict = data.dict()
@@ -306,4 +277,10 @@ class LimpiezaService:
             if data_dict.get('empleado_id') is None or data_dict.get('empleado_id') == 0:
                 data_dict.pop('empleado_id', None)
             limpiezas.append(Limpieza(**data_dict))
-        return self.dao.crear_masivo(db, limpiezas)
\ No newline at end of file
+        limpiezas_creadas = self.dao.crear_masivo(db, limpiezas)
+        
+        # Las notificaciones del mismo empleado se agrupan en un solo push
+        for limpieza in limpiezas_creadas:
+            self._enviar_notificacion_asignacion(db, limpieza)
+        
+        return limpiezas_creadas
\ No newline at end of file
@@ -0,0 +1,285 @@
+"""
+Outbox de emails
+Las peticiones solo registran el email como 'pending' en EMAIL.Tb_email_log; un pool de
+workers en segundo plano los reclama por lotes, los envía por el pool SMTP y registra el
+resultado. Los fallos se reintentan con backoff exponencial y los logs antiguos se depuran
+periódicamente
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import List, Optional
+
+from core.config import EmailOutboxSettings
+from core.database_connection import db_connection
+from dao.email.dao_email_log import EmailLogDAO
+from schemas.email.email_schemas import EmailStatus
+from services.email.smtp_pool import smtp_pool
+
+logger = logging.getLogger(__name__)
+
+
+class EmailOutbox:
+    """
+    Clase Singleton con los workers del outbox de emails
+
+    Características:
+    - La tabla de logs es la cola: sobrevive a reinicios y la comparten todos los procesos
+    - Cada worker reclama un lote con bloqueo de filas (UPDLOCK + READPAST) y lo envía
+      reutilizando las conexiones del pool SMTP
+    - Los emails fallidos vuelven a la cola tras un backoff exponencial hasta agotar max_intentos
+    - Los emails que quedaron en 'sending' por un proceso caído se liberan al vencer su reserva
+      (el envío interrumpido cuenta como intento; sin intentos disponibles pasan a 'failed')
+    - Limpieza programada de logs antiguos (cleanup_old_logs)
+    """
+
+    _instance: Optional['EmailOutbox'] = None
+    _lock = threading.Lock()  # Para thread-safety
+
+    def __new__(cls) -> 'EmailOutbox':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self._settings = EmailOutboxSettings()
+        self._cond = threading.Condition()
+        self._running = False
+        self._workers: List[threading.Thread] = []
+        self._maintenance_thread: Optional[threading.Thread] = None
+        self._email_service = None
+        self._ultima_limpieza: Optional[float] = None
+        self._metrics = {
+            "enqueued": 0,
+            "claimed": 0,
+            "sent": 0,
+            "failed": 0,
+            "retried": 0,
+            "released_stale": 0,
+            "stale_failed": 0,
+            "cleaned": 0,
+        }
+        self._initialized = True
+
+    @property
+    def enabled(self) -> bool:
+        return self._settings.enabled
+
+    def _contar(self, metrica: str, cantidad: int = 1):
+        with self._cond:
+            self._metrics[metrica] += cantidad
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """
+        Inicia los workers y el hilo de mantenimiento (al arrancar la app)
+        """
+        if not self.enabled or self._running:
+            return
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._workers = [
+                threading.Thread(target=self._worker_loop, name=f"email-outbox-{i}", daemon=True)
+                for i in range(max(1, self._settings.workers))
+            ]
+            for worker in self._workers:
+                worker.start()
+            self._maintenance_thread = threading.Thread(
+                target=self._maintenance_loop, name="email-outbox-maintenance", daemon=True
+            )
+            self._maintenance_thread.start()
+            logger.info(f"EmailOutbox iniciado con {len(self._workers)} workers")
+
+    def shutdown(self, timeout: float = 10.0):
+        """
+        Detiene los workers esperando el lote en curso. Los emails reclamados que no
+        alcancen a registrarse se liberan cuando vence su reserva (EMAIL_OUTBOX_LEASE_SECONDS)
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for hilo in self._workers + [self._maintenance_thread]:
+            if hilo is not None:
+                hilo.join(max(0.0, deadline - time.monotonic()))
+        self._workers = []
+        self._maintenance_thread = None
+
+    def notificar(self):
+        """
+        Avisa a los workers de este proceso que hay un email nuevo en la cola
+        (los demás procesos lo verán en su siguiente consulta)
+        """
+        with self._cond:
+            self._metrics["enqueued"] += 1
+            self._cond.notify()
+
+    def _esperar(self, segundos: float):
+        with self._cond:
+            if self._running:
+                self._cond.wait(segundos)
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _worker_loop(self):
+        while self._running:
+            try:
+                procesados = self.procesar_lote()
+            except Exception as e:
+                logger.error(f"Error procesando lote de emails: {e}", exc_info=True)
+                procesados = 0
+            if not procesados:
+                self._esperar(self._settings.poll_interval_seconds)
+
+    def _get_email_service(self):
+        # Importar aquí para evitar importación circular
+        if self._email_service is None:
+            from services.email.email_service import EmailService
+            self._email_service = EmailService()
+        return self._email_service
+
+    def procesar_lote(self) -> int:
+        """
+        Reclama un lote de emails, los envía y registra el resultado de cada uno
+
+        Returns:
+            int: Número de emails procesados
+        """
+        db = db_connection.get_session()
+        try:
+            dao = EmailLogDAO(db)
+            lote = [
+                (log.id_log, log.destinatario_email, log.asunto, log.contenido_html or log.contenido_texto or "")
+                for log in dao.claim_batch(self._settings.batch_size)
+            ]
+            if not lote:
+                return 0
+            self._contar("claimed", len(lote))
+
+            email_service = self._get_email_service()
+            mensajes = [
+                (email_service._crear_mensaje_mime(destinatario, asunto, contenido), destinatario)
+                for _, destinatario, asunto, contenido in lote
+            ]
+            resultados = smtp_pool.send_many(mensajes)
+
+            dao.update_status_many([
+                (id_log, EmailStatus.SENT if resultado["success"] else EmailStatus.FAILED, resultado.get("error"))
+                for (id_log, _, _, _), resultado in zip(lote, resultados)
+            ])
+        finally:
+            db.close()
+
+        enviados = sum(1 for resultado in resultados if resultado["success"])
+        self._contar("sent", enviados)
+        self._contar("failed", len(lote) - enviados)
+        if enviados < len(lote):
+            logger.warning(f"Outbox: {len(lote) - enviados} de {len(lote)} email(s) fallaron; se reintentarán con backoff")
+        return len(lote)
+
+    # ------------------------------------------------------------------
+    # Mantenimiento: reintentos, reservas vencidas y limpieza
+    # ------------------------------------------------------------------
+
+    def _backoff(self, intentos: int) -> float:
+        base = self._settings.retry_base_seconds * (2 ** max(0, intentos - 1))
+        return min(base, self._settings.retry_max_seconds)
+
+    def _maintenance_loop(self):
+        while self._running:
+            try:
+                self.mantenimiento()
+            except Exception as e:
+                logger.error(f"Error en mantenimiento del outbox de emails: {e}")
+            self._esperar(self._settings.poll_interval_seconds)
+
+    def mantenimiento(self):
+        """
+        Devuelve a la cola los fallidos cuyo backoff venció, libera los 'sending'
+        abandonados y, cuando corresponde, depura los logs antiguos
+        """
+        db = db_connection.get_session()
+        try:
+            dao = EmailLogDAO(db)
+
+            liberados, agotados = dao.release_stale_sending(self._settings.lease_seconds)
+            if liberados:
+                logger.warning(f"Outbox: {liberados} email(s) abandonados en 'sending' vuelven a la cola")
+                self._contar("released_stale", liberados)
+            if agotados:
+                logger.warning(f"Outbox: {agotados} email(s) abandonados en 'sending' sin intentos disponibles se marcan como fallidos")
+                self._contar("stale_failed", agotados)
+
+            ahora = dao.get_db_now()
+            reintentos = 0
+            for log in dao.get_failed_retryable(limit=self._settings.batch_size * max(1, self._settings.workers)):
+                ultimo_intento = (log.fecha_actualizacion or log.fecha_creacion).replace(tzinfo=None)
+                if ultimo_intento + timedelta(seconds=self._backoff(log.intentos_envio)) > ahora:
+                    continue
+                if dao.mark_as_retry(log.id_log):
+                    reintentos += 1
+            if reintentos:
+                self._contar("retried", reintentos)
+                with self._cond:
+                    self._cond.notify_all()
+
+            intervalo = self._settings.cleanup_interval_hours * 3600
+            if intervalo > 0 and (self._ultima_limpieza is None or time.monotonic() - self._ultima_limpieza >= intervalo):
+                self._ultima_limpieza = time.monotonic()
+                eliminados = dao.cleanup_old_logs(days_to_keep=self._settings.retention_days)
+                if eliminados:
+                    logger.info(f"Outbox: {eliminados} log(s) de email con más de {self._settings.retention_days} días depurados")
+                self._contar("cleaned", eliminados)
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """
+        Retorna métricas del outbox de este proceso
+        """
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "running": self._running,
+                "workers": len(self._workers),
+                "batch_size": self._settings.batch_size,
+                **self._metrics
+            }
+
+
+# Instancia global del outbox (Singleton)
+email_outbox = EmailOutbox()
+
+
+def get_email_outbox_stats() -> dict:
+    """
+    Función helper para obtener las métricas del outbox de emails
+    """
+    return email_outbox.stats()
@@ -9,15 +9,18 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import logging
 
 from core.config import EmailSettings
-from core.database_connection import get_database_session
+from core.database_connection import db_connection
+from core.executor import run_blocking
 from schemas.email.email_basic_schemas import EmailSendBasic, EmailResponseBasic
 from schemas.email.email_schemas import EmailSend, EmailStatus, EmailType
 from dao.email.dao_email_log import EmailLogDAO
 from services.email.template_service import EmailTemplateService
+from services.email.smtp_pool import smtp_pool
+from services.email.email_outbox import email_outbox
 from utils.pdf_generator import generate_quotation_pdf
 
 # Configurar logging
@@ -62,50 +65,39 @@ class EmailService:
         """
         Envía un email usando SMTP con logging completo
         
+        Con el outbox habilitado solo se registra el email como pendiente y los workers
+        del outbox lo envían; sin log en BD se envía directamente.
+        
         Args:
             email_data (EmailSendBasic): Datos del email a enviar
             
         Returns:
             EmailResponseBasic: Resultado del envío
         """
-        # Convertir a EmailSend para el logging
+        # Convertir a EmailSend para el logging (con la plantilla base ya aplicada,
+        # para que el outbox envíe exactamente el contenido registrado)
         email_send = EmailSend(
             destinatario_email=email_data.destinatario_email,
             destinatario_nombre=None,
             asunto=email_data.asunto,
-            contenido_html=email_data.contenido_html,
+            contenido_html=self._process_html_content(email_data),
             contenido_texto=None,
             tipo_email=EmailType.CUSTOM,
             variables={},
             id_template=None
         )
         
-        # Crear log inicial
-        log_id = None
-        try:
-            db = get_database_session()
-            try:
-                email_dao = EmailLogDAO(db)
-                email_log = email_dao.create_log(
-                    email_send,
-                    remitente_email=self.from_email,
-                    remitente_nombre=self.from_name,
-                    proveedor_email='smtp'
-                )
-                log_id = email_log.id_log
-                logger.info(f"Log creado con ID: {log_id}")
-            finally:
-                db.close()
-        except Exception as e:
-            logger.error(f"Error al crear log: {str(e)}")
-            # Continuar sin log si falla la creación
+        # Crear log inicial (I/O de BD fuera del event loop); si no se encola, el log
+        # queda fuera del alcance del outbox para que no se envíe dos veces
+        encolar = email_outbox.enabled and self._validate_config()
+        log_id = await run_blocking(self._create_log, email_send, not encolar)
         
         try:
             # Validar configuración
             if not self._validate_config():
                 error_msg = "Configuración de email incompleta"
                 if log_id:
-                    self._update_log_status(log_id, EmailStatus.FAILED, error_msg)
+                    await run_blocking(self._update_log_status, log_id, EmailStatus.FAILED, error_msg)
                 return EmailResponseBasic(
                     success=False,
                     message=error_msg,
@@ -113,15 +105,18 @@ class EmailService:
                     error="Faltan credenciales de SMTP"
                 )
             
+            if log_id and encolar:
+                return self._respuesta_encolado(log_id)
+            
             # Crear mensaje
             message = self._create_message(email_data)
             
             # Enviar email
-            self._send_smtp(message, email_data.destinatario_email)
+            await run_blocking(self._send_smtp, message, email_data.destinatario_email)
             
             # Actualizar log como exitoso
             if log_id:
-                self._update_log_status(log_id, EmailStatus.SENT)
+                await run_blocking(self._update_log_status, log_id, EmailStatus.SENT)
             
             logger.info(f"Email enviado exitosamente a {email_data.destinatario_email}")
             
@@ -136,7 +131,7 @@ class EmailService:
             error_msg = "Error de autenticación SMTP. Verifica las credenciales."
             logger.error(f"Error de autenticación: {str(e)}")
             if log_id:
-                self._update_log_status(log_id, EmailStatus.FAILED, error_msg)
+                await run_blocking(self._update_log_status, log_id, EmailStatus.FAILED, error_msg)
             return EmailResponseBasic(
                 success=False,
                 message="Error de autenticación",
@@ -148,7 +143,7 @@ class EmailService:
             error_msg = f"Error SMTP: {str(e)}"
             logger.error(f"Error SMTP: {str(e)}")
             if log_id:
-                self._update_log_status(log_id, EmailStatus.FAILED, error_msg)
+                await run_blocking(self._update_log_status, log_id, EmailStatus.FAILED, error_msg)
             return EmailResponseBasic(
                 success=False,
                 message="Error al enviar email",
@@ -160,7 +155,7 @@ class EmailService:
             error_msg = f"Error inesperado: {str(e)}"
             logger.error(f"Error inesperado: {str(e)}")
             if log_id:
-                self._update_log_status(log_id, EmailStatus.FAILED, error_msg)
+                await run_blocking(self._update_log_status, log_id, EmailStatus.FAILED, error_msg)
             return EmailResponseBasic(
                 success=False,
                 message="Error al procesar el email",
@@ -275,7 +270,9 @@ class EmailService:
             return self._enviar_email_smtp(
                 destinatario_email=destinatario_email,
                 asunto="Bienvenido a InnPulse 360 - Tus Credenciales de Acceso",
-                contenido_html=html_content
+                contenido_html=html_content,
+                destinatario_nombre=destinatario_nombre,
+                tipo_email=EmailType.WELCOME_USER
             )
             
         except Exception as e:
@@ -316,7 +313,9 @@ class EmailService:
             return self._enviar_email_smtp(
                 destinatario_email=destinatario_email,
                 asunto="Recuperación de Contraseña - InnPulse 360",
-                contenido_html=html_content
+                contenido_html=html_content,
+                destinatario_nombre=destinatario_nombre,
+                tipo_email=EmailType.PASSWORD_RESET
             )
             
         except Exception as e:
@@ -365,14 +364,20 @@ class EmailService:
         )
     
     def _enviar_email_smtp(self, destinatario_email: str, asunto: str, 
-                          contenido_html: str) -> EmailResponseBasic:
+                          contenido_html: str, destinatario_nombre: Optional[str] = None,
+                          tipo_email: EmailType = EmailType.CUSTOM) -> EmailResponseBasic:
         """
         Envía un email usando SMTP
         
+        Con el outbox habilitado solo registra el email como pendiente; si el log
+        no se puede crear se envía directamente.
+        
         Args:
             destinatario_email: Email del destinatario
             asunto: Asunto del email
             contenido_html: Contenido HTML del mensaje
+            destinatario_nombre: Nombre del destinatario (para el log)
+            tipo_email: Tipo de email (para el log)
         
         Returns:
             EmailResponseBasic con el resultado
@@ -387,13 +392,28 @@ class EmailService:
                     error="Faltan credenciales SMTP"
                 )
             
-            # 2. Crear mensaje MIME
+            # 2. Registrar el email; el outbox se encarga del envío
+            if email_outbox.enabled:
+                log_id = self._create_log(EmailSend(
+                    destinatario_email=destinatario_email,
+                    destinatario_nombre=destinatario_nombre,
+                    asunto=asunto,
+                    contenido_html=contenido_html,
+                    contenido_texto=None,
+                    tipo_email=tipo_email,
+                    variables={},
+                    id_template=None
+                ))
+                if log_id:
+                    return self._respuesta_encolado(log_id)
+            
+            # 3. Crear mensaje MIME
             message = self._crear_mensaje_mime(destinatario_email, asunto, contenido_html)
             
-            # 3. Enviar por SMTP
+            # 4. Enviar por SMTP
             self._send_smtp(message, destinatario_email)
             
-            # 4. Retornar éxito
+            # 5. Retornar éxito
             logger.info(f"Email enviado exitosamente a {destinatario_email}")
             return EmailResponseBasic(
                 success=True,
@@ -432,6 +452,27 @@ class EmailService:
                 error=error_msg
             )
     
+    def _respuesta_encolado(self, log_id: int) -> EmailResponseBasic:
+        """
+        Avisa al outbox del nuevo email y retorna la respuesta de email encolado
+        
+        Args:
+            log_id (int): ID del log pendiente
+            
+        Returns:
+            EmailResponseBasic: Respuesta exitosa sin fecha de envío (aún no se envía)
+            con el ID del log para consultar su estado
+        """
+        email_outbox.notificar()
+        logger.info(f"Email encolado en el outbox (log {log_id})")
+        return EmailResponseBasic(
+            success=True,
+            message="Email encolado para envío",
+            fecha_envio=None,
+            error=None,
+            log_id=log_id
+        )
+    
     def _crear_mensaje_mime(self, destinatario_email: str, asunto: str, 
                            contenido_html: str) -> MIMEMultipart:
         """
@@ -677,33 +718,11 @@ class EmailService:
     
     def _send_smtp(self, message: MIMEMultipart, destinatario: str):
         """
-        Envía el mensaje vía SMTP
+        Envía el mensaje vía SMTP usando una conexión autenticada del pool compartido
         """
         try:
-            logger.info(f"Intentando conectar a SMTP: {self.smtp_server}:{self.smtp_port}")
-            logger.info(f"Timeout configurado: 10 segundos")
-            
-            # Conectar al servidor SMTP
-            with smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=10) as server:
-                logger.info("Conexión SMTP establecida")
-                server.ehlo()
-                
-                # Iniciar TLS si está habilitado
-                if self.use_tls:
-                    logger.info("Iniciando TLS...")
-                    server.starttls()
-                    server.ehlo()
-                
-                logger.info("Autenticando con servidor SMTP...")
-                # Autenticarse
-                server.login(self.username, self.password)
-                logger.info("Autenticación exitosa")
-                
-                # Enviar email
-                logger.info(f"Enviando mensaje a {destinatario}...")
-                server.send_message(message)
-                
-                logger.info(f"Mensaje enviado exitosamente a {destinatario}")
+            logger.info(f"Enviando mensaje a {destinatario}...")
+            smtp_pool.send(message, destinatario)
                 
         except Exception as e:
             error_msg = f"Error al enviar SMTP: {str(e)}"
@@ -711,6 +730,38 @@ class EmailService:
             logger.error(f"Detalles de conexión: Server={self.smtp_server}, Port={self.smtp_port}, TLS={self.use_tls}")
             raise
     
+    def _create_log(self, email_send: EmailSend, envio_directo: bool = False) -> Optional[int]:
+        """
+        Crea el log inicial de un email
+        
+        Args:
+            email_send (EmailSend): Datos del email a registrar
+            envio_directo (bool): Si la petición envía el email ella misma, el log se crea
+                como 'sending' y sin reintentos para que el outbox no lo reclame ni lo reenvíe
+            
+        Returns:
+            Optional[int]: ID del log creado o None si no se pudo crear
+        """
+        try:
+            db = db_connection.get_session()
+            try:
+                email_dao = EmailLogDAO(db)
+                email_log = email_dao.create_log(
+                    email_send,
+                    remitente_email=self.from_email,
+                    remitente_nombre=self.from_name,
+                    proveedor_email='smtp',
+                    **self._opciones_log(envio_directo)
+                )
+                logger.info(f"Log creado con ID: {email_log.id_log}")
+                return email_log.id_log
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Error al crear log: {str(e)}")
+            # Continuar sin log si falla la creación
+            return None
+    
     def _update_log_status(self, log_id: int, estado: EmailStatus, error_mensaje: Optional[str] = None):
         """
         Actualiza el estado de un log de email
@@ -721,7 +772,7 @@ class EmailService:
             error_mensaje (Optional[str]): Mensaje de error si aplica
         """
         try:
-            db = get_database_session()
+            db = db_connection.get_session()
             try:
                 email_dao = EmailLogDAO(db)
                 email_dao.update_status(log_id, estado, error_mensaje)
@@ -731,6 +782,147 @@ class EmailService:
         except Exception as e:
             logger.error(f"Error al actualizar log {log_id}: {str(e)}")
     
+    async def send_many(self, emails: List[EmailSendBasic]) -> List[EmailResponseBasic]:
+        """
+        Encola un lote de emails en el outbox (o, sin outbox, lo envía reutilizando las
+        conexiones del pool SMTP)
+        
+        Args:
+            emails (List[EmailSendBasic]): Emails a enviar
+            
+        Returns:
+            List[EmailResponseBasic]: Resultado por email, en el mismo orden
+        """
+        return await run_blocking(self.send_many_sync, emails)
+    
+    def send_many_sync(self, emails: List[EmailSendBasic]) -> List[EmailResponseBasic]:
+        """
+        Encola o envía un lote de emails (MÉTODO SÍNCRONO)
+        
+        Los logs del lote se crean con un solo commit. Con el outbox habilitado quedan
+        pendientes y la respuesta trae el log_id de cada email; si no, los mensajes se
+        reparten entre las conexiones del pool y el resultado de cada uno se guarda en su
+        log, que se crea como 'sending' y sin reintentos para que el outbox no lo reenvíe
+        
+        Args:
+            emails (List[EmailSendBasic]): Emails a enviar
+            
+        Returns:
+            List[EmailResponseBasic]: Resultado por email, en el mismo orden
+        """
+        if not emails:
+            return []
+        
+        configuracion_valida = self._validate_config()
+        encolar = email_outbox.enabled and configuracion_valida
+        log_ids = self._create_logs([
+            EmailSend(
+                destinatario_email=email_data.destinatario_email,
+                destinatario_nombre=None,
+                asunto=email_data.asunto,
+                contenido_html=self._process_html_content(email_data),
+                contenido_texto=None,
+                tipo_email=EmailType.CUSTOM,
+                variables={},
+                id_template=None
+            )
+            for email_data in emails
+        ], envio_directo=not encolar)
+        
+        if not configuracion_valida:
+            error_msg = "Configuración de email incompleta"
+            self._update_logs_status([(log_id, EmailStatus.FAILED, error_msg) for log_id in log_ids])
+            return [
+                EmailResponseBasic(success=False, message=error_msg, fecha_envio=None, error="Faltan credenciales de SMTP")
+                for _ in emails
+            ]
+        
+        if encolar and all(log_ids):
+            return [self._respuesta_encolado(log_id) for log_id in log_ids]
+        
+        mensajes = [(self._create_message(email_data), email_data.destinatario_email) for email_data in emails]
+        resultados = smtp_pool.send_many(mensajes)
+        
+        self._update_logs_status([
+            (log_id, EmailStatus.SENT if resultado["success"] else EmailStatus.FAILED, resultado.get("error"))
+            for log_id, resultado in zip(log_ids, resultados)
+        ])
+        
+        enviados = sum(1 for resultado in resultados if resultado["success"])
+        logger.info(f"Lote de emails procesado: {enviados}/{len(emails)} enviados")
+        
+        return [
+            EmailResponseBasic(
+                success=True,
+                message="Email enviado exitosamente",
+                fecha_envio=resultado["fecha_envio"],
+                error=None
+            ) if resultado["success"] else EmailResponseBasic(
+                success=False,
+                message="Error al enviar email",
+                fecha_envio=None,
+                error=f"Error SMTP: {resultado['error']}"
+            )
+            for resultado in resultados
+        ]
+    
+    def _create_logs(self, emails: List[EmailSend], envio_directo: bool = False) -> List[Optional[int]]:
+        """
+        Crea los logs de un lote de emails (pendientes, o 'sending' sin reintentos si
+        envio_directo, ver _create_log)
+        
+        Returns:
+            List[Optional[int]]: IDs de los logs (None en todas las posiciones si no se pudieron crear)
+        """
+        try:
+            db = db_connection.get_session()
+            try:
+                email_dao = EmailLogDAO(db)
+                email_logs = email_dao.create_logs(
+                    emails,
+                    remitente_email=self.from_email,
+                    remitente_nombre=self.from_name,
+                    proveedor_email='smtp',
+                    **self._opciones_log(envio_directo)
+                )
+                return [email_log.id_log for email_log in email_logs]
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Error al crear logs del lote: {str(e)}")
+            # Continuar sin logs si falla la creación
+            return [None] * len(emails)
+    
+    @staticmethod
+    def _opciones_log(envio_directo: bool) -> dict:
+        """
+        Datos del log de un email que envía la propia petición: en 'sending' el outbox
+        no lo reclama y con max_intentos=1 su fallo no vuelve a la cola (el llamador ya
+        recibió el resultado)
+        """
+        if not envio_directo:
+            return {}
+        return {'estado_envio': EmailStatus.SENDING, 'max_intentos': 1}
+    
+    def _update_logs_status(self, updates: List[tuple]):
+        """
+        Actualiza el estado de varios logs de email con un solo commit
+        
+        Args:
+            updates (List[tuple]): (log_id, estado, error_mensaje) por log
+        """
+        updates = [update for update in updates if update[0]]
+        if not updates:
+            return
+        try:
+            db = db_connection.get_session()
+            try:
+                EmailLogDAO(db).update_status_many(updates)
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Error al actualizar logs del lote: {str(e)}")
+    
     def send_quotation_email(
         self,
         destinatario_email: str,
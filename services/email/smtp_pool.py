@@ -0,0 +1,351 @@
+"""
+Pool de conexiones SMTP persistentes compartido por todo el proceso
+Mantiene algunas conexiones ya autenticadas (STARTTLS + login) para que cada
+email no pague el handshake TLS ni la autenticación
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.message import Message
+from queue import Empty, LifoQueue
+from typing import Dict, List, Optional, Tuple
+
+from core.config import EmailSettings
+
+logger = logging.getLogger(__name__)
+
+# Rechazos de un mensaje concreto: la conexión sigue siendo usable
+ERRORES_RECHAZO = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+# Errores tras los que la conexión quedó inservible y hay que abrir otra
+# (SMTPException hereda de OSError, por eso los rechazos se evalúan antes)
+ERRORES_CONEXION = (smtplib.SMTPServerDisconnected, OSError)
+
+
+class _ConexionSMTP:
+    """
+    Conexión SMTP autenticada con su contador de uso
+    """
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.mensajes_enviados = 0
+        self.ultimo_uso = time.monotonic()
+
+    def cerrar(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            try:
+                self.smtp.close()
+            except Exception:
+                pass
+
+
+class SMTPConnectionPool:
+    """
+    Clase Singleton con el pool de conexiones SMTP
+
+    Características:
+    - Hasta SMTP_POOL_SIZE conexiones autenticadas abiertas a la vez
+    - Las conexiones se reutilizan para muchos mensajes (se reciclan tras
+      SMTP_MAX_MESSAGES_PER_CONNECTION)
+    - Una conexión sin uso por más de SMTP_IDLE_TIMEOUT se descarta y se reabre,
+      antes de que el servidor la cierre por inactividad
+    - Si el servidor cerró la conexión se reconecta y se reintenta el mensaje una vez
+    - send_many reparte un lote entre las conexiones del pool y retorna un resultado por mensaje
+    """
+
+    _instance: Optional['SMTPConnectionPool'] = None
+    _lock = threading.Lock()  # Para thread-safety
+
+    def __new__(cls) -> 'SMTPConnectionPool':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self._settings = EmailSettings()
+        self._pool_size = max(1, self._settings.pool_size)
+        # LIFO: se reutiliza primero la conexión usada más recientemente
+        self._libres: "LifoQueue[_ConexionSMTP]" = LifoQueue()
+        self._cupos = threading.BoundedSemaphore(self._pool_size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "connections_closed_idle": 0,
+            "reconnects": 0,
+            "messages_sent": 0,
+            "messages_failed": 0,
+        }
+        self._initialized = True
+
+    def _contar(self, metrica: str, cantidad: int = 1):
+        with self._stats_lock:
+            self._stats[metrica] += cantidad
+
+    # ------------------------------------------------------------------
+    # Conexiones
+    # ------------------------------------------------------------------
+
+    def _abrir(self) -> _ConexionSMTP:
+        """
+        Abre una conexión nueva, con STARTTLS si está habilitado, y se autentica
+        """
+        settings = self._settings
+        logger.info(f"Abriendo conexión SMTP: {settings.smtp_server}:{settings.smtp_port}")
+        smtp = smtplib.SMTP(settings.smtp_server, settings.smtp_port, timeout=settings.timeout)
+        try:
+            smtp.ehlo()
+            if settings.use_tls:
+                smtp.starttls()
+                smtp.ehlo()
+            smtp.login(settings.smtp_username, settings.smtp_password)
+        except Exception:
+            smtp.close()
+            raise
+        self._contar("connections_opened")
+        return _ConexionSMTP(smtp)
+
+    def _adquirir(self) -> _ConexionSMTP:
+        """
+        Toma una conexión libre (o abre una) respetando el tamaño del pool
+        """
+        if not self._cupos.acquire(timeout=self._settings.acquire_timeout):
+            raise smtplib.SMTPException("No hay conexiones SMTP disponibles en el pool")
+        try:
+            while True:
+                try:
+                    conexion = self._libres.get_nowait()
+                except Empty:
+                    return self._abrir()
+                if time.monotonic() - conexion.ultimo_uso > self._settings.idle_timeout:
+                    conexion.cerrar()
+                    self._contar("connections_closed_idle")
+                    continue
+                self._contar("connections_reused")
+                return conexion
+        except Exception:
+            self._cupos.release()
+            raise
+
+    def _liberar(self, conexion: Optional[_ConexionSMTP], descartar: bool = False):
+        """
+        Devuelve la conexión al pool o la cierra si está rota o ya cumplió su cuota de mensajes
+        """
+        try:
+            if conexion is None:
+                return
+            limite = self._settings.max_messages_per_connection
+            if descartar or (limite and conexion.mensajes_enviados >= limite):
+                conexion.cerrar()
+            else:
+                conexion.ultimo_uso = time.monotonic()
+                self._libres.put(conexion)
+        finally:
+            self._cupos.release()
+
+    @staticmethod
+    def _reiniciar_transaccion(conexion: _ConexionSMTP) -> bool:
+        """
+        Envía RSET tras un rechazo para dejar la conexión lista para el siguiente mensaje
+
+        Returns:
+            bool: False si la conexión no respondió y se cerró
+        """
+        try:
+            conexion.smtp.rset()
+            return True
+        except Exception:
+            conexion.cerrar()
+            return False
+
+    # ------------------------------------------------------------------
+    # Envío
+    # ------------------------------------------------------------------
+
+    def _enviar_con(self, conexion: _ConexionSMTP, message: Message):
+        """
+        Envía un mensaje por la conexión dada, reconectando una vez si el servidor la cerró
+        (la conexión se reabre en el mismo objeto, que el llamador conserva)
+        """
+        try:
+            conexion.smtp.send_message(message)
+        except ERRORES_RECHAZO:
+            raise
+        except ERRORES_CONEXION as e:
+            logger.warning(f"Conexión SMTP perdida ({e}); reconectando")
+            conexion.cerrar()
+            self._contar("reconnects")
+            conexion.smtp = self._abrir().smtp
+            conexion.mensajes_enviados = 0
+            conexion.smtp.send_message(message)
+        conexion.mensajes_enviados += 1
+        self._contar("messages_sent")
+
+    def send(self, message: Message, destinatario: str):
+        """
+        Envía un mensaje usando una conexión del pool
+
+        Raises:
+            smtplib.SMTPException: Si el envío falla
+        """
+        conexion = self._adquirir()
+        descartar = False
+        try:
+            self._enviar_con(conexion, message)
+            logger.info(f"Mensaje enviado exitosamente a {destinatario}")
+        except ERRORES_RECHAZO:
+            self._contar("messages_failed")
+            self._reiniciar_transaccion(conexion)
+            raise
+        except Exception:
+            descartar = True
+            self._contar("messages_failed")
+            raise
+        finally:
+            self._liberar(conexion, descartar)
+
+    def _enviar_lote(self, lote: List[Tuple[int, Message, str]]) -> List[Tuple[int, Dict]]:
+        """
+        Envía un lote de mensajes reutilizando una sola conexión del pool
+        """
+        resultados = []
+        conexion = None
+        try:
+            conexion = self._adquirir()
+        except Exception as e:
+            error = str(e)
+            self._contar("messages_failed", len(lote))
+            return [(indice, {"success": False, "error": error, "destinatario": destinatario})
+                    for indice, _, destinatario in lote]
+
+        try:
+            for indice, message, destinatario in lote:
+                if conexion is None:
+                    # La reconexión previa falló: intentar abrir otra para el resto del lote
+                    try:
+                        conexion = self._abrir()
+                    except Exception as e:
+                        self._contar("messages_failed")
+                        resultados.append((indice, {"success": False, "error": str(e), "destinatario": destinatario}))
+                        continue
+                try:
+                    self._enviar_con(conexion, message)
+                    resultados.append((indice, {
+                        "success": True,
+                        "fecha_envio": datetime.utcnow(),
+                        "destinatario": destinatario
+                    }))
+                except ERRORES_RECHAZO as e:
+                    # Rechazo del mensaje (destinatario inválido, etc.): la conexión sigue usable
+                    self._contar("messages_failed")
+                    resultados.append((indice, {"success": False, "error": str(e), "destinatario": destinatario}))
+                    if not self._reiniciar_transaccion(conexion):
+                        conexion = None
+                except Exception as e:
+                    self._contar("messages_failed")
+                    resultados.append((indice, {"success": False, "error": str(e), "destinatario": destinatario}))
+                    conexion.cerrar()
+                    conexion = None
+        finally:
+            if conexion is None:
+                self._cupos.release()
+            else:
+                self._liberar(conexion)
+        return resultados
+
+    def send_many(self, mensajes: List[Tuple[Message, str]]) -> List[Dict]:
+        """
+        Envía varios mensajes repartiéndolos entre las conexiones del pool
+
+        Args:
+            mensajes: Lista de (mensaje MIME, email del destinatario)
+
+        Returns:
+            List[Dict]: Un resultado por mensaje, en el mismo orden
+                ("success", "destinatario" y "fecha_envio" o "error")
+        """
+        if not mensajes:
+            return []
+
+        indexados = [(i, message, destinatario) for i, (message, destinatario) in enumerate(mensajes)]
+        num_lotes = min(self._pool_size, len(indexados))
+        lotes = [indexados[i::num_lotes] for i in range(num_lotes)]
+
+        if num_lotes == 1:
+            por_lote = [self._enviar_lote(lotes[0])]
+        else:
+            por_lote = list(self.executor.map(self._enviar_lote, lotes))
+
+        resultados: List[Optional[Dict]] = [None] * len(indexados)
+        for lote in por_lote:
+            for indice, resultado in lote:
+                resultados[indice] = resultado
+        return resultados
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Hilos para enviar los lotes de send_many en paralelo (uno por conexión del pool)
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self._pool_size,
+                        thread_name_prefix="smtp-pool"
+                    )
+        return self._executor
+
+    def stats(self) -> dict:
+        """
+        Retorna métricas del pool
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["pool_size"] = self._pool_size
+        stats["idle_connections"] = self._libres.qsize()
+        stats["idle_timeout_seconds"] = self._settings.idle_timeout
+        return stats
+
+    def shutdown(self):
+        """
+        Cierra las conexiones libres y el pool de envío en lote
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        while True:
+            try:
+                self._libres.get_nowait().cerrar()
+            except Empty:
+                break
+
+
+# Instancia global del pool (Singleton)
+smtp_pool = SMTPConnectionPool()
+
+
+def get_smtp_pool_stats() -> dict:
+    """
+    Función helper para obtener las métricas del pool SMTP
+    """
+    return smtp_pool.stats()
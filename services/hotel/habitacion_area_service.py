@@ -1,6 +1,7 @@
 from dao.hotel.dao_habitacion_area import HabitacionAreaDAO
 from models.hotel.habitacionArea_model import HabitacionArea
 from schemas.hotel.habitacion_area_schema import HabitacionAreaCreate, HabitacionAreaUpdate, HabitacionAreaResponse
+from services.reserva.disponibilidad_index import disponibilidad_index
 from typing import List
 
 class HabitacionAreaService:
@@ -16,14 +17,21 @@ class HabitacionAreaService:
     def crear(self, data: HabitacionAreaCreate):
         # Crear usando **data
         nuevo = HabitacionArea(**data.model_dump())
-        return self.dao.create(nuevo)
+        creada = self.dao.create(nuevo)
+        # El catálogo de habitaciones cambió: el índice de disponibilidad se recarga
+        disponibilidad_index.invalidar()
+        return creada
 
     def actualizar(self, id_habitacion_area: int, data: HabitacionAreaUpdate):
         # Actualizar usando **data
-        return self.dao.update(id_habitacion_area, data.model_dump(exclude_unset=True))
+        actualizada = self.dao.update(id_habitacion_area, data.model_dump(exclude_unset=True))
+        disponibilidad_index.invalidar()
+        return actualizada
 
     def eliminar(self, id_habitacion_area: int):
-        return self.dao.delete(id_habitacion_area)
+        eliminada = self.dao.delete(id_habitacion_area)
+        disponibilidad_index.invalidar()
+        return eliminada
 
     def obtener_habitaciones_disponibles_por_piso(self, piso_id: int) -> List[HabitacionAreaResponse]:
         """Obtiene habitaciones disponibles para un piso (sin reservas activas)"""
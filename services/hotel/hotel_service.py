@@ -7,8 +7,9 @@ Actúa como intermediario entre las rutas (API) y el DAO (acceso a datos)
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from dao.hotel.dao_hotel import HotelDAO
+from dao.hotel.dao_hotel import HotelDAO, HotelAsyncDAO
 from schemas.hotel import HotelCreate, HotelUpdate, HotelResponse
 from models.hotel.hotel_model import Hotel
 from core.config import SupabaseSettings
@@ -20,15 +21,17 @@ class HotelService:
     Servicio que encapsula la lógica de negocio para operaciones de Hotel
     """
     
-    def __init__(self, db_session: Session):
+    def __init__(self, db_session: Optional[Session] = None, async_db_session: Optional[AsyncSession] = None):
         """
         Inicializa el servicio con una sesión de base de datos
         
         Args:
-            db_session (Session): Sesión de SQLAlchemy
+            db_session (Optional[Session]): Sesión de SQLAlchemy para los métodos síncronos
+            async_db_session (Optional[AsyncSession]): Sesión async para los métodos *_async
         """
         self.db = db_session
-        self.dao = HotelDAO(db_session)
+        self.dao = HotelDAO(db_session) if db_session is not None else None
+        self.async_dao = HotelAsyncDAO(async_db_session) if async_db_session is not None else None
         self.supabase_settings = SupabaseSettings()
         self.rutas_imagenes = RutasImagenes()
     
@@ -172,6 +175,32 @@ class HotelService:
         except Exception as e:
             raise Exception(f"Error inesperado al obtener hoteles: {str(e)}")
     
+    async def obtener_todos_los_hoteles_async(self, skip: int = 0, limit: int = 100) -> List[HotelResponse]:
+        """
+        Obtiene todos los hoteles con paginación usando la sesión async
+        
+        Args:
+            skip (int): Número de registros a saltar
+            limit (int): Número máximo de registros
+            
+        Returns:
+            List[HotelResponse]: Lista de hoteles
+            
+        Raises:
+            Exception: Si hay un error en la base de datos
+        """
+        if self.async_dao is None:
+            raise RuntimeError("HotelService se creó sin sesión async")
+        
+        try:
+            hoteles = await self.async_dao.get_all(skip=skip, limit=limit)
+            return [self._build_hotel_response(hotel) for hotel in hoteles]
+            
+        except SQLAlchemyError as e:
+            raise Exception(f"Error al obtener hoteles de la base de datos: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Error inesperado al obtener hoteles: {str(e)}")
+    
     def actualizar_hotel(self, hotel_id: int, hotel_update: HotelUpdate) -> Optional[HotelResponse]:
         """
         Actualiza un hotel existente
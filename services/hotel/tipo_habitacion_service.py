@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException, status
 
@@ -11,6 +11,7 @@ from schemas.hotel.tipo_habitacion_schemas import (
     PeriodicidadResponse
 )
 from core.config import SupabaseSettings
+from core.executor import blocking_executor
 from utils.rutas_imagenes import RutasImagenes
 
 
@@ -46,13 +47,65 @@ class TipoHabitacionService:
         
         return f"{base_url}/storage/v1/object/public/{bucket}/{ruta_storage}"
     
-    def _build_tipo_habitacion_response(self, tipo_habitacion: TipoHabitacion, incluir_galeria: bool = False) -> TipoHabitacionResponse:
+    def _obtener_galeria_urls(self, id_tipoHabitacion: int) -> List[str]:
+        """
+        Lista la galería de un tipo de habitación en storage y retorna sus URLs públicas
+        
+        Args:
+            id_tipoHabitacion (int): ID del tipo de habitación
+            
+        Returns:
+            List[str]: URLs públicas (lista vacía si no hay imágenes o hubo error)
+        """
+        try:
+            from services.storage.tipo_habitacion_storage_service import TipoHabitacionStorageService
+            storage_service = TipoHabitacionStorageService()
+            galeria_result = storage_service.list_galeria(id_tipoHabitacion)
+            if galeria_result.get("success") and galeria_result.get("imagenes"):
+                return [img.get("url_publica") for img in galeria_result["imagenes"] if img.get("url_publica")]
+            return []
+        except Exception as e:
+            print(f"Error al obtener galería para tipo {id_tipoHabitacion}: {e}")
+            return []
+    
+    def obtener_galerias(self, ids_tipoHabitacion: Iterable[int]) -> Dict[int, List[str]]:
+        """
+        Obtiene las galerías de varios tipos de habitación en paralelo
+        
+        Las llamadas a storage se reparten en el pool compartido de llamadas bloqueantes,
+        como máximo SupabaseSettings.gallery_fetch_workers a la vez, de modo que la
+        latencia total es la del listado más lento y no la suma de todos
+        
+        Args:
+            ids_tipoHabitacion (Iterable[int]): IDs de los tipos de habitación
+            
+        Returns:
+            Dict[int, List[str]]: URLs públicas de la galería por ID de tipo
+        """
+        ids = list(dict.fromkeys(ids_tipoHabitacion))
+        if not ids:
+            return {}
+        if len(ids) == 1:
+            return {ids[0]: self._obtener_galeria_urls(ids[0])}
+        
+        galerias = blocking_executor.map(
+            self._obtener_galeria_urls, ids, max_concurrency=self.supabase_settings.gallery_fetch_workers
+        )
+        return dict(zip(ids, galerias))
+    
+    def _build_tipo_habitacion_response(
+        self,
+        tipo_habitacion: TipoHabitacion,
+        incluir_galeria: bool = False,
+        galeria_urls: Optional[List[str]] = None
+    ) -> TipoHabitacionResponse:
         """
         Construye un TipoHabitacionResponse desde un modelo TipoHabitacion, incluyendo URL de foto de perfil y galería
         
         Args:
             tipo_habitacion (TipoHabitacion): Modelo de tipo de habitación
             incluir_galeria (bool): Si True, incluye la galería de imágenes
+            galeria_urls (Optional[List[str]]): Galería ya obtenida (ver obtener_galerias); evita consultar storage
             
         Returns:
             TipoHabitacionResponse: Schema de respuesta con URL de foto construida
@@ -62,20 +115,9 @@ class TipoHabitacionService:
         if tipo_habitacion.url_foto_perfil:
             url_foto_completa = self._build_foto_perfil_url(tipo_habitacion.url_foto_perfil)
         
-        # Obtener galería si se solicita
-        galeria_urls = None
-        if incluir_galeria:
-            try:
-                from services.storage.tipo_habitacion_storage_service import TipoHabitacionStorageService
-                storage_service = TipoHabitacionStorageService()
-                galeria_result = storage_service.list_galeria(tipo_habitacion.id_tipoHabitacion)
-                if galeria_result.get("success") and galeria_result.get("imagenes"):
-                    galeria_urls = [img.get("url_publica") for img in galeria_result["imagenes"] if img.get("url_publica")]
-                else:
-                    galeria_urls = []
-            except Exception as e:
-                print(f"Error al obtener galería para tipo {tipo_habitacion.id_tipoHabitacion}: {e}")
-                galeria_urls = []
+        # Obtener galería si se solicita y no se proporcionó
+        if galeria_urls is None and incluir_galeria:
+            galeria_urls = self._obtener_galeria_urls(tipo_habitacion.id_tipoHabitacion)
         
         # Construir diccionario con todos los campos
         tipo_dict = {
@@ -3,13 +3,50 @@ from dao.mantenimiento.dao_mantenimiento import MantenimientoDao
 from models.mantenimiento.mantenimiento_model import Mantenimiento
 from schemas.mantenimiento.mantenimiento_schema import MantenimientoCreate, MantenimientoUpdate
 from datetime import datetime
-from models.seguridad.usuario_asignacion_model import UsuarioAsignacion
+from dao.seguridad.dao_usuario_asignacion import UsuarioAsignacionDAO
+from services.notifications.notification_dispatcher import (
+    NotificationMessage,
+    enqueue_notification,
+    notification_handler
+)
 import logging
-import threading
 from sqlalchemy.orm import joinedload
 
 logger = logging.getLogger(__name__)
 
+
+@notification_handler("mantenimiento_asignado")
+def _resolver_mantenimiento_asignado(db: Session, payloads: list):
+    """
+    Construye el push de mantenimientos asignados a un empleado (uno solo si se asignaron varios)
+    """
+    empleado_id = payloads[0]["empleado_id"]
+    usuario_id = UsuarioAsignacionDAO(db).get_usuario_id_empleado_activo(empleado_id)
+    if not usuario_id:
+        logger.info(f"No se encontró usuario asignado para empleado_id {empleado_id}")
+        return []
+    
+    ultimo = payloads[-1]
+    if len(payloads) == 1:
+        title = "Nueva tarea de mantenimiento asignada"
+        body = f"Se te ha asignado: {ultimo['descripcion']}"
+    else:
+        title = "Nuevas tareas de mantenimiento asignadas"
+        body = f"Se te han asignado {len(payloads)} tareas de mantenimiento"
+    
+    return [NotificationMessage(
+        usuario_id=usuario_id,
+        title=title,
+        body=body,
+        data={
+            "tipo": "mantenimiento_asignado",
+            "mantenimiento_id": str(ultimo["mantenimiento_id"]),
+            "mantenimiento_ids": ",".join(str(p["mantenimiento_id"]) for p in payloads),
+            "empleado_id": str(empleado_id),
+            "screen": "mantenimiento_detail"
+        }
+    )]
+
 class MantenimientoService:
     def __init__(self):
         self.dao = MantenimientoDao()
@@ -24,39 +61,9 @@ class MantenimientoService:
         mantenimiento = Mantenimiento(**data.model_dump())
         mantenimientoCreado = self.dao.create(db, mantenimiento)
         
-        def enviar_en_background():
-            # Crear nueva sesión de BD para el hilo (importante: no reutilizar la sesión del hilo principal)
-            from core.database_connection import get_database_session
-            db_background = next(get_database_session())
-            try:
-                from services.notifications.fcm_push_service import FCMPushService
-                    
-             # Crear servicio de notificaciones con nueva sesión
-                push_service = FCMPushService(db_background)
-                    
-                # Buscar usuario_id desde empleado_id en UsuarioAsignacion
-                usuario_asignacion = db_background.query(UsuarioAsignacion).filter(
-                        UsuarioAsignacion.empleado_id == mantenimiento.empleado_id,
-                        UsuarioAsignacion.tipo_asignacion == 1,  # 1=Empleado
-                        UsuarioAsignacion.estatus == 1  # Activo
-                ).first()
-                   
-                if not usuario_asignacion:
-                        logger.info(f"No se encontró usuario asignado para empleado_id {mantenimiento.empleado_id}")
-                        return
-                    
-                usuario_id = usuario_asignacion.usuario_id
-                # Enviar notificación (sin esperar respuesta)
-                push_service.send_to_user(
-                    usuario_id=usuario_id,
-                    title="Nueva tarea de mantenimiento asignada",
-                    body=f"Se te ha asignado: {mantenimiento.descripcion}",
-                )         
-            finally:
-                # Cerrar sesión de BD del hilo
-                db_background.close() 
-            thread = threading.Thread(target=enviar_en_background, daemon=True)
-            thread.start()  
+        # Enviar notificación si se asignó un empleado
+        if mantenimientoCreado and mantenimientoCreado.empleado_id:
+            self._enviar_notificacion_asignacion(db, mantenimientoCreado)
         return mantenimientoCreado        
 
     def actualizar(self, db: Session, mantenimiento_id: int, data: MantenimientoUpdate):
@@ -102,77 +109,26 @@ class MantenimientoService:
     
     def _enviar_notificacion_asignacion(self, db: Session, mantenimiento):
         """
-        Envía notificación push al empleado cuando se le asigna un mantenimiento.
-        Se ejecuta en un hilo separado para no bloquear la respuesta principal.
+        Encola la notificación push al empleado al que se asigna un mantenimiento.
+        El envío lo hace el NotificationDispatcher sin bloquear la respuesta principal.
         
         Args:
             db (Session): Sesión de base de datos
-            mantenimiento: Mantenimiento actualizado con empleado asignado
+            mantenimiento: Mantenimiento con empleado asignado
         """
-        # Guardar datos necesarios antes de pasar al hilo
-        mantenimiento_id = mantenimiento.id_mantenimiento
-        empleado_id = mantenimiento.empleado_id
-        descripcion = mantenimiento.descripcion
-        
-        # Ejecutar en hilo separado para no bloquear la respuesta
-        def enviar_en_background():
-            try:
-                # Crear nueva sesión de BD para el hilo (importante: no reutilizar la sesión del hilo principal)
-                from core.database_connection import get_database_session
-                from models.seguridad.usuario_asignacion_model import UsuarioAsignacion
-                
-                db_background = next(get_database_session())
-                
-                try:
-                    # Solo enviar si hay empleado asignado
-                    if not empleado_id:
-                        return
-                    
-                    # Buscar usuario_id desde empleado_id en UsuarioAsignacion
-                    usuario_asignacion = db_background.query(UsuarioAsignacion).filter(
-                        UsuarioAsignacion.empleado_id == empleado_id,
-                        UsuarioAsignacion.tipo_asignacion == 1,  # 1=Empleado
-                        UsuarioAsignacion.estatus == 1  # Activo
-                    ).first()
-                    
-                    if not usuario_asignacion:
-                        logger.info(f"No se encontró usuario asignado para empleado_id {empleado_id}")
-                        return
-                    
-                    usuario_id = usuario_asignacion.usuario_id
-                    
-                    # Importar aquí para evitar importación circular
-                    from services.notifications.fcm_push_service import FCMPushService
-                    
-                    # Crear servicio de notificaciones con nueva sesión
-                    push_service = FCMPushService(db_background)
-                    
-                    # Enviar notificación
-                    push_service.send_to_user(
-                        usuario_id=usuario_id,
-                        title="Nueva tarea de mantenimiento asignada",
-                        body=f"Se te ha asignado: {descripcion}",
-                        data={
-                            "tipo": "mantenimiento_asignado",
-                            "mantenimiento_id": str(mantenimiento_id),
-                            "empleado_id": str(empleado_id),
-                            "screen": "mantenimiento_detail"
-                        }
-                    )
-                    
-                    logger.info(f"✅ Notificación enviada al usuario {usuario_id} (empleado_id: {empleado_id}) por mantenimiento {mantenimiento_id}")
-                    
-                finally:
-                    # Cerrar sesión de BD del hilo
-                    db_background.close()
-                    
-            except Exception as e:
-                # No fallar la operación principal si falla la notificación
-                logger.error(f"❌ Error enviando notificación de mantenimiento: {e}", exc_info=True)
+        # Solo enviar si hay empleado asignado
+        if not mantenimiento.empleado_id:
+            return
         
-        # Iniciar hilo en background sin esperar (daemon=True permite que el programa termine sin esperar el hilo)
-        thread = threading.Thread(target=enviar_en_background, daemon=True)
-        thread.start()
+        enqueue_notification(
+            "mantenimiento_asignado",
+            f"empleado:{mantenimiento.empleado_id}",
+            {
+                "mantenimiento_id": mantenimiento.id_mantenimiento,
+                "empleado_id": mantenimiento.empleado_id,
+                "descripcion": mantenimiento.descripcion
+            }
+        )
 
 
     def eliminar(self, db: Session, id_mantenimiento: int):
@@ -3,7 +3,7 @@ Servicio de Conversación
 Maneja la lógica de negocio para conversaciones
 """
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import datetime
@@ -24,6 +24,8 @@ from schemas.mensajeria.conversacion_schema import (
 )
 from schemas.mensajeria.mensaje_schema import MensajeResponse
 from core.config import SupabaseSettings
+from services.seguridad.permisos_matrix import permisos_matrix
+from services.mensajeria.websocket_manager import WebSocketManager
 
 
 class ConversacionService:
@@ -59,8 +61,7 @@ class ConversacionService:
         Returns:
             bool: True si tiene el rol, False si no
         """
-        roles = self.rol_usuario_dao.get_user_roles(usuario_id)
-        return any(rol.rol.lower() == nombre_rol.lower() for rol in roles)
+        return permisos_matrix.tiene_rol(usuario_id, nombre_rol)
     
     def _es_cliente(self, usuario_id: int) -> bool:
         """Verifica si un usuario es cliente"""
@@ -280,109 +281,95 @@ class ConversacionService:
             id_estatus=conversacion.id_estatus
         )
     
+    @staticmethod
+    def _cursor_inbox(fecha_orden: datetime, id_conversacion: int) -> str:
+        """Cursor opaco de la paginación keyset del inbox: '<fecha ISO>_<id_conversacion>'"""
+        return f"{fecha_orden.isoformat()}_{id_conversacion}"
+    
+    @staticmethod
+    def _parse_cursor_inbox(cursor: str) -> Tuple[datetime, int]:
+        try:
+            fecha, id_conversacion = cursor.rsplit("_", 1)
+            return datetime.fromisoformat(fecha), int(id_conversacion)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor de paginación inválido"
+            )
+    
+    def _url_foto_perfil(self, ruta_storage: Optional[str]) -> Optional[str]:
+        """Construye la URL completa de una foto de perfil desde la ruta almacenada"""
+        if not ruta_storage:
+            return None
+        if self.supabase_settings.public_base_url:
+            base_url = self.supabase_settings.public_base_url.rstrip('/')
+            bucket = self.supabase_settings.bucket_images
+            return f"{base_url}/storage/v1/object/public/{bucket}/{ruta_storage}"
+        return ruta_storage
+    
     def obtener_conversaciones_usuario(
         self,
         usuario_id: int,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[ConversacionListResponse]:
         """
-        Obtiene todas las conversaciones de un usuario con información adicional
+        Obtiene el inbox de un usuario: conversaciones con último mensaje, contador de
+        no leídos y datos del otro participante, resueltos en una sola consulta
         Solo retorna conversaciones que tienen al menos un mensaje
         
         Args:
             usuario_id (int): ID del usuario
-            skip (int): Número de registros a saltar
+            skip (int): Número de registros a saltar (se ignora si se envía cursor)
             limit (int): Número máximo de registros
+            cursor (Optional[str]): Campo `cursor` de la última conversación de la página
+                anterior (paginación keyset por fecha del último mensaje)
             
         Returns:
             List[ConversacionListResponse]: Lista de conversaciones con último mensaje y contador
         """
-        try:
-            print(f"🔵 ConversacionService: Obteniendo conversaciones para usuario_id={usuario_id}")
-            conversaciones = self.dao.get_by_usuario(usuario_id, skip, limit)
-            print(f"🔵 ConversacionService: Encontradas {len(conversaciones)} conversaciones en BD")
-            
-            resultado = []
-            conversaciones_sin_mensajes = 0
-            
-            for idx, conv in enumerate(conversaciones):
-                # Obtener último mensaje
-                ultimos_mensajes = self.mensaje_dao.get_by_conversacion(conv.id_conversacion, 0, 1)
-                
-                # FILTRO: Solo incluir conversaciones que tienen al menos un mensaje
-                if not ultimos_mensajes:
-                    conversaciones_sin_mensajes += 1
-                    print(f"🔵 ConversacionService: Conversación {conv.id_conversacion} sin mensajes, omitiendo")
-                    continue
-                
-                ultimo_mensaje = None
-                if ultimos_mensajes:
-                    msg = ultimos_mensajes[0]
-                    ultimo_mensaje = MensajeResponse(
-                        id_mensaje=msg.id_mensaje,
-                        conversacion_id=msg.conversacion_id,
-                        remitente_id=msg.remitente_id,
-                        contenido=msg.contenido,
-                        fecha_envio=msg.fecha_envio,
-                        fecha_leido=msg.fecha_leido,
-                        id_estatus=msg.id_estatus,
-                        adjuntos=[]
-                    )
-                
-                # Contar mensajes no leídos
-                no_leidos = self.mensaje_dao.get_no_leidos(conv.id_conversacion, usuario_id)
-                contador_no_leidos = len(no_leidos)
-                
-                # Obtener información del otro usuario
-                otro_usuario_id = conv.usuario2_id if conv.usuario1_id == usuario_id else conv.usuario1_id
-                otro_usuario = self.usuario_dao.get_by_id(otro_usuario_id)
-                otro_usuario_nombre = otro_usuario.login if otro_usuario else None
-                
-                # Construir URL completa de foto de perfil si existe
-                otro_usuario_foto = None
-                if otro_usuario and otro_usuario.url_foto_perfil:
-                    # Construir URL completa desde la ruta almacenada
-                    ruta_storage = otro_usuario.url_foto_perfil
-                    if self.supabase_settings.public_base_url:
-                        base_url = self.supabase_settings.public_base_url.rstrip('/')
-                        bucket = self.supabase_settings.bucket_images
-                        otro_usuario_foto = f"{base_url}/storage/v1/object/public/{bucket}/{ruta_storage}"
-                    else:
-                        otro_usuario_foto = ruta_storage
-                
-                try:
-                    resultado.append(ConversacionListResponse(
-                        id_conversacion=conv.id_conversacion,
-                        tipo_conversacion=conv.tipo_conversacion,
-                        usuario1_id=conv.usuario1_id,
-                        usuario2_id=conv.usuario2_id,
-                        cliente_id=conv.cliente_id,
-                        empleado1_id=conv.empleado1_id,
-                        empleado2_id=conv.empleado2_id,
-                        fecha_creacion=conv.fecha_creacion,
-                        fecha_ultimo_mensaje=conv.fecha_ultimo_mensaje,
-                        id_estatus=conv.id_estatus,
-                        ultimo_mensaje=ultimo_mensaje,
-                        contador_no_leidos=contador_no_leidos,
-                        otro_usuario_id=otro_usuario_id,
-                        otro_usuario_nombre=otro_usuario_nombre,
-                        otro_usuario_foto=otro_usuario_foto
-                    ))
-                except Exception as e:
-                    print(f"❌ ConversacionService: Error procesando conversación {idx}: {e}")
-                    import traceback
-                    print(f"❌ ConversacionService: Traceback: {traceback.format_exc()}")
-                    raise
-            
-            print(f"🔵 ConversacionService: Omitidas {conversaciones_sin_mensajes} conversaciones sin mensajes")
-            print(f"🔵 ConversacionService: Retornando {len(resultado)} conversaciones procesadas")
-            return resultado
-        except Exception as e:
-            print(f"❌ ConversacionService: Error en obtener_conversaciones_usuario: {e}")
-            import traceback
-            print(f"❌ ConversacionService: Traceback: {traceback.format_exc()}")
-            raise
+        despues_de = self._parse_cursor_inbox(cursor) if cursor else None
+        filas = self.dao.get_inbox(
+            usuario_id,
+            limit=limit,
+            despues_de=despues_de,
+            skip=0 if despues_de else skip
+        )
+        
+        resultado = []
+        for fila in filas:
+            conv = fila.Conversacion
+            msg = fila.ultimo_mensaje
+            resultado.append(ConversacionListResponse(
+                id_conversacion=conv.id_conversacion,
+                tipo_conversacion=conv.tipo_conversacion,
+                usuario1_id=conv.usuario1_id,
+                usuario2_id=conv.usuario2_id,
+                cliente_id=conv.cliente_id,
+                empleado1_id=conv.empleado1_id,
+                empleado2_id=conv.empleado2_id,
+                fecha_creacion=conv.fecha_creacion,
+                fecha_ultimo_mensaje=conv.fecha_ultimo_mensaje,
+                id_estatus=conv.id_estatus,
+                ultimo_mensaje=MensajeResponse(
+                    id_mensaje=msg.id_mensaje,
+                    conversacion_id=msg.conversacion_id,
+                    remitente_id=msg.remitente_id,
+                    contenido=msg.contenido,
+                    fecha_envio=msg.fecha_envio,
+                    fecha_leido=msg.fecha_leido,
+                    id_estatus=msg.id_estatus,
+                    adjuntos=[]
+                ),
+                contador_no_leidos=fila.contador_no_leidos or 0,
+                otro_usuario_id=fila.otro_usuario_id,
+                otro_usuario_nombre=fila.otro_usuario_login,
+                otro_usuario_foto=self._url_foto_perfil(fila.otro_usuario_foto),
+                cursor=self._cursor_inbox(fila.fecha_orden, conv.id_conversacion)
+            ))
+        
+        return resultado
     
     def obtener_conversacion_por_id(
         self,
@@ -639,6 +626,17 @@ class ConversacionService:
         
         conversacion_archivada = self.dao.archivar(conversacion_id)
         
+        # Sus pendientes salieron del total de no leídos: avisar a los participantes conectados
+        websocket_manager = WebSocketManager()
+        for participante_id in (conversacion_archivada.usuario1_id, conversacion_archivada.usuario2_id):
+            if websocket_manager.is_user_connected(participante_id):
+                websocket_manager.notify_threadsafe({
+                    "type": "no_leidos",
+                    "total": self.mensaje_dao.contar_no_leidos_usuario(participante_id),
+                    "conversacion_id": conversacion_id,
+                    "no_leidos": 0
+                }, participante_id)
+        
         return ConversacionResponse(
             id_conversacion=conversacion_archivada.id_conversacion,
             tipo_conversacion=conversacion_archivada.tipo_conversacion,
@@ -12,15 +12,42 @@ from dao.mensajeria.dao_conversacion import ConversacionDAO
 from dao.mensajeria.dao_mensaje import MensajeDAO
 from dao.seguridad.dao_usuario import UsuarioDAO
 from models.mensajeria.mensaje_model import Mensaje
-from schemas.mensajeria.mensaje_schema import MensajeCreate, MensajeResponse
+from schemas.mensajeria.mensaje_schema import (
+    MensajeCreate,
+    MensajeResponse,
+    ConversacionNoLeidosResponse,
+    ContadorNoLeidosResponse
+)
 from services.mensajeria.websocket_manager import WebSocketManager
-from services.notifications.fcm_push_service import FCMPushService
+from services.notifications.notification_dispatcher import (
+    NotificationMessage,
+    enqueue_notification,
+    notification_handler
+)
+
+
+def mensaje_a_evento(mensaje: MensajeResponse) -> dict:
+    """
+    Representación de un mensaje en los eventos WebSocket
+    """
+    return {
+        "id_mensaje": mensaje.id_mensaje,
+        "conversacion_id": mensaje.conversacion_id,
+        "remitente_id": mensaje.remitente_id,
+        "contenido": mensaje.contenido,
+        "fecha_envio": mensaje.fecha_envio.isoformat(),
+        "fecha_leido": mensaje.fecha_leido.isoformat() if mensaje.fecha_leido else None,
+        "id_estatus": mensaje.id_estatus
+    }
 
 
 class MensajeService:
     """
     Servicio para manejar la lógica de negocio de mensajes
     Incluye integración con WebSocket y FCM para notificaciones
+
+    Un mensaje nuevo se entrega en tiempo real si el destinatario está conectado (en
+    cualquier worker); si no, se encola un push en el NotificationDispatcher.
     """
     
     def __init__(self, db_session: Session):
@@ -33,9 +60,7 @@ class MensajeService:
         self.db = db_session
         self.dao = MensajeDAO(db_session)
         self.conversacion_dao = ConversacionDAO(db_session)
-        self.usuario_dao = UsuarioDAO(db_session)
         self.websocket_manager = WebSocketManager()
-        self.fcm_service = FCMPushService(db_session)
     
     def enviar_mensaje(
         self,
@@ -79,20 +104,6 @@ class MensajeService:
                 detail="La conversación está archivada"
             )
         
-        # Crear el mensaje
-        mensaje_data = {
-            'conversacion_id': conversacion_id,
-            'remitente_id': remitente_id,
-            'contenido': contenido,
-            'fecha_envio': datetime.now(),
-            'id_estatus': 1
-        }
-        
-        mensaje = self.dao.create(mensaje_data)
-        
-        # Actualizar fecha del último mensaje en la conversación
-        self.conversacion_dao.update_ultimo_mensaje(conversacion_id, mensaje.fecha_envio)
-        
         # Determinar destinatario
         destinatario_id = (
             conversacion.usuario2_id 
@@ -100,9 +111,19 @@ class MensajeService:
             else conversacion.usuario1_id
         )
         
-        # Obtener información del remitente para notificación
-        remitente = self.usuario_dao.get_by_id(remitente_id)
-        remitente_nombre = remitente.login if remitente else "Usuario"
+        # Crear el mensaje. En el mismo commit se incrementa el contador de no leídos del
+        # destinatario y se actualiza la fecha del último mensaje de la conversación
+        fecha_envio = datetime.now()
+        conversacion.fecha_ultimo_mensaje = fecha_envio
+        mensaje_data = {
+            'conversacion_id': conversacion_id,
+            'remitente_id': remitente_id,
+            'contenido': contenido,
+            'fecha_envio': fecha_envio,
+            'id_estatus': 1
+        }
+        
+        mensaje = self.dao.create(mensaje_data, destinatario_id=destinatario_id)
         
         # Preparar respuesta del mensaje
         mensaje_response = MensajeResponse(
@@ -116,31 +137,29 @@ class MensajeService:
             adjuntos=[]
         )
         
-        # Enviar notificación push SIEMPRE cuando llega un mensaje
-        # Esto asegura notificación incluso si el usuario está en otra pantalla o la app en segundo plano
-        # El WebSocket y FCM pueden coexistir sin problemas
-        try:
+        # Destinatario conectado: entrega por WebSocket. Desconectado: push FCM asíncrono
+        # (el dispatcher agrupa los mensajes seguidos de la misma conversación en un solo push)
+        entregado = self.websocket_manager.notify_threadsafe({
+            "type": "nuevo_mensaje",
+            "conversacion_id": conversacion_id,
+            "mensaje": mensaje_a_evento(mensaje_response)
+        }, destinatario_id)
+        
+        if entregado:
+            self.publicar_no_leidos(destinatario_id, conversacion_id)
+        else:
             contenido_preview = contenido[:100] + "..." if len(contenido) > 100 else contenido
-            notification_result = self.fcm_service.send_to_user(
-                usuario_id=destinatario_id,
-                title=f"Nuevo mensaje de {remitente_nombre}",
-                body=contenido_preview,
-                data={
-                    'type': 'mensaje',
-                    'conversacion_id': str(conversacion_id),
-                    'mensaje_id': str(mensaje.id_mensaje),
-                    'remitente_nombre': remitente_nombre
+            enqueue_notification(
+                "mensaje_nuevo",
+                f"usuario:{destinatario_id}:conversacion:{conversacion_id}",
+                {
+                    "usuario_id": destinatario_id,
+                    "conversacion_id": conversacion_id,
+                    "mensaje_id": mensaje.id_mensaje,
+                    "remitente_id": remitente_id,
+                    "contenido": contenido_preview
                 }
             )
-            if notification_result.get('success'):
-                print(f"🔵 MensajeService: Notificación push enviada a usuario {destinatario_id} ({notification_result.get('sent_to')} dispositivos)")
-            else:
-                print(f"⚠️ MensajeService: No se pudo enviar notificación push a usuario {destinatario_id}: {notification_result.get('message', 'Error desconocido')}")
-        except Exception as e:
-            # No fallar el envío del mensaje si falla la notificación
-            print(f"⚠️ MensajeService: Error enviando notificación FCM: {e}")
-            import traceback
-            print(f"⚠️ MensajeService: Traceback: {traceback.format_exc()}")
         
         return mensaje_response
     
@@ -183,7 +202,8 @@ class MensajeService:
         mensajes = self.dao.get_by_conversacion(conversacion_id, skip, limit)
         
         # Marcar mensajes como leídos cuando el usuario los ve
-        self.dao.marcar_todos_leidos_conversacion(conversacion_id, usuario_id)
+        if self.dao.marcar_todos_leidos_conversacion(conversacion_id, usuario_id):
+            self.publicar_no_leidos(usuario_id, conversacion_id)
         
         resultado = []
         for msg in mensajes:
@@ -246,7 +266,10 @@ class MensajeService:
                 detail="No puedes marcar este mensaje como leído"
             )
         
-        mensaje_actualizado = self.dao.marcar_leido(mensaje_id)
+        estaba_pendiente = mensaje.fecha_leido is None
+        mensaje_actualizado = self.dao.marcar_leido(mensaje_id, usuario_id=usuario_id)
+        if estaba_pendiente:
+            self.publicar_no_leidos(usuario_id, mensaje.conversacion_id)
         
         return MensajeResponse(
             id_mensaje=mensaje_actualizado.id_mensaje,
@@ -270,4 +293,78 @@ class MensajeService:
             int: Cantidad de mensajes no leídos
         """
         return self.dao.contar_no_leidos_usuario(usuario_id)
+    
+    def obtener_contadores_no_leidos(self, usuario_id: int, detalle: bool = False) -> ContadorNoLeidosResponse:
+        """
+        Obtiene el total de no leídos del usuario y, opcionalmente, el contador de cada conversación
+        
+        Args:
+            usuario_id (int): ID del usuario
+            detalle (bool): Incluir las conversaciones con mensajes no leídos
+            
+        Returns:
+            ContadorNoLeidosResponse: Total (y detalle por conversación)
+        """
+        conversaciones = None
+        if detalle:
+            conversaciones = [
+                ConversacionNoLeidosResponse(conversacion_id=conversacion_id, no_leidos=no_leidos)
+                for conversacion_id, no_leidos in self.dao.contador_dao.get_por_conversacion(usuario_id)
+            ]
+        return ContadorNoLeidosResponse(
+            contador_no_leidos=self.dao.contar_no_leidos_usuario(usuario_id),
+            conversaciones=conversaciones
+        )
+    
+    def publicar_no_leidos(self, usuario_id: int, conversacion_id: int):
+        """
+        Envía por WebSocket los contadores actualizados al usuario si está conectado
+        
+        Args:
+            usuario_id (int): ID del usuario cuyos contadores cambiaron
+            conversacion_id (int): ID de la conversación que cambió
+        """
+        if not self.websocket_manager.is_user_connected(usuario_id):
+            return
+        try:
+            self.websocket_manager.notify_threadsafe({
+                "type": "no_leidos",
+                "total": self.dao.contar_no_leidos_usuario(usuario_id),
+                "conversacion_id": conversacion_id,
+                "no_leidos": self.dao.contador_dao.get_contador(usuario_id, conversacion_id)
+            }, usuario_id)
+        except Exception as e:
+            # El contador persiste en BD; el cliente lo recupera en su siguiente consulta
+            print(f"⚠️ MensajeService: Error publicando contador de no leídos: {e}")
+
 
+@notification_handler("mensaje_nuevo")
+def _resolver_mensaje_nuevo(db: Session, payloads: list):
+    """
+    Construye el push de mensajes nuevos de una conversación (uno solo si llegaron varios
+    seguidos). Se omite si el destinatario se conectó mientras el push esperaba en cola.
+    """
+    ultimo = payloads[-1]
+    usuario_id = ultimo["usuario_id"]
+    if WebSocketManager().is_user_connected(usuario_id):
+        return []
+    
+    remitente = UsuarioDAO(db).get_by_id(ultimo["remitente_id"])
+    remitente_nombre = remitente.login if remitente else "Usuario"
+    
+    if len(payloads) == 1:
+        body = ultimo["contenido"]
+    else:
+        body = f"{len(payloads)} mensajes nuevos"
+    
+    return [NotificationMessage(
+        usuario_id=usuario_id,
+        title=f"Nuevo mensaje de {remitente_nombre}",
+        body=body,
+        data={
+            'type': 'mensaje',
+            'conversacion_id': str(ultimo["conversacion_id"]),
+            'mensaje_id': str(ultimo["mensaje_id"]),
+            'remitente_nombre': remitente_nombre
+        }
+    )]
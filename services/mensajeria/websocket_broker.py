@@ -0,0 +1,447 @@
+"""
+Brokers pub/sub para repartir mensajes WebSocket entre workers
+Con varios workers de uvicorn (o varios contenedores) cada proceso solo tiene los sockets
+de sus propios usuarios; el broker lleva el mensaje al worker donde está conectado el
+destinatario y replica la presencia (quién está conectado) en todos los workers
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import ssl
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import unquote, urlparse
+
+from core.config import WebSocketSettings
+
+logger = logging.getLogger(__name__)
+
+# Callback del WebSocketManager para entregar a los sockets locales: (usuario_id, mensaje en JSON)
+EntregaLocal = Callable[[int, str], Awaitable[None]]
+
+
+class WebSocketBroker:
+    """
+    Interfaz común de los brokers
+
+    - publicar(usuario_id, texto): entrega el mensaje (ya codificado en JSON) en los demás
+      workers que tengan sockets del usuario (el worker que publica entrega a sus sockets
+      locales por su cuenta)
+    - usuario_conectado / usuario_desconectado: presencia local (primer y último socket)
+    - esta_conectado: presencia global, consultable desde cualquier hilo
+    """
+
+    backend = "base"
+
+    def __init__(self, worker_id: Optional[str] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._entregar: Optional[EntregaLocal] = None
+        self._locales: Set[int] = set()
+        self._publicados = 0
+        self._recibidos = 0
+
+    async def iniciar(self, entregar: EntregaLocal):
+        """
+        Arranca el broker; entregar se invoca con los mensajes que llegan de otros workers
+        """
+        self._entregar = entregar
+
+    async def detener(self):
+        """
+        Detiene el broker y retira la presencia de este worker
+        """
+
+    async def publicar(self, usuario_id: int, texto: str):
+        """
+        Envía el mensaje (JSON) a los otros workers donde el usuario tiene sockets
+        """
+
+    async def usuario_conectado(self, usuario_id: int):
+        """
+        El usuario abrió su primer socket en este worker
+        """
+        self._locales.add(usuario_id)
+
+    async def usuario_desconectado(self, usuario_id: int):
+        """
+        El usuario cerró su último socket en este worker
+        """
+        self._locales.discard(usuario_id)
+
+    def conectado_en_otro_worker(self, usuario_id: int) -> bool:
+        return False
+
+    def esta_conectado(self, usuario_id: int) -> bool:
+        """
+        True si el usuario tiene al menos un socket abierto en cualquier worker
+        """
+        return usuario_id in self._locales or self.conectado_en_otro_worker(usuario_id)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "worker_id": self.worker_id,
+            "usuarios_locales": len(self._locales),
+            "publicados": self._publicados,
+            "recibidos": self._recibidos
+        }
+
+
+class InMemoryBroker(WebSocketBroker):
+    """
+    Broker de un solo proceso: no hay otros workers, la presencia es la local
+    """
+
+    backend = "memory"
+
+
+class BrokerError(RuntimeError):
+    """
+    Error reportado por el servidor pub/sub
+    """
+
+
+def _comando(*args) -> bytes:
+    """
+    Codifica un comando en el protocolo de Redis (RESP)
+    """
+    partes = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        partes.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(partes)
+
+
+async def _leer_respuesta(reader: asyncio.StreamReader):
+    """
+    Lee una respuesta RESP completa (simple, error, entero, bulk o arreglo)
+    """
+    linea = await reader.readline()
+    if not linea:
+        raise ConnectionError("Conexión cerrada por el broker")
+    tipo, resto = linea[:1], linea[1:-2]
+    if tipo == b"+":
+        return resto.decode()
+    if tipo == b"-":
+        return BrokerError(resto.decode())
+    if tipo == b":":
+        return int(resto)
+    if tipo == b"$":
+        largo = int(resto)
+        if largo < 0:
+            return None
+        return (await reader.readexactly(largo + 2))[:-2]
+    if tipo == b"*":
+        largo = int(resto)
+        if largo < 0:
+            return None
+        return [await _leer_respuesta(reader) for _ in range(largo)]
+    raise BrokerError(f"Respuesta RESP inválida: {linea!r}")
+
+
+class RedisBroker(WebSocketBroker):
+    """
+    Broker sobre PUBLISH/SUBSCRIBE del protocolo de Redis
+
+    Funciona contra Redis o contra scripts/ws_pubsub_hub.py (servidor local con el mismo
+    subconjunto de comandos). Usa dos conexiones: una suscrita y otra para publicar.
+
+    Canales:
+    - <prefijo>:u:<usuario_id>: mensajes para el usuario; cada worker se suscribe al canal
+      de los usuarios que tiene conectados
+    - <prefijo>:presencia: altas, bajas y anuncios periódicos de usuarios por worker; cada
+      worker mantiene una réplica local para responder esta_conectado sin ir a la red
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str, settings: Optional[WebSocketSettings] = None, worker_id: Optional[str] = None):
+        super().__init__(worker_id)
+        self._settings = settings or WebSocketSettings()
+        self._url = urlparse(url)
+        self._prefijo = self._settings.channel_prefix
+        self._canal_presencia = f"{self._prefijo}:presencia"
+        self._intervalo = self._settings.presence_interval_seconds
+        self._sub_writer: Optional[asyncio.StreamWriter] = None
+        self._pub_reader: Optional[asyncio.StreamReader] = None
+        self._pub_writer: Optional[asyncio.StreamWriter] = None
+        self._pub_lock = asyncio.Lock()
+        self._sub_lock = asyncio.Lock()
+        self._tareas: List[asyncio.Task] = []
+        self._conectado = asyncio.Event()
+        self._detenido = False
+        # Réplica de presencia: worker -> usuarios y vencimiento del último anuncio
+        self._remotos: Dict[str, Set[int]] = {}
+        self._vencimientos: Dict[str, float] = {}
+        # usuario -> cantidad de otros workers donde está conectado
+        self._conteo_remoto: Dict[int, int] = {}
+        self._reconexiones = 0
+        self._errores_publicacion = 0
+
+    def _canal_usuario(self, usuario_id: int) -> str:
+        return f"{self._prefijo}:u:{usuario_id}"
+
+    # ------------------------------------------------------------------
+    # Conexión
+    # ------------------------------------------------------------------
+
+    async def _abrir(self):
+        if self._url.scheme == "unix":
+            reader, writer = await asyncio.open_unix_connection(self._url.path)
+        else:
+            reader, writer = await asyncio.open_connection(
+                self._url.hostname or "localhost",
+                self._url.port or 6379,
+                ssl=ssl.create_default_context() if self._url.scheme == "rediss" else None
+            )
+        if self._url.password:
+            args = ["AUTH", unquote(self._url.password)]
+            if self._url.username:
+                args.insert(1, unquote(self._url.username))
+            writer.write(_comando(*args))
+            await writer.drain()
+            respuesta = await _leer_respuesta(reader)
+            if isinstance(respuesta, BrokerError):
+                writer.close()
+                raise respuesta
+        return reader, writer
+
+    async def iniciar(self, entregar: EntregaLocal):
+        await super().iniciar(entregar)
+        self._detenido = False
+        self._tareas = [
+            asyncio.create_task(self._escuchar(), name="ws-broker-sub"),
+            asyncio.create_task(self._anunciar_presencia(), name="ws-broker-presencia")
+        ]
+        try:
+            await asyncio.wait_for(self._conectado.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            logger.warning(f"Broker WebSocket sin conexión a {self._url.geturl()}; se reintentará en segundo plano")
+
+    async def detener(self):
+        self._detenido = True
+        try:
+            await self._publicar_presencia("bye")
+        except Exception:
+            pass
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self._tareas = []
+        for writer in (self._sub_writer, self._pub_writer):
+            if writer is not None:
+                writer.close()
+        self._sub_writer = self._pub_writer = self._pub_reader = None
+        self._conectado.clear()
+
+    async def _escuchar(self):
+        """
+        Mantiene la conexión suscrita; al perderla reconecta con backoff y se vuelve a
+        suscribir a la presencia y a los usuarios locales
+        """
+        espera = 0.5
+        while not self._detenido:
+            try:
+                reader, writer = await self._abrir()
+                async with self._sub_lock:
+                    self._sub_writer = writer
+                    canales = [self._canal_presencia] + [self._canal_usuario(u) for u in self._locales]
+                    writer.write(_comando("SUBSCRIBE", *canales))
+                    await writer.drain()
+                self._conectado.set()
+                espera = 0.5
+                # Pedir a los demás workers su presencia y anunciar la propia
+                await self._publicar_presencia("sync")
+                await self._publicar_presencia("snap")
+                while True:
+                    respuesta = await _leer_respuesta(reader)
+                    if isinstance(respuesta, list) and len(respuesta) == 3 and respuesta[0] == b"message":
+                        await self._recibir(respuesta[1].decode(), respuesta[2])
+                    elif isinstance(respuesta, BrokerError):
+                        logger.error(f"Broker WebSocket: {respuesta}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._conectado.clear()
+                self._sub_writer = None
+                if self._detenido:
+                    return
+                self._reconexiones += 1
+                logger.warning(f"Broker WebSocket desconectado ({e}); reintento en {espera:.1f} s")
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, self._settings.reconnect_max_seconds)
+
+    async def _suscripcion(self, comando: str, canal: str):
+        async with self._sub_lock:
+            if self._sub_writer is None:
+                # Al reconectar se suscribe a todos los usuarios locales
+                return
+            try:
+                self._sub_writer.write(_comando(comando, canal))
+                await self._sub_writer.drain()
+            except (ConnectionError, OSError) as e:
+                logger.warning(f"Broker WebSocket: error en {comando} {canal}: {e}")
+
+    async def _publish(self, canal: str, datos: bytes):
+        async with self._pub_lock:
+            for intento in range(2):
+                try:
+                    if self._pub_writer is None:
+                        self._pub_reader, self._pub_writer = await self._abrir()
+                    self._pub_writer.write(_comando("PUBLISH", canal, datos))
+                    await self._pub_writer.drain()
+                    respuesta = await _leer_respuesta(self._pub_reader)
+                    if isinstance(respuesta, BrokerError):
+                        raise respuesta
+                    self._publicados += 1
+                    return
+                except (ConnectionError, OSError, asyncio.IncompleteReadError) as e:
+                    # Conexión de publicación caída: se reabre una vez
+                    if self._pub_writer is not None:
+                        self._pub_writer.close()
+                    self._pub_reader = self._pub_writer = None
+                    if intento:
+                        self._errores_publicacion += 1
+                        raise ConnectionError(f"No se pudo publicar en el broker: {e}") from e
+
+    # ------------------------------------------------------------------
+    # Mensajes
+    # ------------------------------------------------------------------
+
+    async def publicar(self, usuario_id: int, texto: str):
+        if not self.conectado_en_otro_worker(usuario_id):
+            return
+        # "<worker>\n<json>": el JSON viaja tal cual, sin volver a codificarlo ni decodificarlo
+        datos = f"{self.worker_id}\n{texto}".encode()
+        try:
+            await self._publish(self._canal_usuario(usuario_id), datos)
+        except Exception as e:
+            logger.error(f"Broker WebSocket: mensaje para usuario {usuario_id} no publicado: {e}")
+
+    async def _recibir(self, canal: str, datos: bytes):
+        if canal == self._canal_presencia:
+            try:
+                evento = json.loads(datos)
+            except ValueError:
+                logger.warning("Broker WebSocket: evento de presencia inválido")
+                return
+            if evento.get("o") != self.worker_id:
+                self._recibidos += 1
+                await self._recibir_presencia(evento.get("o"), evento)
+            return
+        origen, _, texto = datos.decode().partition("\n")
+        if origen == self.worker_id or not texto:
+            return
+        self._recibidos += 1
+        usuario_id = int(canal.rsplit(":", 1)[1])
+        if usuario_id in self._locales and self._entregar is not None:
+            try:
+                await self._entregar(usuario_id, texto)
+            except Exception as e:
+                logger.error(f"Broker WebSocket: error entregando a usuario {usuario_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # Presencia
+    # ------------------------------------------------------------------
+
+    async def usuario_conectado(self, usuario_id: int):
+        await super().usuario_conectado(usuario_id)
+        await self._suscripcion("SUBSCRIBE", self._canal_usuario(usuario_id))
+        await self._publicar_presencia("on", usuario_id)
+
+    async def usuario_desconectado(self, usuario_id: int):
+        await super().usuario_desconectado(usuario_id)
+        await self._suscripcion("UNSUBSCRIBE", self._canal_usuario(usuario_id))
+        await self._publicar_presencia("off", usuario_id)
+
+    async def _publicar_presencia(self, tipo: str, usuario_id: Optional[int] = None):
+        evento = {"o": self.worker_id, "t": tipo}
+        if tipo == "snap":
+            evento["u"] = sorted(self._locales)
+        elif usuario_id is not None:
+            evento["u"] = usuario_id
+        try:
+            await self._publish(self._canal_presencia, json.dumps(evento).encode())
+        except Exception as e:
+            logger.warning(f"Broker WebSocket: presencia '{tipo}' no publicada: {e}")
+
+    async def _recibir_presencia(self, worker: str, evento: dict):
+        tipo = evento.get("t")
+        if tipo == "sync":
+            await self._publicar_presencia("snap")
+            return
+        if tipo == "bye":
+            self._reemplazar_remotos(worker, set())
+            return
+        usuarios = set(self._remotos.get(worker, ()))
+        if tipo == "snap":
+            usuarios = {int(u) for u in evento.get("u", ())}
+        elif tipo == "on":
+            usuarios.add(int(evento["u"]))
+        elif tipo == "off":
+            usuarios.discard(int(evento["u"]))
+        self._reemplazar_remotos(worker, usuarios)
+        self._vencimientos[worker] = time.monotonic() + 3 * self._intervalo
+
+    def _reemplazar_remotos(self, worker: str, usuarios: Set[int]):
+        anteriores = self._remotos.get(worker, set())
+        for usuario_id in anteriores - usuarios:
+            restantes = self._conteo_remoto.get(usuario_id, 0) - 1
+            if restantes > 0:
+                self._conteo_remoto[usuario_id] = restantes
+            else:
+                self._conteo_remoto.pop(usuario_id, None)
+        for usuario_id in usuarios - anteriores:
+            self._conteo_remoto[usuario_id] = self._conteo_remoto.get(usuario_id, 0) + 1
+        if usuarios:
+            self._remotos[worker] = usuarios
+        else:
+            self._remotos.pop(worker, None)
+            self._vencimientos.pop(worker, None)
+
+    async def _anunciar_presencia(self):
+        """
+        Anuncia periódicamente los usuarios locales y descarta workers que dejaron de anunciarse
+        """
+        while True:
+            await asyncio.sleep(self._intervalo)
+            if self._conectado.is_set():
+                await self._publicar_presencia("snap")
+            ahora = time.monotonic()
+            for worker, vence in list(self._vencimientos.items()):
+                if vence < ahora:
+                    logger.warning(f"Broker WebSocket: worker {worker} sin anuncios de presencia; se descarta")
+                    self._reemplazar_remotos(worker, set())
+
+    def conectado_en_otro_worker(self, usuario_id: int) -> bool:
+        return usuario_id in self._conteo_remoto
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({
+            "conectado": self._conectado.is_set(),
+            "workers_remotos": len(self._remotos),
+            "usuarios_remotos": len(self._conteo_remoto),
+            "reconexiones": self._reconexiones,
+            "errores_publicacion": self._errores_publicacion
+        })
+        return stats
+
+
+def crear_broker(settings: Optional[WebSocketSettings] = None) -> WebSocketBroker:
+    """
+    Crea el broker según WS_BROKER_URL (vacío o "memory" = un solo proceso)
+    """
+    settings = settings or WebSocketSettings()
+    url = settings.broker_url.strip()
+    if not url or url == "memory":
+        return InMemoryBroker()
+    esquema = urlparse(url).scheme
+    if esquema not in ("redis", "rediss", "unix"):
+        raise ValueError(f"WS_BROKER_URL no soportado: {url}")
+    return RedisBroker(url, settings)
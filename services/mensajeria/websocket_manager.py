@@ -3,105 +3,501 @@ Manager para manejar conexiones WebSocket activas
 Gestiona las conexiones de usuarios conectados en tiempo real
 """
 
-from typing import Dict, List
-from fastapi import WebSocket
+import asyncio
 import json
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+from fastapi import WebSocket, status
 import logging
 
+from core.config import WebSocketSettings
+from services.mensajeria.websocket_broker import WebSocketBroker, crear_broker
+
 logger = logging.getLogger(__name__)
 
+POLITICA_DESCONECTAR = "disconnect"
+POLITICA_DESCARTAR_ANTIGUO = "drop_oldest"
+
+
+def _codificar(message: dict) -> str:
+    # Mismo formato que WebSocket.send_json
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class ConexionWebSocket:
+    """
+    Socket de un usuario con su cola de salida acotada y su tarea escritora
+
+    Los mensajes se encolan ya codificados; la tarea los escribe en orden con un tiempo
+    máximo por envío, de modo que un socket lento no retrasa a los demás.
+    Registra la última trama recibida del cliente para detectar sockets muertos.
+    """
+
+    def __init__(self, websocket: WebSocket, usuario_id: int, manager: 'WebSocketManager'):
+        self.websocket = websocket
+        self.usuario_id = usuario_id
+        self._manager = manager
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=max(1, manager.settings.send_queue_size))
+        self.tarea: Optional[asyncio.Task] = None
+        self.cerrada = False
+        ahora = time.monotonic()
+        self.conectada_en = ahora
+        self.ultima_actividad = ahora
+        self.ultimo_heartbeat = ahora
+
+    def actividad(self):
+        """
+        Marca que llegó una trama del cliente (mensaje, ping o pong)
+        """
+        self.ultima_actividad = time.monotonic()
+        self._manager._contar("recibidos")
+
+    def iniciar(self):
+        self.tarea = asyncio.create_task(self._escribir(), name=f"ws-writer-{self.usuario_id}")
+
+    def encolar(self, texto: str) -> bool:
+        """
+        Encola un mensaje sin esperar; con la cola llena aplica la política de consumidor lento
+
+        Returns:
+            bool: True si el mensaje quedó en cola
+        """
+        if self.cerrada:
+            return False
+        try:
+            self.cola.put_nowait(texto)
+        except asyncio.QueueFull:
+            if self._manager.settings.slow_consumer_policy == POLITICA_DESCARTAR_ANTIGUO:
+                self.cola.get_nowait()
+                self.cola.put_nowait(texto)
+                self._manager._contar("descartados")
+            else:
+                self._manager._contar("desconexiones_lentas")
+                logger.warning(f"Socket del usuario {self.usuario_id} con la cola llena; se desconecta")
+                self._manager._cerrar(self, status.WS_1013_TRY_AGAIN_LATER)
+                return False
+        self._manager._contar("encolados")
+        return True
+
+    async def _escribir(self):
+        timeout = self._manager.settings.send_timeout_seconds
+        while True:
+            texto = await self.cola.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(texto), timeout=timeout)
+                self._manager._contar("enviados")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._manager._contar("errores_envio")
+                logger.error(f"Error enviando mensaje a usuario {self.usuario_id}: {e!r}")
+                self._manager._cerrar(self, status.WS_1011_INTERNAL_ERROR)
+                return
+
+    def detener(self):
+        self.cerrada = True
+        if self.tarea is not None and not self.tarea.done():
+            self.tarea.cancel()
+
 
 class WebSocketManager:
     """
     Clase singleton para manejar conexiones WebSocket activas
-    Almacena las conexiones por usuario_id
+    Almacena las conexiones locales por usuario_id
+
+    Los mensajes se entregan a los sockets de este worker y, a través del broker
+    (WS_BROKER_URL), a los de otros workers o contenedores donde el usuario esté conectado.
+    La presencia (is_user_connected) es global a todos los workers.
+
+    Cada socket tiene una cola de salida acotada (WS_SEND_QUEUE_SIZE) y su propia tarea
+    escritora: enviar solo encola, y un dispositivo lento no retrasa a los demás. Con la
+    cola llena se aplica WS_SLOW_CONSUMER_POLICY. Cada mensaje se codifica a JSON una vez,
+    sin importar a cuántos sockets o workers se entregue.
+
+    Una tarea periódica (WS_REAPER_INTERVAL) cierra los sockets cuya tarea escritora
+    terminó y, si se configuran WS_HEARTBEAT_INTERVAL / WS_IDLE_TIMEOUT (desactivados por
+    defecto), envía heartbeats de aplicación y cierra los sockets sin actividad del
+    cliente. Los sockets por usuario y por worker están limitados.
     """
-    
-    _instance = None
-    
-    def __new__(cls):
+
+    _instance: Optional['WebSocketManager'] = None
+    _lock = threading.Lock()  # Para thread-safety
+
+    def __new__(cls) -> 'WebSocketManager':
+        """
+        Implementación del patrón Singleton
+        """
         if cls._instance is None:
-            cls._instance = super(WebSocketManager, cls).__new__(cls)
-            cls._instance.active_connections: Dict[int, List[WebSocket]] = {}
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
         return cls._instance
-    
-    async def connect(self, websocket: WebSocket, usuario_id: int):
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self.settings = WebSocketSettings()
+        self.active_connections: Dict[int, List[ConexionWebSocket]] = {}
+        self.broker: WebSocketBroker = crear_broker(self.settings)
+        # Event loop de las conexiones, para publicar desde hilos del pool
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._iniciado = False
+        self._total_conexiones = 0
+        self._mantenimiento: Optional[asyncio.Task] = None
+        # Usuarios anunciados al broker; los cambios de presencia se aplican de uno en uno
+        self._presentes: Set[int] = set()
+        self._presencia_lock = asyncio.Lock()
+        # Muestra anterior para calcular mensajes por segundo
+        self._muestra = (time.monotonic(), 0, 0)
+        self._tasas = {"enviados_por_segundo": 0.0, "recibidos_por_segundo": 0.0}
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "mensajes": 0,
+            "difusiones": 0,
+            "codificaciones": 0,
+            "encolados": 0,
+            "enviados": 0,
+            "descartados": 0,
+            "desconexiones_lentas": 0,
+            "errores_envio": 0,
+            "recibidos": 0,
+            "heartbeats": 0,
+            "cerradas_inactividad": 0,
+            "cerradas_limite_usuario": 0,
+            "rechazadas_limite": 0,
+        }
+        self._initialized = True
+
+    def _contar(self, clave: str, cantidad: int = 1):
+        with self._stats_lock:
+            self._stats[clave] += cantidad
+
+    async def start(self):
+        """
+        Arranca el broker entre workers (se llama en el startup de la app)
+        """
+        if self._iniciado:
+            return
+        self._loop = asyncio.get_running_loop()
+        await self.broker.iniciar(self._entregar_local)
+        self._mantenimiento = asyncio.create_task(self._mantener(), name="ws-reaper")
+        self._iniciado = True
+        logger.info(f"WebSocketManager iniciado con broker '{self.broker.backend}' ({self.broker.worker_id})")
+
+    async def stop(self):
+        """
+        Detiene las tareas escritoras y el broker, y retira la presencia de este worker
+        """
+        if self._mantenimiento is not None:
+            self._mantenimiento.cancel()
+            self._mantenimiento = None
+        for conexiones in list(self.active_connections.values()):
+            for conexion in conexiones:
+                conexion.detener()
+        if self._iniciado:
+            await self.broker.detener()
+            self._presentes.clear()
+            self._iniciado = False
+
+    async def connect(self, websocket: WebSocket, usuario_id: int) -> Optional[ConexionWebSocket]:
         """
         Conecta un WebSocket para un usuario
-        
+
+        Con el worker en WS_MAX_CONNECTIONS la conexión se rechaza (código 1013). Si el
+        usuario supera WS_MAX_CONNECTIONS_PER_USER se cierra su socket más antiguo, que
+        suele ser uno medio cerrado de una reconexión.
+
         Args:
             websocket (WebSocket): Conexión WebSocket
             usuario_id (int): ID del usuario
+
+        Returns:
+            Optional[ConexionWebSocket]: Conexión registrada, o None si se rechazó
         """
         await websocket.accept()
-        if usuario_id not in self.active_connections:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+
+        limite = self.settings.max_connections
+        if limite > 0 and self._total_conexiones >= limite:
+            self._contar("rechazadas_limite")
+            logger.warning(f"Límite de {limite} conexiones WebSocket alcanzado; se rechaza al usuario {usuario_id}")
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+            return None
+
+        conexion = ConexionWebSocket(websocket, usuario_id, self)
+        conexion.iniciar()
+        primera = usuario_id not in self.active_connections
+        if primera:
             self.active_connections[usuario_id] = []
-        self.active_connections[usuario_id].append(websocket)
-        logger.info(f"Usuario {usuario_id} conectado. Total conexiones: {len(self.active_connections[usuario_id])}")
-    
+        conexiones = self.active_connections[usuario_id]
+        conexiones.append(conexion)
+        self._total_conexiones += 1
+        if primera:
+            await self._sincronizar_presencia(usuario_id)
+
+        exceso = len(conexiones) - max(1, self.settings.max_connections_per_user)
+        for antigua in conexiones[:max(0, exceso)]:
+            self._contar("cerradas_limite_usuario")
+            self._cerrar(antigua, status.WS_1008_POLICY_VIOLATION)
+        logger.info(f"Usuario {usuario_id} conectado. Total conexiones: {len(conexiones)}")
+        return conexion
+
+    def _buscar(self, websocket: WebSocket, usuario_id: int) -> Optional[ConexionWebSocket]:
+        for conexion in self.active_connections.get(usuario_id, ()):
+            if conexion.websocket is websocket:
+                return conexion
+        return None
+
     def disconnect(self, websocket: WebSocket, usuario_id: int):
         """
         Desconecta un WebSocket de un usuario
-        
+
         Args:
             websocket (WebSocket): Conexión WebSocket
             usuario_id (int): ID del usuario
         """
-        if usuario_id in self.active_connections:
+        conexion = self._buscar(websocket, usuario_id)
+        if conexion is None:
+            # Ya retirado (ej. cerrado por consumidor lento)
+            return
+        self._retirar(conexion)
+        logger.info(f"Usuario {usuario_id} desconectado")
+
+    def _retirar(self, conexion: ConexionWebSocket):
+        conexion.detener()
+        conexiones = self.active_connections.get(conexion.usuario_id)
+        if conexiones is None or conexion not in conexiones:
+            return
+        conexiones.remove(conexion)
+        self._total_conexiones -= 1
+        if not conexiones:
+            self._quitar_usuario(conexion.usuario_id)
+
+    def _cerrar(self, conexion: ConexionWebSocket, code: int):
+        """
+        Retira y cierra un socket (consumidor lento o error de escritura); el handler
+        del endpoint recibe la desconexión y termina
+        """
+        self._retirar(conexion)
+
+        async def _cerrar_socket():
             try:
-                self.active_connections[usuario_id].remove(websocket)
-                if not self.active_connections[usuario_id]:
-                    del self.active_connections[usuario_id]
-                logger.info(f"Usuario {usuario_id} desconectado")
-            except ValueError:
-                logger.warning(f"WebSocket no encontrado en conexiones del usuario {usuario_id}")
-    
+                await asyncio.wait_for(conexion.websocket.close(code=code), timeout=self.settings.send_timeout_seconds)
+            except Exception:
+                pass
+
+        asyncio.get_running_loop().create_task(_cerrar_socket())
+
+    async def _mantener(self):
+        """
+        Tarea periódica: heartbeats, cierre de sockets inactivos y tasas de mensajes
+        """
+        intervalo = max(1.0, self.settings.reaper_interval_seconds)
+        while True:
+            await asyncio.sleep(intervalo)
+            try:
+                self.revisar_conexiones()
+            except Exception as e:
+                logger.error(f"Error revisando conexiones WebSocket: {e!r}")
+
+    def revisar_conexiones(self) -> int:
+        """
+        Envía heartbeat a los sockets que lo necesitan y cierra los que no han enviado
+        nada durante WS_IDLE_TIMEOUT o cuya tarea escritora terminó
+
+        Returns:
+            int: Sockets cerrados en esta pasada
+        """
+        ahora = time.monotonic()
+        heartbeat = self.settings.heartbeat_interval_seconds
+        inactividad = self.settings.idle_timeout_seconds
+        ping = None
+        cerrados = 0
+        for conexiones in list(self.active_connections.values()):
+            for conexion in list(conexiones):
+                escritor_caido = conexion.tarea is not None and conexion.tarea.done()
+                if escritor_caido or (inactividad > 0 and ahora - conexion.ultima_actividad > inactividad):
+                    self._contar("cerradas_inactividad")
+                    self._cerrar(conexion, status.WS_1001_GOING_AWAY)
+                    cerrados += 1
+                elif heartbeat > 0 and ahora - conexion.ultimo_heartbeat >= heartbeat:
+                    if ping is None:
+                        ping = _codificar({"type": "ping"})
+                    conexion.ultimo_heartbeat = ahora
+                    if conexion.encolar(ping):
+                        self._contar("heartbeats")
+        if cerrados:
+            logger.info(f"{cerrados} sockets WebSocket inactivos cerrados")
+
+        # Tasas desde la pasada anterior
+        with self._stats_lock:
+            enviados, recibidos = self._stats["enviados"], self._stats["recibidos"]
+        instante, enviados_antes, recibidos_antes = self._muestra
+        transcurrido = ahora - instante
+        if transcurrido > 0:
+            self._tasas = {
+                "enviados_por_segundo": round((enviados - enviados_antes) / transcurrido, 2),
+                "recibidos_por_segundo": round((recibidos - recibidos_antes) / transcurrido, 2)
+            }
+        self._muestra = (ahora, enviados, recibidos)
+        return cerrados
+
+    def _quitar_usuario(self, usuario_id: int):
+        """
+        Elimina la entrada del usuario y avisa al broker (último socket local cerrado)
+        """
+        del self.active_connections[usuario_id]
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(
+                lambda: self._loop.create_task(self._sincronizar_presencia(usuario_id))
+            )
+
+    async def _sincronizar_presencia(self, usuario_id: int):
+        """
+        Anuncia al broker la presencia actual del usuario en este worker
+
+        Se decide al ejecutarse, no al programarse: si el usuario se reconectó antes de
+        que corriera el aviso de desconexión, no se le quita del broker.
+        """
+        async with self._presencia_lock:
+            conectado = usuario_id in self.active_connections
+            if conectado == (usuario_id in self._presentes):
+                return
+            if conectado:
+                self._presentes.add(usuario_id)
+                await self.broker.usuario_conectado(usuario_id)
+            else:
+                self._presentes.discard(usuario_id)
+                await self.broker.usuario_desconectado(usuario_id)
+
+    async def _entregar_local(self, usuario_id: int, texto: str):
+        """
+        Encola el mensaje (ya codificado) en los sockets del usuario en este worker
+        """
+        for conexion in list(self.active_connections.get(usuario_id, ())):
+            conexion.encolar(texto)
+
+    async def _enviar(self, texto: str, usuarios_ids: Iterable[int]):
+        for usuario_id in usuarios_ids:
+            await self._entregar_local(usuario_id, texto)
+            await self.broker.publicar(usuario_id, texto)
+
     async def send_personal_message(self, message: dict, usuario_id: int):
         """
-        Envía un mensaje a un usuario específico
-        
+        Envía un mensaje a un usuario específico (en este y en los demás workers)
+
+        Solo encola: retorna sin esperar a que cada socket termine de escribir.
+
         Args:
             message (dict): Mensaje a enviar
             usuario_id (int): ID del usuario destinatario
         """
-        if usuario_id in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections[usuario_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Error enviando mensaje a usuario {usuario_id}: {e}")
-                    disconnected.append(connection)
-            
-            # Remover conexiones desconectadas
-            for conn in disconnected:
-                self.active_connections[usuario_id].remove(conn)
-            
-            # Si no quedan conexiones, eliminar entrada
-            if not self.active_connections[usuario_id]:
-                del self.active_connections[usuario_id]
-    
+        self._contar("mensajes")
+        self._contar("codificaciones")
+        await self._enviar(_codificar(message), (usuario_id,))
+
+    async def send_to_connection(self, websocket: WebSocket, usuario_id: int, message: dict):
+        """
+        Envía un mensaje solo a un socket (respuestas al cliente que hizo la petición),
+        por la misma cola para no intercalar escrituras con la tarea escritora
+
+        Args:
+            websocket (WebSocket): Socket destino
+            usuario_id (int): ID del usuario dueño del socket
+            message (dict): Mensaje a enviar
+        """
+        conexion = self._buscar(websocket, usuario_id)
+        if conexion is not None:
+            self._contar("codificaciones")
+            conexion.encolar(_codificar(message))
+
+    def notify_threadsafe(self, message: dict, usuario_id: int) -> bool:
+        """
+        Programa el envío de un mensaje a un usuario desde código síncrono (servicios
+        ejecutados en el pool de hilos) sin esperar a que se entregue
+
+        Args:
+            message (dict): Mensaje a enviar
+            usuario_id (int): ID del usuario destinatario
+
+        Returns:
+            bool: True si el usuario estaba conectado y el envío quedó programado
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self.is_user_connected(usuario_id):
+            return False
+        asyncio.run_coroutine_threadsafe(self.send_personal_message(message, usuario_id), loop)
+        return True
+
     def is_user_connected(self, usuario_id: int) -> bool:
         """
-        Verifica si un usuario está conectado
-        
+        Verifica si un usuario está conectado en cualquier worker
+
         Args:
             usuario_id (int): ID del usuario
-            
+
         Returns:
             bool: True si está conectado, False si no
         """
-        return usuario_id in self.active_connections and len(self.active_connections[usuario_id]) > 0
-    
+        return self.broker.esta_conectado(usuario_id)
+
     async def broadcast_to_conversation(self, message: dict, usuario1_id: int, usuario2_id: int):
         """
-        Envía un mensaje a ambos usuarios de una conversación
-        
+        Envía un mensaje a ambos usuarios de una conversación (una sola codificación)
+
         Args:
             message (dict): Mensaje a enviar
             usuario1_id (int): ID del primer usuario
             usuario2_id (int): ID del segundo usuario
         """
-        await self.send_personal_message(message, usuario1_id)
-        await self.send_personal_message(message, usuario2_id)
+        self._contar("difusiones")
+        self._contar("codificaciones")
+        await self._enviar(_codificar(message), (usuario1_id, usuario2_id))
 
+    def stats(self) -> dict:
+        """
+        Retorna métricas de las conexiones locales, del reparto y del broker
+
+        Returns:
+            dict: usuarios y sockets conectados, profundidad de las colas de salida,
+            mensajes encolados/enviados/descartados, mensajes por segundo, desconexiones
+            por consumidor lento, sockets cerrados por inactividad o por límite
+        """
+        profundidades = [
+            conexion.cola.qsize()
+            for conexiones in list(self.active_connections.values())
+            for conexion in conexiones
+        ]
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update(self._tasas)
+        stats.update({
+            "usuarios_conectados": len(self.active_connections),
+            "conexiones": len(profundidades),
+            "conexiones_max": self.settings.max_connections,
+            "conexiones_max_por_usuario": self.settings.max_connections_per_user,
+            "cola_total": sum(profundidades),
+            "cola_max": max(profundidades, default=0),
+            "capacidad_cola": self.settings.send_queue_size,
+            "politica_consumidor_lento": self.settings.slow_consumer_policy,
+            "broker": self.broker.stats()
+        })
+        return stats
+
+
+# Instancia global del manager (Singleton)
+websocket_manager = WebSocketManager()
+
+
+def get_websocket_stats() -> dict:
+    """
+    Función helper para obtener las métricas de las conexiones WebSocket
+    """
+    return websocket_manager.stats()
@@ -0,0 +1,339 @@
+"""
+Emisor de notificaciones FCM compartido por todo el proceso
+Mantiene las credenciales, el access token OAuth y un pool HTTP keep-alive
+para que cada envío no pague carga de credenciales ni handshake TLS
+"""
+
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+
+from core.config import FCMSettings
+
+logger = logging.getLogger(__name__)
+
+FCM_SCOPES = ['https://www.googleapis.com/auth/firebase.messaging']
+
+
+class FCMSender:
+    """
+    Clase Singleton que envía mensajes a la API HTTP v1 de FCM
+
+    Características:
+    - Credenciales cargadas una sola vez por proceso
+    - Access token OAuth en cache hasta poco antes de su expiración
+    - requests.Session con pool de conexiones keep-alive
+    - Envío concurrente a varios tokens con límite de concurrencia
+    - Marca los tokens que FCM reporta como no registrados
+    """
+
+    _instance: Optional['FCMSender'] = None
+    _lock = threading.Lock()  # Para thread-safety
+
+    def __new__(cls) -> 'FCMSender':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self.fcm_settings = FCMSettings()
+        self._credentials = None
+        self._project_id: Optional[str] = None
+        self._credentials_loaded = False
+        self._token_lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._initialized = True
+
+    # ------------------------------------------------------------------
+    # Credenciales y access token
+    # ------------------------------------------------------------------
+
+    def _load_credentials(self):
+        """
+        Carga las credenciales de Google desde variables de entorno o archivo JSON
+        Prioriza variables de entorno sobre archivo físico
+        """
+        if self._credentials_loaded:
+            return
+        with self._lock:
+            if self._credentials_loaded:
+                return
+            try:
+                # Opción 1: Intentar cargar desde variables de entorno (recomendado)
+                if self.fcm_settings.has_env_variables:
+                    self._credentials = service_account.Credentials.from_service_account_info(
+                        self.fcm_settings.get_service_account_dict(),
+                        scopes=FCM_SCOPES
+                    )
+                    self._project_id = self.fcm_settings.project_id
+                    logger.info(f"✅ Credenciales FCM cargadas desde variables de entorno (Project ID: {self._project_id})")
+                    return
+
+                # Opción 2: Fallback a archivo JSON (solo para desarrollo local)
+                service_account_path = Path(self.fcm_settings.service_account_path)
+                if not service_account_path.exists():
+                    logger.warning(f"Service Account JSON no encontrado en: {service_account_path}")
+                    logger.warning("Configura las variables de entorno FCM_* en tu archivo .env")
+                    return
+
+                self._credentials = service_account.Credentials.from_service_account_file(
+                    str(service_account_path),
+                    scopes=FCM_SCOPES
+                )
+                with open(service_account_path, 'r') as f:
+                    self._project_id = json.load(f).get('project_id')
+
+                if not self._project_id:
+                    logger.error("No se encontró project_id en el Service Account JSON")
+                else:
+                    logger.info(f"✅ Credenciales FCM cargadas desde archivo JSON (Project ID: {self._project_id})")
+            except Exception as e:
+                logger.error(f"Error inicializando credenciales FCM: {e}")
+                self._credentials = None
+                self._project_id = None
+            finally:
+                self._credentials_loaded = True
+
+    @property
+    def project_id(self) -> Optional[str]:
+        self._load_credentials()
+        return self._project_id
+
+    @property
+    def configured(self) -> bool:
+        """
+        Indica si hay credenciales y project_id para enviar
+        """
+        self._load_credentials()
+        return self._credentials is not None and bool(self._project_id)
+
+    def _token_vigente(self) -> bool:
+        if not self._credentials.token or not self._credentials.expiry:
+            return False
+        margen = timedelta(seconds=self.fcm_settings.token_refresh_margin)
+        # google-auth maneja expiry como datetime UTC sin zona horaria
+        return self._credentials.expiry - margen > datetime.utcnow()
+
+    def get_access_token(self, force_refresh: bool = False) -> Optional[str]:
+        """
+        Retorna el access token en cache, renovándolo solo cuando está por expirar
+
+        Args:
+            force_refresh (bool): Renueva aunque el token siga vigente (ej. tras un 401)
+
+        Returns:
+            Optional[str]: Token de acceso o None si hay error
+        """
+        if not self.configured:
+            logger.error("Credenciales FCM no inicializadas")
+            return None
+
+        if not force_refresh and self._token_vigente():
+            return self._credentials.token
+
+        with self._token_lock:
+            # Otro hilo pudo haberlo renovado mientras se esperaba el lock
+            if not force_refresh and self._token_vigente():
+                return self._credentials.token
+            try:
+                self._credentials.refresh(Request(session=self.session))
+                return self._credentials.token
+            except Exception as e:
+                logger.error(f"Error obteniendo access token: {e}")
+                return None
+
+    # ------------------------------------------------------------------
+    # Pools HTTP y de envío
+    # ------------------------------------------------------------------
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        Sesión HTTP compartida con pool de conexiones keep-alive
+        """
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=2,
+                        pool_maxsize=self.fcm_settings.http_pool_size
+                    )
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Pool que limita los envíos concurrentes a FCM
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=max(1, self.fcm_settings.max_concurrency),
+                        thread_name_prefix="fcm-sender"
+                    )
+        return self._executor
+
+    # ------------------------------------------------------------------
+    # Envío
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _build_message(device_token: str, title: str, body: str, data: Optional[Dict] = None) -> Dict:
+        """
+        Construye el mensaje según formato HTTP v1
+        """
+        message = {
+            "message": {
+                "token": device_token,
+                "notification": {
+                    "title": title,
+                    "body": body
+                },
+                "android": {
+                    "priority": "high"
+                },
+                "apns": {
+                    "headers": {
+                        "apns-priority": "10"
+                    },
+                    "payload": {
+                        "aps": {
+                            "sound": "default",
+                            "badge": 1
+                        }
+                    }
+                }
+            }
+        }
+
+        # Agregar datos adicionales si se proporcionan
+        if data:
+            message["message"]["data"] = {str(k): str(v) for k, v in data.items()}
+        return message
+
+    @staticmethod
+    def _es_no_registrado(status_code: int, error: Dict) -> bool:
+        """
+        Indica si FCM reporta el token como inexistente o ya no registrado
+        """
+        if status_code == 404 or error.get("status") == "NOT_FOUND":
+            return True
+        for detail in error.get("details", []) or []:
+            if detail.get("errorCode") == "UNREGISTERED":
+                return True
+        return False
+
+    def send(self, device_token: str, title: str, body: str, data: Optional[Dict] = None) -> Dict:
+        """
+        Envía una notificación individual a través de FCM API HTTP v1
+
+        Returns:
+            Dict: Resultado del envío; "unregistered" es True si el token ya no es válido y
+            "retryable" es True si el error es transitorio (red, 429, 5xx) y vale la pena
+            reintentar; los errores de configuración no lo son
+        """
+        token_preview = device_token[:20] + "..."
+        if not self.project_id:
+            logger.error("Project ID no configurado")
+            return {"success": False, "error": "Project ID no configurado", "retryable": False, "device_token": token_preview}
+
+        url = self.fcm_settings.fcm_url.format(project_id=self._project_id)
+        message = self._build_message(device_token, title, body, data)
+
+        for intento in range(2):
+            access_token = self.get_access_token(force_refresh=intento > 0)
+            if not access_token:
+                return {"success": False, "error": "No se pudo obtener access token", "retryable": False, "device_token": token_preview}
+
+            try:
+                response = self.session.post(
+                    url,
+                    json=message,
+                    headers={"Authorization": f"Bearer {access_token}"},
+                    timeout=self.fcm_settings.request_timeout
+                )
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error de conexión con FCM: {e}")
+                return {"success": False, "error": str(e), "retryable": True, "device_token": token_preview}
+
+            # Token OAuth revocado o expirado antes de lo esperado: renovar y reintentar una vez
+            if response.status_code == 401 and intento == 0:
+                continue
+            break
+
+        if response.status_code == 200:
+            logger.info(f"Notificación enviada exitosamente a {token_preview}")
+            return {
+                "success": True,
+                "message_id": response.json().get("name", ""),
+                "device_token": token_preview
+            }
+
+        try:
+            error = response.json().get("error", {}) if response.text else {}
+        except ValueError:
+            error = {}
+        error_message = error.get("message", response.text)
+        logger.error(f"Error de FCM ({response.status_code}): {error_message}")
+        return {
+            "success": False,
+            "error": error_message,
+            "status_code": response.status_code,
+            "unregistered": self._es_no_registrado(response.status_code, error),
+            "retryable": response.status_code == 429 or response.status_code >= 500,
+            "device_token": token_preview
+        }
+
+    def send_many(self, device_tokens: List[str], title: str, body: str, data: Optional[Dict] = None) -> List[Dict]:
+        """
+        Envía la misma notificación a varios tokens en paralelo (acotado por FCM_MAX_CONCURRENCY)
+
+        Returns:
+            List[Dict]: Resultados en el mismo orden que device_tokens
+        """
+        if not device_tokens:
+            return []
+        if len(device_tokens) == 1:
+            return [self.send(device_tokens[0], title, body, data)]
+        return list(self.executor.map(lambda token: self.send(token, title, body, data), device_tokens))
+
+    def shutdown(self):
+        """
+        Libera el pool de envío y las conexiones HTTP
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+# Instancia global del emisor (Singleton)
+fcm_sender = FCMSender()
@@ -0,0 +1,559 @@
+"""
+Despachador de notificaciones push
+Reemplaza los hilos daemon por evento: los servicios encolan eventos (tipo + payload)
+y un pool fijo de workers los resuelve a mensajes y los envía por FCM
+
+Características:
+- Cola acotada en memoria, opcionalmente persistida en NOTIFICACIONES.Tb_notificacion_pendiente
+- Pool fijo de workers, cada uno con una sesión de BD corta por trabajo
+- Agrupación por destinatario: eventos del mismo tipo y destinatario que aún no se
+  despachan se combinan en un solo push
+- Reintentos con backoff exponencial ante errores transitorios (solo de los mensajes
+  que no se entregaron)
+- Limpieza periódica de las notificaciones persistidas ya enviadas o fallidas
+- Métricas de encolados, agrupados, enviados, reintentos y fallos
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+
+from core.config import NotificationSettings
+from core.database_connection import db_connection
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class NotificationMessage:
+    """
+    Mensaje push ya resuelto para un usuario
+    """
+    usuario_id: int
+    title: str
+    body: str
+    data: Optional[Dict] = None
+
+
+# Un handler recibe una sesión de BD y los payloads agrupados de un destinatario
+NotificationHandler = Callable[[Session, List[dict]], List[NotificationMessage]]
+
+
+@dataclass
+class _Job:
+    tipo: str
+    destinatario: str
+    payloads: List[dict] = field(default_factory=list)
+    ids_persistidos: List[int] = field(default_factory=list)
+    intentos: int = 0
+    disponible_en: float = 0.0
+    # Mensajes que quedan por entregar tras un intento parcial (None: aún no se resuelven)
+    pendientes: Optional[List[NotificationMessage]] = None
+
+
+class NotificationDispatcher:
+    """
+    Clase Singleton que administra la cola y el pool de workers de notificaciones
+
+    Uso desde los servicios:
+        @notification_handler("limpieza_asignada")
+        def _resolver(db, payloads): ...
+
+        enqueue_notification("limpieza_asignada", f"empleado:{empleado_id}", {...})
+    """
+
+    _instance: Optional['NotificationDispatcher'] = None
+    _lock = threading.Lock()  # Para thread-safety
+
+    def __new__(cls) -> 'NotificationDispatcher':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self._settings = NotificationSettings()
+        self._handlers: Dict[str, NotificationHandler] = {}
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, _Job]] = []
+        self._seq = itertools.count()
+        # Trabajos aún no tomados por un worker, indexados para agrupar por destinatario
+        self._agrupables: Dict[Tuple[str, str], _Job] = {}
+        # Ids persistidos que este proceso tiene en cola o en curso (el barrido no los vuelve a encolar)
+        self._retenidos: Set[int] = set()
+        self._workers: List[threading.Thread] = []
+        self._recovery_thread: Optional[threading.Thread] = None
+        self._ultima_limpieza: Optional[float] = None
+        self._running = False
+        self._in_flight = 0
+        self._metrics = {
+            "enqueued": 0,
+            "coalesced": 0,
+            "rejected": 0,
+            "deferred": 0,
+            "recovered": 0,
+            "processed": 0,
+            "messages_sent": 0,
+            "retried": 0,
+            "failed": 0,
+            "purged": 0
+        }
+        self._initialized = True
+
+    # ------------------------------------------------------------------
+    # Registro y encolado
+    # ------------------------------------------------------------------
+
+    def register_handler(self, tipo: str, handler: NotificationHandler):
+        """
+        Registra la función que convierte eventos de un tipo en mensajes push
+        """
+        self._handlers[tipo] = handler
+
+    def enqueue(self, tipo: str, destinatario: str, payload: dict) -> bool:
+        """
+        Encola un evento de notificación sin bloquear al llamador
+
+        Args:
+            tipo (str): Tipo de evento (debe tener handler registrado)
+            destinatario (str): Clave de agrupación, ej: "empleado:12" o "usuario:5"
+            payload (dict): Datos serializables a JSON del evento
+
+        Returns:
+            bool: True si el evento quedó encolado (o persistido para despacho posterior)
+        """
+        self.start()
+        lleno = self._cola_llena()
+
+        id_persistido = None
+        if self._settings.persist:
+            # Si la cola está llena se persiste sin reserva para que la recupere el barrido
+            id_persistido = self._persistir(tipo, destinatario, payload, reservar=not lleno)
+            if lleno and id_persistido is not None:
+                with self._cond:
+                    self._metrics["deferred"] += 1
+                return True
+
+        with self._cond:
+            job = self._agrupables.get((tipo, destinatario))
+            if job is not None:
+                job.payloads.append(payload)
+                if id_persistido is not None:
+                    job.ids_persistidos.append(id_persistido)
+                    self._retenidos.add(id_persistido)
+                self._metrics["coalesced"] += 1
+                return True
+
+            if len(self._heap) >= self._settings.queue_size:
+                self._metrics["rejected"] += 1
+                logger.warning(f"Cola de notificaciones llena, se descarta evento {tipo} para {destinatario}")
+                return False
+
+            job = _Job(
+                tipo=tipo,
+                destinatario=destinatario,
+                payloads=[payload],
+                ids_persistidos=[id_persistido] if id_persistido is not None else [],
+                disponible_en=time.monotonic() + self._settings.coalesce_seconds
+            )
+            self._push(job)
+            self._agrupables[(tipo, destinatario)] = job
+            self._retenidos.update(job.ids_persistidos)
+            self._metrics["enqueued"] += 1
+            return True
+
+    def _cola_llena(self) -> bool:
+        with self._cond:
+            return len(self._heap) >= self._settings.queue_size
+
+    def _push(self, job: _Job):
+        """
+        Agrega un trabajo al heap (requiere tener self._cond)
+        """
+        heapq.heappush(self._heap, (job.disponible_en, next(self._seq), job))
+        self._cond.notify()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """
+        Inicia los workers (lazy: se llama en el primer encolado o al arrancar la app)
+        """
+        if self._running:
+            return
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._workers = [
+                threading.Thread(target=self._worker_loop, name=f"notification-worker-{i}", daemon=True)
+                for i in range(max(1, self._settings.workers))
+            ]
+            for worker in self._workers:
+                worker.start()
+            if self._settings.persist:
+                self._recovery_thread = threading.Thread(
+                    target=self._recovery_loop, name="notification-recovery", daemon=True
+                )
+                self._recovery_thread.start()
+            logger.info(f"NotificationDispatcher iniciado con {len(self._workers)} workers")
+
+    def shutdown(self, timeout: float = 5.0):
+        """
+        Detiene los workers. Los eventos persistidos que no se enviaron serán
+        recuperados por otro proceso (o al reiniciar) cuando venza su reserva
+        """
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            pendientes = len(self._heap)
+            self._cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(max(0.0, deadline - time.monotonic()))
+        self._workers = []
+        if pendientes:
+            logger.warning(f"NotificationDispatcher detenido con {pendientes} trabajo(s) sin despachar")
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _siguiente(self) -> Optional[_Job]:
+        """
+        Espera y toma el siguiente trabajo listo; None si el despachador se detuvo
+        """
+        with self._cond:
+            while self._running:
+                if self._heap:
+                    espera = self._heap[0][0] - time.monotonic()
+                    if espera <= 0:
+                        _, _, job = heapq.heappop(self._heap)
+                        if self._agrupables.get((job.tipo, job.destinatario)) is job:
+                            del self._agrupables[(job.tipo, job.destinatario)]
+                        self._in_flight += 1
+                        return job
+                    self._cond.wait(espera)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _worker_loop(self):
+        while True:
+            job = self._siguiente()
+            if job is None:
+                return
+            try:
+                self._procesar(job)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+
+    def _procesar(self, job: _Job):
+        """
+        Resuelve el trabajo a mensajes con su handler y los envía por FCM
+        """
+        job.intentos += 1
+        handler = self._handlers.get(job.tipo)
+        if handler is None:
+            self._fallar(job, f"Sin handler registrado para '{job.tipo}'")
+            return
+
+        db = db_connection.get_session()
+        try:
+            # En un reintento solo se envían los mensajes que no se entregaron
+            mensajes = job.pendientes if job.pendientes is not None else handler(db, job.payloads)
+            enviados, pendientes, error = self._enviar(db, mensajes)
+        except Exception as e:
+            logger.error(f"Error procesando notificación {job.tipo} para {job.destinatario}: {e}", exc_info=True)
+            self._reintentar(job, str(e))
+            return
+        finally:
+            db.close()
+
+        with self._cond:
+            self._metrics["messages_sent"] += enviados
+        if pendientes:
+            job.pendientes = pendientes
+            self._reintentar(job, error)
+            return
+
+        with self._cond:
+            self._metrics["processed"] += 1
+            self._retenidos.difference_update(job.ids_persistidos)
+        self._actualizar_persistidos("marcar_enviadas", job.ids_persistidos)
+
+    def _enviar(self, db: Session, mensajes: List[NotificationMessage]) -> Tuple[int, List[NotificationMessage], Optional[str]]:
+        """
+        Envía los mensajes
+
+        Returns:
+            Tuple: (mensajes entregados, mensajes a reintentar por error transitorio,
+            primer error transitorio). Los errores permanentes (configuración de FCM,
+            token inválido, 4xx) no se reintentan.
+        """
+        if not mensajes:
+            return 0, [], None
+
+        # Importar aquí para evitar importación circular
+        from services.notifications.fcm_push_service import FCMPushService
+        push_service = FCMPushService(db)
+
+        enviados = 0
+        pendientes: List[NotificationMessage] = []
+        error: Optional[str] = None
+        for mensaje in mensajes:
+            try:
+                result = push_service.send_to_user(
+                    usuario_id=mensaje.usuario_id,
+                    title=mensaje.title,
+                    body=mensaje.body,
+                    data=mensaje.data
+                )
+            except Exception as e:
+                logger.error(f"Error enviando push al usuario {mensaje.usuario_id}: {e}")
+                pendientes.append(mensaje)
+                error = error or str(e)
+                continue
+            if result.get("success"):
+                enviados += 1
+                continue
+            transitorios = [r for r in result.get("results", []) if r.get("retryable")]
+            if transitorios:
+                pendientes.append(mensaje)
+                error = error or transitorios[0].get("error", "Error transitorio de FCM")
+        return enviados, pendientes, error
+
+    def _backoff(self, intentos: int) -> float:
+        base = self._settings.retry_base_seconds * (2 ** (intentos - 1))
+        return min(self._settings.retry_max_seconds, base) * random.uniform(0.5, 1.0)
+
+    def _reintentar(self, job: _Job, error: str):
+        if job.intentos >= self._settings.max_retries:
+            self._fallar(job, error)
+            return
+
+        espera = self._backoff(job.intentos)
+        job.disponible_en = time.monotonic() + espera
+        with self._cond:
+            self._metrics["retried"] += 1
+            self._push(job)
+        logger.info(f"Reintento {job.intentos} de notificación {job.tipo} para {job.destinatario} en {espera:.1f}s")
+
+        proximo = datetime.utcnow() + timedelta(seconds=espera)
+        self._actualizar_persistidos(
+            "reprogramar", job.ids_persistidos,
+            intentos=job.intentos,
+            proximo_intento=proximo,
+            bloqueado_hasta=proximo + timedelta(seconds=self._settings.lease_seconds),
+            error=error
+        )
+
+    def _fallar(self, job: _Job, error: str):
+        with self._cond:
+            self._metrics["failed"] += 1
+            self._retenidos.difference_update(job.ids_persistidos)
+        logger.error(f"Notificación {job.tipo} para {job.destinatario} descartada tras {job.intentos} intento(s): {error}")
+        self._actualizar_persistidos("marcar_fallidas", job.ids_persistidos, intentos=job.intentos, error=error)
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def _persistir(self, tipo: str, destinatario: str, payload: dict, reservar: bool) -> Optional[int]:
+        from dao.notificaciones.dao_notificacion_pendiente import NotificacionPendienteDAO
+
+        ahora = datetime.utcnow()
+        bloqueado_hasta = ahora + timedelta(seconds=self._settings.lease_seconds) if reservar else ahora
+        db = db_connection.get_session()
+        try:
+            notificacion = NotificacionPendienteDAO(db).create(
+                tipo=tipo,
+                destinatario=destinatario,
+                payload=json.dumps(payload),
+                bloqueado_hasta=bloqueado_hasta
+            )
+            return notificacion.id_notificacion
+        except Exception as e:
+            logger.error(f"No se pudo persistir la notificación {tipo}: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _actualizar_persistidos(self, metodo: str, ids: List[int], **kwargs):
+        if not ids:
+            return
+        from dao.notificaciones.dao_notificacion_pendiente import NotificacionPendienteDAO
+
+        db = db_connection.get_session()
+        try:
+            getattr(NotificacionPendienteDAO(db), metodo)(ids, **kwargs)
+        except Exception as e:
+            logger.error(f"No se pudo actualizar la cola persistente de notificaciones: {e}")
+        finally:
+            db.close()
+
+    def _recovery_loop(self):
+        """
+        Recupera periódicamente las notificaciones persistidas cuya reserva venció
+        (encoladas por un proceso que se detuvo o diferidas por cola llena) y elimina
+        las ya terminadas
+        """
+        while self._running:
+            try:
+                self.recuperar_pendientes()
+            except Exception as e:
+                logger.error(f"Error recuperando notificaciones pendientes: {e}")
+            try:
+                self._limpiar_terminadas()
+            except Exception as e:
+                logger.error(f"Error limpiando notificaciones terminadas: {e}")
+            with self._cond:
+                if self._running:
+                    self._cond.wait(self._settings.recovery_interval_seconds)
+
+    def recuperar_pendientes(self) -> int:
+        """
+        Reclama notificaciones persistidas sin dueño y las encola
+
+        Un trabajo que espera en la cola local (agrupación o backoff) más que
+        NOTIFICATIONS_LEASE_SECONDS vuelve a aparecer como vencido: el reclamo le renueva
+        la reserva en BD, pero no se encola de nuevo porque este proceso ya lo tiene.
+
+        Returns:
+            int: Número de notificaciones recuperadas
+        """
+        from dao.notificaciones.dao_notificacion_pendiente import NotificacionPendienteDAO
+
+        with self._cond:
+            libres = self._settings.queue_size - len(self._heap)
+        if libres <= 0:
+            return 0
+
+        bloqueado_hasta = datetime.utcnow() + timedelta(seconds=self._settings.lease_seconds)
+        db = db_connection.get_session()
+        try:
+            filas = [
+                (n.id_notificacion, n.tipo, n.destinatario, n.payload, n.intentos)
+                for n in NotificacionPendienteDAO(db).reclamar_vencidas(bloqueado_hasta, limit=libres)
+            ]
+        finally:
+            db.close()
+
+        recuperadas = 0
+        with self._cond:
+            for id_notificacion, tipo, destinatario, payload, intentos in filas:
+                if id_notificacion in self._retenidos:
+                    continue
+                job = self._agrupables.get((tipo, destinatario))
+                if job is None:
+                    job = _Job(tipo=tipo, destinatario=destinatario, intentos=intentos, disponible_en=time.monotonic())
+                    self._push(job)
+                    self._agrupables[(tipo, destinatario)] = job
+                job.payloads.append(json.loads(payload))
+                job.ids_persistidos.append(id_notificacion)
+                self._retenidos.add(id_notificacion)
+                recuperadas += 1
+            self._metrics["recovered"] += recuperadas
+        if recuperadas:
+            logger.info(f"Recuperadas {recuperadas} notificación(es) pendientes")
+        return recuperadas
+
+    def _limpiar_terminadas(self):
+        """
+        Elimina las notificaciones enviadas o fallidas con más de NOTIFICATIONS_RETENTION_DAYS
+        (como máximo una vez por NOTIFICATIONS_CLEANUP_INTERVAL_HOURS)
+        """
+        intervalo = self._settings.cleanup_interval_hours * 3600
+        if intervalo <= 0:
+            return
+        if self._ultima_limpieza is not None and time.monotonic() - self._ultima_limpieza < intervalo:
+            return
+        self._ultima_limpieza = time.monotonic()
+
+        from dao.notificaciones.dao_notificacion_pendiente import NotificacionPendienteDAO
+
+        db = db_connection.get_session()
+        try:
+            eliminadas = NotificacionPendienteDAO(db).eliminar_terminadas(
+                datetime.utcnow() - timedelta(days=self._settings.retention_days)
+            )
+        finally:
+            db.close()
+        with self._cond:
+            self._metrics["purged"] += eliminadas
+        if eliminadas:
+            logger.info(f"Eliminadas {eliminadas} notificación(es) enviadas o fallidas")
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """
+        Retorna métricas del despachador
+
+        Returns:
+            dict: profundidad de cola, trabajos en curso, workers y contadores acumulados
+        """
+        with self._cond:
+            return {
+                "running": self._running,
+                "workers": len(self._workers),
+                "queue_depth": len(self._heap),
+                "queue_size": self._settings.queue_size,
+                "in_flight": self._in_flight,
+                "persist": self._settings.persist,
+                **self._metrics
+            }
+
+
+# Instancia global del despachador (Singleton)
+notification_dispatcher = NotificationDispatcher()
+
+
+def notification_handler(tipo: str):
+    """
+    Decorador para registrar el handler de un tipo de notificación
+    """
+    def decorator(func: NotificationHandler) -> NotificationHandler:
+        notification_dispatcher.register_handler(tipo, func)
+        return func
+    return decorator
+
+
+def enqueue_notification(tipo: str, destinatario: str, payload: dict) -> bool:
+    """
+    Función helper para encolar una notificación desde los servicios
+
+    Ejemplo:
+        enqueue_notification("limpieza_asignada", f"empleado:{empleado_id}", {"limpieza_id": 10})
+    """
+    try:
+        return notification_dispatcher.enqueue(tipo, destinatario, payload)
+    except Exception as e:
+        # No fallar la operación principal si falla el encolado
+        logger.error(f"Error encolando notificación {tipo}: {e}", exc_info=True)
+        return False
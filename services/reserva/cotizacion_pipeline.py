@@ -0,0 +1,230 @@
+"""
+Pipeline post-commit de cotizaciones de reservación
+Genera el PDF de cotización, lo envía por SMTP y encola el push de confirmación
+fuera de la petición HTTP, registrando el estado del trabajo por reservación
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional
+
+from core.config import CotizacionSettings
+from core.database_connection import db_connection
+
+logger = logging.getLogger(__name__)
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_EN_PROCESO = "en_proceso"
+ESTADO_COMPLETADA = "completada"
+ESTADO_FALLIDA = "fallida"
+
+
+class CotizacionPipeline:
+    """
+    Clase Singleton que ejecuta los trabajos de cotización en segundo plano
+
+    Características:
+    - Pool de hilos acotado y propio (PDF + SMTP no compiten con las rutas)
+    - Cada trabajo usa su propia sesión de BD, abierta después del commit de la reservación
+    - Estado consultable por reservación (pendiente, en_proceso, completada, fallida)
+    - Los estados se guardan en memoria con un máximo configurable (los más antiguos se descartan)
+    - encolar_lote(): los PDFs de un grupo se generan juntos en el pool de procesos de QuotationRenderer
+    """
+
+    _instance: Optional['CotizacionPipeline'] = None
+    _lock = threading.Lock()  # Para thread-safety
+
+    def __new__(cls) -> 'CotizacionPipeline':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self._settings = CotizacionSettings()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._estados: "OrderedDict[int, dict]" = OrderedDict()
+        self._estados_lock = threading.Lock()
+        self._initialized = True
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Retorna el pool de trabajos, creándolo la primera vez que se usa
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=max(1, self._settings.workers),
+                        thread_name_prefix="cotizacion"
+                    )
+        return self._executor
+
+    def _actualizar_estado(self, id_reservacion: int, **valores) -> dict:
+        with self._estados_lock:
+            estado = self._estados.setdefault(id_reservacion, {"id_reservacion": id_reservacion})
+            estado.update(valores)
+            self._estados.move_to_end(id_reservacion)
+            while len(self._estados) > self._settings.max_estados:
+                self._estados.popitem(last=False)
+            return dict(estado)
+
+    def _estado_pendiente(self, id_reservacion: int) -> dict:
+        return self._actualizar_estado(
+            id_reservacion,
+            estado=ESTADO_PENDIENTE,
+            email=None,
+            push=None,
+            error=None,
+            fecha_encolado=datetime.now(),
+            fecha_inicio=None,
+            fecha_fin=None
+        )
+
+    def _submit(self, id_reservacion: int, funcion, *args) -> Optional[dict]:
+        """Envía un trabajo al pool; si no lo acepta retorna el estado fallido"""
+        try:
+            self.executor.submit(funcion, *args)
+            return None
+        except Exception as e:
+            # No fallar la creación de la reserva si el pool no acepta el trabajo
+            logger.error(f"No se pudo encolar la cotización de la reservación {id_reservacion}: {e}")
+            return self._actualizar_estado(
+                id_reservacion, estado=ESTADO_FALLIDA, error=str(e), fecha_fin=datetime.now()
+            )
+
+    def encolar(self, id_reservacion: int) -> dict:
+        """
+        Encola la cotización de una reservación ya confirmada en BD
+
+        Args:
+            id_reservacion (int): ID de la reservación
+
+        Returns:
+            dict: Estado inicial del trabajo
+        """
+        estado = self._estado_pendiente(id_reservacion)
+        return self._submit(id_reservacion, self._procesar, id_reservacion) or estado
+
+    def encolar_lote(self, ids_reservacion: List[int]) -> List[dict]:
+        """
+        Encola las cotizaciones de varias reservaciones (grupos y eventos)
+
+        Un primer trabajo genera todos los PDFs con QuotationRenderer.render_batch y
+        después encola el envío de cada reservación, que toma su PDF del caché.
+
+        Args:
+            ids_reservacion (List[int]): IDs de las reservaciones
+
+        Returns:
+            List[dict]: Estado inicial de cada trabajo
+        """
+        ids = list(dict.fromkeys(ids_reservacion))
+        estados = [self._estado_pendiente(id_reservacion) for id_reservacion in ids]
+        if not ids:
+            return estados
+        fallido = self._submit(ids[0], self._procesar_lote, ids)
+        if fallido:
+            return [
+                self._actualizar_estado(id_reservacion, estado=ESTADO_FALLIDA, error=fallido["error"], fecha_fin=datetime.now())
+                for id_reservacion in ids
+            ]
+        return estados
+
+    def _procesar_lote(self, ids_reservacion: List[int]):
+        """
+        Genera juntos los PDFs del lote y encola el envío de cada reservación
+        """
+        # Importar aquí para evitar importación circular
+        from services.reserva.reservacion_service import ReservacionService
+        from utils.pdf_generator import quotation_renderer
+
+        db = db_connection.get_session()
+        try:
+            service = ReservacionService()
+            datos = []
+            for id_reservacion in ids_reservacion:
+                reservacion = service.dao.get_by_id(db, id_reservacion)
+                cotizacion = service._datos_cotizacion(db, reservacion) if reservacion else {}
+                if cotizacion.get("datos") and cotizacion["datos"].cliente_email:
+                    datos.append(cotizacion["datos"])
+            quotation_renderer.render_batch(datos)
+        except Exception as e:
+            # Sin el lote cada envío genera su propio PDF
+            logger.warning(f"No se pudieron generar en lote las cotizaciones {ids_reservacion}: {e}", exc_info=True)
+        finally:
+            db.close()
+
+        for id_reservacion in ids_reservacion:
+            self._submit(id_reservacion, self._procesar, id_reservacion)
+
+    def _procesar(self, id_reservacion: int):
+        """
+        Ejecuta la cotización con una sesión de BD propia
+        """
+        # Importar aquí para evitar importación circular
+        from services.reserva.reservacion_service import ReservacionService
+
+        self._actualizar_estado(id_reservacion, estado=ESTADO_EN_PROCESO, fecha_inicio=datetime.now())
+        db = db_connection.get_session()
+        try:
+            service = ReservacionService()
+            reservacion = service.dao.get_by_id(db, id_reservacion)
+            if not reservacion:
+                raise ValueError(f"Reservación {id_reservacion} no encontrada")
+
+            resultado = service._enviar_cotizacion_y_notificacion(db, reservacion) or {}
+            error = resultado.get("error")
+            if error is None and resultado.get("email") == "fallido":
+                error = "Error al enviar el email de cotización"
+            self._actualizar_estado(
+                id_reservacion,
+                estado=ESTADO_FALLIDA if error else ESTADO_COMPLETADA,
+                email=resultado.get("email"),
+                push=resultado.get("push"),
+                error=error,
+                fecha_fin=datetime.now()
+            )
+        except Exception as e:
+            logger.error(f"Error al procesar cotización de la reservación {id_reservacion}: {e}", exc_info=True)
+            self._actualizar_estado(id_reservacion, estado=ESTADO_FALLIDA, error=str(e), fecha_fin=datetime.now())
+        finally:
+            db.close()
+
+    def obtener_estado(self, id_reservacion: int) -> Optional[dict]:
+        """
+        Retorna el estado del trabajo de cotización de una reservación
+
+        Returns:
+            Optional[dict]: Estado o None si este proceso no tiene registro del trabajo
+        """
+        with self._estados_lock:
+            estado = self._estados.get(id_reservacion)
+            return dict(estado) if estado else None
+
+    def shutdown(self, wait: bool = True):
+        """
+        Detiene el pool esperando los trabajos en curso
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Instancia global del pipeline (Singleton)
+cotizacion_pipeline = CotizacionPipeline()
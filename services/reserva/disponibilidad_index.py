@@ -0,0 +1,357 @@
+"""
+Índice en memoria de disponibilidad de habitaciones
+Mantiene, por habitación, los intervalos de fechas reservados (reservaciones
+activas y en curso) para responder "habitaciones/tipos libres del hotel H
+entre d1 y d2" sin ejecutar Sp_DisponibilidadHabitaciones_Obt sobre toda la cadena
+"""
+
+import bisect
+import logging
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Union
+
+from core.config import DisponibilidadSettings
+from core.database_connection import db_connection
+from models.hotel.habitacionArea_model import HabitacionArea
+from models.hotel.piso_model import Piso
+from models.reserva.reservaciones_model import Reservacion
+
+logger = logging.getLogger(__name__)
+
+# Estatus de reservación que ocupan la habitación (1: activa, 2: en curso)
+ESTATUS_OCUPAN = (1, 2)
+# Estatus de habitación activa
+ESTATUS_HABITACION_ACTIVA = 1
+
+
+@dataclass
+class _Habitacion:
+    """Datos mínimos de una habitación para responder consultas de disponibilidad"""
+    id_habitacion_area: int
+    piso_id: int
+    id_hotel: int
+    tipo_habitacion_id: int
+    nombre_clave: str
+    descripcion: str
+    estatus_id: int
+
+    def to_dict(self) -> dict:
+        """Representación compatible con HabitacionAreaResponse"""
+        return {
+            "id_habitacion_area": self.id_habitacion_area,
+            "piso_id": self.piso_id,
+            "tipo_habitacion_id": self.tipo_habitacion_id,
+            "nombre_clave": self.nombre_clave,
+            "descripcion": self.descripcion,
+            "estatus_id": self.estatus_id
+        }
+
+
+@dataclass
+class _Agenda:
+    """
+    Intervalos reservados [inicio, fin) de una habitación ordenados por inicio
+
+    max_fin[i] guarda el mayor fin entre los intervalos 0..i, así una consulta de
+    solapamiento es un bisect + una comparación aunque existan dobles reservas
+    """
+    inicios: List[date] = field(default_factory=list)
+    intervalos: List[Tuple[date, date, int]] = field(default_factory=list)
+    max_fin: List[date] = field(default_factory=list)
+
+    def _reindexar(self):
+        self.intervalos.sort()
+        self.inicios = [inicio for inicio, _, _ in self.intervalos]
+        self.max_fin = []
+        mayor = None
+        for _, fin, _ in self.intervalos:
+            mayor = fin if mayor is None or fin > mayor else mayor
+            self.max_fin.append(mayor)
+
+    def agregar(self, inicio: date, fin: date, id_reservacion: int):
+        self.intervalos.append((inicio, fin, id_reservacion))
+        self._reindexar()
+
+    def quitar(self, id_reservacion: int) -> bool:
+        antes = len(self.intervalos)
+        self.intervalos = [i for i in self.intervalos if i[2] != id_reservacion]
+        if len(self.intervalos) != antes:
+            self._reindexar()
+            return True
+        return False
+
+    def libre(self, desde: date, hasta: date) -> bool:
+        # Intervalos que empiezan antes de `hasta`; alguno se solapa si su fin > `desde`
+        i = bisect.bisect_left(self.inicios, hasta)
+        return i == 0 or self.max_fin[i - 1] <= desde
+
+
+class DisponibilidadIndex:
+    """
+    Clase Singleton con el índice de disponibilidad del proceso
+
+    Características:
+    - Carga perezosa con dos consultas (habitaciones activas y reservaciones vigentes)
+    - Reconstrucción completa cuando vence el TTL (cambios hechos por otros workers)
+    - Actualización incremental en crear/actualizar/check-in/checkout/eliminar
+    - Consultas por hotel que se detienen al alcanzar `limit`
+    """
+
+    _instance: Optional['DisponibilidadIndex'] = None
+    _lock = threading.Lock()  # Para thread-safety del Singleton
+
+    def __new__(cls) -> 'DisponibilidadIndex':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self._settings = DisponibilidadSettings()
+        self._state_lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._habitaciones: Dict[int, _Habitacion] = {}
+        self._por_hotel: Dict[int, List[int]] = {}
+        self._agendas: Dict[int, _Agenda] = {}
+        # id_reservacion -> id_habitacion_area, para quitar/mover reservaciones
+        self._reservaciones: Dict[int, int] = {}
+        self._cargado_en: Optional[float] = None
+        self._initialized = True
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _a_fecha(valor: Union[date, datetime]) -> date:
+        return valor.date() if isinstance(valor, datetime) else valor
+
+    def _intervalo(self, reservacion: Reservacion) -> Tuple[date, date]:
+        inicio = self._a_fecha(reservacion.fecha_reserva)
+        fin = self._a_fecha(reservacion.fecha_salida)
+        # Una reservación ocupa al menos el día de entrada
+        if fin <= inicio:
+            fin = inicio + timedelta(days=1)
+        return inicio, fin
+
+    def _vigente(self) -> bool:
+        return (
+            self._cargado_en is not None
+            and time.monotonic() - self._cargado_en < self._settings.index_ttl_seconds
+        )
+
+    def _asegurar_cargado(self):
+        if self._vigente():
+            return
+        with self._build_lock:
+            if not self._vigente():
+                self.reconstruir()
+
+    def reconstruir(self):
+        """
+        Reconstruye el índice completo desde la base de datos
+        """
+        inicio = time.perf_counter()
+
+        with db_connection.get_session() as db:
+            filas_habitacion = (
+                db.query(
+                    HabitacionArea.id_habitacion_area,
+                    HabitacionArea.piso_id,
+                    Piso.id_hotel,
+                    HabitacionArea.tipo_habitacion_id,
+                    HabitacionArea.nombre_clave,
+                    HabitacionArea.descripcion,
+                    HabitacionArea.estatus_id
+                )
+                .join(Piso, HabitacionArea.piso_id == Piso.id_piso)
+                .filter(HabitacionArea.estatus_id == ESTATUS_HABITACION_ACTIVA)
+                .order_by(Piso.id_hotel, HabitacionArea.id_habitacion_area)
+                .all()
+            )
+            reservaciones = (
+                db.query(
+                    Reservacion.id_reservacion,
+                    Reservacion.habitacion_area_id,
+                    Reservacion.fecha_reserva,
+                    Reservacion.fecha_salida
+                )
+                .filter(Reservacion.id_estatus.in_(ESTATUS_OCUPAN))
+                .all()
+            )
+            intervalos = [
+                (r.id_reservacion, r.habitacion_area_id, *self._intervalo(r))
+                for r in reservaciones
+            ]
+
+        habitaciones: Dict[int, _Habitacion] = {}
+        por_hotel: Dict[int, List[int]] = defaultdict(list)
+        for fila in filas_habitacion:
+            habitacion = _Habitacion(*fila)
+            habitaciones[habitacion.id_habitacion_area] = habitacion
+            por_hotel[habitacion.id_hotel].append(habitacion.id_habitacion_area)
+
+        agendas: Dict[int, _Agenda] = defaultdict(_Agenda)
+        mapa_reservaciones: Dict[int, int] = {}
+        for id_reservacion, id_habitacion, inicio_r, fin_r in intervalos:
+            agendas[id_habitacion].intervalos.append((inicio_r, fin_r, id_reservacion))
+            mapa_reservaciones[id_reservacion] = id_habitacion
+        for agenda in agendas.values():
+            agenda._reindexar()
+
+        with self._state_lock:
+            self._habitaciones = habitaciones
+            self._por_hotel = dict(por_hotel)
+            self._agendas = dict(agendas)
+            self._reservaciones = mapa_reservaciones
+            self._cargado_en = time.monotonic()
+
+        logger.info(
+            f"Índice de disponibilidad reconstruido: {len(habitaciones)} habitaciones, "
+            f"{len(intervalos)} reservaciones en {(time.perf_counter() - inicio) * 1000:.1f} ms"
+        )
+
+    def invalidar(self):
+        """
+        Marca el índice como vencido (ej. al crear o desactivar habitaciones)
+        """
+        with self._state_lock:
+            self._cargado_en = None
+
+    # ------------------------------------------------------------------
+    # Actualización incremental
+    # ------------------------------------------------------------------
+
+    def sincronizar_reservacion(self, reservacion: Reservacion):
+        """
+        Refleja en el índice el estado actual de una reservación ya confirmada en BD
+
+        Si la reservación ocupa la habitación (estatus activo/en curso) se inserta
+        o mueve su intervalo; en otro caso (checkout, eliminación) se libera.
+        """
+        if reservacion is None or self._cargado_en is None:
+            return
+
+        with self._state_lock:
+            self._quitar(reservacion.id_reservacion)
+            if reservacion.id_estatus in ESTATUS_OCUPAN:
+                inicio, fin = self._intervalo(reservacion)
+                agenda = self._agendas.setdefault(reservacion.habitacion_area_id, _Agenda())
+                agenda.agregar(inicio, fin, reservacion.id_reservacion)
+                self._reservaciones[reservacion.id_reservacion] = reservacion.habitacion_area_id
+
+    def liberar_reservacion(self, id_reservacion: int):
+        """
+        Quita del índice el intervalo de una reservación
+        """
+        with self._state_lock:
+            self._quitar(id_reservacion)
+
+    def _quitar(self, id_reservacion: int):
+        id_habitacion = self._reservaciones.pop(id_reservacion, None)
+        if id_habitacion is not None and id_habitacion in self._agendas:
+            self._agendas[id_habitacion].quitar(id_reservacion)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def _ids_candidatos(self, id_hotel: Optional[int]) -> List[int]:
+        if id_hotel is not None:
+            return self._por_hotel.get(id_hotel, [])
+        return [i for ids in self._por_hotel.values() for i in ids]
+
+    def _esta_libre(self, id_habitacion: int, desde: date, hasta: date) -> bool:
+        agenda = self._agendas.get(id_habitacion)
+        return agenda is None or agenda.libre(desde, hasta)
+
+    def habitaciones_disponibles(
+        self,
+        fecha_inicio: date,
+        fecha_salida: date,
+        id_hotel: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Habitaciones activas sin reservaciones que se solapen con [fecha_inicio, fecha_salida)
+
+        Args:
+            fecha_inicio (date): Fecha de entrada
+            fecha_salida (date): Fecha de salida
+            id_hotel (Optional[int]): Restringe la búsqueda a un hotel
+            limit (Optional[int]): Máximo de habitaciones a devolver
+
+        Returns:
+            List[dict]: Habitaciones libres con la forma de HabitacionAreaResponse
+        """
+        self._asegurar_cargado()
+        desde, hasta = self._a_fecha(fecha_inicio), self._a_fecha(fecha_salida)
+        if hasta <= desde:
+            hasta = desde + timedelta(days=1)
+
+        resultado = []
+        with self._state_lock:
+            for id_habitacion in self._ids_candidatos(id_hotel):
+                if self._esta_libre(id_habitacion, desde, hasta):
+                    resultado.append(self._habitaciones[id_habitacion].to_dict())
+                    if limit and len(resultado) >= limit:
+                        break
+        return resultado
+
+    def tipos_disponibles(
+        self,
+        fecha_inicio: date,
+        fecha_salida: date,
+        id_hotel: Optional[int] = None
+    ) -> Dict[int, int]:
+        """
+        Cantidad de habitaciones libres por tipo de habitación
+
+        Returns:
+            Dict[int, int]: tipo_habitacion_id -> habitaciones disponibles
+        """
+        self._asegurar_cargado()
+        desde, hasta = self._a_fecha(fecha_inicio), self._a_fecha(fecha_salida)
+        if hasta <= desde:
+            hasta = desde + timedelta(days=1)
+
+        conteo: Dict[int, int] = defaultdict(int)
+        with self._state_lock:
+            for id_habitacion in self._ids_candidatos(id_hotel):
+                if self._esta_libre(id_habitacion, desde, hasta):
+                    conteo[self._habitaciones[id_habitacion].tipo_habitacion_id] += 1
+        return dict(conteo)
+
+    def stats(self) -> dict:
+        """
+        Métricas del índice
+        """
+        with self._state_lock:
+            return {
+                "habitaciones": len(self._habitaciones),
+                "hoteles": len(self._por_hotel),
+                "reservaciones": len(self._reservaciones),
+                "edad_segundos": (
+                    round(time.monotonic() - self._cargado_en, 1)
+                    if self._cargado_en is not None else None
+                )
+            }
+
+
+# Instancia global del índice (Singleton)
+disponibilidad_index = DisponibilidadIndex()
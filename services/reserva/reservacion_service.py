@@ -10,13 +10,44 @@ from datetime import datetime
 from typing import List, Optional
 from datetime import date
 from core.database_connection import db_connection, get_database_engine
+from core.config import DisponibilidadSettings
+from services.reserva.disponibilidad_index import disponibilidad_index
+from services.reserva.cotizacion_pipeline import cotizacion_pipeline
+from utils.pdf_generator import QuotationData
+from services.notifications.notification_dispatcher import (
+    NotificationMessage,
+    enqueue_notification,
+    notification_handler
+)
 from sqlalchemy import text
+from fastapi import HTTPException, status
 import logging
 import uuid
 from decimal import Decimal
 
 logger = logging.getLogger(__name__)
 
+
+@notification_handler("reservacion_confirmada")
+def _resolver_reservacion_confirmada(db: Session, payloads: list):
+    """
+    Construye el push de confirmación de reservación (uno por reservación)
+    """
+    return [
+        NotificationMessage(
+            usuario_id=payload["usuario_id"],
+            title=f"Reservación Confirmada - {payload['codigo_reservacion']}",
+            body=f"Tu reservación ha sido confirmada. Fecha de entrada: {payload['fecha_entrada']}",
+            data={
+                "tipo": "reservacion_confirmada",
+                "id_reservacion": str(payload["id_reservacion"]),
+                "codigo_reservacion": payload["codigo_reservacion"]
+            }
+        )
+        for payload in payloads
+    ]
+
+
 class ReservacionService:
     def __init__(self):
         self.dao = ReservacionDao()
@@ -79,7 +110,7 @@ class ReservacionService:
 
     def crear_reservacion(self, db: Session, reservacion_data: ReservacionCreate):
         """
-        Crea una nueva reservación y envía email de cotización con PDF adjunto y notificación push
+        Crea una nueva reservación y encola el envío de la cotización con PDF adjunto y la notificación push
         
         Args:
             db: Sesión de base de datos
@@ -106,10 +137,21 @@ class ReservacionService:
         reservacion_dict = reservacion_data.model_dump(exclude={"monto_reserva"})
         reservacion_dict['codigo_reservacion'] = codigo_reservacion
         
+        # El índice de este worker puede no ver reservaciones recién creadas en otro:
+        # la habitación se confirma en BD dentro de la misma transacción del INSERT
+        if DisponibilidadSettings.validar_reserva_con_sp:
+            self._confirmar_disponibilidad(
+                db,
+                reservacion_data.habitacion_area_id,
+                reservacion_data.fecha_reserva,
+                reservacion_data.fecha_salida
+            )
+        
         # Crear la reservación
         nueva_reservacion = Reservacion(**reservacion_dict)
         nueva_reservacion.fecha_registro = datetime.now()
         reservacion_creada = self.dao.create(db, nueva_reservacion)
+        disponibilidad_index.sincronizar_reservacion(reservacion_creada)
         
         # Crear el cargo de la reserva
         cargo = CargoCreate(
@@ -122,105 +164,145 @@ class ReservacionService:
 
         cargo_creado = self.dao_cargo.create(db, cargo)
 
-        # Enviar email y notificación push de forma asíncrona (no bloquear creación)
-        try:
-            self._enviar_cotizacion_y_notificacion(db, reservacion_creada)
-        except Exception as e:
-            # Registrar error pero no fallar la creación de la reserva
-            logger.error(f"Error al enviar cotización/notificación para reservación {reservacion_creada.id_reservacion}: {str(e)}")
+        # La reservación ya está confirmada en BD: cotización (PDF + SMTP) y push
+        # se procesan en segundo plano sin retrasar la respuesta
+        cotizacion_pipeline.encolar(reservacion_creada.id_reservacion)
         
         return reservacion_creada
     
-    def _enviar_cotizacion_y_notificacion(self, db: Session, reservacion: Reservacion):
+    def _datos_cotizacion(self, db: Session, reservacion: Reservacion) -> dict:
+        """
+        Carga habitación, hotel, cliente y usuario de una reservación y arma los campos de su cotización
+        
+        Args:
+            db: Sesión de base de datos
+            reservacion: Reservación
+        
+        Returns:
+            dict: "datos" (QuotationData) y "usuario_id", o "error" si falta alguna relación
+        """
+        # Cargar relaciones necesarias
+        from models.hotel.habitacionArea_model import HabitacionArea
+        from models.hotel.piso_model import Piso
+        from models.hotel.hotel_model import Hotel
+        from models.hotel.tipo_habitacion_model import TipoHabitacion
+        from models.cliente.cliente_model import Cliente
+        
+        # Cargar habitación con piso y hotel
+        habitacion = db.query(HabitacionArea).options(
+            joinedload(HabitacionArea.piso).joinedload(Piso.hotel),
+            joinedload(HabitacionArea.tipo_habitacion).joinedload(TipoHabitacion.periodicidad)
+        ).filter(
+            HabitacionArea.id_habitacion_area == reservacion.habitacion_area_id
+        ).first()
+        
+        if not habitacion:
+            logger.error(f"Habitación {reservacion.habitacion_area_id} no encontrada")
+            return {"error": f"Habitación {reservacion.habitacion_area_id} no encontrada"}
+        
+        # Cargar cliente
+        cliente = db.query(Cliente).filter(
+            Cliente.id_cliente == reservacion.cliente_id
+        ).first()
+        
+        if not cliente:
+            logger.error(f"Cliente {reservacion.cliente_id} no encontrado")
+            return {"error": f"Cliente {reservacion.cliente_id} no encontrado"}
+        
+        # Obtener información del hotel
+        hotel = habitacion.piso.hotel if habitacion.piso else None
+        if not hotel:
+            logger.error(f"Hotel no encontrado para habitación {habitacion.id_habitacion_area}")
+            return {"error": f"Hotel no encontrado para habitación {habitacion.id_habitacion_area}"}
+        
+        # Obtener tipo de habitación y periodicidad
+        tipo_habitacion = habitacion.tipo_habitacion
+        if not tipo_habitacion:
+            logger.error(f"Tipo de habitación no encontrado para habitación {habitacion.id_habitacion_area}")
+            return {"error": f"Tipo de habitación no encontrado para habitación {habitacion.id_habitacion_area}"}
+        
+        periodicidad = tipo_habitacion.periodicidad
+        # El modelo Periodicidad usa el atributo 'periodicidad', no 'nombre'
+        periodicidad_nombre = periodicidad.periodicidad if periodicidad else "Por noche"
+        
+        # Calcular precio total
+        duracion_dias = reservacion.duracion or 1
+        precio_unitario = tipo_habitacion.precio_unitario or 0.0
+        
+        # Lógica de cálculo de precio (igual que en Flutter)
+        if periodicidad and periodicidad.id_periodicidad == 1:  # Por noche
+            precio_total = precio_unitario * duracion_dias
+        else:  # Por estadía u otra periodicidad
+            precio_total = precio_unitario
+        
+        # Obtener usuario_id desde cliente_id
+        from dao.seguridad.dao_usuario_asignacion import UsuarioAsignacionDAO
+        usuario_asignacion_dao = UsuarioAsignacionDAO(db)
+        
+        # Buscar asignación por cliente_id
+        asignaciones = usuario_asignacion_dao.get_usuarios_por_cliente(reservacion.cliente_id)
+        asignacion = asignaciones[0] if asignaciones else None
+        usuario_id = asignacion.usuario_id if asignacion else None
+        
+        # Obtener nombre completo del cliente
+        if cliente.tipo_persona == 1:  # Persona física
+            nombre_completo = f"{cliente.nombre_razon_social} {cliente.apellido_paterno or ''} {cliente.apellido_materno or ''}".strip()
+        else:  # Persona moral
+            nombre_completo = cliente.nombre_razon_social or ""
+        
+        # Limpiar espacios y convertir a string si es necesario
+        cliente_email = str(cliente.correo_electronico).strip() if cliente.correo_electronico else None
+        
+        datos = QuotationData(
+            codigo_reservacion=reservacion.codigo_reservacion or "",
+            fecha_entrada=reservacion.fecha_reserva.strftime("%d/%m/%Y") if reservacion.fecha_reserva else "",
+            fecha_salida=reservacion.fecha_salida.strftime("%d/%m/%Y") if reservacion.fecha_salida else "",
+            duracion_dias=duracion_dias,
+            hotel_nombre=hotel.nombre or "",
+            hotel_direccion=hotel.direccion,
+            hotel_telefono=hotel.telefono,
+            hotel_email=hotel.email_contacto,
+            habitacion_nombre=habitacion.nombre_clave or "",
+            habitacion_descripcion=habitacion.descripcion,
+            tipo_habitacion=tipo_habitacion.tipo_habitacion or "",
+            cliente_nombre=nombre_completo,
+            cliente_rfc=cliente.rfc,
+            cliente_identificacion=cliente.documento_identificacion,
+            cliente_email=cliente_email,
+            precio_unitario=precio_unitario,
+            periodicidad_nombre=periodicidad_nombre,
+            precio_total=precio_total
+        )
+        return {"datos": datos, "usuario_id": usuario_id}
+    
+    def _enviar_cotizacion_y_notificacion(self, db: Session, reservacion: Reservacion) -> dict:
         """
         Envía email de cotización con PDF adjunto y notificación push al cliente
+        Se ejecuta fuera de la petición, en el CotizacionPipeline
         
         Args:
             db: Sesión de base de datos
             reservacion: Reservación creada
+        
+        Returns:
+            dict: Resultado por etapa ("email", "push") y "error" si no se pudo procesar
         """
+        resultado = {"email": "omitido", "push": "omitido"}
         try:
-            # Cargar relaciones necesarias
-            from models.hotel.habitacionArea_model import HabitacionArea
-            from models.hotel.piso_model import Piso
-            from models.hotel.hotel_model import Hotel
-            from models.hotel.tipo_habitacion_model import TipoHabitacion
-            from models.cliente.cliente_model import Cliente
-            
-            # Cargar habitación con piso y hotel
-            habitacion = db.query(HabitacionArea).options(
-                joinedload(HabitacionArea.piso).joinedload(Piso.hotel),
-                joinedload(HabitacionArea.tipo_habitacion).joinedload(TipoHabitacion.periodicidad)
-            ).filter(
-                HabitacionArea.id_habitacion_area == reservacion.habitacion_area_id
-            ).first()
-            
-            if not habitacion:
-                logger.error(f"Habitación {reservacion.habitacion_area_id} no encontrada")
-                return
-            
-            # Cargar cliente
-            cliente = db.query(Cliente).filter(
-                Cliente.id_cliente == reservacion.cliente_id
-            ).first()
-            
-            if not cliente:
-                logger.error(f"Cliente {reservacion.cliente_id} no encontrado")
-                return
-            
-            # Obtener información del hotel
-            hotel = habitacion.piso.hotel if habitacion.piso else None
-            if not hotel:
-                logger.error(f"Hotel no encontrado para habitación {habitacion.id_habitacion_area}")
-                return
-            
-            # Obtener tipo de habitación y periodicidad
-            tipo_habitacion = habitacion.tipo_habitacion
-            if not tipo_habitacion:
-                logger.error(f"Tipo de habitación no encontrado para habitación {habitacion.id_habitacion_area}")
-                return
-            
-            periodicidad = tipo_habitacion.periodicidad
-            # El modelo Periodicidad usa el atributo 'periodicidad', no 'nombre'
-            periodicidad_nombre = periodicidad.periodicidad if periodicidad else "Por noche"
-            
-            # Calcular precio total
-            duracion_dias = reservacion.duracion or 1
-            precio_unitario = tipo_habitacion.precio_unitario or 0.0
-            
-            # Lógica de cálculo de precio (igual que en Flutter)
-            if periodicidad and periodicidad.id_periodicidad == 1:  # Por noche
-                precio_total = precio_unitario * duracion_dias
-            else:  # Por estadía u otra periodicidad
-                precio_total = precio_unitario
-            
-            # Obtener usuario_id desde cliente_id
-            from dao.seguridad.dao_usuario_asignacion import UsuarioAsignacionDAO
-            usuario_asignacion_dao = UsuarioAsignacionDAO(db)
-            
-            # Buscar asignación por cliente_id
-            asignaciones = usuario_asignacion_dao.get_usuarios_por_cliente(reservacion.cliente_id)
-            asignacion = asignaciones[0] if asignaciones else None
-            usuario_id = asignacion.usuario_id if asignacion else None
-            
-            # Formatear fechas
-            fecha_entrada_str = reservacion.fecha_reserva.strftime("%d/%m/%Y") if reservacion.fecha_reserva else ""
-            fecha_salida_str = reservacion.fecha_salida.strftime("%d/%m/%Y") if reservacion.fecha_salida else ""
-            
-            # Obtener nombre completo del cliente
-            if cliente.tipo_persona == 1:  # Persona física
-                nombre_completo = f"{cliente.nombre_razon_social} {cliente.apellido_paterno or ''} {cliente.apellido_materno or ''}".strip()
-            else:  # Persona moral
-                nombre_completo = cliente.nombre_razon_social or ""
-            
-            # Obtener y validar email del cliente
-            cliente_email = cliente.correo_electronico
+            cotizacion = self._datos_cotizacion(db, reservacion)
+            if "error" in cotizacion:
+                resultado["error"] = cotizacion["error"]
+                return resultado
+            datos: QuotationData = cotizacion["datos"]
+            usuario_id = cotizacion["usuario_id"]
+            nombre_completo = datos.cliente_nombre
+
+            # Validar email del cliente
+            cliente_email = datos.cliente_email
             if not cliente_email:
                 logger.warning(f"Cliente {reservacion.cliente_id} no tiene correo electrónico registrado. No se enviará email de cotización.")
                 logger.warning(f"Nombre del cliente: {nombre_completo}")
             else:
-                # Limpiar espacios y convertir a string si es necesario
-                cliente_email = str(cliente_email).strip()
                 logger.info(f"📧 [Reservación {reservacion.id_reservacion}] Preparando envío de cotización a: {cliente_email}")
                 logger.info(f"📧 [Reservación {reservacion.id_reservacion}] Cliente: {nombre_completo} (ID: {reservacion.cliente_id})")
                 
@@ -235,60 +317,56 @@ class ReservacionService:
                         
                         logger.info(f"📧 [Reservación {reservacion.id_reservacion}] Enviando email de cotización a: {cliente_email}")
                         
-                        resultado = email_service.send_quotation_email(
+                        email_resultado = email_service.send_quotation_email(
                             destinatario_email=cliente_email,
                             destinatario_nombre=nombre_completo,
-                            codigo_reservacion=reservacion.codigo_reservacion or "",
-                            fecha_entrada=fecha_entrada_str,
-                            fecha_salida=fecha_salida_str,
-                            duracion_dias=duracion_dias,
-                            hotel_nombre=hotel.nombre or "",
-                            hotel_direccion=hotel.direccion,
-                            hotel_telefono=hotel.telefono,
-                            hotel_email=hotel.email_contacto,
-                            habitacion_nombre=habitacion.nombre_clave or "",
-                            habitacion_descripcion=habitacion.descripcion,
-                            tipo_habitacion=tipo_habitacion.tipo_habitacion or "",
-                            cliente_rfc=cliente.rfc,
-                            cliente_identificacion=cliente.documento_identificacion,
-                            precio_unitario=precio_unitario,
-                            periodicidad_nombre=periodicidad_nombre,
-                            precio_total=precio_total
+                            codigo_reservacion=datos.codigo_reservacion,
+                            fecha_entrada=datos.fecha_entrada,
+                            fecha_salida=datos.fecha_salida,
+                            duracion_dias=datos.duracion_dias,
+                            hotel_nombre=datos.hotel_nombre,
+                            hotel_direccion=datos.hotel_direccion,
+                            hotel_telefono=datos.hotel_telefono,
+                            hotel_email=datos.hotel_email,
+                            habitacion_nombre=datos.habitacion_nombre,
+                            habitacion_descripcion=datos.habitacion_descripcion,
+                            tipo_habitacion=datos.tipo_habitacion,
+                            cliente_rfc=datos.cliente_rfc,
+                            cliente_identificacion=datos.cliente_identificacion,
+                            precio_unitario=datos.precio_unitario,
+                            periodicidad_nombre=datos.periodicidad_nombre,
+                            precio_total=datos.precio_total
                         )
                         
-                        if resultado.success:
+                        if email_resultado.success:
+                            resultado["email"] = "enviado"
                             logger.info(f"✅ [Reservación {reservacion.id_reservacion}] Email de cotización enviado exitosamente a: {cliente_email}")
                         else:
-                            logger.error(f"❌ [Reservación {reservacion.id_reservacion}] Error al enviar email a {cliente_email}: {resultado.error}")
+                            resultado["email"] = "fallido"
+                            logger.error(f"❌ [Reservación {reservacion.id_reservacion}] Error al enviar email a {cliente_email}: {email_resultado.error}")
                     except Exception as e:
+                        resultado["email"] = "fallido"
                         logger.error(f"❌ [Reservación {reservacion.id_reservacion}] Excepción al enviar email de cotización a {cliente_email}: {str(e)}")
                         import traceback
                         logger.error(f"Traceback: {traceback.format_exc()}")
             
-            # Enviar notificación push
+            # Encolar notificación push (el NotificationDispatcher se encarga de reintentos)
             if usuario_id:
-                try:
-                    from services.notifications.fcm_push_service import FCMPushService
-                    fcm_service = FCMPushService(db)
-                    
-                    titulo = f"Reservación Confirmada - {reservacion.codigo_reservacion or ''}"
-                    mensaje = f"Tu reservación ha sido confirmada. Fecha de entrada: {fecha_entrada_str}"
-                    
-                    resultado = fcm_service.send_to_user(
-                        usuario_id=usuario_id,
-                        title=titulo,
-                        body=mensaje,
-                        data={
-                            "tipo": "reservacion_confirmada",
-                            "id_reservacion": str(reservacion.id_reservacion),
-                            "codigo_reservacion": reservacion.codigo_reservacion or ""
-                        }
-                    )
-                    logger.info(f"Notificación push enviada para reservación {reservacion.id_reservacion}: {resultado}")
-                except Exception as e:
-                    logger.error(f"Error al enviar notificación push: {str(e)}")
+                encolado = enqueue_notification(
+                    "reservacion_confirmada",
+                    f"usuario:{usuario_id}",
+                    {
+                        "usuario_id": usuario_id,
+                        "id_reservacion": reservacion.id_reservacion,
+                        "codigo_reservacion": reservacion.codigo_reservacion or "",
+                        "fecha_entrada": datos.fecha_entrada
+                    }
+                )
+                resultado["push"] = "encolado" if encolado else "fallido"
             else:
                 logger.warning(f"No se encontró usuario_id para cliente {reservacion.cliente_id}, no se enviará notificación push")
+            
+            return resultado
                 
         except Exception as e:
             logger.error(f"Error en _enviar_cotizacion_y_notificacion: {str(e)}")
@@ -300,10 +378,15 @@ class ReservacionService:
             return None
         for key, value in reservacion_data.dict(exclude_unset=True).items():
             setattr(reservacion, key, value)
-        return self.dao.update(db, reservacion)
+        reservacion_actualizada = self.dao.update(db, reservacion)
+        disponibilidad_index.sincronizar_reservacion(reservacion_actualizada)
+        return reservacion_actualizada
 
     def eliminar_reservacion(self, db: Session, id_reservacion: int):
-        return self.dao.delete(db, id_reservacion)
+        reservacion_eliminada = self.dao.delete(db, id_reservacion)
+        if reservacion_eliminada:
+            disponibilidad_index.liberar_reservacion(id_reservacion)
+        return reservacion_eliminada
 
     def obtener_habitaciones_reservadas_por_cliente(self, db: Session, id_cliente: int) -> List[HabitacionReservadaResponse]:
         resultados = self.dao.get_habitaciones_reservadas_por_cliente(db, id_cliente)
@@ -315,7 +398,10 @@ class ReservacionService:
             for row in resultados
         ]
     
-    def obtener_habitaciones_disponibles(self, fecha_inicio_reservacion: date, fecha_salida: date, limit: int):
+    def _ejecutar_sp_disponibilidad(self, fecha_inicio_reservacion: date, fecha_salida: date):
+        """
+        Ejecuta Sp_DisponibilidadHabitaciones_Obt (todas las habitaciones libres de la cadena)
+        """
         query = text("""
         EXEC Sp_DisponibilidadHabitaciones_Obt 
             :fecha_inicio_reservacion, 
@@ -327,9 +413,109 @@ class ReservacionService:
                 "fecha_inicio_reservacion": fecha_inicio_reservacion,
                 "fecha_salida": fecha_salida
             })
-            rows = result.mappings().all() 
-        rows = rows[:limit] if limit else rows
-        return rows
+            return result.mappings().all()
+
+    def obtener_habitaciones_disponibles(self, fecha_inicio_reservacion: date, fecha_salida: date, limit: int, id_hotel: Optional[int] = None):
+        """
+        Obtiene habitaciones disponibles usando el índice en memoria
+        
+        Filtra por hotel y aplica `limit` antes de materializar filas. Si el índice
+        falla se usa el stored procedure; con DISPONIBILIDAD_VALIDAR_SP=true el
+        resultado del índice se contrasta contra el stored procedure.
+        """
+        try:
+            habitaciones = disponibilidad_index.habitaciones_disponibles(
+                fecha_inicio_reservacion, fecha_salida, id_hotel=id_hotel, limit=limit
+            )
+        except Exception as e:
+            logger.error(f"Error en índice de disponibilidad, usando stored procedure: {str(e)}")
+            rows = self._ejecutar_sp_disponibilidad(fecha_inicio_reservacion, fecha_salida)
+            if id_hotel is not None:
+                ids_hotel = self._ids_habitaciones_hotel(id_hotel)
+                rows = [row for row in rows if row.get('id_habitacion_area') in ids_hotel]
+            return rows[:limit] if limit else rows
+        
+        if DisponibilidadSettings.validar_con_sp:
+            habitaciones = self._validar_con_sp(habitaciones, fecha_inicio_reservacion, fecha_salida)
+        return habitaciones
+
+    def _confirmar_disponibilidad(self, db: Session, habitacion_area_id: int, fecha_reserva: datetime, fecha_salida: datetime):
+        """
+        Confirma con Sp_DisponibilidadHabitaciones_Obt que la habitación sigue libre
+        
+        Toma antes un bloqueo de aplicación por habitación (sp_getapplock, liberado al
+        hacer commit o rollback de la transacción), así dos workers que reservan la misma
+        habitación a la vez se serializan y el segundo ve la reservación del primero.
+        
+        Raises:
+            HTTPException: 409 si la habitación ya no está disponible en esas fechas,
+                503 si no se obtuvo el bloqueo a tiempo
+        """
+        bloqueo = db.execute(text("""
+        SET NOCOUNT ON;
+        DECLARE @resultado INT;
+        EXEC @resultado = sp_getapplock
+            @Resource = :recurso,
+            @LockMode = 'Exclusive',
+            @LockOwner = 'Transaction',
+            @LockTimeout = :timeout;
+        SELECT @resultado;
+        """), {
+            "recurso": f"reservacion_habitacion_{habitacion_area_id}",
+            "timeout": DisponibilidadSettings.bloqueo_timeout_ms
+        }).scalar()
+        if bloqueo is None or bloqueo < 0:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="La habitación se está reservando en otra solicitud, intenta de nuevo"
+            )
+        
+        libres = db.execute(text("""
+        EXEC Sp_DisponibilidadHabitaciones_Obt 
+            :fecha_inicio_reservacion, 
+            :fecha_salida
+        """), {
+            "fecha_inicio_reservacion": fecha_reserva.date() if isinstance(fecha_reserva, datetime) else fecha_reserva,
+            "fecha_salida": fecha_salida.date() if isinstance(fecha_salida, datetime) else fecha_salida
+        }).mappings().all()
+        if not any(row.get('id_habitacion_area') == habitacion_area_id for row in libres):
+            db.rollback()
+            # El índice local la daba por libre: se reconstruye en la próxima consulta
+            disponibilidad_index.invalidar()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La habitación ya no está disponible en las fechas seleccionadas"
+            )
+
+    def _validar_con_sp(self, habitaciones: List[dict], fecha_inicio_reservacion: date, fecha_salida: date) -> List[dict]:
+        """
+        Descarta habitaciones que el stored procedure no reporta como libres y registra la diferencia
+        """
+        ids_sp = {
+            row.get('id_habitacion_area')
+            for row in self._ejecutar_sp_disponibilidad(fecha_inicio_reservacion, fecha_salida)
+        }
+        validas = [h for h in habitaciones if h["id_habitacion_area"] in ids_sp]
+        if len(validas) != len(habitaciones):
+            logger.warning(
+                f"Índice de disponibilidad desfasado: {len(habitaciones) - len(validas)} habitaciones "
+                f"no confirmadas por el stored procedure; se reconstruirá"
+            )
+            disponibilidad_index.invalidar()
+        return validas
+
+    def _ids_habitaciones_hotel(self, id_hotel: int) -> set:
+        """
+        IDs de habitaciones que pertenecen a un hotel (para filtrar el resultado del stored procedure)
+        """
+        from models.hotel.habitacionArea_model import HabitacionArea
+        from models.hotel.piso_model import Piso
+        with db_connection.get_session() as db:
+            filas = db.query(HabitacionArea.id_habitacion_area).join(
+                Piso, HabitacionArea.piso_id == Piso.id_piso
+            ).filter(Piso.id_hotel == id_hotel).all()
+        return {fila[0] for fila in filas}
     
     def listar_reservaciones_filtradas(self, db: Session, incluir_todos_estatus: bool = False, id_hotel: Optional[int] = None) -> List[Reservacion]:
         """
@@ -377,6 +563,7 @@ class ReservacionService:
         reserva.fecha_salida = datetime.now()
         db.commit()
         db.refresh(reserva)
+        disponibilidad_index.sincronizar_reservacion(reserva)
 
         # 5. Crear limpieza
         limpieza = Limpieza(
@@ -411,66 +598,52 @@ class ReservacionService:
         from services.hotel.tipo_habitacion_service import TipoHabitacionService
         from schemas.reserva.tipo_habitacion_disponible_schema import TipoHabitacionDisponibleResponse
         
-        # Obtener habitaciones disponibles usando el stored procedure existente
-        query = text("""
-        EXEC Sp_DisponibilidadHabitaciones_Obt 
-            :fecha_inicio_reservacion, 
-            :fecha_salida
-        """)
-        engine = get_database_engine()
-        with engine.connect() as conn:
-            result = conn.execute(query, {
-                "fecha_inicio_reservacion": fecha_inicio_reservacion,
-                "fecha_salida": fecha_salida
-            })
-            rows = result.mappings().all()
-        
-        # Agrupar por tipo_habitacion_id y contar
-        habitaciones_por_tipo = defaultdict(int)
-        tipo_ids = set()
-        
-        for row in rows:
-            tipo_id = row.get('tipo_habitacion_id')
-            if tipo_id:
-                # Si se especifica id_hotel, necesitamos obtenerlo de la habitación
-                # Por ahora, si no hay filtro de hotel, incluimos todas
-                # Si hay filtro, necesitaríamos hacer join con tabla de habitaciones
-                # Por simplicidad, si hay filtro de hotel, lo ignoramos por ahora
-                # TODO: Implementar filtrado por hotel si el stored procedure no lo devuelve
-                habitaciones_por_tipo[tipo_id] += 1
-                tipo_ids.add(tipo_id)
-        
-        # Obtener detalles de cada tipo de habitación con galería
-        tipos_disponibles = []
+        # Contar habitaciones libres por tipo (filtrado por hotel) desde el índice en memoria
+        habitaciones_por_tipo = None
+        if not DisponibilidadSettings.validar_con_sp:
+            try:
+                habitaciones_por_tipo = disponibilidad_index.tipos_disponibles(
+                    fecha_inicio_reservacion, fecha_salida, id_hotel=id_hotel
+                )
+            except Exception as e:
+                logger.error(f"Error en índice de disponibilidad, usando stored procedure: {str(e)}")
+        
+        if habitaciones_por_tipo is None:
+            # Validación contra el stored procedure o fallback si el índice falló
+            habitaciones_por_tipo = defaultdict(int)
+            for row in self.obtener_habitaciones_disponibles(
+                fecha_inicio_reservacion, fecha_salida, limit=0, id_hotel=id_hotel
+            ):
+                if row.get('tipo_habitacion_id'):
+                    habitaciones_por_tipo[row.get('tipo_habitacion_id')] += 1
+        tipo_ids = set(habitaciones_por_tipo.keys())
+        
+        if not tipo_ids:
+            return []
+        
+        # Una sola consulta IN para todos los tipos (periodicidad y características precargadas)
         tipo_service = TipoHabitacionService(db)
+        tipos_modelo = tipo_service.dao.get_active_by_ids(tipo_ids)
+        
+        # Galerías de todos los tipos en paralelo (una ronda de storage, no una por tipo)
+        galerias = tipo_service.obtener_galerias(t.id_tipoHabitacion for t in tipos_modelo)
         
-        for tipo_id in tipo_ids:
+        # Ensamblar respuesta en una sola pasada
+        tipos_disponibles = []
+        for tipo_modelo in tipos_modelo:
+            tipo_id = tipo_modelo.id_tipoHabitacion
             try:
-                # Obtener el modelo TipoHabitacion directamente del DAO con periodicidad cargada
-                from dao.hotel.dao_tipo_habitacion import TipoHabitacionDAO
-                from sqlalchemy.orm import joinedload
-                from models.hotel.tipo_habitacion_model import TipoHabitacion
-                
-                # Obtener tipo con periodicidad cargada usando joinedload
-                tipo_modelo = db.query(TipoHabitacion).options(
-                    joinedload(TipoHabitacion.periodicidad)
-                ).filter(
-                    TipoHabitacion.id_tipoHabitacion == tipo_id
-                ).first()
-                
-                if tipo_modelo and tipo_modelo.estatus_id == 1:  # Solo activos
-                    # Construir respuesta con galería incluida
-                    tipo_response = tipo_service._build_tipo_habitacion_response(
-                        tipo_modelo, 
-                        incluir_galeria=True
-                    )
-                    
-                    tipos_disponibles.append(
-                        TipoHabitacionDisponibleResponse(
-                            tipo_habitacion=tipo_response,
-                            cantidad_disponible=habitaciones_por_tipo[tipo_id]
-                        )
+                tipo_response = tipo_service._build_tipo_habitacion_response(
+                    tipo_modelo,
+                    incluir_galeria=True,
+                    galeria_urls=galerias.get(tipo_id, [])
+                )
+                tipos_disponibles.append(
+                    TipoHabitacionDisponibleResponse(
+                        tipo_habitacion=tipo_response,
+                        cantidad_disponible=habitaciones_por_tipo[tipo_id]
                     )
+                )
             except Exception as e:
                 print(f"Error al obtener tipo de habitación {tipo_id}: {e}")
                 continue
@@ -479,7 +652,8 @@ class ReservacionService:
     
     def checkin(self, db: Session, id_reservacion: int, monto_pagado: float):
         # 1. cambiarle el estatus a la reservacion
-        self.dao.checkin(db, id_reservacion)
+        if self.dao.checkin(db, id_reservacion):
+            disponibilidad_index.sincronizar_reservacion(self.dao.get_by_id(db, id_reservacion))
 
         # 2. Si pagó, se le registra el monto pagado
         # Crear el cargo de la reserva
@@ -1,11 +1,15 @@
 # services/servicio_transporte_service.py
-import threading
 import logging
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from dao.reserva.dao_servicio_transporte import ServicioTransporteDAO
 from dao.seguridad.dao_usuario_asignacion import UsuarioAsignacionDAO
 from schemas.reserva.servicios_transporte_schema import ServicioTransporteCreate, ServicioTransporteUpdate
+from services.notifications.notification_dispatcher import (
+    NotificationMessage,
+    enqueue_notification,
+    notification_handler
+)
 
 logger = logging.getLogger(__name__)
 
@@ -172,95 +176,26 @@ class ServicioTransporteService:
     
     def _enviar_notificacion_asignacion(self, db: Session, servicio):
         """
-        Envía notificación push al transportista cuando se le asigna un viaje.
-        Se ejecuta en un hilo separado para no bloquear la respuesta principal.
+        Encola la notificación push al transportista cuando se le asigna un viaje.
+        El envío lo hace el NotificationDispatcher sin bloquear la respuesta principal.
         
         Args:
             db (Session): Sesión de base de datos
             servicio: ServicioTransporte actualizado con empleado asignado
         """
-        # Guardar datos necesarios antes de pasar al hilo
-        servicio_id = servicio.id_servicio_transporte
-        empleado_id = servicio.empleado_id
-        destino = servicio.destino
-        
-        # Ejecutar en hilo separado para no bloquear la respuesta
-        def enviar_en_background():
-            try:
-                # Crear nueva sesión de BD para el hilo (importante: no reutilizar la sesión del hilo principal)
-                from core.database_connection import get_database_session
-                from models.seguridad.usuario_asignacion_model import UsuarioAsignacion
-                
-                db_background = next(get_database_session())
-                
-                try:
-                    # Solo enviar si hay empleado asignado
-                    if not empleado_id:
-                        return
-                    
-                    # Recargar servicio con relaciones desde BD del hilo
-                    from sqlalchemy.orm import joinedload
-                    from models.reserva.servicios_transporte_model import ServicioTransporte
-                    
-                    servicio_completo = db_background.query(ServicioTransporte).options(
-                        joinedload(ServicioTransporte.empleado)
-                    ).filter(ServicioTransporte.id_servicio_transporte == servicio_id).first()
-                    
-                    if not servicio_completo:
-                        logger.warning(f"No se encontró servicio transporte {servicio_id} para notificación")
-                        return
-                    
-                    # Buscar usuario_id desde empleado_id en UsuarioAsignacion
-                    usuario_asignacion = db_background.query(UsuarioAsignacion).filter(
-                        UsuarioAsignacion.empleado_id == empleado_id,
-                        UsuarioAsignacion.tipo_asignacion == 1,  # 1=Empleado
-                        UsuarioAsignacion.estatus == 1  # Activo
-                    ).first()
-                    
-                    if not usuario_asignacion:
-                        logger.info(f"No se encontró usuario asignado para empleado_id {empleado_id}")
-                        return
-                    
-                    usuario_id = usuario_asignacion.usuario_id
-                    
-                    # Importar aquí para evitar importación circular
-                    from services.notifications.fcm_push_service import FCMPushService
-                    
-                    # Crear servicio de notificaciones con nueva sesión
-                    push_service = FCMPushService(db_background)
-                    
-                    # Formatear fecha y hora para el mensaje
-                    fecha_str = servicio_completo.fecha_servicio.strftime("%d/%m/%Y") if servicio_completo.fecha_servicio else ""
-                    hora_str = servicio_completo.hora_servicio.strftime("%H:%M") if servicio_completo.hora_servicio else ""
-                    destino_actualizado = servicio_completo.destino or destino
-                    
-                    # Enviar notificación
-                    push_service.send_to_user(
-                        usuario_id=usuario_id,
-                        title="Nuevo viaje asignado",
-                        body=f"Se te ha asignado un viaje a {destino_actualizado}. Fecha: {fecha_str} Hora: {hora_str}",
-                        data={
-                            "tipo": "transporte_asignado",
-                            "servicio_id": str(servicio_id),
-                            "empleado_id": str(empleado_id),
-                            "destino": destino_actualizado,
-                            "screen": "transportista_detail"
-                        }
-                    )
-                    
-                    logger.info(f"✅ Notificación enviada al usuario {usuario_id} (empleado_id: {empleado_id}) por servicio transporte {servicio_id}")
-                    
-                finally:
-                    # Cerrar sesión de BD del hilo
-                    db_background.close()
-                    
-            except Exception as e:
-                # No fallar la operación principal si falla la notificación
-                logger.error(f"❌ Error enviando notificación de transporte: {e}", exc_info=True)
-        
-        # Iniciar hilo en background sin esperar (daemon=True permite que el programa termine sin esperar el hilo)
-        thread = threading.Thread(target=enviar_en_background, daemon=True)
-        thread.start()
+        # Solo enviar si hay empleado asignado
+        if not servicio.empleado_id:
+            return
+        
+        enqueue_notification(
+            "transporte_asignado",
+            f"empleado:{servicio.empleado_id}",
+            {
+                "servicio_id": servicio.id_servicio_transporte,
+                "empleado_id": servicio.empleado_id,
+                "destino": servicio.destino
+            }
+        )
     
     def _obtener_cliente_usuario_id(self, db: Session, servicio_id: int):
         """
@@ -318,156 +253,31 @@ class ServicioTransporteService:
     
     def _enviar_notificacion_inicio_viaje(self, db: Session, servicio):
         """
-        Envía notificación push al cliente cuando se inicia el viaje.
-        Se ejecuta en un hilo separado para no bloquear la respuesta principal.
+        Encola la notificación push al cliente cuando se inicia el viaje.
         
         Args:
             db (Session): Sesión de base de datos
             servicio: ServicioTransporte con estatus 4 (En Curso)
         """
-        # Guardar datos necesarios antes de pasar al hilo
-        servicio_id = servicio.id_servicio_transporte
-        destino = servicio.destino
-        
-        # Ejecutar en hilo separado para no bloquear la respuesta
-        def enviar_en_background():
-            try:
-                # Crear nueva sesión de BD para el hilo
-                from core.database_connection import get_database_session
-                from sqlalchemy.orm import joinedload
-                from models.reserva.servicios_transporte_model import ServicioTransporte
-                
-                db_background = next(get_database_session())
-                
-                try:
-                    # Recargar servicio con relaciones desde BD del hilo
-                    servicio_completo = db_background.query(ServicioTransporte).options(
-                        joinedload(ServicioTransporte.empleado)
-                    ).filter(ServicioTransporte.id_servicio_transporte == servicio_id).first()
-                    
-                    if not servicio_completo:
-                        logger.warning(f"No se encontró servicio transporte {servicio_id} para notificación de inicio")
-                        return
-                    
-                    # Obtener usuario_id del cliente
-                    usuario_id = self._obtener_cliente_usuario_id(db_background, servicio_id)
-                    
-                    if not usuario_id:
-                        logger.info(f"No se encontró usuario cliente para servicio transporte {servicio_id}")
-                        return
-                    
-                    # Importar aquí para evitar importación circular
-                    from services.notifications.fcm_push_service import FCMPushService
-                    
-                    # Crear servicio de notificaciones con nueva sesión
-                    push_service = FCMPushService(db_background)
-                    
-                    # Formatear fecha y hora para el mensaje
-                    fecha_str = servicio_completo.fecha_servicio.strftime("%d/%m/%Y") if servicio_completo.fecha_servicio else ""
-                    hora_str = servicio_completo.hora_servicio.strftime("%H:%M") if servicio_completo.hora_servicio else ""
-                    destino_actualizado = servicio_completo.destino or destino
-                    
-                    # Enviar notificación
-                    push_service.send_to_user(
-                        usuario_id=usuario_id,
-                        title="Tu viaje ha comenzado",
-                        body=f"El conductor ha iniciado el viaje a {destino_actualizado}. Fecha: {fecha_str} Hora: {hora_str}",
-                        data={
-                            "tipo": "transporte_iniciado",
-                            "servicio_id": str(servicio_id),
-                            "destino": destino_actualizado,
-                            "screen": "transporte_detail"
-                        }
-                    )
-                    
-                    logger.info(f"✅ Notificación de inicio de viaje enviada al cliente {usuario_id} por servicio {servicio_id}")
-                    
-                finally:
-                    # Cerrar sesión de BD del hilo
-                    db_background.close()
-                    
-            except Exception as e:
-                # No fallar la operación principal si falla la notificación
-                logger.error(f"❌ Error enviando notificación de inicio de viaje: {e}", exc_info=True)
-        
-        # Iniciar hilo en background sin esperar
-        thread = threading.Thread(target=enviar_en_background, daemon=True)
-        thread.start()
+        enqueue_notification(
+            "transporte_iniciado",
+            f"servicio:{servicio.id_servicio_transporte}",
+            {"servicio_id": servicio.id_servicio_transporte, "destino": servicio.destino}
+        )
     
     def _enviar_notificacion_fin_viaje(self, db: Session, servicio):
         """
-        Envía notificación push al cliente cuando termina el viaje.
-        Se ejecuta en un hilo separado para no bloquear la respuesta principal.
+        Encola la notificación push al cliente cuando termina el viaje.
         
         Args:
             db (Session): Sesión de base de datos
             servicio: ServicioTransporte con estatus 3 (Terminado)
         """
-        # Guardar datos necesarios antes de pasar al hilo
-        servicio_id = servicio.id_servicio_transporte
-        destino = servicio.destino
-        
-        # Ejecutar en hilo separado para no bloquear la respuesta
-        def enviar_en_background():
-            try:
-                # Crear nueva sesión de BD para el hilo
-                from core.database_connection import get_database_session
-                from sqlalchemy.orm import joinedload
-                from models.reserva.servicios_transporte_model import ServicioTransporte
-                
-                db_background = next(get_database_session())
-                
-                try:
-                    # Recargar servicio con relaciones desde BD del hilo
-                    servicio_completo = db_background.query(ServicioTransporte).options(
-                        joinedload(ServicioTransporte.empleado)
-                    ).filter(ServicioTransporte.id_servicio_transporte == servicio_id).first()
-                    
-                    if not servicio_completo:
-                        logger.warning(f"No se encontró servicio transporte {servicio_id} para notificación de fin")
-                        return
-                    
-                    # Obtener usuario_id del cliente
-                    usuario_id = self._obtener_cliente_usuario_id(db_background, servicio_id)
-                    
-                    if not usuario_id:
-                        logger.info(f"No se encontró usuario cliente para servicio transporte {servicio_id}")
-                        return
-                    
-                    # Importar aquí para evitar importación circular
-                    from services.notifications.fcm_push_service import FCMPushService
-                    
-                    # Crear servicio de notificaciones con nueva sesión
-                    push_service = FCMPushService(db_background)
-                    
-                    destino_actualizado = servicio_completo.destino or destino
-                    
-                    # Enviar notificación
-                    push_service.send_to_user(
-                        usuario_id=usuario_id,
-                        title="Tu viaje ha finalizado",
-                        body=f"El viaje a {destino_actualizado} ha sido completado. Puedes calificar el servicio.",
-                        data={
-                            "tipo": "transporte_terminado",
-                            "servicio_id": str(servicio_id),
-                            "destino": destino_actualizado,
-                            "screen": "transporte_detail"
-                        }
-                    )
-                    
-                    logger.info(f"✅ Notificación de fin de viaje enviada al cliente {usuario_id} por servicio {servicio_id}")
-                    
-                finally:
-                    # Cerrar sesión de BD del hilo
-                    db_background.close()
-                    
-            except Exception as e:
-                # No fallar la operación principal si falla la notificación
-                logger.error(f"❌ Error enviando notificación de fin de viaje: {e}", exc_info=True)
-        
-        # Iniciar hilo en background sin esperar
-        thread = threading.Thread(target=enviar_en_background, daemon=True)
-        thread.start()
+        enqueue_notification(
+            "transporte_terminado",
+            f"servicio:{servicio.id_servicio_transporte}",
+            {"servicio_id": servicio.id_servicio_transporte, "destino": servicio.destino}
+        )
 
     def eliminar(self, db: Session, id_servicio: int):
         return self.dao.delete(db, id_servicio)
@@ -481,4 +291,112 @@ class ServicioTransporteService:
                 detail="Servicio no encontrado o no tienes acceso a este servicio"
             )
         
-        return servicio
\ No newline at end of file
+        return servicio
+
+
+def _cargar_servicio(db: Session, servicio_id: int):
+    """
+    Recarga un servicio de transporte con su empleado
+    """
+    from sqlalchemy.orm import joinedload
+    from models.reserva.servicios_transporte_model import ServicioTransporte
+    
+    return db.query(ServicioTransporte).options(
+        joinedload(ServicioTransporte.empleado)
+    ).filter(ServicioTransporte.id_servicio_transporte == servicio_id).first()
+
+
+def _fecha_hora(servicio):
+    fecha_str = servicio.fecha_servicio.strftime("%d/%m/%Y") if servicio.fecha_servicio else ""
+    hora_str = servicio.hora_servicio.strftime("%H:%M") if servicio.hora_servicio else ""
+    return fecha_str, hora_str
+
+
+@notification_handler("transporte_asignado")
+def _resolver_transporte_asignado(db: Session, payloads: list):
+    """
+    Construye el push de viajes asignados a un transportista (uno solo si se asignaron varios)
+    """
+    empleado_id = payloads[0]["empleado_id"]
+    usuario_id = UsuarioAsignacionDAO(db).get_usuario_id_empleado_activo(empleado_id)
+    if not usuario_id:
+        logger.info(f"No se encontró usuario asignado para empleado_id {empleado_id}")
+        return []
+    
+    ultimo = payloads[-1]
+    servicio = _cargar_servicio(db, ultimo["servicio_id"])
+    if not servicio:
+        logger.warning(f"No se encontró servicio transporte {ultimo['servicio_id']} para notificación")
+        return []
+    
+    destino = servicio.destino or ultimo["destino"]
+    if len(payloads) == 1:
+        fecha_str, hora_str = _fecha_hora(servicio)
+        title = "Nuevo viaje asignado"
+        body = f"Se te ha asignado un viaje a {destino}. Fecha: {fecha_str} Hora: {hora_str}"
+    else:
+        title = "Nuevos viajes asignados"
+        body = f"Se te han asignado {len(payloads)} viajes"
+    
+    return [NotificationMessage(
+        usuario_id=usuario_id,
+        title=title,
+        body=body,
+        data={
+            "tipo": "transporte_asignado",
+            "servicio_id": str(servicio.id_servicio_transporte),
+            "servicio_ids": ",".join(str(p["servicio_id"]) for p in payloads),
+            "empleado_id": str(empleado_id),
+            "destino": destino,
+            "screen": "transportista_detail"
+        }
+    )]
+
+
+def _resolver_viaje_cliente(db: Session, payloads: list, tipo: str):
+    """
+    Construye el push al cliente para el inicio o fin de un viaje
+    (los eventos repetidos del mismo servicio se reducen al último)
+    """
+    ultimo = payloads[-1]
+    servicio_id = ultimo["servicio_id"]
+    servicio = _cargar_servicio(db, servicio_id)
+    if not servicio:
+        logger.warning(f"No se encontró servicio transporte {servicio_id} para notificación")
+        return []
+    
+    usuario_id = ServicioTransporteService()._obtener_cliente_usuario_id(db, servicio_id)
+    if not usuario_id:
+        logger.info(f"No se encontró usuario cliente para servicio transporte {servicio_id}")
+        return []
+    
+    destino = servicio.destino or ultimo["destino"]
+    if tipo == "transporte_iniciado":
+        fecha_str, hora_str = _fecha_hora(servicio)
+        title = "Tu viaje ha comenzado"
+        body = f"El conductor ha iniciado el viaje a {destino}. Fecha: {fecha_str} Hora: {hora_str}"
+    else:
+        title = "Tu viaje ha finalizado"
+        body = f"El viaje a {destino} ha sido completado. Puedes calificar el servicio."
+    
+    return [NotificationMessage(
+        usuario_id=usuario_id,
+        title=title,
+        body=body,
+        data={
+            "tipo": tipo,
+            "servicio_id": str(servicio_id),
+            "destino": destino,
+            "screen": "transporte_detail"
+        }
+    )]
+
+
+@notification_handler("transporte_iniciado")
+def _resolver_transporte_iniciado(db: Session, payloads: list):
+    return _resolver_viaje_cliente(db, payloads, "transporte_iniciado")
+
+
+@notification_handler("transporte_terminado")
+def _resolver_transporte_terminado(db: Session, payloads: list):
+    return _resolver_viaje_cliente(db, payloads, "transporte_terminado")
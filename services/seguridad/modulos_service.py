@@ -10,6 +10,7 @@ from fastapi import HTTPException, status
 from dao.seguridad.dao_modulos import ModulosDAO
 from dao.seguridad.dao_modulo_rol import ModuloRolDAO
 from dao.seguridad.dao_roles import RolesDAO
+from services.seguridad.permisos_matrix import permisos_matrix
 from models.seguridad.modulos_model import Modulos
 from schemas.seguridad.modulos_create import ModulosCreate
 from schemas.seguridad.modulos_update import ModulosUpdate
@@ -174,6 +175,9 @@ class ModulosService:
                     detail=f"Módulo con ID {id_modulo} no encontrado"
                 )
             
+            # El login entrega nombre, ruta e ícono del módulo desde la matriz de permisos
+            permisos_matrix.invalidar()
+            
             return self._modulo_to_response(db_modulo)
             
         except HTTPException:
@@ -214,6 +218,7 @@ class ModulosService:
                     detail=f"Módulo con ID {id_modulo} no encontrado"
                 )
             
+            permisos_matrix.invalidar()
             return True
             
         except HTTPException:
@@ -263,6 +268,7 @@ class ModulosService:
                     detail="No se pudo asignar el módulo al rol"
                 )
             
+            permisos_matrix.asignar_modulos_a_rol(rol_id, [modulo_id])
             return True
             
         except HTTPException:
@@ -312,6 +318,7 @@ class ModulosService:
                     detail="No se pudo desasignar el módulo del rol"
                 )
             
+            permisos_matrix.desasignar_modulo_de_rol(rol_id, modulo_id)
             return True
             
         except HTTPException:
@@ -362,6 +369,7 @@ class ModulosService:
                     detail="No se pudieron asignar los módulos al rol"
                 )
             
+            permisos_matrix.asignar_modulos_a_rol(rol_id, modulos_ids)
             return True
             
         except HTTPException:
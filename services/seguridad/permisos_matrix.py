@@ -0,0 +1,341 @@
+"""
+Matriz de permisos en memoria
+Mantiene los roles, los módulos asignados a cada rol y los roles de cada usuario para
+resolver el login y las verificaciones de rol sin consultar Tb_modulo_rol / Tb_rol_usuario
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from core.config import AuthSettings
+from core.database_connection import db_connection
+from models.seguridad.modulos_model import Modulos, modulo_rol
+from models.seguridad.roles_model import Roles, rol_usuario
+
+logger = logging.getLogger(__name__)
+
+# Estatus activo de roles y módulos
+ESTATUS_ACTIVO = 1
+
+
+@dataclass(frozen=True)
+class RolPermiso:
+    """Datos mínimos de un rol"""
+    id_rol: int
+    rol: str
+    estatus_id: int
+
+
+@dataclass(frozen=True)
+class ModuloPermiso:
+    """Datos de un módulo tal como se entregan en el login"""
+    id_modulo: int
+    nombre: str
+    descripcion: Optional[str]
+    icono: Optional[str]
+    ruta: Optional[str]
+    movil: Optional[int]
+    id_estatus: int
+
+
+class PermisosMatrix:
+    """
+    Clase Singleton con la matriz rol → módulos y usuario → roles
+
+    Características:
+    - Se carga completa al arrancar la app (4 consultas simples, sin joins)
+    - Actualización incremental al asignar/desasignar módulos a roles y roles a usuarios
+    - Los cambios de catálogo (crear/editar/eliminar roles o módulos) invalidan la matriz,
+      que se reconstruye en la siguiente consulta
+    - Reconstrucción periódica (PERMISOS_MATRIX_TTL) para recoger cambios de otros workers
+    - Los módulos de cada combinación de roles se calculan una vez y se reutilizan
+    - Un usuario que no está en la matriz (creado en otro proceso) se carga individualmente
+    """
+
+    _instance: Optional['PermisosMatrix'] = None
+    _lock = threading.Lock()  # Para thread-safety del Singleton
+
+    def __new__(cls) -> 'PermisosMatrix':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self._ttl = AuthSettings.permisos_matrix_ttl_seconds
+        self._state_lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._roles: Dict[int, RolPermiso] = {}
+        self._modulos: Dict[int, ModuloPermiso] = {}
+        self._modulos_por_rol: Dict[int, Set[int]] = {}
+        self._roles_por_usuario: Dict[int, Set[int]] = {}
+        # nombre de rol en minúsculas -> ids de roles activos con ese nombre
+        self._roles_por_nombre: Dict[str, Set[int]] = {}
+        # combinación de roles -> módulos activos ordenados (se limpia con cada cambio)
+        self._modulos_por_combinacion: Dict[FrozenSet[int], Tuple[ModuloPermiso, ...]] = {}
+        self._cargado_en: Optional[float] = None
+        # Se incrementa con cada cambio incremental; una reconstrucción que se cruzó
+        # con un cambio deja la matriz vencida para no perderlo
+        self._version = 0
+        self._reconstrucciones = 0
+        self._cargas_usuario = 0
+        self._initialized = True
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def _vigente(self) -> bool:
+        return (
+            self._cargado_en is not None
+            and (self._ttl <= 0 or time.monotonic() - self._cargado_en < self._ttl)
+        )
+
+    def _asegurar_cargado(self):
+        if self._vigente():
+            return
+        with self._build_lock:
+            if not self._vigente():
+                self.reconstruir()
+
+    def reconstruir(self):
+        """
+        Reconstruye la matriz completa desde la base de datos
+        """
+        inicio = time.perf_counter()
+        with self._state_lock:
+            version = self._version
+
+        with db_connection.get_session() as db:
+            filas_rol = db.query(Roles.id_rol, Roles.rol, Roles.estatus_id).all()
+            filas_modulo = db.query(
+                Modulos.id_modulo,
+                Modulos.nombre,
+                Modulos.descripcion,
+                Modulos.icono,
+                Modulos.ruta,
+                Modulos.movil,
+                Modulos.id_estatus
+            ).all()
+            filas_modulo_rol = db.execute(select(modulo_rol.c.rol_id, modulo_rol.c.modulo_id)).all()
+            filas_rol_usuario = db.execute(select(rol_usuario.c.usuario_id, rol_usuario.c.rol_id)).all()
+
+        roles = {fila.id_rol: RolPermiso(fila.id_rol, fila.rol, fila.estatus_id) for fila in filas_rol}
+        modulos = {fila.id_modulo: ModuloPermiso(*fila) for fila in filas_modulo}
+        modulos_por_rol: Dict[int, Set[int]] = {}
+        for rol_id, modulo_id in filas_modulo_rol:
+            modulos_por_rol.setdefault(rol_id, set()).add(modulo_id)
+        roles_por_usuario: Dict[int, Set[int]] = {}
+        for usuario_id, rol_id in filas_rol_usuario:
+            roles_por_usuario.setdefault(usuario_id, set()).add(rol_id)
+
+        with self._state_lock:
+            self._roles = roles
+            self._modulos = modulos
+            self._modulos_por_rol = modulos_por_rol
+            self._roles_por_usuario = roles_por_usuario
+            self._reindexar_catalogo()
+            self._cargado_en = time.monotonic() if self._version == version else None
+            self._reconstrucciones += 1
+
+        logger.info(
+            f"Matriz de permisos reconstruida: {len(roles)} roles, {len(modulos)} módulos, "
+            f"{len(roles_por_usuario)} usuarios en {(time.perf_counter() - inicio) * 1000:.1f} ms"
+        )
+
+    def _reindexar_catalogo(self):
+        self._roles_por_nombre = {}
+        for rol in self._roles.values():
+            if rol.estatus_id == ESTATUS_ACTIVO:
+                self._roles_por_nombre.setdefault(rol.rol.lower(), set()).add(rol.id_rol)
+        self._modulos_por_combinacion = {}
+
+    def invalidar(self):
+        """
+        Marca la matriz como vencida (ej. al crear, editar o eliminar roles o módulos)
+        """
+        with self._state_lock:
+            self._version += 1
+            self._cargado_en = None
+
+    def _roles_ids(self, usuario_id: int) -> FrozenSet[int]:
+        """
+        Retorna los ids de roles del usuario, cargándolos de BD si no está en la matriz
+        """
+        self._asegurar_cargado()
+        with self._state_lock:
+            roles_ids = self._roles_por_usuario.get(usuario_id)
+            if roles_ids is not None:
+                return frozenset(roles_ids)
+
+        with db_connection.get_session() as db:
+            filas = db.execute(
+                select(rol_usuario.c.rol_id).where(rol_usuario.c.usuario_id == usuario_id)
+            ).all()
+        roles_ids = {fila.rol_id for fila in filas}
+
+        with self._state_lock:
+            self._roles_por_usuario.setdefault(usuario_id, set()).update(roles_ids)
+            self._cargas_usuario += 1
+            return frozenset(self._roles_por_usuario[usuario_id])
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def modulos_de_usuario(self, usuario_id: int) -> List[ModuloPermiso]:
+        """
+        Módulos activos a los que el usuario tiene acceso por sus roles
+
+        Args:
+            usuario_id (int): ID del usuario
+
+        Returns:
+            List[ModuloPermiso]: Módulos únicos ordenados por id_modulo
+        """
+        roles_ids = self._roles_ids(usuario_id)
+        with self._state_lock:
+            modulos = self._modulos_por_combinacion.get(roles_ids)
+            if modulos is None:
+                ids = set()
+                for rol_id in roles_ids:
+                    ids.update(self._modulos_por_rol.get(rol_id, ()))
+                modulos = tuple(
+                    self._modulos[modulo_id]
+                    for modulo_id in sorted(ids)
+                    if modulo_id in self._modulos and self._modulos[modulo_id].id_estatus == ESTATUS_ACTIVO
+                )
+                self._modulos_por_combinacion[roles_ids] = modulos
+            return list(modulos)
+
+    def roles_de_usuario(self, usuario_id: int) -> List[RolPermiso]:
+        """
+        Roles activos del usuario ordenados por id_rol
+
+        Args:
+            usuario_id (int): ID del usuario
+
+        Returns:
+            List[RolPermiso]: Roles del usuario
+        """
+        roles_ids = self._roles_ids(usuario_id)
+        with self._state_lock:
+            return [
+                self._roles[rol_id]
+                for rol_id in sorted(roles_ids)
+                if rol_id in self._roles and self._roles[rol_id].estatus_id == ESTATUS_ACTIVO
+            ]
+
+    def tiene_rol(self, usuario_id: int, nombre_rol: str) -> bool:
+        """
+        Verifica si el usuario tiene un rol activo con el nombre dado (sin distinguir mayúsculas)
+        """
+        roles_ids = self._roles_ids(usuario_id)
+        with self._state_lock:
+            return not roles_ids.isdisjoint(self._roles_por_nombre.get(nombre_rol.lower(), ()))
+
+    # ------------------------------------------------------------------
+    # Actualización incremental (llamar después del commit)
+    # ------------------------------------------------------------------
+
+    def asignar_modulos_a_rol(self, rol_id: int, modulos_ids: Iterable[int]):
+        """
+        Refleja la asignación de módulos a un rol
+        """
+        modulos_ids = set(modulos_ids)
+        with self._state_lock:
+            self._version += 1
+            if self._cargado_en is None:
+                return
+            if rol_id not in self._roles or not modulos_ids.issubset(self._modulos):
+                # Rol o módulo creado después de la carga: recargar el catálogo completo
+                self._cargado_en = None
+                return
+            self._modulos_por_rol.setdefault(rol_id, set()).update(modulos_ids)
+            self._modulos_por_combinacion = {}
+
+    def desasignar_modulo_de_rol(self, rol_id: int, modulo_id: int):
+        """
+        Refleja la desasignación de un módulo de un rol
+        """
+        with self._state_lock:
+            self._version += 1
+            modulos = self._modulos_por_rol.get(rol_id)
+            if modulos is not None:
+                modulos.discard(modulo_id)
+            self._modulos_por_combinacion = {}
+
+    def asignar_roles_a_usuario(self, usuario_id: int, roles_ids: Iterable[int]):
+        """
+        Refleja la asignación de roles a un usuario
+        """
+        roles_ids = set(roles_ids)
+        with self._state_lock:
+            self._version += 1
+            if self._cargado_en is None:
+                return
+            if not roles_ids.issubset(self._roles):
+                self._cargado_en = None
+                return
+            self._roles_por_usuario.setdefault(usuario_id, set()).update(roles_ids)
+
+    def quitar_roles_de_usuario(self, usuario_id: int, roles_ids: Iterable[int]):
+        """
+        Refleja la remoción de roles de un usuario
+        """
+        with self._state_lock:
+            self._version += 1
+            roles = self._roles_por_usuario.get(usuario_id)
+            if roles is not None:
+                roles.difference_update(roles_ids)
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def stats(self) -> dict:
+        """
+        Retorna el tamaño y la antigüedad de la matriz
+        """
+        with self._state_lock:
+            return {
+                "roles": len(self._roles),
+                "modulos": len(self._modulos),
+                "usuarios": len(self._roles_por_usuario),
+                "asignaciones_modulo_rol": sum(len(m) for m in self._modulos_por_rol.values()),
+                "combinaciones_en_cache": len(self._modulos_por_combinacion),
+                "reconstrucciones": self._reconstrucciones,
+                "cargas_usuario": self._cargas_usuario,
+                "ttl_seconds": self._ttl,
+                "antiguedad_segundos": (
+                    round(time.monotonic() - self._cargado_en, 1)
+                    if self._cargado_en is not None else None
+                )
+            }
+
+
+# Instancia global de la matriz (Singleton)
+permisos_matrix = PermisosMatrix()
+
+
+def get_permisos_matrix_stats() -> dict:
+    """
+    Función helper para obtener las métricas de la matriz de permisos
+    """
+    return permisos_matrix.stats()
@@ -0,0 +1,161 @@
+"""
+Cache en memoria del usuario autenticado (principal) por token
+Evita consultar el usuario y sus roles en BD en cada petición autenticada
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from core.config import AuthSettings
+from schemas.seguridad.usuario_response import UsuarioResponse
+
+CacheKey = Tuple[int, str]
+
+
+class PrincipalCache:
+    """
+    Clase Singleton con el cache LRU + TTL de usuarios autenticados
+
+    Características:
+    - Entradas indexadas por (id_usuario, jti del token)
+    - Guarda el usuario con sus roles y estatus tal como lo retorna get_current_user
+    - Expiración por TTL corto (AUTH_PRINCIPAL_CACHE_TTL), nunca más allá del exp del token
+    - Invalidación explícita por usuario (cambio de roles, desactivación, cambio de
+      contraseña) o total (cambios en el catálogo de roles)
+    - Desalojo LRU al superar el máximo de entradas
+    """
+
+    _instance: Optional['PrincipalCache'] = None
+    _lock = threading.Lock()  # Para thread-safety
+
+    def __new__(cls) -> 'PrincipalCache':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self._ttl = AuthSettings.principal_cache_ttl_seconds
+        self._max_entries = AuthSettings.principal_cache_max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[float, UsuarioResponse]]" = OrderedDict()
+        self._por_usuario: Dict[int, Set[CacheKey]] = {}
+        self._data_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._initialized = True
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0 and self._max_entries > 0
+
+    def get(self, id_usuario: int, jti: str) -> Optional[UsuarioResponse]:
+        """
+        Retorna una copia del usuario en cache o None si no existe o expiró
+        """
+        key = (id_usuario, jti)
+        with self._data_lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._quitar(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1].model_copy(deep=True)
+
+    def put(self, id_usuario: int, jti: str, usuario: UsuarioResponse, token_exp: Optional[float] = None):
+        """
+        Guarda el usuario autenticado de un token
+
+        Args:
+            id_usuario (int): ID del usuario (claim sub)
+            jti (str): Identificador del token
+            usuario (UsuarioResponse): Usuario con roles y estatus
+            token_exp (Optional[float]): Expiración del token (epoch); la entrada no la supera
+        """
+        if not self.enabled:
+            return
+        ttl = self._ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+        key = (id_usuario, jti)
+        with self._data_lock:
+            self._entries[key] = (time.monotonic() + ttl, usuario.model_copy(deep=True))
+            self._entries.move_to_end(key)
+            self._por_usuario.setdefault(id_usuario, set()).add(key)
+            while len(self._entries) > self._max_entries:
+                self._quitar(next(iter(self._entries)))
+
+    def _quitar(self, key: CacheKey):
+        self._entries.pop(key, None)
+        claves = self._por_usuario.get(key[0])
+        if claves is not None:
+            claves.discard(key)
+            if not claves:
+                del self._por_usuario[key[0]]
+
+    def invalidar_usuario(self, id_usuario: int):
+        """
+        Invalida todas las entradas (todos los tokens) de un usuario
+        """
+        with self._data_lock:
+            for key in list(self._por_usuario.get(id_usuario, ())):
+                self._quitar(key)
+            self._invalidations += 1
+
+    def invalidar_todo(self):
+        """
+        Invalida el cache completo (ej. al renombrar o desactivar un rol)
+        """
+        with self._data_lock:
+            self._entries.clear()
+            self._por_usuario.clear()
+            self._invalidations += 1
+
+    def stats(self) -> dict:
+        """
+        Retorna métricas del cache
+
+        Returns:
+            dict: entradas, capacidad, TTL, hits, misses, invalidaciones y hit_ratio
+        """
+        with self._data_lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "ttl_seconds": self._ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "hit_ratio": round(self._hits / total, 4) if total else 0.0
+            }
+
+
+# Instancia global del cache (Singleton)
+principal_cache = PrincipalCache()
+
+
+def invalidar_principal(id_usuario: int):
+    """
+    Función helper para invalidar el usuario autenticado en cache tras cambiar
+    sus roles, su estatus o su contraseña
+    """
+    principal_cache.invalidar_usuario(id_usuario)
@@ -12,6 +12,8 @@ from models.seguridad.roles_model import Roles
 from schemas.seguridad.roles_create import RolesCreate
 from schemas.seguridad.roles_update import RolesUpdate
 from schemas.seguridad.roles_response import RolesResponse
+from services.seguridad.principal_cache import principal_cache
+from services.seguridad.permisos_matrix import permisos_matrix
 
 
 class RolesService:
@@ -156,6 +158,10 @@ class RolesService:
         if not db_roles:
             return None
         
+        # Los usuarios autenticados en cache incluyen el nombre y estatus de sus roles
+        principal_cache.invalidar_todo()
+        permisos_matrix.invalidar()
+        
         return RolesResponse(
             id_rol=db_roles.id_rol,
             rol=db_roles.rol,
@@ -173,7 +179,10 @@ class RolesService:
         Returns:
             bool: True si se eliminó correctamente
         """
-        return self.dao.delete_logical(id_rol)
+        eliminado = self.dao.delete_logical(id_rol)
+        principal_cache.invalidar_todo()
+        permisos_matrix.invalidar()
+        return eliminado
     
     def reactivate_rol(self, id_rol: int) -> bool:
         """
@@ -185,4 +194,7 @@ class RolesService:
         Returns:
             bool: True si se reactivó correctamente
         """
-        return self.dao.reactivate(id_rol)
+        reactivado = self.dao.reactivate(id_rol)
+        principal_cache.invalidar_todo()
+        permisos_matrix.invalidar()
+        return reactivado
@@ -14,6 +14,8 @@ from models.seguridad.usuario_model import Usuario
 from models.seguridad.roles_model import Roles
 from schemas.seguridad.usuario_rol_schemas import UsuarioRolAssign, UsuarioRolBulkAssign, RolSimpleResponse
 from schemas.seguridad.usuario_response import UsuarioResponse
+from services.seguridad.principal_cache import invalidar_principal
+from services.seguridad.permisos_matrix import permisos_matrix
 
 
 class UsuarioRolService:
@@ -72,6 +74,8 @@ class UsuarioRolService:
                 detail="El usuario ya tiene asignado este rol"
             )
         
+        permisos_matrix.asignar_roles_a_usuario(usuario_id, [rol_id])
+        invalidar_principal(usuario_id)
         return True
     
     def remove_rol_from_usuario(self, usuario_id: int, rol_id: int) -> bool:
@@ -113,6 +117,8 @@ class UsuarioRolService:
                 detail="El usuario no tiene asignado este rol"
             )
         
+        permisos_matrix.quitar_roles_de_usuario(usuario_id, [rol_id])
+        invalidar_principal(usuario_id)
         return True
     
     def get_usuario_roles(self, usuario_id: int) -> List[RolSimpleResponse]:
@@ -215,6 +221,8 @@ class UsuarioRolService:
         
         # Asignar roles
         assigned_count = self.rol_usuario_dao.assign_multiple_roles_to_user(usuario_id, roles_ids)
+        permisos_matrix.asignar_roles_a_usuario(usuario_id, roles_ids)
+        invalidar_principal(usuario_id)
         
         return assigned_count
     
@@ -242,6 +250,8 @@ class UsuarioRolService:
         
         # Remover roles
         removed_count = self.rol_usuario_dao.remove_multiple_roles_from_user(usuario_id, roles_ids)
+        permisos_matrix.quitar_roles_de_usuario(usuario_id, roles_ids)
+        invalidar_principal(usuario_id)
         
         return removed_count
     
@@ -3,11 +3,13 @@ Servicio de Usuario
 Maneja la lógica de negocio para usuarios, incluyendo encriptación de contraseñas
 """
 
-from typing import List, Optional
+import hashlib
+import logging
+import uuid
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
 from dao.seguridad.dao_usuario import UsuarioDAO
@@ -36,11 +38,15 @@ from schemas.seguridad.registro_cliente_schemas import (
 from schemas.seguridad.usuario_asignacion_schemas import UsuarioEmpleadoAsociacionRequest, UsuarioClienteAsociacionRequest, UsuarioAsignacionResponse
 from schemas.cliente.cliente_formulario import ClienteFormularioData
 from core.config import AuthSettings, SupabaseSettings
+from core.password_hasher import password_hasher, PasswordHasherSaturado
 from utils.password_generator import generar_password_temporal, validar_fortaleza_password
+from services.seguridad.principal_cache import principal_cache, invalidar_principal
+from services.seguridad.permisos_matrix import permisos_matrix
 
-# Configuración para encriptación de contraseñas
-# Argon2 es más moderno y seguro que bcrypt, sin limitaciones de longitud
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# Encriptación de contraseñas con Argon2 (más moderno y seguro que bcrypt, sin
+# limitaciones de longitud); se ejecuta en el pool de procesos de core.password_hasher
 
 
 class UsuarioService:
@@ -75,8 +81,14 @@ class UsuarioService:
             
         Returns:
             str: Contraseña encriptada
+            
+        Raises:
+            HTTPException: 503 si el pool de hashing está saturado
         """
-        return pwd_context.hash(password)
+        try:
+            return password_hasher.hash(password)
+        except PasswordHasherSaturado as e:
+            raise self._hashing_saturado() from e
     
     def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """
@@ -89,7 +101,35 @@ class UsuarioService:
         Returns:
             bool: True si coinciden, False si no
         """
-        return pwd_context.verify(plain_password, hashed_password)
+        return self._verify_and_update_password(plain_password, hashed_password)[0]
+    
+    def _verify_and_update_password(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica una contraseña y, si su hash usa parámetros de Argon2 anteriores,
+        retorna el hash recalculado con los parámetros actuales
+        
+        Args:
+            plain_password (str): Contraseña en texto plano
+            hashed_password (str): Contraseña encriptada
+            
+        Returns:
+            Tuple[bool, Optional[str]]: (coinciden, hash nuevo o None)
+            
+        Raises:
+            HTTPException: 503 si el pool de hashing está saturado
+        """
+        try:
+            return password_hasher.verify_and_update(plain_password, hashed_password)
+        except PasswordHasherSaturado as e:
+            raise self._hashing_saturado() from e
+    
+    @staticmethod
+    def _hashing_saturado() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El servicio de autenticación está ocupado, intente de nuevo en unos segundos",
+            headers={"Retry-After": "5"}
+        )
     
     def _get_usuario_roles(self, usuario_id: int) -> List[RolSimpleResponse]:
         """
@@ -101,7 +141,7 @@ class UsuarioService:
         Returns:
             List[RolSimpleResponse]: Lista de roles del usuario
         """
-        roles = self.rol_usuario_dao.get_user_roles(usuario_id)
+        roles = permisos_matrix.roles_de_usuario(usuario_id)
         return [
             RolSimpleResponse(
                 id_rol=rol.id_rol,
@@ -149,6 +189,8 @@ class UsuarioService:
             expire = datetime.utcnow() + timedelta(minutes=AuthSettings.access_token_expire_minutes)
         
         to_encode.update({"exp": expire})
+        # Identificador único del token (clave del cache de usuario autenticado)
+        to_encode.setdefault("jti", uuid.uuid4().hex)
         encoded_jwt = jwt.encode(to_encode, AuthSettings.secret_key, algorithm=AuthSettings.algorithm)
         return encoded_jwt
     
@@ -218,6 +260,7 @@ class UsuarioService:
         # Asignar roles si se proporcionaron
         if usuario_data.roles_ids:
             self.rol_usuario_dao.assign_multiple_roles_to_user(db_usuario.id_usuario, usuario_data.roles_ids)
+            permisos_matrix.asignar_roles_a_usuario(db_usuario.id_usuario, usuario_data.roles_ids)
         
         # Obtener roles asignados
         roles = self._get_usuario_roles(db_usuario.id_usuario)
@@ -383,6 +426,9 @@ class UsuarioService:
         if not db_usuario:
             return None
         
+        # Estatus, contraseña, login o correo pudieron cambiar
+        invalidar_principal(id_usuario)
+        
         # Obtener roles del usuario
         roles = self._get_usuario_roles(id_usuario)
         
@@ -410,7 +456,9 @@ class UsuarioService:
         Returns:
             bool: True si se eliminó correctamente
         """
-        return self.dao.delete_logical(id_usuario)
+        eliminado = self.dao.delete_logical(id_usuario)
+        invalidar_principal(id_usuario)
+        return eliminado
     
     def authenticate_user(self, login: str, password: str) -> Optional[Usuario]:
         """
@@ -427,9 +475,19 @@ class UsuarioService:
         if not usuario:
             return None
         
-        if not self._verify_password(password, usuario.password):
+        valido, nuevo_hash = self._verify_and_update_password(password, usuario.password)
+        if not valido:
             return None
         
+        # Actualizar el hash si se generó con parámetros de Argon2 anteriores
+        if nuevo_hash:
+            try:
+                usuario.password = nuevo_hash
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                logger.warning(f"No se pudo actualizar el hash de contraseña del usuario {usuario.id_usuario}: {e}")
+        
         return usuario
     
     def login(self, login_data: UsuarioLogin) -> Token:
@@ -490,7 +548,8 @@ class UsuarioService:
             )
         
         # 📦 OBTENER MÓDULOS A LOS QUE EL USUARIO TIENE ACCESO
-        modulos_db = self.modulo_rol_dao.get_modulos_por_usuario(usuario.id_usuario)
+        # (desde la matriz de permisos en memoria, sin consultar Tb_modulo_rol)
+        modulos_db = permisos_matrix.modulos_de_usuario(usuario.id_usuario)
         modulos_response = [
             ModuloSimpleResponse(
                 id_modulo=modulo.id_modulo,
@@ -583,6 +642,13 @@ class UsuarioService:
         except JWTError:
             raise credentials_exception
         
+        # Usuario autenticado en cache (evita consultar usuario y roles en cada petición).
+        # Tokens emitidos antes de incluir jti se identifican por su hash
+        jti = payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+        usuario_cache = principal_cache.get(token_data.id_usuario, jti)
+        if usuario_cache is not None:
+            return usuario_cache
+        
         # Verificar que el usuario aún existe y está activo
         usuario = self.dao.get_by_id(token_data.id_usuario)
         if usuario is None or usuario.estatus_id != 1:
@@ -596,7 +662,7 @@ class UsuarioService:
         if usuario.url_foto_perfil:
             url_foto_completa = self._build_foto_perfil_url(usuario.url_foto_perfil)
         
-        return UsuarioResponse(
+        usuario_response = UsuarioResponse(
             id_usuario=usuario.id_usuario,
             login=usuario.login,
             correo_electronico=usuario.correo_electronico,
@@ -604,6 +670,8 @@ class UsuarioService:
             roles=roles,
             url_foto_perfil=url_foto_completa
         )
+        principal_cache.put(usuario.id_usuario, jti, usuario_response, token_exp=payload.get("exp"))
+        return usuario_response
     
     def actualizar_url_foto_perfil(self, id_usuario: int, url_publica: Optional[str], ruta_storage: str) -> None:
         """
@@ -629,6 +697,7 @@ class UsuarioService:
         # Esto hace el sistema más flexible y portable
         update_data = UsuarioUpdate(url_foto_perfil=ruta_storage)
         self.dao.update(id_usuario, update_data)
+        invalidar_principal(id_usuario)
     
     # ==================== MÉTODOS PARA REGISTRO DE CLIENTES ====================
     
@@ -800,6 +869,9 @@ class UsuarioService:
         try:
             usuario_creado = self._create_usuario_internal(usuario_data, skip_validations=True)
         except HTTPException as e:
+            # Saturación del pool de hashing: conservar el 503 para que el cliente reintente
+            if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                raise
             # Convertir HTTPException a ValueError para mantener consistencia
             raise ValueError(e.detail) from e
         
@@ -817,6 +889,7 @@ class UsuarioService:
         
         # 10. Asignar rol "Cliente"
         self.rol_usuario_dao.assign_role_to_user(usuario_creado.id_usuario, rol_cliente.id_rol)
+        permisos_matrix.asignar_roles_a_usuario(usuario_creado.id_usuario, [rol_cliente.id_rol])
         
         # 11. Crear asignación usuario-cliente
         self.asignacion_dao.crear_asignacion_cliente(usuario_creado.id_usuario, cliente.id_cliente)
@@ -1025,6 +1098,7 @@ class UsuarioService:
         usuario.fecha_ultimo_cambio_password = datetime.utcnow()
         
         self.db.commit()
+        invalidar_principal(usuario.id_usuario)
         
         return CambiarPasswordTemporalResponse(
             success=True,
@@ -1131,6 +1205,7 @@ class UsuarioService:
             
             self.db.commit()
             self.db.refresh(usuario)
+            invalidar_principal(usuario.id_usuario)
             
             # 8. Enviar email con la contraseña temporal
             email_enviado = self._enviar_email_recuperacion(
@@ -11,6 +11,7 @@ from .limpieza_storage_service import LimpiezaStorageService
 from .habitacion_storage_service import HabitacionStorageService
 from .tipo_habitacion_storage_service import TipoHabitacionStorageService
 from .incidencia_storage_service import IncidenciaStorageService
+from .galeria_cache import GaleriaManifestCache, galeria_cache, get_galeria_cache_stats
 
 __all__ = [
     "SupabaseStorageService",
@@ -21,6 +22,9 @@ __all__ = [
     "LimpiezaStorageService",
     "HabitacionStorageService",
     "TipoHabitacionStorageService",
-    "IncidenciaStorageService"
+    "IncidenciaStorageService",
+    "GaleriaManifestCache",
+    "galeria_cache",
+    "get_galeria_cache_stats"
 ]
 
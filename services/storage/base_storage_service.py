@@ -4,10 +4,11 @@ Proporciona funcionalidad común para subir, eliminar y obtener URLs de archivos
 """
 
 import logging
-from typing import Optional
+from typing import Any, List, Optional
 from supabase import Client
 from core.supabase_client import get_supabase_client
 from core.config import SupabaseSettings
+from services.storage.galeria_cache import galeria_cache
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -80,6 +81,7 @@ class SupabaseStorageService:
             )
             
             public_url = self.build_public_url(file_path)
+            galeria_cache.registrar_archivo(self._bucket, file_path, size=len(file_bytes))
             
             logger.info(
                 f"Archivo subido exitosamente - Bucket: {self._bucket}, Path: {file_path}"
@@ -125,6 +127,7 @@ class SupabaseStorageService:
         """
         try:
             self._client.storage.from_(self._bucket).remove([file_path])
+            galeria_cache.quitar_archivo(self._bucket, file_path)
             
             logger.info(
                 f"Archivo eliminado exitosamente - Bucket: {self._bucket}, Path: {file_path}"
@@ -150,6 +153,24 @@ class SupabaseStorageService:
                 "message": error_msg
             }
     
+    def list_folder(self, folder_path: str) -> List[Any]:
+        """
+        Lista los archivos de una carpeta del bucket usando el cache compartido de galerías
+        
+        Args:
+            folder_path (str): Ruta de la carpeta
+            
+        Returns:
+            List[Any]: Elementos tal como los retorna Supabase (las excepciones se propagan)
+        """
+        items = galeria_cache.get(self._bucket, folder_path)
+        if items is not None:
+            return items
+        
+        items = self._client.storage.from_(self._bucket).list(path=folder_path) or []
+        galeria_cache.put(self._bucket, folder_path, items)
+        return items
+    
     def create_signed_url(self, file_path: str, expires_in: int = 3600) -> dict:
         """
         Crea una URL firmada temporal para acceder a un archivo
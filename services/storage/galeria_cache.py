@@ -0,0 +1,170 @@
+"""
+Cache en memoria de los listados (manifiestos) de carpetas de galería en Supabase Storage
+Compartido por todos los *StorageService del proceso: evita un `list(path)` por red
+en cada consulta de galería
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+from core.config import SupabaseSettings
+
+CacheKey = Tuple[str, str]
+
+
+class GaleriaManifestCache:
+    """
+    Clase Singleton con el cache LRU + TTL de listados de galería
+
+    Características:
+    - Una sola instancia por proceso, compartida por todos los buckets
+    - Entradas indexadas por (bucket, carpeta)
+    - Expiración por TTL (recoge cambios hechos por otros workers)
+    - Desalojo LRU al superar el máximo de entradas
+    - Write-through: upload/delete actualizan la entrada en lugar de esperar al TTL
+    - Contadores de hits, misses y desalojos
+    """
+
+    _instance: Optional['GaleriaManifestCache'] = None
+    _lock = threading.Lock()  # Para thread-safety
+
+    def __new__(cls) -> 'GaleriaManifestCache':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        settings = SupabaseSettings()
+        self._ttl = settings.gallery_cache_ttl_seconds
+        self._max_entries = settings.gallery_cache_max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[float, List[Any]]]" = OrderedDict()
+        self._data_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._initialized = True
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl > 0 and self._max_entries > 0
+
+    def get(self, bucket: str, carpeta: str) -> Optional[List[Any]]:
+        """
+        Retorna una copia del listado en cache o None si no existe o expiró
+        """
+        key = (bucket, carpeta.rstrip("/"))
+        with self._data_lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, bucket: str, carpeta: str, items: List[Any]):
+        """
+        Guarda el listado de una carpeta, desalojando la entrada menos usada si hace falta
+        """
+        if not self.enabled:
+            return
+        key = (bucket, carpeta.rstrip("/"))
+        with self._data_lock:
+            self._entries[key] = (time.monotonic() + self._ttl, copy.deepcopy(list(items or [])))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def registrar_archivo(self, bucket: str, file_path: str, size: int = 0):
+        """
+        Agrega (o reemplaza) un archivo subido en el listado de su carpeta, si está en cache
+        """
+        carpeta, _, nombre = file_path.rpartition("/")
+        with self._data_lock:
+            entry = self._entries.get((bucket, carpeta))
+            if entry is None:
+                return
+            items = [item for item in entry[1] if _nombre_item(item) != nombre]
+            items.append({"name": nombre, "metadata": {"size": size}})
+            self._entries[(bucket, carpeta)] = (entry[0], items)
+
+    def quitar_archivo(self, bucket: str, file_path: str):
+        """
+        Quita un archivo eliminado del listado de su carpeta, si está en cache
+        """
+        carpeta, _, nombre = file_path.rpartition("/")
+        with self._data_lock:
+            entry = self._entries.get((bucket, carpeta))
+            if entry is None:
+                return
+            items = [item for item in entry[1] if _nombre_item(item) != nombre]
+            self._entries[(bucket, carpeta)] = (entry[0], items)
+
+    def invalidar(self, bucket: Optional[str] = None, carpeta: Optional[str] = None):
+        """
+        Invalida una carpeta, todo un bucket o el cache completo
+        """
+        with self._data_lock:
+            if bucket is None:
+                self._entries.clear()
+            elif carpeta is not None:
+                self._entries.pop((bucket, carpeta.rstrip("/")), None)
+            else:
+                for key in [k for k in self._entries if k[0] == bucket]:
+                    del self._entries[key]
+
+    def stats(self) -> dict:
+        """
+        Retorna métricas del cache
+
+        Returns:
+            dict: entradas, capacidad, TTL, hits, misses, evictions y hit_ratio
+        """
+        with self._data_lock:
+            total = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "ttl_seconds": self._ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_ratio": round(self._hits / total, 4) if total else 0.0
+            }
+
+
+def _nombre_item(item: Any) -> str:
+    """
+    Nombre de un elemento del listado (la respuesta puede traer dicts u objetos)
+    """
+    if isinstance(item, dict):
+        return item.get("name", "")
+    return getattr(item, "name", "")
+
+
+# Instancia global del cache (Singleton)
+galeria_cache = GaleriaManifestCache()
+
+
+def get_galeria_cache_stats() -> dict:
+    """
+    Función helper para obtener las métricas del cache de galerías
+    """
+    return galeria_cache.stats()
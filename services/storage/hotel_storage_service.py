@@ -212,7 +212,7 @@ class HotelStorageService(SupabaseStorageService):
             ruta_galeria = self.rutas_imagenes.get_ruta_galeria_hotel(id_hotel)
             
             # Listar archivos en la carpeta de galería
-            response = self._client.storage.from_(self._bucket).list(path=ruta_galeria)
+            response = self.list_folder(ruta_galeria)
             
             # Filtrar solo imágenes válidas
             imagenes = []
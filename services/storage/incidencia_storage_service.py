@@ -130,7 +130,7 @@ class IncidenciaStorageService(SupabaseStorageService):
             ruta_galeria = self.rutas_imagenes.get_ruta_galeria_incidencia(id_incidencia)
             
             # Listar archivos en la carpeta de galería
-            response = self._client.storage.from_(self._bucket).list(path=ruta_galeria)
+            response = self.list_folder(ruta_galeria)
             
             # Filtrar solo imágenes válidas
             imagenes = []
@@ -184,7 +184,7 @@ class LimpiezaStorageService(SupabaseStorageService):
                     ruta_galeria = self.rutas_imagenes.get_ruta_galeria_limpieza_despues(id_limpieza)
                 
                 # Listar archivos en la carpeta de galería
-                response = self._client.storage.from_(self._bucket).list(path=ruta_galeria)
+                response = self.list_folder(ruta_galeria)
                 
                 # Filtrar solo imágenes válidas
                 if response:
@@ -1,9 +1,23 @@
 """
 Utilidad para generar PDFs de cotización usando reportlab
+
+Los estilos de párrafo y de tabla de la cotización son fijos: se construyen una vez por
+proceso y cada PDF solo arma las tablas con sus datos. QuotationRenderer agrega un caché
+por hash de contenido (reenviar la misma cotización no la vuelve a generar) y generación
+en lote en un pool de procesos.
 """
 
+import hashlib
+import json
 import logging
-from typing import Optional
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import cm
 from reportlab.lib import colors
@@ -12,79 +26,58 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, Tabl
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 from io import BytesIO
 
+from core.config import CotizacionSettings
+
 logger = logging.getLogger(__name__)
 
+# Cambiar al modificar el diseño: invalida los PDFs cacheados
+TEMPLATE_VERSION = "1"
 
-def generate_quotation_pdf(
-    codigo_reservacion: str,
-    fecha_entrada: str,
-    fecha_salida: str,
-    duracion_dias: int,
-    hotel_nombre: str,
-    hotel_direccion: Optional[str],
-    hotel_telefono: Optional[str],
-    hotel_email: Optional[str],
-    habitacion_nombre: str,
-    habitacion_descripcion: Optional[str],
-    tipo_habitacion: str,
-    cliente_nombre: str,
-    cliente_rfc: Optional[str],
-    cliente_identificacion: Optional[str],
-    cliente_email: Optional[str],
-    precio_unitario: float,
-    periodicidad_nombre: str,
-    precio_total: float,
-    output_path: Optional[str] = None
-) -> BytesIO:
+MARGEN = 2*cm
+ANCHO_CONTENIDO = A4[0] - 2*MARGEN
+
+
+@dataclass(frozen=True)
+class QuotationData:
     """
-    Genera un PDF de cotización usando reportlab
-    
-    Args:
-        codigo_reservacion: Código de la reservación
-        fecha_entrada: Fecha de entrada formateada
-        fecha_salida: Fecha de salida formateada
-        duracion_dias: Duración en días
-        hotel_nombre: Nombre del hotel
-        hotel_direccion: Dirección del hotel
-        hotel_telefono: Teléfono del hotel
-        hotel_email: Email del hotel
-        habitacion_nombre: Nombre/clave de la habitación
-        habitacion_descripcion: Descripción de la habitación
-        tipo_habitacion: Tipo de habitación
-        cliente_nombre: Nombre completo del cliente
-        cliente_rfc: RFC del cliente
-        cliente_identificacion: Documento de identificación
-        cliente_email: Email del cliente
-        precio_unitario: Precio unitario
-        periodicidad_nombre: Nombre de la periodicidad
-        precio_total: Precio total calculado
-        output_path: Ruta opcional para guardar el archivo
-    
-    Returns:
-        BytesIO: Contenido del PDF en memoria
+    Campos variables de una cotización
     """
-    try:
-        # Crear buffer para el PDF
-        pdf_bytes = BytesIO()
-        
-        # Crear documento PDF
-        doc = SimpleDocTemplate(
-            pdf_bytes,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-        
-        # Contenedor para elementos del PDF
-        elements = []
-        
-        # Estilos
+    codigo_reservacion: str
+    fecha_entrada: str
+    fecha_salida: str
+    duracion_dias: int
+    hotel_nombre: str
+    hotel_direccion: Optional[str]
+    hotel_telefono: Optional[str]
+    hotel_email: Optional[str]
+    habitacion_nombre: str
+    habitacion_descripcion: Optional[str]
+    tipo_habitacion: str
+    cliente_nombre: str
+    cliente_rfc: Optional[str]
+    cliente_identificacion: Optional[str]
+    cliente_email: Optional[str]
+    precio_unitario: float
+    periodicidad_nombre: str
+    precio_total: float
+
+    def content_hash(self) -> str:
+        """Hash del contenido y de la versión de la plantilla (clave del caché)"""
+        contenido = json.dumps(asdict(self), sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(f"{TEMPLATE_VERSION}\n{contenido}".encode("utf-8")).hexdigest()
+
+
+class _Plantilla:
+    """
+    Estilos de la cotización, construidos una vez por proceso
+    (los TableStyle se copian al aplicarse, así que se comparten entre PDFs e hilos)
+    """
+
+    def __init__(self):
         styles = getSampleStyleSheet()
-        
+
         # Estilo para el título principal
-        title_style = ParagraphStyle(
+        self.title_style = ParagraphStyle(
             'CustomTitle',
             parent=styles['Heading1'],
             fontSize=24,
@@ -92,18 +85,18 @@ def generate_quotation_pdf(
             spaceAfter=10,
             alignment=TA_LEFT
         )
-        
+
         # Estilo para subtítulo
-        subtitle_style = ParagraphStyle(
+        self.subtitle_style = ParagraphStyle(
             'CustomSubtitle',
             parent=styles['Normal'],
             fontSize=14,
             textColor=colors.HexColor('#666666'),
             spaceAfter=30
         )
-        
+
         # Estilo para secciones
-        section_style = ParagraphStyle(
+        self.section_style = ParagraphStyle(
             'SectionTitle',
             parent=styles['Heading2'],
             fontSize=14,
@@ -116,137 +109,18 @@ def generate_quotation_pdf(
             borderColor=colors.HexColor('#6B46C1'),
             borderPadding=5
         )
-        
-        # Estilo para texto normal
-        normal_style = styles['Normal']
-        normal_style.fontSize = 12
-        
-        # Header
-        elements.append(Paragraph("InnPulse 360", title_style))
-        elements.append(Paragraph("Cotización de Reservación", subtitle_style))
-        elements.append(Spacer(1, 0.5*cm))
-        
-        # Línea divisoria
-        elements.append(Table(
-            [[None]],
-            colWidths=[doc.width],
-            style=[('LINEBELOW', (0, 0), (-1, -1), 3, colors.HexColor('#6B46C1'))]
-        ))
-        elements.append(Spacer(1, 1*cm))
-        
-        # Información de la Reservación
-        elements.append(Paragraph("Información de la Reservación", section_style))
-        reservacion_data = [
-            ['Código de Reservación:', codigo_reservacion],
-            ['Fecha de Entrada:', fecha_entrada],
-            ['Fecha de Salida:', fecha_salida],
-            ['Duración:', f"{duracion_dias} {'día' if duracion_dias == 1 else 'días'}"]
-        ]
-        reservacion_table = Table(reservacion_data, colWidths=[6*cm, 10*cm])
-        reservacion_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
-            ('TEXTCOLOR', (1, 0), (1, -1), colors.black),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E5E7EB')),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        elements.append(reservacion_table)
-        elements.append(Spacer(1, 0.8*cm))
-        
-        # Información del Hotel
-        elements.append(Paragraph("Información del Hotel", section_style))
-        hotel_data = [['Nombre:', hotel_nombre]]
-        if hotel_direccion:
-            hotel_data.append(['Dirección:', hotel_direccion])
-        if hotel_telefono:
-            hotel_data.append(['Teléfono:', hotel_telefono])
-        if hotel_email:
-            hotel_data.append(['Email:', hotel_email])
-        
-        hotel_table = Table(hotel_data, colWidths=[6*cm, 10*cm])
-        hotel_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
-            ('TEXTCOLOR', (1, 0), (1, -1), colors.black),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E5E7EB')),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        elements.append(hotel_table)
-        elements.append(Spacer(1, 0.8*cm))
-        
-        # Información de la Habitación
-        elements.append(Paragraph("Información de la Habitación", section_style))
-        habitacion_data = [['Habitación:', habitacion_nombre]]
-        if habitacion_descripcion:
-            habitacion_data.append(['Descripción:', habitacion_descripcion])
-        habitacion_data.append(['Tipo de Habitación:', tipo_habitacion])
-        
-        habitacion_table = Table(habitacion_data, colWidths=[6*cm, 10*cm])
-        habitacion_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
-            ('TEXTCOLOR', (1, 0), (1, -1), colors.black),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E5E7EB')),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        elements.append(habitacion_table)
-        elements.append(Spacer(1, 0.8*cm))
-        
-        # Información del Cliente
-        elements.append(Paragraph("Información del Cliente", section_style))
-        cliente_data = [['Nombre Completo:', cliente_nombre]]
-        if cliente_rfc:
-            cliente_data.append(['RFC:', cliente_rfc])
-        if cliente_identificacion:
-            cliente_data.append(['Identificación:', cliente_identificacion])
-        if cliente_email:
-            cliente_data.append(['Email:', cliente_email])
-        
-        cliente_table = Table(cliente_data, colWidths=[6*cm, 10*cm])
-        cliente_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 12),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
-            ('TEXTCOLOR', (1, 0), (1, -1), colors.black),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E5E7EB')),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        elements.append(cliente_table)
-        elements.append(Spacer(1, 0.8*cm))
-        
-        # Detalles de Precio
-        elements.append(Paragraph("Detalles de Precio", section_style))
-        precio_data = [
-            ['Precio Unitario:', f"${precio_unitario:,.2f}"],
-            ['Periodicidad:', periodicidad_nombre],
-            ['Duración:', f"{duracion_dias} {'día' if duracion_dias == 1 else 'días'}"]
-        ]
-        
-        precio_table = Table(precio_data, colWidths=[6*cm, 10*cm])
-        precio_table.setStyle(TableStyle([
+
+        # Estilo del pie de página
+        self.footer_style = ParagraphStyle(
+            'FooterStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor=colors.HexColor('#999999'),
+            alignment=TA_CENTER
+        )
+
+        # Tablas de información (etiqueta | valor)
+        self.info_table_style = TableStyle([
             ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
             ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
             ('FONTSIZE', (0, 0), (-1, -1), 12),
@@ -258,18 +132,10 @@ def generate_quotation_pdf(
             ('RIGHTPADDING', (0, 0), (-1, -1), 8),
             ('TOPPADDING', (0, 0), (-1, -1), 8),
             ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        elements.append(precio_table)
-        elements.append(Spacer(1, 1*cm))
-        
+        ])
+
         # Total destacado - "Total a Pagar" a la izquierda, monto a la derecha
-        total_table = Table(
-            [
-                ['Total a Pagar:', f"${precio_total:,.2f}"]
-            ],
-            colWidths=[10*cm, 6*cm]
-        )
-        total_table.setStyle(TableStyle([
+        self.total_table_style = TableStyle([
             ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F9FAFB')),
             ('TEXTCOLOR', (0, 0), (0, 0), colors.HexColor('#666666')),
             ('TEXTCOLOR', (1, 0), (1, 0), colors.HexColor('#6B46C1')),
@@ -287,51 +153,374 @@ def generate_quotation_pdf(
             ('RIGHTPADDING', (1, 0), (1, 0), 20),  # Padding derecho para el monto
             ('TOPPADDING', (0, 0), (-1, -1), 20),
             ('BOTTOMPADDING', (0, 0), (-1, -1), 20),
-        ]))
-        elements.append(total_table)
-        elements.append(Spacer(1, 2*cm))
-        
-        # Footer
-        footer_style = ParagraphStyle(
-            'FooterStyle',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=colors.HexColor('#999999'),
-            alignment=TA_CENTER
+        ])
+
+        # Líneas divisorias del encabezado y del pie
+        self.header_line_style = [('LINEBELOW', (0, 0), (-1, -1), 3, colors.HexColor('#6B46C1'))]
+        self.footer_line_style = [('LINEABOVE', (0, 0), (-1, -1), 1, colors.HexColor('#E5E7EB'))]
+
+
+_plantilla: Optional[_Plantilla] = None
+_plantilla_lock = threading.Lock()
+
+
+def _get_plantilla() -> _Plantilla:
+    global _plantilla
+    if _plantilla is None:
+        with _plantilla_lock:
+            if _plantilla is None:
+                _plantilla = _Plantilla()
+    return _plantilla
+
+
+def _seccion(elements: list, plantilla: _Plantilla, titulo: str, filas: list, espacio: float = 0.8*cm):
+    elements.append(Paragraph(titulo, plantilla.section_style))
+    elements.append(Table(filas, colWidths=[6*cm, 10*cm], style=plantilla.info_table_style))
+    elements.append(Spacer(1, espacio))
+
+
+def render_quotation_pdf(data: QuotationData) -> bytes:
+    """
+    Genera el PDF de una cotización (sin caché)
+
+    Es una función de módulo para poder ejecutarse en el pool de procesos del lote.
+
+    Args:
+        data (QuotationData): Campos de la cotización
+
+    Returns:
+        bytes: Contenido del PDF
+    """
+    plantilla = _get_plantilla()
+    pdf_bytes = BytesIO()
+
+    # Crear documento PDF
+    doc = SimpleDocTemplate(
+        pdf_bytes,
+        pagesize=A4,
+        rightMargin=MARGEN,
+        leftMargin=MARGEN,
+        topMargin=MARGEN,
+        bottomMargin=MARGEN
+    )
+    duracion = f"{data.duracion_dias} {'día' if data.duracion_dias == 1 else 'días'}"
+
+    # Header
+    elements = [
+        Paragraph("InnPulse 360", plantilla.title_style),
+        Paragraph("Cotización de Reservación", plantilla.subtitle_style),
+        Spacer(1, 0.5*cm),
+        Table([[None]], colWidths=[ANCHO_CONTENIDO], style=plantilla.header_line_style),
+        Spacer(1, 1*cm)
+    ]
+
+    _seccion(elements, plantilla, "Información de la Reservación", [
+        ['Código de Reservación:', data.codigo_reservacion],
+        ['Fecha de Entrada:', data.fecha_entrada],
+        ['Fecha de Salida:', data.fecha_salida],
+        ['Duración:', duracion]
+    ])
+
+    hotel_data = [['Nombre:', data.hotel_nombre]]
+    if data.hotel_direccion:
+        hotel_data.append(['Dirección:', data.hotel_direccion])
+    if data.hotel_telefono:
+        hotel_data.append(['Teléfono:', data.hotel_telefono])
+    if data.hotel_email:
+        hotel_data.append(['Email:', data.hotel_email])
+    _seccion(elements, plantilla, "Información del Hotel", hotel_data)
+
+    habitacion_data = [['Habitación:', data.habitacion_nombre]]
+    if data.habitacion_descripcion:
+        habitacion_data.append(['Descripción:', data.habitacion_descripcion])
+    habitacion_data.append(['Tipo de Habitación:', data.tipo_habitacion])
+    _seccion(elements, plantilla, "Información de la Habitación", habitacion_data)
+
+    cliente_data = [['Nombre Completo:', data.cliente_nombre]]
+    if data.cliente_rfc:
+        cliente_data.append(['RFC:', data.cliente_rfc])
+    if data.cliente_identificacion:
+        cliente_data.append(['Identificación:', data.cliente_identificacion])
+    if data.cliente_email:
+        cliente_data.append(['Email:', data.cliente_email])
+    _seccion(elements, plantilla, "Información del Cliente", cliente_data)
+
+    _seccion(elements, plantilla, "Detalles de Precio", [
+        ['Precio Unitario:', f"${data.precio_unitario:,.2f}"],
+        ['Periodicidad:', data.periodicidad_nombre],
+        ['Duración:', duracion]
+    ], espacio=1*cm)
+
+    elements.append(Table(
+        [['Total a Pagar:', f"${data.precio_total:,.2f}"]],
+        colWidths=[10*cm, 6*cm],
+        style=plantilla.total_table_style
+    ))
+    elements.append(Spacer(1, 2*cm))
+
+    # Footer
+    elements.append(Table([[None]], colWidths=[ANCHO_CONTENIDO], style=plantilla.footer_line_style))
+    elements.append(Spacer(1, 0.5*cm))
+    elements.append(Paragraph(
+        "Este documento es una cotización generada automáticamente por InnPulse 360",
+        plantilla.footer_style
+    ))
+    elements.append(Paragraph(
+        f"Para consultas, contacte a: {data.hotel_email if data.hotel_email else 'support@innpulse360.com'}",
+        plantilla.footer_style
+    ))
+
+    # Construir PDF
+    doc.build(elements)
+    return pdf_bytes.getvalue()
+
+
+class QuotationRenderer:
+    """
+    Clase Singleton que genera los PDFs de cotización
+
+    Características:
+    - Caché LRU en memoria por hash de contenido (COTIZACION_PDF_CACHE_SIZE)
+    - Generación en lote en un pool de procesos (grupos y eventos con decenas de cotizaciones)
+    """
+
+    _instance: Optional['QuotationRenderer'] = None
+    _lock = threading.Lock()  # Para thread-safety
+
+    def __new__(cls) -> 'QuotationRenderer':
+        """
+        Implementación del patrón Singleton
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        """
+        Inicialización que solo ocurre una vez
+        """
+        if self._initialized:
+            return
+
+        self._settings = CotizacionSettings()
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._stats = {
+            "generados": 0,
+            "generados_lote": 0,
+            "aciertos_cache": 0,
+            "tiempo_total_ms": 0.0
+        }
+        self._initialized = True
+
+    @property
+    def workers(self) -> int:
+        """
+        Procesos del pool de lotes (COTIZACION_PDF_BATCH_WORKERS, 0 = número de CPUs)
+        """
+        return max(1, self._settings.pdf_batch_workers or os.cpu_count() or 1)
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """
+        Retorna el pool de procesos, creándolo la primera vez que se usa
+        (spawn: los procesos no heredan hilos ni conexiones del worker web)
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    )
+        return self._executor
+
+    def _recordar(self, destino: OrderedDict, clave: str, valor):
+        destino[clave] = valor
+        destino.move_to_end(clave)
+        while len(destino) > max(0, self._settings.pdf_cache_size):
+            destino.popitem(last=False)
+
+    def _buscar(self, clave: str) -> Optional[bytes]:
+        with self._cache_lock:
+            pdf = self._cache.get(clave)
+            if pdf is not None:
+                self._cache.move_to_end(clave)
+                self._stats["aciertos_cache"] += 1
+            return pdf
+
+    def _guardar(self, clave: str, pdf: bytes, duracion_ms: float, lote: bool = False):
+        with self._cache_lock:
+            self._recordar(self._cache, clave, pdf)
+            self._stats["generados_lote" if lote else "generados"] += 1
+            self._stats["tiempo_total_ms"] += duracion_ms
+
+    def render(self, data: QuotationData) -> bytes:
+        """
+        PDF de una cotización, desde el caché si ya se generó con el mismo contenido
+
+        Args:
+            data (QuotationData): Campos de la cotización
+
+        Returns:
+            bytes: Contenido del PDF
+        """
+        clave = data.content_hash()
+        pdf = self._buscar(clave)
+        if pdf is not None:
+            return pdf
+        inicio = time.perf_counter()
+        pdf = render_quotation_pdf(data)
+        self._guardar(clave, pdf, (time.perf_counter() - inicio) * 1000)
+        return pdf
+
+    def render_batch(self, items: List[QuotationData]) -> List[bytes]:
+        """
+        Genera varias cotizaciones repartiéndolas en el pool de procesos
+
+        Las repetidas o ya cacheadas no se vuelven a generar.
+
+        Args:
+            items (List[QuotationData]): Cotizaciones a generar
+
+        Returns:
+            List[bytes]: PDFs en el mismo orden que items
+        """
+        claves = [data.content_hash() for data in items]
+        resultados: Dict[str, bytes] = {}
+        pendientes: Dict[str, QuotationData] = {}
+        for clave, data in zip(claves, items):
+            if clave in resultados or clave in pendientes:
+                continue
+            pdf = self._buscar(clave)
+            if pdf is not None:
+                resultados[clave] = pdf
+            else:
+                pendientes[clave] = data
+
+        if len(pendientes) == 1:
+            clave, data = next(iter(pendientes.items()))
+            resultados[clave] = self.render(data)
+        elif pendientes:
+            inicio = time.perf_counter()
+            chunksize = max(1, len(pendientes) // (self.workers * 4))
+            pdfs = list(self.executor.map(render_quotation_pdf, pendientes.values(), chunksize=chunksize))
+            duracion_ms = (time.perf_counter() - inicio) * 1000 / len(pdfs)
+            for clave, pdf in zip(pendientes.keys(), pdfs):
+                resultados[clave] = pdf
+                self._guardar(clave, pdf, duracion_ms, lote=True)
+
+        return [resultados[clave] for clave in claves]
+
+    def stats(self) -> dict:
+        """
+        Retorna métricas del generador de cotizaciones
+        """
+        with self._cache_lock:
+            stats = dict(self._stats)
+            stats["en_cache"] = len(self._cache)
+            stats["bytes_cache"] = sum(len(pdf) for pdf in self._cache.values())
+        generados = stats["generados"] + stats["generados_lote"]
+        stats["promedio_ms"] = round(stats["tiempo_total_ms"] / generados, 2) if generados else 0.0
+        stats["tiempo_total_ms"] = round(stats["tiempo_total_ms"], 2)
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        """
+        Detiene el pool de procesos (se recrea si se vuelve a usar)
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Instancia global del generador (Singleton)
+quotation_renderer = QuotationRenderer()
+
+
+def generate_quotation_pdf(
+    codigo_reservacion: str,
+    fecha_entrada: str,
+    fecha_salida: str,
+    duracion_dias: int,
+    hotel_nombre: str,
+    hotel_direccion: Optional[str],
+    hotel_telefono: Optional[str],
+    hotel_email: Optional[str],
+    habitacion_nombre: str,
+    habitacion_descripcion: Optional[str],
+    tipo_habitacion: str,
+    cliente_nombre: str,
+    cliente_rfc: Optional[str],
+    cliente_identificacion: Optional[str],
+    cliente_email: Optional[str],
+    precio_unitario: float,
+    periodicidad_nombre: str,
+    precio_total: float,
+    output_path: Optional[str] = None
+) -> BytesIO:
+    """
+    Genera un PDF de cotización usando reportlab
+
+    Args:
+        codigo_reservacion: Código de la reservación
+        fecha_entrada: Fecha de entrada formateada
+        fecha_salida: Fecha de salida formateada
+        duracion_dias: Duración en días
+        hotel_nombre: Nombre del hotel
+        hotel_direccion: Dirección del hotel
+        hotel_telefono: Teléfono del hotel
+        hotel_email: Email del hotel
+        habitacion_nombre: Nombre/clave de la habitación
+        habitacion_descripcion: Descripción de la habitación
+        tipo_habitacion: Tipo de habitación
+        cliente_nombre: Nombre completo del cliente
+        cliente_rfc: RFC del cliente
+        cliente_identificacion: Documento de identificación
+        cliente_email: Email del cliente
+        precio_unitario: Precio unitario
+        periodicidad_nombre: Nombre de la periodicidad
+        precio_total: Precio total calculado
+        output_path: Ruta opcional para guardar el archivo
+
+    Returns:
+        BytesIO: Contenido del PDF en memoria
+    """
+    try:
+        data = QuotationData(
+            codigo_reservacion=codigo_reservacion,
+            fecha_entrada=fecha_entrada,
+            fecha_salida=fecha_salida,
+            duracion_dias=duracion_dias,
+            hotel_nombre=hotel_nombre,
+            hotel_direccion=hotel_direccion,
+            hotel_telefono=hotel_telefono,
+            hotel_email=hotel_email,
+            habitacion_nombre=habitacion_nombre,
+            habitacion_descripcion=habitacion_descripcion,
+            tipo_habitacion=tipo_habitacion,
+            cliente_nombre=cliente_nombre,
+            cliente_rfc=cliente_rfc,
+            cliente_identificacion=cliente_identificacion,
+            cliente_email=cliente_email,
+            precio_unitario=precio_unitario,
+            periodicidad_nombre=periodicidad_nombre,
+            precio_total=precio_total
         )
-        
-        elements.append(Table(
-            [[None]],
-            colWidths=[doc.width],
-            style=[('LINEABOVE', (0, 0), (-1, -1), 1, colors.HexColor('#E5E7EB'))]
-        ))
-        elements.append(Spacer(1, 0.5*cm))
-        elements.append(Paragraph(
-            "Este documento es una cotización generada automáticamente por InnPulse 360",
-            footer_style
-        ))
-        elements.append(Paragraph(
-            f"Para consultas, contacte a: {hotel_email if hotel_email else 'support@innpulse360.com'}",
-            footer_style
-        ))
-        
-        # Construir PDF
-        doc.build(elements)
-        
-        pdf_bytes.seek(0)
-        
+        pdf_bytes = BytesIO(quotation_renderer.render(data))
+
         # Si se proporciona output_path, guardar también en archivo
         if output_path:
             with open(output_path, 'wb') as f:
                 f.write(pdf_bytes.getvalue())
             logger.info(f"PDF generado y guardado en: {output_path}")
-            pdf_bytes.seek(0)  # Resetear posición para lectura
-        
+
         return pdf_bytes
-            
+
     except Exception as e:
         logger.error(f"Error al generar PDF: {str(e)}")
         raise
-
-
-